@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import argparse
+
+from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
+from lsst.ts.wep.bsc.ColumnarDatabase import ColumnarDatabase
+from lsst.ts.wep.Utility import FilterType
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Convert the bright star catalog (BSC) tables in the local "
+        "sqlite3 database to the memory-mapped column files."
+    )
+    parser.add_argument("dbAdress", type=str, help="Path of local sqlite3 database.")
+    parser.add_argument("dbDir", type=str, help="Directory of the column files.")
+    parser.add_argument(
+        "--filters",
+        type=str,
+        nargs="+",
+        default=["u", "g", "r", "i", "z", "y"],
+        help="Filters of the tables to convert. (default: u g r i z y)",
+    )
+    parser.add_argument(
+        "--numOfDeclBand",
+        type=int,
+        default=180,
+        help="Number of declination bands to partition the tables. (default: 180)",
+    )
+    args = parser.parse_args()
+
+    localDatabase = LocalDatabase()
+    localDatabase.connect(args.dbAdress)
+
+    os.makedirs(args.dbDir, exist_ok=True)
+    columnarDatabase = ColumnarDatabase()
+    columnarDatabase.connect(args.dbDir)
+
+    for filterName in args.filters:
+        filterType = FilterType.fromString(filterName)
+
+        stars = localDatabase.getAllStarData(filterType)
+        columnarDatabase.writeTable(
+            filterType,
+            stars.getId(),
+            stars.getRA(),
+            stars.getDecl(),
+            stars.getMag(filterType),
+            numOfDeclBand=args.numOfDeclBand,
+        )
+        print(
+            "Convert the table of %s with %d stars."
+            % (filterType.name, len(stars.getId()))
+        )
+
+    columnarDatabase.disconnect()
+    localDatabase.disconnect()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import argparse
+
+from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
+from lsst.ts.wep.Utility import FilterType
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Create the spatial index of the bright star catalog (BSC) "
+        "tables in the local sqlite3 database."
+    )
+    parser.add_argument("dbAdress", type=str, help="Path of local sqlite3 database.")
+    parser.add_argument(
+        "--filters",
+        type=str,
+        nargs="+",
+        default=["u", "g", "r", "i", "z", "y"],
+        help="Filters of the tables to index. (default: u g r i z y)",
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="Drop the spatial index instead."
+    )
+    args = parser.parse_args()
+
+    localDatabase = LocalDatabase()
+    localDatabase.connect(args.dbAdress)
+
+    for filterName in args.filters:
+        filterType = FilterType.fromString(filterName)
+        if args.drop:
+            localDatabase.dropSpatialIndex(filterType)
+            print("Drop the spatial index of %s." % filterType.name)
+        else:
+            localDatabase.createSpatialIndex(filterType)
+            print("Create the spatial index of %s." % filterType.name)
+
+    localDatabase.disconnect()
@@ -79,6 +79,53 @@ py::array_t<double> zernikeAnnularGrad(py::array_t<double> arrayZk,
                                        py::array_t<double> arrayY, double e,
                                        std::string axis);
 
+/**
+ * All derivatives of annular Zernike polynomials in one pass.
+ *
+ * @param[in] arrayZk  Coefficient of annular Zernike polynomials
+ * @param[in] arrayX  X coordinate on pupil plane
+ * @param[in] arrayY  Y coordinate on pupil plane
+ * @param[in] e  Obscuration value
+ * @param[in] withJacobian  Calculate the "1st" and "2nd" Jacobian elements
+ * @return the 5 x n array of "dx", "dy", "dx2", "dy2", "dxy" gradients, or
+ * 7 x n array with the "1st" and "2nd" Jacobian elements appended
+ */
+py::array_t<double> zernikeAnnularDerivatives(py::array_t<double> arrayZk,
+                                              py::array_t<double> arrayX,
+                                              py::array_t<double> arrayY,
+                                              double e, bool withJacobian);
+
+/**
+ * Annular Zernike polynomials evaluation for multiple sets of coefficients.
+ *
+ * @param[in] arrayZk  Coefficients of annular Zernike polynomials with the
+ * dimension of (number of sets, 28)
+ * @param[in] arrayX  X coordinate on pupil plane
+ * @param[in] arrayY  Y coordinate on pupil plane
+ * @param[in] e  Obscuration value
+ * @return the wavefront surfaces with the dimension of (number of sets, n)
+ */
+py::array_t<double> zernikeAnnularEvalBatch(
+    py::array_t<double, py::array::c_style | py::array::forcecast> arrayZk,
+    py::array_t<double> arrayX, py::array_t<double> arrayY, double e);
+
+/**
+ * Gradient of annular Zernike polynomials for multiple sets of coefficients.
+ *
+ * @param[in] arrayZk  Coefficients of annular Zernike polynomials with the
+ * dimension of (number of sets, 22)
+ * @param[in] arrayX  X coordinate on pupil plane
+ * @param[in] arrayY  Y coordinate on pupil plane
+ * @param[in] e  Obscuration value
+ * @param[in] axis  Axis of "dx", "dy", "dx2", "dy2", or "dxy"
+ * @return the integration elements of gradient with the dimension of (number
+ * of sets, n)
+ */
+py::array_t<double> zernikeAnnularGradBatch(
+    py::array_t<double, py::array::c_style | py::array::forcecast> arrayZk,
+    py::array_t<double> arrayX, py::array_t<double> arrayY, double e,
+    std::string axis);
+
 /**
  * Polynomial fit to 10th order in 2D (x, y dimensions).
  *
@@ -111,6 +158,12 @@ PYBIND11_MODULE(mathcwfs, m) {
           "Jacobian of annular Zernike polynomials.");
     m.def("zernikeAnnularGrad", &zernikeAnnularGrad,
           "Gradient of annular Zernike polynomials.");
+    m.def("zernikeAnnularDerivatives", &zernikeAnnularDerivatives,
+          "All derivatives of annular Zernike polynomials in one pass.");
+    m.def("zernikeAnnularEvalBatch", &zernikeAnnularEvalBatch,
+          "Annular Zernike polynomials evaluation for multiple coefficients.");
+    m.def("zernikeAnnularGradBatch", &zernikeAnnularGradBatch,
+          "Gradient of annular Zernike polynomials for multiple coefficients.");
     m.def("poly10_2D", &poly10_2D,
           "Polynomial fit to 10th order in 2D (x, y dimensions).");
     m.def("poly10Grad", &poly10Grad,
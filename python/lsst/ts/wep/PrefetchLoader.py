@@ -0,0 +1,148 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+
+class PrefetchLoader(object):
+    def __init__(self, loadFunc, keyList, depth=2):
+        """Initialize the PrefetchLoader class.
+
+        Load the data of keys in order with the background threads. The data
+        of next keys are loaded while the data of current key is processed by
+        the caller. At most "depth" data are loaded ahead, which limits the
+        peak memory. The data are loaded by the caller one by one without the
+        background threads if the depth is 0.
+
+        Parameters
+        ----------
+        loadFunc : callable
+            Function to load the data of key. It is called as loadFunc(key)
+            in the background threads.
+        keyList : list
+            List of keys to load in order.
+        depth : int, optional
+            Maximum number of data loaded ahead of the caller (should be >= 0).
+            (the default is 2.)
+
+        Raises
+        ------
+        ValueError
+            The depth is less than 0.
+        """
+
+        if int(depth) < 0:
+            raise ValueError("The depth of prefetch should be >= 0.")
+
+        self._loadFunc = loadFunc
+        self._keyList = list(keyList)
+        self._depth = int(depth)
+
+    def getDepth(self):
+        """Get the maximum number of data loaded ahead of the caller.
+
+        Returns
+        -------
+        int
+            Depth of prefetch.
+        """
+
+        return self._depth
+
+    def getKeyList(self):
+        """Get the list of keys to load.
+
+        Returns
+        -------
+        list
+            List of keys.
+        """
+
+        return self._keyList
+
+    def __iter__(self):
+        """Iterate the keys and loaded data in the order of keys.
+
+        The loading of the keys not reached yet is cancelled if the iteration
+        stops early. The exception in the loading is raised when the data is
+        reached. The loader does not keep the reference of data handed over
+        to the caller, so the data is released once the caller drops it.
+
+        Yields
+        ------
+        object
+            Key.
+        object
+            Loaded data of key.
+        """
+
+        if self._depth == 0:
+            for key in self._keyList:
+                yield key, self._loadFunc(key)
+            return
+
+        futures = deque()
+        executor = ThreadPoolExecutor(max_workers=self._depth)
+        try:
+            keyIter = iter(self._keyList)
+
+            # Fill the queue of prefetch
+            for key in islice(keyIter, self._depth):
+                futures.append((key, executor.submit(self._loadFunc, key)))
+
+            while futures:
+                # The future holding the data is dropped here
+                loaded = [self._popLoaded(futures)]
+
+                # Load the next key while the current data is processed
+                for nextKey in islice(keyIter, 1):
+                    futures.append((nextKey, executor.submit(self._loadFunc, nextKey)))
+
+                # Hand over the only reference of data to the caller. No local
+                # variable refers to the data while the iteration is suspended.
+                yield loaded.pop()
+
+        finally:
+            for key, future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _popLoaded(self, futures):
+        """Pop the first key and wait for its loaded data.
+
+        Parameters
+        ----------
+        futures : collections.deque
+            Queue of key and future of the loading.
+
+        Returns
+        -------
+        object
+            Key.
+        object
+            Loaded data of key.
+        """
+
+        key, future = futures.popleft()
+
+        return key, future.result()
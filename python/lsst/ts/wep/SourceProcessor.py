@@ -20,6 +20,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import copy
 import numpy as np
 
 from lsst.ts.wep.deblend.DeblendDonutFactory import DeblendDonutFactory
@@ -195,6 +196,31 @@ class SourceProcessor(object):
         if sensorName is not None:
             self.sensorName = sensorName
 
+    def copyWithSensor(self, sensorName):
+        """Copy the source processor and configure the copy with the sensor.
+
+        The setting and focal plane data are shared with the copy because
+        they are read-only. The sensor name and deblending algorithm are owned
+        by the copy, so the copies of different sensors can be used in
+        parallel.
+
+        Parameters
+        ----------
+        sensorName : str
+            Abbreviated sensor name.
+
+        Returns
+        -------
+        SourceProcessor
+            Copy of source processor.
+        """
+
+        sourProc = copy.copy(self)
+        sourProc.deblend = copy.deepcopy(self.deblend)
+        sourProc.config(sensorName=sensorName)
+
+        return sourProc
+
     def getEulerZinDeg(self, sensorName):
         """Get the Euler Z angle of sensor in degree.
 
@@ -633,39 +659,27 @@ class SourceProcessor(object):
         if index >= len(nbrStarId):
             raise ValueError("Index is higher than the length of star map.")
 
-        # Get the star SimobjID
+        # Get the table of bright star and neighboring stars with the
+        # magnitude of filter
         brightStar = list(nbrStarId)[index]
-        neighboringStar = nbrStarId[brightStar]
-
-        # Get all star SimobjID list
-        allStar = neighboringStar[:]
-        allStar.append(brightStar)
-
-        # Get the pixel positions
-        raDeclInPixel = nbrStar.getRaDeclInPixel()
-        allStarPosX = []
-        allStarPosY = []
-        for star in allStar:
-
-            # Get the star pixel position
-            starX, starY = raDeclInPixel[star]
-
-            # Transform the coordiante from DM team to camera team
-            starX, starY = self.dmXY2CamXY(starX, starY)
+        mappedFilterType = mapFilterRefToG(filterType)
+        starTable = nbrStar.getStarTable(brightStar, mappedFilterType)
 
-            allStarPosX.append(starX)
-            allStarPosY.append(starY)
+        # Transform the pixel positions from DM team to camera team
+        allStarPosX, allStarPosY = self.dmXY2CamXY(
+            starTable["raInPixel"], starTable["declInPixel"]
+        )
 
         # Check the ccd image dimenstion
         ccdD1, ccdD2 = ccdImg.shape
 
         # Define the range of image
         # Get min/ max of x, y
-        minX = int(min(allStarPosX))
-        maxX = int(max(allStarPosX))
+        minX = int(np.min(allStarPosX))
+        maxX = int(np.max(allStarPosX))
 
-        minY = int(min(allStarPosY))
-        maxY = int(max(allStarPosY))
+        minY = int(np.min(allStarPosY))
+        maxY = int(np.max(allStarPosY))
 
         # Get the central point
         cenX = int(np.mean([minX, maxX]))
@@ -699,21 +713,12 @@ class SourceProcessor(object):
 
         # Get the stars position in the new coordinate system
         # The final one is the bright star
-        allStarPosX = np.array(allStarPosX) - offsetX
-        allStarPosY = np.array(allStarPosY) - offsetY
-
-        # Get the star magnitude
-        mappedFilterType = mapFilterRefToG(filterType)
-        magList = nbrStar.getMag(mappedFilterType)
-
-        # Get the list of magnitude
-        magRatio = np.array([])
-        for star in allStar:
-            neiMag = magList[star]
-            magRatio = np.append(magRatio, neiMag)
+        allStarPosX = allStarPosX - offsetX
+        allStarPosY = allStarPosY - offsetY
 
         # Calculate the magnitude ratio
-        magRatio = 1 / 100 ** ((magRatio - magRatio[-1]) / 5.0)
+        starMag = starTable["mag"]
+        magRatio = 1 / 100 ** ((starMag - starMag[-1]) / 5.0)
 
         return singleSciNeiImg, allStarPosX, allStarPosY, magRatio, offsetX, offsetY
 
@@ -237,7 +237,7 @@ class SourceSelector(object):
             starMap.pop(detector)
             wavefrontSensors.pop(detector)
 
-    def getTargetStarByFile(self, skyFilePath, offset=0):
+    def getTargetStarByFile(self, skyFilePath, offset=0, keepTable=False):
         """Get the target stars by querying the star file.
 
         This function is only for the test. This shall be removed in the final.
@@ -250,6 +250,10 @@ class SourceSelector(object):
             Offset to the dimension of camera. If the detector dimension is 10
             (assume 1-D), the star's position between -offset and 10+offset
             will be seem to be on the detector. (the default is 0.)
+        keepTable : bool, optional
+            Keep the temporary table of sky data until the database is
+            disconnected. The table is reused in the next call with the same
+            sky file that is not modified. (the default is False.)
 
         Returns
         -------
@@ -276,12 +280,17 @@ class SourceSelector(object):
         mappedFilterType = mapFilterRefToG(filterType)
 
         # Write the sky data into the temporary table
-        self.db.createTable(mappedFilterType)
-        self.db.insertDataByFile(skyFilePath, mappedFilterType, skiprows=1)
+        if keepTable:
+            self.db.prepareTableByFile(skyFilePath, mappedFilterType, skiprows=1)
+        else:
+            self.db.createTable(mappedFilterType)
+            self.db.insertDataByFile(skyFilePath, mappedFilterType, skiprows=1)
+
         neighborStarMap, starMap, wavefrontSensors = self.getTargetStar(offset=offset)
 
         # Delete the table
-        self.db.deleteTable(mappedFilterType)
+        if not keepTable:
+            self.db.deleteTable(mappedFilterType)
 
         return neighborStarMap, starMap, wavefrontSensors
 
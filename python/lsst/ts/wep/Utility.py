@@ -104,6 +104,7 @@ class CamType(IntEnum):
 class BscDbType(IntEnum):
     LocalDb = 1
     LocalDbForStarFile = auto()
+    ColumnarDb = auto()
 
 
 class DefocalType(IntEnum):
@@ -436,7 +437,7 @@ def getBscDbType(bscDbType):
     Parameters
     ----------
     bscDbType : str
-        BSC database type to use (localDb or file).
+        BSC database type to use (localDb, file, or columnar).
 
     Returns
     -------
@@ -453,6 +454,8 @@ def getBscDbType(bscDbType):
         return BscDbType.LocalDb
     elif bscDbType == "file":
         return BscDbType.LocalDbForStarFile
+    elif bscDbType == "columnar":
+        return BscDbType.ColumnarDb
     else:
         raise ValueError("The bscDb (%s) is not supported." % bscDbType)
 
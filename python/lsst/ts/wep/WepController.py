@@ -20,11 +20,16 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import re
+import warnings
+import multiprocessing
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from lsst.ts.wep.ButlerWrapper import ButlerWrapper
 from lsst.ts.wep.DefocalImage import DefocalImage
 from lsst.ts.wep.DonutImage import DonutImage
+from lsst.ts.wep.PrefetchLoader import PrefetchLoader
 from lsst.ts.wep.Utility import (
     abbrevDectectorName,
     searchDonutPos,
@@ -81,6 +86,15 @@ class WepController(object):
         # Butler wrapper to use DM data butler
         self.butlerWrapper = None
 
+        # Number of processes to calculate the wavefront error
+        self._numOfProc = 1
+
+        # Worker processes to calculate the wavefront error and the key of
+        # number of processes and configuration of wavefront estimator that
+        # the workers are started with
+        self._wfErrExecutor = None
+        self._wfErrExecutorKey = None
+
     def getDataCollector(self):
         """Get the attribute of data collector.
 
@@ -138,6 +152,55 @@ class WepController(object):
 
         return self.wfEsti
 
+    def getNumOfProc(self):
+        """Get the number of processes to calculate the wavefront error.
+
+        Returns
+        -------
+        int
+            Number of processes.
+        """
+
+        return self._numOfProc
+
+    def setNumOfProc(self, numOfProc):
+        """Set the number of processes to calculate the wavefront error.
+
+        If the value is bigger than 1, the sensors in getDonutMap() are
+        distributed to the worker threads, and the donut pairs in calcWfErr()
+        are distributed to the worker processes. Each worker process holds a
+        copy of the wavefront estimator, and the worker processes are reused
+        in the following calls of calcWfErr() until close() is called.
+
+        Parameters
+        ----------
+        numOfProc : int
+            Number of processes (should be >= 1).
+
+        Raises
+        ------
+        ValueError
+            The number of processes is less than 1.
+        """
+
+        if int(numOfProc) < 1:
+            raise ValueError("The number of processes should be >= 1.")
+
+        self._numOfProc = int(numOfProc)
+
+    def close(self):
+        """Shut down the worker processes to calculate the wavefront error.
+
+        The worker processes are started again in the next call of
+        calcWfErr() if the number of processes is bigger than 1.
+        """
+
+        if self._wfErrExecutor is not None:
+            self._wfErrExecutor.shutdown(wait=True)
+
+        self._wfErrExecutor = None
+        self._wfErrExecutorKey = None
+
     def getButlerWrapper(self):
         """Get the attribute of butler wrapper.
 
@@ -219,35 +282,148 @@ class WepController(object):
         # Get the waveront image map
         wfsImgMap = dict()
         for sensorName in sensorNameList:
+            wfsImgMap[sensorName] = self._getDefocalImgByPistonDefocal(
+                sensorName, obsIdList, imageType
+            )
 
-            # Get the sensor name information
-            raft, sensor = self._getSensorInfo(sensorName)[0:2]
+        return wfsImgMap
 
-            # The intra/ extra defocal images are decided by obsId
-            imgList = []
-            for visit in obsIdList:
+    def _getDefocalImgByPistonDefocal(self, sensorName, obsIdList, imageType):
+        """Get the defocal image of single sensor that the defocal images are
+        by the pistion motion.
 
-                # Get the exposure image in ndarray
-                if imageType == ImageType.Amp:
-                    exp = self.butlerWrapper.getPostIsrCcd(int(visit), raft, sensor)
-                elif imageType == ImageType.Eimg:
-                    exp = self.butlerWrapper.getEimage(int(visit), raft, sensor)
-                else:
-                    raise ValueError("The %s is not supported." % imageType)
+        Parameters
+        ----------
+        sensorName : str
+            Sensor name.
+        obsIdList : list
+            Observation Id list in [intraObsId, extraObsId].
+        imageType : ImageType
+            Image type.
+
+        Returns
+        -------
+        DefocalImage
+            Defocal image on the camera coordinate.
+
+        Raises
+        ------
+        ValueError
+            The image type is not supported.
+        """
 
-                img = self.butlerWrapper.getImageData(exp)
+        # Get the sensor name information
+        raft, sensor = self._getSensorInfo(sensorName)[0:2]
 
-                # Transform the image in DM coordinate to camera coordinate.
-                camImg = self._transImgDmCoorToCamCoor(img)
+        # The intra/ extra defocal images are decided by obsId
+        imgList = []
+        for visit in obsIdList:
 
-                # Collect the image
-                imgList.append(camImg)
+            # Get the exposure image in ndarray
+            if imageType == ImageType.Amp:
+                exp = self.butlerWrapper.getPostIsrCcd(int(visit), raft, sensor)
+            elif imageType == ImageType.Eimg:
+                exp = self.butlerWrapper.getEimage(int(visit), raft, sensor)
+            else:
+                raise ValueError("The %s is not supported." % imageType)
 
-            wfsImgMap[sensorName] = DefocalImage(
-                intraImg=imgList[0], extraImg=imgList[1]
-            )
+            img = self.butlerWrapper.getImageData(exp)
 
-        return wfsImgMap
+            # Transform the image in DM coordinate to camera coordinate.
+            camImg = self._transImgDmCoorToCamCoor(img)
+
+            # Collect the image
+            imgList.append(camImg)
+
+        return DefocalImage(intraImg=imgList[0], extraImg=imgList[1])
+
+    def getPostIsrImgLoaderByPistonDefocal(
+        self, sensorNameList, obsIdList, prefetchDepth=2
+    ):
+        """Get the loader of post ISR images that the defocal images are by
+        the pistion motion.
+
+        The images of next sensors are read by the background threads while
+        the images of current sensor are processed.
+
+        Parameters
+        ----------
+        sensorNameList : list
+            List of sensor name.
+        obsIdList : list
+            Observation Id list in [intraObsId, extraObsId].
+        prefetchDepth : int, optional
+            Maximum number of sensors read ahead. (the default is 2.)
+
+        Returns
+        -------
+        PrefetchLoader
+            Loader to iterate the sensor name and defocal image on the camera
+            coordinate (type: DefocalImage) in the order of sensor name list.
+        """
+
+        return self._getImgLoaderByPistonDefocal(
+            sensorNameList, obsIdList, ImageType.Amp, prefetchDepth
+        )
+
+    def getEimgLoaderByPistonDefocal(self, sensorNameList, obsIdList, prefetchDepth=2):
+        """Get the loader of eimages that the defocal images are by the
+        pistion motion.
+
+        The images of next sensors are read by the background threads while
+        the images of current sensor are processed.
+
+        Parameters
+        ----------
+        sensorNameList : list
+            List of sensor name.
+        obsIdList : list
+            Observation Id list in [intraObsId, extraObsId].
+        prefetchDepth : int, optional
+            Maximum number of sensors read ahead. (the default is 2.)
+
+        Returns
+        -------
+        PrefetchLoader
+            Loader to iterate the sensor name and defocal image on the camera
+            coordinate (type: DefocalImage) in the order of sensor name list.
+        """
+
+        return self._getImgLoaderByPistonDefocal(
+            sensorNameList, obsIdList, ImageType.Eimg, prefetchDepth
+        )
+
+    def _getImgLoaderByPistonDefocal(
+        self, sensorNameList, obsIdList, imageType, prefetchDepth
+    ):
+        """Get the image loader that the defocal images are by the pistion
+        motion.
+
+        Parameters
+        ----------
+        sensorNameList : list
+            List of sensor name.
+        obsIdList : list
+            Observation Id list in [intraObsId, extraObsId].
+        imageType : ImageType
+            Image type.
+        prefetchDepth : int
+            Maximum number of sensors read ahead.
+
+        Returns
+        -------
+        PrefetchLoader
+            Loader to iterate the sensor name and defocal image on the camera
+            coordinate (type: DefocalImage) in the order of sensor name list.
+        """
+
+        return PrefetchLoader(
+            lambda sensorName: self._getDefocalImgByPistonDefocal(
+                sensorName, obsIdList, imageType
+            ),
+            sensorNameList,
+            depth=prefetchDepth,
+        )
 
     def _getSensorInfo(self, sensorName):
         """Get the sensor information.
@@ -368,144 +544,194 @@ class WepController(object):
             list[DonutImage]).
         """
 
+        # Get the donut images on each sensor
+        sensorNameList = list(neighborStarMap.keys())
+        numOfWorkers = min(self._numOfProc, len(sensorNameList))
+        if numOfWorkers > 1:
+            # Each sensor uses its own copy of source processor that shares
+            # the focal plane data
+            with ThreadPoolExecutor(max_workers=numOfWorkers) as executor:
+                futures = [
+                    executor.submit(
+                        self._getDonutListOnSensor,
+                        self.sourProc.copyWithSensor(abbrevDectectorName(sensorName)),
+                        sensorName,
+                        neighborStarMap[sensorName],
+                        wfsImgMap[sensorName],
+                        filterType,
+                        doDeblending,
+                    )
+                    for sensorName in sensorNameList
+                ]
+                donutLists = [future.result() for future in futures]
+        else:
+            donutLists = []
+            for sensorName in sensorNameList:
+
+                # Configure the source processor
+                self.sourProc.config(sensorName=abbrevDectectorName(sensorName))
+
+                donutLists.append(
+                    self._getDonutListOnSensor(
+                        self.sourProc,
+                        sensorName,
+                        neighborStarMap[sensorName],
+                        wfsImgMap[sensorName],
+                        filterType,
+                        doDeblending,
+                    )
+                )
+
+        # Keep the sensors with the donut images in the order of input
         donutMap = dict()
-        for sensorName, nbrStar in neighborStarMap.items():
-
-            # Get the abbraviated sensor name
-            abbrevName = abbrevDectectorName(sensorName)
-
-            # Configure the source processor
-            self.sourProc.config(sensorName=abbrevName)
-
-            # Get the defocal images: [intra, extra]
-            defocalImgList = [
-                wfsImgMap[sensorName].getIntraImg(),
-                wfsImgMap[sensorName].getExtraImg(),
-            ]
-
-            # Get the bright star id list on specific sensor
-            brightStarIdList = list(nbrStar.getId())
-            for starIdIdx in range(len(brightStarIdList)):
-
-                # Get the single star map
-                for jj in range(len(defocalImgList)):
-
-                    ccdImg = defocalImgList[jj]
-
-                    # Get the segment of image
-                    if ccdImg is not None:
-                        (
-                            singleSciNeiImg,
-                            allStarPosX,
-                            allStarPosY,
-                            magRatio,
-                            offsetX,
-                            offsetY,
-                        ) = self.sourProc.getSingleTargetImage(
-                            ccdImg, nbrStar, starIdIdx, filterType
-                        )
+        for sensorName, donutList in zip(sensorNameList, donutLists):
+            if len(donutList) != 0:
+                donutMap[sensorName] = donutList
+
+        return donutMap
+
+    def _getDonutListOnSensor(
+        self, sourProc, sensorName, nbrStar, wfsImg, filterType, doDeblending
+    ):
+        """Get the donut images on single wavefront sensor (WFS).
 
-                        # Only consider the single donut if no deblending
-                        if (not doDeblending) and (len(magRatio) != 1):
-                            continue
+        Parameters
+        ----------
+        sourProc : SourceProcessor
+            Source processor configured with the sensor.
+        sensorName : str
+            Sensor name.
+        nbrStar : NbrStar
+            Information of neighboring stars and candidate stars on the
+            sensor.
+        wfsImg : DefocalImage
+            Post-ISR defocal image on the camera coordinate.
+        filterType : FilterType
+            Filter type.
+        doDeblending : bool
+            Do the deblending or not. If False, only consider the single donut
+            based on the bright star catalog.
 
-                        # Get the single donut/ deblended image
-                        if (len(magRatio) == 1) or (not doDeblending):
-                            imgDeblend = singleSciNeiImg
+        Returns
+        -------
+        list[DonutImage]
+            List of donut images.
+        """
 
-                            if len(magRatio) == 1:
-                                realcx, realcy = searchDonutPos(imgDeblend)
-                            else:
-                                realcx = allStarPosX[-1]
-                                realcy = allStarPosY[-1]
+        # Get the abbraviated sensor name
+        abbrevName = abbrevDectectorName(sensorName)
 
-                        # Do the deblending or not
-                        elif len(magRatio) == 2 and doDeblending:
-                            imgDeblend, realcx, realcy = self.sourProc.doDeblending(
-                                singleSciNeiImg, allStarPosX, allStarPosY, magRatio
-                            )
-                            # Update the magnitude ratio
-                            magRatio = [1]
+        donutList = []
 
-                        else:
-                            continue
+        # Get the defocal images: [intra, extra]
+        defocalImgList = [wfsImg.getIntraImg(), wfsImg.getExtraImg()]
+
+        # Get the bright star id list on specific sensor
+        brightStarIdList = list(nbrStar.getId())
+        for starIdIdx in range(len(brightStarIdList)):
+
+            # Get the single star map
+            for jj in range(len(defocalImgList)):
+
+                ccdImg = defocalImgList[jj]
+
+                # Get the segment of image
+                if ccdImg is not None:
+                    (
+                        singleSciNeiImg,
+                        allStarPosX,
+                        allStarPosY,
+                        magRatio,
+                        offsetX,
+                        offsetY,
+                    ) = sourProc.getSingleTargetImage(
+                        ccdImg, nbrStar, starIdIdx, filterType
+                    )
+
+                    # Only consider the single donut if no deblending
+                    if (not doDeblending) and (len(magRatio) != 1):
+                        continue
+
+                    # Get the single donut/ deblended image
+                    if (len(magRatio) == 1) or (not doDeblending):
+                        imgDeblend = singleSciNeiImg
 
-                        # Extract the image
                         if len(magRatio) == 1:
-                            sizeInPix = self.wfEsti.getSizeInPix()
-                            x0 = np.floor(realcx - sizeInPix / 2).astype("int")
-                            y0 = np.floor(realcy - sizeInPix / 2).astype("int")
-                            imgDeblend = imgDeblend[
-                                y0 : y0 + sizeInPix, x0 : x0 + sizeInPix
-                            ]
-
-                        # Rotate the image if the sensor is the corner
-                        # wavefront sensor
-                        if sensorName in self.CORNER_WFS_LIST:
-
-                            # Get the Euler angle
-                            eulerZangle = round(
-                                self.sourProc.getEulerZinDeg(abbrevName)
-                            )
-
-                            # Change the sign if the angle < 0
-                            while eulerZangle < 0:
-                                eulerZangle += 360
-
-                            # Do the rotation of matrix
-                            numOfRot90 = eulerZangle // 90
-                            imgDeblend = np.flipud(
-                                np.rot90(np.flipud(imgDeblend), numOfRot90)
-                            )
-
-                        # Put the deblended image into the donut map
-                        if sensorName not in donutMap.keys():
-                            donutMap[sensorName] = []
-
-                        # Check the donut exists in the list or not
-                        starId = brightStarIdList[starIdIdx]
-                        donutIndex = self._searchDonutListId(
-                            donutMap[sensorName], starId
+                            realcx, realcy = searchDonutPos(imgDeblend)
+                        else:
+                            realcx = allStarPosX[-1]
+                            realcy = allStarPosY[-1]
+
+                    # Do the deblending or not
+                    elif len(magRatio) == 2 and doDeblending:
+                        imgDeblend, realcx, realcy = sourProc.doDeblending(
+                            singleSciNeiImg, allStarPosX, allStarPosY, magRatio
                         )
+                        # Update the magnitude ratio
+                        magRatio = [1]
 
-                        # Create the donut object and put into the list if it
-                        # is needed
-                        if donutIndex < 0:
-
-                            # Calculate the field X, Y
-                            pixelX = realcx + offsetX
-                            pixelY = realcy + offsetY
-                            fieldX, fieldY = self.sourProc.camXYtoFieldXY(
-                                pixelX, pixelY
-                            )
-
-                            # Instantiate the DonutImage class
-                            donutImg = DonutImage(
-                                starId, pixelX, pixelY, fieldX, fieldY
-                            )
-                            donutMap[sensorName].append(donutImg)
-
-                            # Search for the donut index again
-                            donutIndex = self._searchDonutListId(
-                                donutMap[sensorName], starId
-                            )
-
-                        # Get the donut image list
-                        donutList = donutMap[sensorName]
-
-                        # Take the absolute value for images, which might
-                        # contain the negative value after the ISR correction.
-                        # This happens for the amplifier images.
-                        imgDeblend = np.abs(imgDeblend)
-
-                        # Set the intra focal image
-                        if jj == 0:
-                            donutList[donutIndex].setImg(intraImg=imgDeblend)
-                        # Set the extra focal image
-                        elif jj == 1:
-                            donutList[donutIndex].setImg(extraImg=imgDeblend)
+                    else:
+                        continue
 
-        return donutMap
+                    # Extract the image
+                    if len(magRatio) == 1:
+                        sizeInPix = self.wfEsti.getSizeInPix()
+                        x0 = np.floor(realcx - sizeInPix / 2).astype("int")
+                        y0 = np.floor(realcy - sizeInPix / 2).astype("int")
+                        imgDeblend = imgDeblend[
+                            y0 : y0 + sizeInPix, x0 : x0 + sizeInPix
+                        ]
+
+                    # Rotate the image if the sensor is the corner
+                    # wavefront sensor
+                    if sensorName in self.CORNER_WFS_LIST:
+
+                        # Get the Euler angle
+                        eulerZangle = round(sourProc.getEulerZinDeg(abbrevName))
+
+                        # Change the sign if the angle < 0
+                        while eulerZangle < 0:
+                            eulerZangle += 360
+
+                        # Do the rotation of matrix
+                        numOfRot90 = eulerZangle // 90
+                        imgDeblend = np.flipud(
+                            np.rot90(np.flipud(imgDeblend), numOfRot90)
+                        )
+
+                    # Check the donut exists in the list or not
+                    starId = brightStarIdList[starIdIdx]
+                    donutIndex = self._searchDonutListId(donutList, starId)
+
+                    # Create the donut object and put into the list if it
+                    # is needed
+                    if donutIndex < 0:
+
+                        # Calculate the field X, Y
+                        pixelX = realcx + offsetX
+                        pixelY = realcy + offsetY
+                        fieldX, fieldY = sourProc.camXYtoFieldXY(pixelX, pixelY)
+
+                        # Instantiate the DonutImage class
+                        donutImg = DonutImage(starId, pixelX, pixelY, fieldX, fieldY)
+                        donutList.append(donutImg)
+
+                        # Search for the donut index again
+                        donutIndex = self._searchDonutListId(donutList, starId)
+
+                    # Take the absolute value for images, which might
+                    # contain the negative value after the ISR correction.
+                    # This happens for the amplifier images.
+                    imgDeblend = np.abs(imgDeblend)
+
+                    # Set the intra focal image
+                    if jj == 0:
+                        donutList[donutIndex].setImg(intraImg=imgDeblend)
+                    # Set the extra focal image
+                    elif jj == 1:
+                        donutList[donutIndex].setImg(extraImg=imgDeblend)
+
+        return donutList
 
     def _searchDonutListId(self, donutList, starId):
         """Search the bright star ID in the donut list.
@@ -547,6 +773,8 @@ class WepController(object):
             Donut image map with calculated wavefront error.
         """
 
+        # Collect the pairs of intra- and extra-focal donuts
+        donutPairs = []
         for sensorName, donutList in donutMap.items():
 
             for ii in range(len(donutList)):
@@ -576,29 +804,159 @@ class WepController(object):
                 else:
                     intraDonut = extraDonut = donutList[ii]
 
-                # Calculate the wavefront error
+                donutPairs.append((intraDonut, extraDonut))
 
-                # Get the field X, Y position
-                intraFieldXY = intraDonut.getFieldPos()
-                extraFieldXY = extraDonut.getFieldPos()
+        # Get the field X, Y positions and defocal images
+        pairInputs = [
+            (
+                intraDonut.getIntraImg(),
+                extraDonut.getExtraImg(),
+                intraDonut.getFieldPos(),
+                extraDonut.getFieldPos(),
+            )
+            for intraDonut, extraDonut in donutPairs
+        ]
 
-                # Get the defocal images
-                intraImg = intraDonut.getIntraImg()
-                extraImg = extraDonut.getExtraImg()
+        # Calculate the wavefront errors
+        zer4UpNmList = self._calcWfErrOfPairs(pairInputs)
 
-                # Calculate the wavefront error
-                zer4UpNm = self._calcSglWfErr(
-                    intraImg, extraImg, intraFieldXY, extraFieldXY
-                )
-
-                # Put the value to the donut image
-                intraDonut.setWfErr(zer4UpNm)
-                extraDonut.setWfErr(zer4UpNm)
+        # Put the values to the donut images in the order of pairs
+        for (intraDonut, extraDonut), zer4UpNm in zip(donutPairs, zer4UpNmList):
+            intraDonut.setWfErr(zer4UpNm)
+            extraDonut.setWfErr(zer4UpNm)
 
         # Intentionally to expose this return value to show the input,
         # donutMap, has been modified.
         return donutMap
 
+    def _calcWfErrOfPairs(self, pairInputs):
+        """Calculate the wavefront errors of donut pairs.
+
+        The pairs are calculated in the worker processes if the number of
+        processes is bigger than 1. The calculation falls back to the serial
+        one if the worker processes are not available.
+
+        Parameters
+        ----------
+        pairInputs : list[tuple]
+            Inputs of _calcSglWfErr() of each pair: (intraImg, extraImg,
+            intraFieldXY, extraFieldXY).
+
+        Returns
+        -------
+        list[numpy.ndarray]
+            Coefficients of Zernike polynomials (z4 - z22) in nm of each pair
+            in the same order as the inputs.
+        """
+
+        numOfWorkers = min(self._numOfProc, len(pairInputs))
+        if numOfWorkers > 1:
+            try:
+                return self._calcWfErrOfPairsInWorkers(pairInputs, numOfWorkers)
+            except (OSError, BrokenProcessPool) as err:
+                self.close()
+                warnings.warn(
+                    "Fall back to the serial calculation of wavefront error: %s." % err,
+                    category=RuntimeWarning,
+                )
+
+        return [self._calcSglWfErr(*pairInput) for pairInput in pairInputs]
+
+    def _calcWfErrOfPairsInWorkers(self, pairInputs, numOfWorkers):
+        """Calculate the wavefront errors of donut pairs in the worker
+        processes.
+
+        Each worker gets a copy of the wavefront estimator when it starts and
+        reuses it for all pairs scheduled to it in this and the following
+        calls. The warm caches of the estimator are kept in the workers.
+
+        Parameters
+        ----------
+        pairInputs : list[tuple]
+            Inputs of _calcSglWfErr() of each pair: (intraImg, extraImg,
+            intraFieldXY, extraFieldXY).
+        numOfWorkers : int
+            Number of worker processes.
+
+        Returns
+        -------
+        list[numpy.ndarray]
+            Coefficients of Zernike polynomials (z4 - z22) in nm of each pair
+            in the same order as the inputs.
+        """
+
+        # Schedule several chunks to each worker to balance the load
+        chunkSize = max(1, len(pairInputs) // (4 * numOfWorkers))
+
+        executor = self._getWfErrExecutor()
+        zer4UpNmList = list(
+            executor.map(_calcSglWfErrInWorker, pairInputs, chunksize=chunkSize)
+        )
+
+        return zer4UpNmList
+
+    def _getWfErrExecutor(self):
+        """Get the worker processes to calculate the wavefront error.
+
+        The worker processes are started when they are used for the first
+        time, and restarted if the number of processes or the configuration of
+        wavefront estimator is changed. The workers are spawned instead of
+        forked, because the images may be read by other threads (e.g. the
+        PrefetchLoader) at the same time and the forked process may inherit
+        the locks held by them.
+
+        Returns
+        -------
+        concurrent.futures.ProcessPoolExecutor
+            Worker processes.
+        """
+
+        key = (self._numOfProc, self._getWfEstiConfig())
+        if key != self._wfErrExecutorKey:
+            self.close()
+
+        if self._wfErrExecutor is None:
+            self._wfErrExecutor = ProcessPoolExecutor(
+                max_workers=self._numOfProc,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initWfEstiInWorker,
+                initargs=(self.wfEsti,),
+            )
+            self._wfErrExecutorKey = key
+
+        return self._wfErrExecutor
+
+    def _getWfEstiConfig(self):
+        """Get the configuration of wavefront estimator copied to the worker
+        processes.
+
+        Returns
+        -------
+        tuple
+            Configuration of wavefront estimator.
+        """
+
+        inst = self.wfEsti.getInst()
+        algo = self.wfEsti.getAlgo()
+
+        warmStartZk = algo.getWarmStartZk()
+        if warmStartZk is not None:
+            warmStartZk = (tuple(warmStartZk), tuple(algo.getCompSequence()))
+
+        return (
+            id(self.wfEsti),
+            self.wfEsti.getOptModel(),
+            self.wfEsti.getSizeInPix(),
+            self.wfEsti.centroidFindType,
+            inst.getInstFilePath(),
+            inst.getAnnDefocalDisInMm(),
+            algo.algoParamFile.getFilePath(),
+            repr(algo.algoParamFile.getContent()),
+            algo.getDebugLevel(),
+            algo.getNumOfFftThreads(),
+            warmStartZk,
+        )
+
     def _calcSglWfErr(self, intraImg, extraImg, intraFieldXY, extraFieldXY):
         """Calculate the wavefront error in annular Zernike polynomials
         (z4-z22) for single donut.
@@ -620,17 +978,9 @@ class WepController(object):
             Coefficients of Zernike polynomials (z4 - z22) in nm.
         """
 
-        # Set the images
-        self.wfEsti.setImg(intraFieldXY, DefocalType.Intra, image=intraImg)
-        self.wfEsti.setImg(extraFieldXY, DefocalType.Extra, image=extraImg)
-
-        # Reset the wavefront estimator
-        self.wfEsti.reset()
-
-        # Calculate the wavefront error
-        zer4UpNm = self.wfEsti.calWfsErr()
-
-        return zer4UpNm
+        return _calcSglWfErrByWfEsti(
+            self.wfEsti, intraImg, extraImg, intraFieldXY, extraFieldXY
+        )
 
     def calcAvgWfErrOnSglCcd(self, donutList):
         """Calculate the average of wavefront error on single CCD.
@@ -823,13 +1173,21 @@ class WepController(object):
         offAxisCorrOrder = algo.getOffAxisPolyOrder()
 
         inst = self.wfEsti.getInst()
-        img.setOffAxisCorr(inst, offAxisCorrOrder)
+        img.setOffAxisCorr(
+            inst, offAxisCorrOrder, lookupTable=algo.getOffAxisLookupTable()
+        )
 
         # Do the image cocenter
         img.imageCoCenter(inst)
 
         # Do the compensation/ projection
-        img.compensate(inst, algo, zcCol, self.wfEsti.getOptModel())
+        img.compensate(
+            inst,
+            algo,
+            zcCol,
+            self.wfEsti.getOptModel(),
+            geometryCache=algo.getGeometryCache(),
+        )
 
         # Return the projected image
         return img.getImg()
@@ -876,5 +1234,76 @@ class WepController(object):
         return stackImg
 
 
+def _calcSglWfErrByWfEsti(wfEsti, intraImg, extraImg, intraFieldXY, extraFieldXY):
+    """Calculate the wavefront error in annular Zernike polynomials (z4-z22)
+    for single donut by the wavefront estimator.
+
+    Parameters
+    ----------
+    wfEsti : WfEstimator
+        Wavefront estimator.
+    intraImg : numpy.ndarray
+        Intra-focal donut image.
+    extraImg : numpy.ndarray
+        Extra-focal donut image.
+    intraFieldXY : tuple
+        Field x, y in degree of intra-focal donut image.
+    extraFieldXY : tuple
+        Field x, y in degree of extra-focal donut image.
+
+    Returns
+    -------
+    numpy.ndarray
+        Coefficients of Zernike polynomials (z4 - z22) in nm.
+    """
+
+    # Set the images
+    wfEsti.setImg(intraFieldXY, DefocalType.Intra, image=intraImg)
+    wfEsti.setImg(extraFieldXY, DefocalType.Extra, image=extraImg)
+
+    # Reset the wavefront estimator
+    wfEsti.reset()
+
+    # Calculate the wavefront error
+    zer4UpNm = wfEsti.calWfsErr()
+
+    return zer4UpNm
+
+
+# Wavefront estimator of the worker process
+_wfEstiInWorker = None
+
+
+def _initWfEstiInWorker(wfEsti):
+    """Initialize the wavefront estimator of the worker process.
+
+    Parameters
+    ----------
+    wfEsti : WfEstimator
+        Wavefront estimator to copy.
+    """
+
+    global _wfEstiInWorker
+    _wfEstiInWorker = wfEsti
+
+
+def _calcSglWfErrInWorker(pairInput):
+    """Calculate the wavefront error for single donut in the worker process.
+
+    Parameters
+    ----------
+    pairInput : tuple
+        Inputs of WepController._calcSglWfErr(): (intraImg, extraImg,
+        intraFieldXY, extraFieldXY).
+
+    Returns
+    -------
+    numpy.ndarray
+        Coefficients of Zernike polynomials (z4 - z22) in nm.
+    """
+
+    return _calcSglWfErrByWfEsti(_wfEstiInWorker, *pairInput)
+
+
 if __name__ == "__main__":
     pass
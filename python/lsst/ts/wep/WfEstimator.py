@@ -19,6 +19,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import numpy as np
+
 from lsst.ts.wep.cwfs.Instrument import Instrument
 from lsst.ts.wep.cwfs.Algorithm import Algorithm
 from lsst.ts.wep.cwfs.CompensableImage import CompensableImage
@@ -45,6 +47,7 @@ class WfEstimator(object):
 
         self.opticalModel = ""
         self.sizeInPix = 0
+        self.centroidFindType = CentroidFindType.RandomWalk
 
     def getAlgo(self):
         """Get the algorithm object.
@@ -181,10 +184,36 @@ class WfEstimator(object):
         self.algo.config(solver, self.inst, debugLevel=debugLevel)
 
         # Reset the centroid find algorithm if not the default one
+        self.centroidFindType = centroidFindType
         if centroidFindType != CentroidFindType.RandomWalk:
             self.imgIntra = CompensableImage(centroidFindType=centroidFindType)
             self.imgExtra = CompensableImage(centroidFindType=centroidFindType)
 
+    def setWarmStart(self, zer4UpNm, compSequence=None):
+        """Set the initial coefficients of Zernike polynomials to warm-start
+        the calculation of wavefront error.
+
+        The warm start is kept for the following calculations until
+        resetWarmStart() is called.
+
+        Parameters
+        ----------
+        zer4UpNm : numpy.ndarray or list
+            Initial coefficients of Zernike polynomials (z4 - z22) in nm. For
+            example, the previous estimation of the same sensor.
+        compSequence : numpy.ndarray or list, optional
+            Compensated sequence of Zernike order for each iteration. If None,
+            the setting in the algorithm configuration file will be used. (the
+            default is None.)
+        """
+
+        self.algo.setWarmStart(zer4UpNm, compSequence=compSequence)
+
+    def resetWarmStart(self):
+        """Reset the warm start of calculation of wavefront error."""
+
+        self.algo.resetWarmStart()
+
     def setImg(self, fieldXY, defocalType, image=None, imageFile=None):
         """Set the wavefront image.
 
@@ -251,6 +280,87 @@ class WfEstimator(object):
 
         return self.algo.getZer4UpInNm()
 
+    def calWfsErrBatch(
+        self, intraImgs, extraImgs, intraFieldXYs, extraFieldXYs=None, tol=1e-3
+    ):
+        """Calculate the wavefront errors of pairs of donut images in a batch.
+
+        The images set by setImg() are not used.
+
+        Parameters
+        ----------
+        intraImgs : numpy.ndarray or list[numpy.ndarray]
+            Intra-focal donut images with the dimension of (number of pairs,
+            sizeInPix, sizeInPix).
+        extraImgs : numpy.ndarray or list[numpy.ndarray]
+            Extra-focal donut images paired with intraImgs.
+        intraFieldXYs : numpy.ndarray or list[tuple]
+            Positions of intra-focal donuts on the focal plane in degree with
+            the dimension of (number of pairs, 2).
+        extraFieldXYs : numpy.ndarray or list[tuple], optional
+            Positions of extra-focal donuts on the focal plane in degree. If
+            None, intraFieldXYs will be used. (the default is None.)
+        tol : float, optional
+            Tolerance of difference of coefficients of Zernike polynomials
+            compared with the previous iteration. (the default is 1e-3.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of Zernike polynomials (z4 - z22) with the dimension
+            of (number of pairs, 19).
+
+        Raises
+        ------
+        ValueError
+            The numbers of images and field positions are different.
+        RuntimeError
+            Input image shape is wrong.
+        """
+
+        if extraFieldXYs is None:
+            extraFieldXYs = intraFieldXYs
+
+        numOfPairs = len(intraImgs)
+        if (
+            len(extraImgs) != numOfPairs
+            or len(intraFieldXYs) != numOfPairs
+            or len(extraFieldXYs) != numOfPairs
+        ):
+            raise ValueError("The numbers of images and field positions are different.")
+
+        # Set the images of pairs
+        intraCompImgs = []
+        extraCompImgs = []
+        for intraImg, extraImg, intraFieldXY, extraFieldXY in zip(
+            intraImgs, extraImgs, intraFieldXYs, extraFieldXYs
+        ):
+
+            for img in (intraImg, extraImg):
+                d1, d2 = np.shape(img)
+                if (d1 != self.sizeInPix) or (d2 != self.sizeInPix):
+                    raise RuntimeError(
+                        "Input image shape is (%d, %d), not required (%d, %d)"
+                        % (d1, d2, self.sizeInPix, self.sizeInPix)
+                    )
+
+            imgIntra = CompensableImage(centroidFindType=self.centroidFindType)
+            imgIntra.setImg(
+                tuple(intraFieldXY), DefocalType.Intra, image=np.array(intraImg)
+            )
+            intraCompImgs.append(imgIntra)
+
+            imgExtra = CompensableImage(centroidFindType=self.centroidFindType)
+            imgExtra.setImg(
+                tuple(extraFieldXY), DefocalType.Extra, image=np.array(extraImg)
+            )
+            extraCompImgs.append(imgExtra)
+
+        # Calculate the wavefront errors
+        return self.algo.runItBatch(
+            intraCompImgs, extraCompImgs, self.opticalModel, tol=tol
+        )
+
 
 if __name__ == "__main__":
     pass
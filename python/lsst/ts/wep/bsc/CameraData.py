@@ -23,7 +23,6 @@ import numpy as np
 import copy
 
 from lsst.ts.wep.bsc.WcsSol import WcsSol
-from lsst.ts.wep.Utility import FilterType
 
 
 class CameraData(object):
@@ -227,56 +226,20 @@ class CameraData(object):
             The stars on the detector.
         """
 
-        # Do the shallow copy
-        starsOnDet = copy.copy(stars)
-
-        # Get the index that will keep the data
-        starsRaInPixel = starsOnDet.getRaInPixel()
-        starsDeclInPixel = starsOnDet.getDeclInPixel()
-        ccdDim = self.getCcdDim(starsOnDet.getDetector())
+        # Get the mask of stars on the detector
+        starsRaInPixel = stars.getRaInPixel()
+        starsDeclInPixel = stars.getDeclInPixel()
+        ccdDim = self.getCcdDim(stars.getDetector())
 
-        keep = []
-        for ii in range(len(starsRaInPixel)):
-            if (
-                -offset <= starsRaInPixel[ii] <= ccdDim[0] + offset
-                and -offset <= starsDeclInPixel[ii] <= ccdDim[1] + offset
-            ):
-                keep.append(ii)
+        keep = (
+            (starsRaInPixel >= -offset)
+            & (starsRaInPixel <= ccdDim[0] + offset)
+            & (starsDeclInPixel >= -offset)
+            & (starsDeclInPixel <= ccdDim[1] + offset)
+        )
 
         # Remove the stars that are not on the detector
-        starsOnDet.setId(self._getKeepItem(starsOnDet.getId(), keep))
-        starsOnDet.setRA(self._getKeepItem(starsOnDet.getRA(), keep))
-        starsOnDet.setDecl(self._getKeepItem(starsOnDet.getDecl(), keep))
-        starsOnDet.setRaInPixel(self._getKeepItem(starsRaInPixel, keep))
-        starsOnDet.setDeclInPixel(self._getKeepItem(starsDeclInPixel, keep))
-
-        for filterType in FilterType:
-
-            if filterType != FilterType.REF:
-                magArray = starsOnDet.getMag(filterType)
-
-                if len(magArray) != 0:
-                    starsOnDet.setMag(filterType, self._getKeepItem(magArray, keep))
-
-        return starsOnDet
-
-    def _getKeepItem(self, valArray, keep):
-        """Get the keep items in array.
-
-        Parameters
-        ----------
-        valArray : list or 1-D numpy.ndarray
-            Value array.
-        keep : list[int]
-            List of keep index.
-
-        Returns
-        -------
-        list
-            The array that has only the keep values.
-        """
-
-        return [valArray[idx] for idx in keep]
+        return stars.getSubset(keep)
 
     def getWavefrontSensor(self):
         """
@@ -0,0 +1,353 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+
+from lsst.ts.wep.bsc.DefaultDatabase import DefaultDatabase
+from lsst.ts.wep.bsc.StarData import StarData
+from lsst.ts.wep.Utility import FilterType
+
+
+class ColumnarDatabase(DefaultDatabase):
+
+    PRE_TABLE_NAME = "BrightStarCatalog"
+
+    # Columns of table
+    COLUMN_LIST = ("id", "ra", "decl", "mag", "bandStart")
+
+    def __init__(self):
+        """Initialize the columnar database class.
+
+        The table of each filter is stored as the numpy column files of star
+        Id, ra, decl, and magnitude in the directory. The stars are sorted by
+        the declination band and then by the ra in each band. The files are
+        memory-mapped, so the query is the binary search of ra in the bands
+        and the slicing of columns.
+        """
+
+        super(ColumnarDatabase, self).__init__()
+
+        self.dbDir = ""
+
+        # Memory-mapped columns of the table of each filter
+        self._tables = dict()
+
+    def connect(self, dbDir):
+        """Connect the database.
+
+        Parameters
+        ----------
+        dbDir : str
+            Directory of the column files.
+
+        Raises
+        ------
+        ValueError
+            The directory does not exist.
+        """
+
+        if not os.path.isdir(dbDir):
+            raise ValueError("The directory (%s) does not exist." % dbDir)
+
+        self.dbDir = dbDir
+        self._tables.clear()
+
+    def disconnect(self):
+        """Disconnect the database."""
+
+        self.dbDir = ""
+        self._tables.clear()
+
+    def hasTable(self, filterType):
+        """The database has the table of filter or not.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        bool
+            True if the database has the table.
+        """
+
+        return all(
+            os.path.exists(self._getColumnFilePath(filterType, column))
+            for column in self.COLUMN_LIST
+        )
+
+    def writeTable(self, filterType, starId, ra, decl, mag, numOfDeclBand=180):
+        """Write the table of filter.
+
+        The existing table of filter is replaced.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        starId : list[int] or numpy.ndarray[int]
+            Star Id.
+        ra : list[float] or numpy.ndarray[float]
+            Star right ascension in degree.
+        decl : list[float] or numpy.ndarray[float]
+            Star declination in degree.
+        mag : list[float] or numpy.ndarray[float]
+            Star magnitude under the filter.
+        numOfDeclBand : int, optional
+            Number of declination bands to partition the table. (the default
+            is 180.)
+
+        Raises
+        ------
+        ValueError
+            The number of declination bands is less than 1.
+        ValueError
+            The lengths of columns are different.
+        """
+
+        if int(numOfDeclBand) < 1:
+            raise ValueError("The number of declination bands should be >= 1.")
+
+        starId = np.asarray(starId, dtype=np.int64)
+        ra = np.asarray(ra, dtype=float)
+        decl = np.asarray(decl, dtype=float)
+        mag = np.asarray(mag, dtype=float)
+        if not (len(starId) == len(ra) == len(decl) == len(mag)):
+            raise ValueError("The lengths of columns are different.")
+
+        # Sort the stars by the declination band and then by the ra
+        band = self._getDeclBand(decl, int(numOfDeclBand))
+        idxSort = np.lexsort((ra, band))
+        bandStart = np.searchsorted(
+            band[idxSort], np.arange(int(numOfDeclBand) + 1), side="left"
+        )
+
+        columns = dict(
+            id=starId[idxSort],
+            ra=ra[idxSort],
+            decl=decl[idxSort],
+            mag=mag[idxSort],
+            bandStart=bandStart.astype(np.int64),
+        )
+        for column in self.COLUMN_LIST:
+            np.save(self._getColumnFilePath(filterType, column), columns[column])
+
+        self._tables.pop(filterType, None)
+
+    def _getDeclBand(self, decl, numOfDeclBand):
+        """Get the index of declination band.
+
+        Parameters
+        ----------
+        decl : float or numpy.ndarray
+            Declination in degree.
+        numOfDeclBand : int
+            Number of declination bands.
+
+        Returns
+        -------
+        int or numpy.ndarray[int]
+            Index of declination band.
+        """
+
+        bandWidth = 180.0 / numOfDeclBand
+        band = np.floor((np.asarray(decl) + 90.0) / bandWidth).astype(int)
+
+        return np.clip(band, 0, numOfDeclBand - 1)
+
+    def _getColumnFilePath(self, filterType, column):
+        """Get the path of column file.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        column : str
+            Column name.
+
+        Returns
+        -------
+        str
+            Path of column file.
+        """
+
+        fileName = "%s%s_%s.npy" % (self.PRE_TABLE_NAME, filterType.name, column)
+
+        return os.path.join(self.dbDir, fileName)
+
+    def _getTable(self, filterType):
+        """Get the memory-mapped columns of the table of filter.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        dict
+            Columns of table. The key is the column name.
+
+        Raises
+        ------
+        ValueError
+            The table of filter does not exist.
+        """
+
+        table = self._tables.get(filterType)
+        if table is None:
+            if not self.hasTable(filterType):
+                raise ValueError("No table of %s in database." % filterType.name)
+
+            table = dict()
+            for column in self.COLUMN_LIST:
+                table[column] = np.load(
+                    self._getColumnFilePath(filterType, column), mmap_mode="r"
+                )
+            self._tables[filterType] = table
+
+        return table
+
+    def _queryTable(self, filterType, top, bottom, left, right):
+        """Queries the database for stars within an area.
+
+        The columns of star data are the views of memory-mapped files if the
+        stars are in the continuous rows.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        top : float
+            The top edge of the box (Decl).
+        bottom : float
+            The bottom edge of the box (Decl).
+        left : float
+            The left edge of the box (RA).
+        right : float
+            The right edge of the box (RA).
+
+        Returns
+        ----------
+        StarData
+            Star information.
+        """
+
+        table = self._getTable(filterType)
+        ra = table["ra"]
+        decl = table["decl"]
+        bandStart = table["bandStart"]
+
+        numOfDeclBand = len(bandStart) - 1
+        bandWidth = 180.0 / numOfDeclBand
+
+        # Collect the rows in each band
+        rows = []
+        for band in range(
+            self._getDeclBand(bottom, numOfDeclBand),
+            self._getDeclBand(top, numOfDeclBand) + 1,
+        ):
+            start = bandStart[band]
+            end = bandStart[band + 1]
+
+            # Binary search of ra in the band
+            raOfBand = ra[start:end]
+            rowStart = start + np.searchsorted(raOfBand, left, side="left")
+            rowEnd = start + np.searchsorted(raOfBand, right, side="right")
+            if rowStart >= rowEnd:
+                continue
+
+            # Check the decl if the band is not covered by the box totally
+            bandBottom = -90.0 + band * bandWidth
+            if (bottom <= bandBottom) and (bandBottom + bandWidth <= top):
+                rows.append(slice(rowStart, rowEnd))
+            else:
+                declOfRows = decl[rowStart:rowEnd]
+                idxInBox = np.flatnonzero((declOfRows >= bottom) & (declOfRows <= top))
+                if len(idxInBox) == len(declOfRows):
+                    rows.append(slice(rowStart, rowEnd))
+                elif len(idxInBox) != 0:
+                    rows.append(idxInBox + rowStart)
+
+        if len(rows) == 1:
+            rowsInBox = rows[0]
+        elif len(rows) == 0:
+            rowsInBox = slice(0, 0)
+        else:
+            rowsInBox = np.concatenate(
+                [
+                    np.arange(row.start, row.stop) if isinstance(row, slice) else row
+                    for row in rows
+                ]
+            )
+
+        return self._getStarData(filterType, table, rowsInBox)
+
+    def _getStarData(self, filterType, table, rows):
+        """Get the star data of rows.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        table : dict
+            Columns of table.
+        rows : slice or numpy.ndarray[int]
+            Rows of stars.
+
+        Returns
+        -------
+        StarData
+            Star information.
+        """
+
+        # Only the magnitude of filter is in the table
+        mags = dict()
+        for filterOfMag in (
+            FilterType.U,
+            FilterType.G,
+            FilterType.R,
+            FilterType.I,
+            FilterType.Z,
+            FilterType.Y,
+        ):
+            if filterOfMag == filterType:
+                mags[filterOfMag] = table["mag"][rows]
+            else:
+                mags[filterOfMag] = np.array([])
+
+        return StarData(
+            table["id"][rows],
+            table["ra"][rows],
+            table["decl"][rows],
+            mags[FilterType.U],
+            mags[FilterType.G],
+            mags[FilterType.R],
+            mags[FilterType.I],
+            mags[FilterType.Z],
+            mags[FilterType.Y],
+        )
+
+
+if __name__ == "__main__":
+    pass
@@ -21,6 +21,7 @@
 
 from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
 from lsst.ts.wep.bsc.LocalDatabaseForStarFile import LocalDatabaseForStarFile
+from lsst.ts.wep.bsc.ColumnarDatabase import ColumnarDatabase
 
 from lsst.ts.wep.Utility import BscDbType
 
@@ -37,7 +38,7 @@ class DatabaseFactory(object):
 
         Returns
         -------
-        LocalDatabase or LocalDatabaseForStarFile
+        LocalDatabase, LocalDatabaseForStarFile, or ColumnarDatabase
             BSC database object.
 
         Raises
@@ -50,6 +51,8 @@ class DatabaseFactory(object):
             return LocalDatabase()
         elif bscDbType == BscDbType.LocalDbForStarFile:
             return LocalDatabaseForStarFile()
+        elif bscDbType == BscDbType.ColumnarDb:
+            return ColumnarDatabase()
         else:
             raise ValueError("The database type does not match.")
 
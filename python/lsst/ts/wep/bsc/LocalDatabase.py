@@ -31,6 +31,17 @@ class LocalDatabase(DefaultDatabase):
 
     PRE_TABLE_NAME = "BrightStarCatalog"
 
+    # Post name of the R*Tree table of spatial index
+    POST_RTREE_TABLE_NAME = "Rtree"
+
+    def __init__(self):
+        """Initialize the local database class."""
+
+        super(LocalDatabase, self).__init__()
+
+        # The table of filter has the spatial index or not
+        self._hasSpatialIndex = dict()
+
     def connect(self, dbAdress):
         """Connects database based on the local path.
 
@@ -43,6 +54,117 @@ class LocalDatabase(DefaultDatabase):
         self.connection = sqlite3.connect(dbAdress)
         self.cursor = self.connection.cursor()
 
+        self._hasSpatialIndex.clear()
+
+    def createSpatialIndex(self, filterType):
+        """Create the spatial index of table.
+
+        The index is the R*Tree virtual table of (ra, decl) of stars. The
+        triggers keep the index in sync with the insertion, update, and
+        deletion of the table. The existing index is rebuilt.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        """
+
+        tableName = self._getTableName(filterType)
+        rtreeName = self._getRtreeTableName(filterType)
+
+        commands = [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS %s "
+            "USING rtree(id, minRa, maxRa, minDecl, maxDecl)" % rtreeName,
+            "DELETE FROM %s" % rtreeName,
+            "INSERT INTO %s SELECT id, ra, ra, decl, decl FROM %s "
+            "WHERE ra IS NOT NULL AND decl IS NOT NULL" % (rtreeName, tableName),
+            "CREATE TRIGGER IF NOT EXISTS %sInsert AFTER INSERT ON %s "
+            "WHEN new.ra IS NOT NULL AND new.decl IS NOT NULL BEGIN "
+            "INSERT INTO %s VALUES (new.id, new.ra, new.ra, new.decl, new.decl); "
+            "END" % (rtreeName, tableName, rtreeName),
+            "CREATE TRIGGER IF NOT EXISTS %sDelete AFTER DELETE ON %s BEGIN "
+            "DELETE FROM %s WHERE id = old.id; END" % (rtreeName, tableName, rtreeName),
+            "CREATE TRIGGER IF NOT EXISTS %sUpdate AFTER UPDATE OF id, ra, decl "
+            "ON %s BEGIN DELETE FROM %s WHERE id = old.id; "
+            "INSERT INTO %s SELECT new.id, new.ra, new.ra, new.decl, new.decl "
+            "WHERE new.ra IS NOT NULL AND new.decl IS NOT NULL; END"
+            % (rtreeName, tableName, rtreeName, rtreeName),
+        ]
+        for command in commands:
+            self.cursor.execute(command)
+
+        # Commit the change to database
+        self.connection.commit()
+
+        self._hasSpatialIndex[filterType] = True
+
+    def dropSpatialIndex(self, filterType, temporary=False):
+        """Drop the spatial index of table.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        temporary : bool, optional
+            Only drop the index in the temporary schema. The index of table
+            in the main schema with the same name is kept. (the default is
+            False.)
+        """
+
+        rtreeName = self._getRtreeTableName(filterType)
+        if temporary:
+            rtreeName = "temp." + rtreeName
+
+        for postName in ("Insert", "Delete", "Update"):
+            self.cursor.execute("DROP TRIGGER IF EXISTS %s%s" % (rtreeName, postName))
+
+        self.cursor.execute("DROP TABLE IF EXISTS %s" % rtreeName)
+
+        # Commit the change to database
+        self.connection.commit()
+
+        self._hasSpatialIndex[filterType] = False
+
+    def hasSpatialIndex(self, filterType):
+        """The table has the spatial index or not.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        bool
+            True if the table has the spatial index.
+        """
+
+        if filterType not in self._hasSpatialIndex:
+            rtreeName = self._getRtreeTableName(filterType)
+            self.cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+                (rtreeName,),
+            )
+            self._hasSpatialIndex[filterType] = len(self.cursor.fetchall()) != 0
+
+        return self._hasSpatialIndex[filterType]
+
+    def _getRtreeTableName(self, filterType):
+        """Get the name of R*Tree table of spatial index.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        str
+            Table name.
+        """
+
+        return self._getTableName(filterType) + self.POST_RTREE_TABLE_NAME
+
     def _queryTable(self, filterType, top, bottom, left, right):
         """Queries the database for stars within an area.
 
@@ -67,63 +189,90 @@ class LocalDatabase(DefaultDatabase):
 
         # Do the query
         tableName = self._getTableName(filterType)
-        command = (
-            "SELECT simobjid, ra, decl, "
-            + filterType.name.lower()
-            + "mag"
-            + " FROM "
-            + tableName
-            + " WHERE decl <= %f AND decl >= %f AND ra >= %f AND ra <= %f"
-        )
-        query = command % (top, bottom, left, right)
-        self.cursor.execute(query)
-
-        # Collect the data
-        simobjid = []
-        ra = []
-        decl = []
-        lsstMagU = []
-        lsstMagG = []
-        lsstMagR = []
-        lsstMagI = []
-        lsstMagZ = []
-        lsstMagY = []
-        for item in self.cursor.fetchall():
-
-            # It is noted that the data type of simobjid is big interger
-            # in UW database
-            simobjid.append(item[0])
-            ra.append(item[1])
-            decl.append(item[2])
-
-            if filterType == FilterType.U:
-                lsstMagU.append(item[3])
+        magName = filterType.name.lower() + "mag"
+        if self.hasSpatialIndex(filterType):
+
+            # The R*Tree has the 32-bit precision and gives the superset of
+            # stars, which are selected by the exact condition later. The
+            # boundary has the same precision as the query without the index.
+            boundary = tuple(
+                float("%f" % value) for value in (top, bottom, left, right)
+            )
+            command = (
+                "SELECT t.simobjid, t.ra, t.decl, t.%s FROM %s AS t "
+                "JOIN %s AS r ON t.id = r.id "
+                "WHERE r.minDecl <= ? AND r.maxDecl >= ? "
+                "AND r.maxRa >= ? AND r.minRa <= ? "
+                "AND t.decl <= ? AND t.decl >= ? AND t.ra >= ? AND t.ra <= ? "
+                "ORDER BY t.id"
+            ) % (magName, tableName, self._getRtreeTableName(filterType))
+            self.cursor.execute(command, boundary * 2)
+
+        else:
+            command = (
+                "SELECT simobjid, ra, decl, "
+                + magName
+                + " FROM "
+                + tableName
+                + " WHERE decl <= %f AND decl >= %f AND ra >= %f AND ra <= %f"
+            )
+            query = command % (top, bottom, left, right)
+            self.cursor.execute(query)
 
-            elif filterType == FilterType.G:
-                lsstMagG.append(item[3])
+        return self._getStarDataFromRows(filterType, self.cursor.fetchall())
 
-            elif filterType == FilterType.R:
-                lsstMagR.append(item[3])
+    def _getStarDataFromRows(self, filterType, rows):
+        """Get the star data from the queried rows.
 
-            elif filterType == FilterType.I:
-                lsstMagI.append(item[3])
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+        rows : list[tuple]
+            Queried rows of (simobjid, ra, decl, magnitude).
 
-            elif filterType == FilterType.Z:
-                lsstMagZ.append(item[3])
+        Returns
+        -------
+        StarData
+            Star information.
+        """
 
-            elif filterType == FilterType.Y:
-                lsstMagY.append(item[3])
+        if len(rows) == 0:
+            columns = [[]] * 4
+        else:
+            columns = list(zip(*rows))
+
+        # It is noted that the data type of simobjid is big interger in UW
+        # database
+        simobjid = np.array(columns[0], dtype=np.int64)
+        ra = np.array(columns[1], dtype=float)
+        decl = np.array(columns[2], dtype=float)
+
+        # Only the magnitude of filter is queried
+        mags = dict()
+        for filterOfMag in (
+            FilterType.U,
+            FilterType.G,
+            FilterType.R,
+            FilterType.I,
+            FilterType.Z,
+            FilterType.Y,
+        ):
+            if filterOfMag == filterType:
+                mags[filterOfMag] = np.array(columns[3], dtype=float)
+            else:
+                mags[filterOfMag] = np.array([])
 
         return StarData(
             simobjid,
             ra,
             decl,
-            lsstMagU,
-            lsstMagG,
-            lsstMagR,
-            lsstMagI,
-            lsstMagZ,
-            lsstMagY,
+            mags[FilterType.U],
+            mags[FilterType.G],
+            mags[FilterType.R],
+            mags[FilterType.I],
+            mags[FilterType.Z],
+            mags[FilterType.Y],
         )
 
     def _getTableName(self, filterType):
@@ -257,31 +406,31 @@ class LocalDatabase(DefaultDatabase):
                     if starID not in allStarList:
                         allStarList.append(starID)
 
-        # Insert the star data to local data base
+        # Insert the star data to local data base in a batch
         tableName = self._getTableName(filterType)
-        for simobjID in allStarList:
+        command = (
+            "INSERT INTO "
+            + tableName
+            + " (simobjid, ra, decl, "
+            + filterType.name.lower()
+            + "mag, bright_star) "
+            + "VALUES (?, ?, ?, ?, ?)"
+        )
 
-            # Insert data
-            command = (
-                "INSERT INTO "
-                + tableName
-                + " (simobjid, ra, decl, "
-                + filterType.name.lower()
-                + "mag, bright_star) "
-                + "VALUES (?, ?, ?, ?, ?)"
+        raDecl = neighborStarMap.getRaDecl()
+        starMag = neighborStarMap.getMag(filterType)
+        remainIdSet = set(remainIdList)
+        tasks = [
+            (
+                int(simobjID),
+                raDecl[simobjID][0],
+                raDecl[simobjID][1],
+                starMag[simobjID],
+                simobjID in remainIdSet,
             )
-
-            raDec = neighborStarMap.getRaDecl()[simobjID]
-            mag = neighborStarMap.getMag(filterType)[simobjID]
-
-            if simobjID in remainIdList:
-                brightStar = True
-            else:
-                brightStar = False
-
-            task = (int(simobjID), raDec[0], raDec[1], mag, brightStar)
-
-            self.cursor.execute(command, task)
+            for simobjID in allStarList
+        ]
+        self.cursor.executemany(command, tasks)
 
         # Commit the change to database
         self.connection.commit()
@@ -311,27 +460,29 @@ class LocalDatabase(DefaultDatabase):
             if item not in ("simobjid", "ra", "decl", "mag", "bright_star"):
                 raise ValueError("'%s' can not be updated." % item)
 
-        # Update data based on the id
+        # Collect the new values of each item
+        tasksOfItem = dict()
+        for itemToChange, newValue, id in zip(
+            listOfItemToChange, listOfNewValue, listID
+        ):
+            # The numpy scalar can not be bound to the SQL command directly
+            if isinstance(newValue, np.generic):
+                newValue = newValue.item()
+
+            tasksOfItem.setdefault(itemToChange, []).append((newValue, id))
+
+        # Update data based on the id in a batch for each item
         tableName = self._getTableName(filterType)
-        for ii in range(len(listID)):
+        for itemToChange, tasks in tasksOfItem.items():
 
             # Check the item is "mag" or not. If it is "mag", give the
             # related filter information.
-            itemToChange = listOfItemToChange[ii]
             if itemToChange == "mag":
                 itemToChange = filterType.name.lower() + itemToChange
 
             # Give the SQL command
-            command = (
-                "UPDATE "
-                + tableName
-                + " SET "
-                + itemToChange
-                + "="
-                + str(listOfNewValue[ii])
-                + " WHERE id=?"
-            )
-            self.cursor.execute(command, (listID[ii],))
+            command = "UPDATE " + tableName + " SET " + itemToChange + "=? WHERE id=?"
+            self.cursor.executemany(command, tasks)
 
         # Commit the change to database
         self.connection.commit()
@@ -347,15 +498,38 @@ class LocalDatabase(DefaultDatabase):
             ID list to delete.
         """
 
-        # Delete the data
+        # Delete the data in a batch
         tableName = self._getTableName(filterType)
-        for id in listID:
-            command = "DELETE FROM " + tableName + " WHERE id=?"
-            self.cursor.execute(command, (id,))
+        command = "DELETE FROM " + tableName + " WHERE id=?"
+        self.cursor.executemany(command, [(id,) for id in listID])
 
         # Commit the change to database
         self.connection.commit()
 
+    def getAllStarData(self, filterType):
+        """Get the data of all stars in the table.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        StarData
+            Star information.
+        """
+
+        tableName = self._getTableName(filterType)
+        magName = filterType.name.lower() + "mag"
+        command = "SELECT simobjid, ra, decl, %s FROM %s ORDER BY id" % (
+            magName,
+            tableName,
+        )
+        self.cursor.execute(command)
+
+        return self._getStarDataFromRows(filterType, self.cursor.fetchall())
+
     def getAllId(self, filterType):
         """Get all ID in the database.
 
@@ -19,6 +19,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 import numpy as np
 
 from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
@@ -28,13 +29,47 @@ class LocalDatabaseForStarFile(LocalDatabase):
 
     PRE_TABLE_NAME = "StarTable"
 
-    def createTable(self, filterType):
+    def __init__(self):
+        """Initialize the local database class to read the star file."""
+
+        super(LocalDatabaseForStarFile, self).__init__()
+
+        # Sky file of the prepared temporary table of filter
+        self._skyFileOfTable = dict()
+
+    def connect(self, dbAdress):
+        """Connects database based on the local path.
+
+        Parameters
+        ----------
+        dbAdress : str
+            Path of local sqlite3 database.
+        """
+
+        super(LocalDatabaseForStarFile, self).connect(dbAdress)
+
+        self._skyFileOfTable.clear()
+
+    def disconnect(self):
+        """Disconnect the database.
+
+        The prepared temporary tables are deleted.
+        """
+
+        super(LocalDatabaseForStarFile, self).disconnect()
+
+        self._skyFileOfTable.clear()
+
+    def createTable(self, filterType, temporary=False):
         """Create the table in database.
 
         Parameters
         ----------
         filterType : FilterType
             Filter type.
+        temporary : bool, optional
+            Create the temporary table that is deleted when the database is
+            disconnected. (the default is False.)
 
         Raises
         ------
@@ -43,28 +78,34 @@ class LocalDatabaseForStarFile(LocalDatabase):
         """
 
         tableName = self._getTableName(filterType)
-        if self._tableIsInDb(tableName):
+        if self._tableIsInDb(tableName, temporary=temporary):
             raise ValueError("%s exists in database already." % tableName)
 
         # Create the table
         command = (
-            "CREATE TABLE %s "
+            "CREATE %s %s "
             "(id INTEGER PRIMARY KEY, simobjid INTEGER NOT NULL, "
             "ra REAL, decl REAL, %smag REAL, bright_star NUMERIC)"
-        ) % (tableName, filterType.name.lower())
+        ) % (
+            "TEMP TABLE" if temporary else "TABLE",
+            tableName,
+            filterType.name.lower(),
+        )
 
         self.cursor.execute(command)
 
         # Commit the change to database
         self.connection.commit()
 
-    def _tableIsInDb(self, tableName):
+    def _tableIsInDb(self, tableName, temporary=False):
         """Check the specific table exists in the database or not.
 
         Parameters
         ----------
         tableName : str
             Table name.
+        temporary : bool, optional
+            Only check the temporary schema. (the default is False.)
 
         Returns
         -------
@@ -73,7 +114,10 @@ class LocalDatabaseForStarFile(LocalDatabase):
         """
 
         # Query the specific table name
-        command = "PRAGMA table_info(%s)" % tableName
+        command = "PRAGMA %stable_info(%s)" % (
+            "temp." if temporary else "",
+            tableName,
+        )
         self.cursor.execute(command)
         data = self.cursor.fetchall()
 
@@ -106,35 +150,85 @@ class LocalDatabaseForStarFile(LocalDatabase):
             if skyData.ndim == 1:
                 skyData = np.expand_dims(skyData, axis=0)
 
-            # Add the star
+            # Add the stars in a batch
             tableName = self._getTableName(filterType)
-            for ii in range(len(skyData)):
-                # Insert data
-                command = (
-                    "INSERT INTO %s "
-                    "(simobjid, ra, decl, %smag, bright_star) "
-                    "VALUES (?, ?, ?, ?, ?)"
-                ) % (tableName, filterType.name.lower())
-
-                simobjID, ra, decl, mag = skyData[ii]
-                task = (int(simobjID), ra, decl, mag, 0)
-
-                self.cursor.execute(command, task)
+            command = (
+                "INSERT INTO %s "
+                "(simobjid, ra, decl, %smag, bright_star) "
+                "VALUES (?, ?, ?, ?, ?)"
+            ) % (tableName, filterType.name.lower())
+
+            tasks = [
+                (int(simobjID), ra, decl, mag, 0)
+                for simobjID, ra, decl, mag in skyData.tolist()
+            ]
+            self.cursor.executemany(command, tasks)
 
             # Commit the change to database
             self.connection.commit()
 
-    def deleteTable(self, filterType):
+    def prepareTableByFile(self, skyFilePath, filterType, skiprows=1):
+        """Prepare the temporary table of sky data by file.
+
+        The temporary table is reused if it is prepared by the same file
+        that is not modified since then. Otherwise, the table is recreated
+        and the sky data is inserted. The temporary table hides the table in
+        the main schema with the same name, which is kept.
+
+        Parameters
+        ----------
+        skyFilePath : str
+            Sky data file path.
+        filterType : FilterType
+            Filter type.
+        skiprows : int, optional
+            Skip the first 'skiprows' lines. (the default is 1.)
+
+        Returns
+        -------
+        bool
+            True if the sky data is inserted. False if the prepared table is
+            reused.
+        """
+
+        skyFile = (
+            os.path.realpath(skyFilePath),
+            os.stat(skyFilePath).st_mtime_ns,
+            skiprows,
+        )
+        if self._skyFileOfTable.get(filterType) == skyFile:
+            return False
+
+        self.deleteTable(filterType, temporary=True)
+        self.createTable(filterType, temporary=True)
+        self.insertDataByFile(skyFilePath, filterType, skiprows=skiprows)
+
+        self._skyFileOfTable[filterType] = skyFile
+
+        return True
+
+    def deleteTable(self, filterType, temporary=False):
         """Delete the table in database.
 
         Parameters
         ----------
         filterType : FilterType
             Filter type.
+        temporary : bool, optional
+            Only delete the temporary table. The table in the main schema with
+            the same name is kept. (the default is False.)
         """
 
+        self._skyFileOfTable.pop(filterType, None)
+
+        # Delete the spatial index if any
+        self.dropSpatialIndex(filterType, temporary=temporary)
+
         # Delete the table
         tableName = self._getTableName(filterType)
+        if temporary:
+            tableName = "temp." + tableName
+
         command = "DROP TABLE IF EXISTS %s" % tableName
         self.cursor.execute(command)
 
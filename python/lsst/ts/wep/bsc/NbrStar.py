@@ -25,6 +25,19 @@ from lsst.ts.wep.Utility import FilterType
 
 
 class NbrStar(object):
+
+    # Columns of the table of stars
+    STAR_TABLE_DTYPE = np.dtype(
+        [
+            ("id", np.int64),
+            ("ra", float),
+            ("decl", float),
+            ("raInPixel", float),
+            ("declInPixel", float),
+            ("mag", float),
+        ]
+    )
+
     def __init__(self):
         """Initialize the neighboring star class."""
 
@@ -122,39 +135,96 @@ class NbrStar(object):
             Filter type.
         """
 
-        candStarId = stars.getId()
-        self.starId[candStarId[idxCand]] = candStarId[idxNbrStar].tolist()
+        idxNbrStar = np.asarray(idxNbrStar, dtype=int)
+        self.addStarGroups(
+            stars.getStarTable(filterType),
+            [idxCand],
+            idxNbrStar,
+            [len(idxNbrStar)],
+            filterType,
+        )
 
-        # Collect coordinates and magnitude of candidate and neighboring stars
-        indexStar = np.append(idxNbrStar, idxCand)
-        for index in indexStar:
-            self.raDecl[candStarId[index]] = (
-                stars.getRA()[index],
-                stars.getDecl()[index],
-            )
-            self.raDeclInPixel[candStarId[index]] = (
-                stars.getRaInPixel()[index],
-                stars.getDeclInPixel()[index],
+    def addStarGroups(self, starTable, idxCand, idxNbrStar, numOfNbrStar, filterType):
+        """Add the information of neighboring stars of candidate stars in
+        a batch.
+
+        Parameters
+        ----------
+        starTable : numpy.ndarray
+            Structured array of stars with the dtype of STAR_TABLE_DTYPE. It
+            is from StarData.getStarTable().
+        idxCand : list[int] or numpy.ndarray[int]
+            Index of candidate stars in the star table.
+        idxNbrStar : numpy.ndarray[int]
+            Index of neighboring stars in the star table. The neighboring
+            stars of each candidate star are continuous and in the order of
+            candidate stars.
+        numOfNbrStar : list[int] or numpy.ndarray[int]
+            Number of neighboring stars of each candidate star.
+        filterType : FilterType
+            Filter type.
+        """
+
+        idxCand = np.asarray(idxCand, dtype=int)
+        idxNbrStar = np.asarray(idxNbrStar, dtype=int)
+        bound = np.cumsum(numOfNbrStar, dtype=int)
+
+        starId = starTable["id"]
+        nbrStarIdOfCand = np.split(starId[idxNbrStar], bound[:-1])
+        for candStarId, nbrStarId in zip(starId[idxCand].tolist(), nbrStarIdOfCand):
+            self.starId[candStarId] = nbrStarId.tolist()
+
+        # Collect coordinates and magnitude of candidate and neighboring stars.
+        # The stars of each candidate star are [neighboring stars, candidate].
+        idxStar = np.insert(idxNbrStar, bound, idxCand)
+        stars = starTable[idxStar]
+        starIdList = stars["id"].tolist()
+
+        self.raDecl.update(
+            zip(starIdList, zip(stars["ra"].tolist(), stars["decl"].tolist()))
+        )
+        self.raDeclInPixel.update(
+            zip(
+                starIdList,
+                zip(stars["raInPixel"].tolist(), stars["declInPixel"].tolist()),
             )
+        )
+        self.getMag(filterType).update(zip(starIdList, stars["mag"].tolist()))
 
-            starMag = stars.getMag(filterType)[index]
-            if filterType == FilterType.U:
-                self.lsstMagU[candStarId[index]] = starMag
+    def getStarTable(self, candStarId, filterType):
+        """Get the columnar table of candidate star and its neighboring stars.
 
-            elif filterType == FilterType.G:
-                self.lsstMagG[candStarId[index]] = starMag
+        Parameters
+        ----------
+        candStarId : int
+            Id of candidate star.
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of stars with the dtype of STAR_TABLE_DTYPE. The
+            arange is [neighboring stars, candidate star]. The RA and Decl are
+            NaN if they are not recorded.
+        """
 
-            elif filterType == FilterType.R:
-                self.lsstMagR[candStarId[index]] = starMag
+        allStar = list(self.starId[candStarId])
+        allStar.append(candStarId)
 
-            elif filterType == FilterType.I:
-                self.lsstMagI[candStarId[index]] = starMag
+        starTable = np.empty(len(allStar), dtype=self.STAR_TABLE_DTYPE)
+        starTable["id"] = allStar
+        starTable[["ra", "decl"]] = [
+            self.raDecl.get(star, (np.nan, np.nan)) for star in allStar
+        ]
+        starTable[["raInPixel", "declInPixel"]] = [
+            self.raDeclInPixel[star] for star in allStar
+        ]
 
-            elif filterType == FilterType.Z:
-                self.lsstMagZ[candStarId[index]] = starMag
+        starMag = self.getMag(filterType)
+        starTable["mag"] = [starMag[star] for star in allStar]
 
-            elif filterType == FilterType.Y:
-                self.lsstMagY[candStarId[index]] = starMag
+        return starTable
 
 
 if __name__ == "__main__":
@@ -19,8 +19,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import copy
+from itertools import chain
+
 import numpy as np
-from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
 
 from lsst.ts.wep.Utility import FilterType
 from lsst.ts.wep.bsc.NbrStar import NbrStar
@@ -98,8 +101,10 @@ class StarData(object):
             Star Id.
         """
 
+        # Do not copy the array of integer, which can be the view of
+        # memory-mapped file
         starIdArray = self._changeToNpArrayIfNeeded(starId)
-        self.starId = starIdArray.astype(int)
+        self.starId = starIdArray.astype(int, copy=False)
 
     def setRA(self, ra):
         """Set the star right ascension (RA) in degree.
@@ -327,25 +332,7 @@ class StarData(object):
         """
 
         if len(self.ra) != 0:
-
-            if filterType == FilterType.U:
-                valArray = self.lsstMagU
-
-            elif filterType == FilterType.G:
-                valArray = self.lsstMagG
-
-            elif filterType == FilterType.R:
-                valArray = self.lsstMagR
-
-            elif filterType == FilterType.I:
-                valArray = self.lsstMagI
-
-            elif filterType == FilterType.Z:
-                valArray = self.lsstMagZ
-
-            elif filterType == FilterType.Y:
-                valArray = self.lsstMagY
-
+            valArray = self.getMag(filterType)
             idxCand = self._getIdxCandByBndry(valArray, lowMag, highMag)
 
         else:
@@ -371,11 +358,83 @@ class StarData(object):
             List of index candidate.
         """
 
-        idxCand = [
-            idx for idx in range(len(valArray)) if lowMag <= valArray[idx] <= highMag
-        ]
+        valArray = np.asarray(valArray)
+        isCand = (valArray >= lowMag) & (valArray <= highMag)
 
-        return idxCand
+        return np.flatnonzero(isCand).tolist()
+
+    def getStarTable(self, filterType):
+        """Get the columnar table of stars.
+
+        The magnitude of filter is selected as the "mag" column. The column
+        that is not set yet is filled with NaN.
+
+        Parameters
+        ----------
+        filterType : FilterType
+            Filter type.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of stars with the dtype of
+            NbrStar.STAR_TABLE_DTYPE.
+        """
+
+        numOfStar = len(self.starId)
+        starTable = np.empty(numOfStar, dtype=NbrStar.STAR_TABLE_DTYPE)
+
+        starTable["id"] = self.starId
+        columns = (
+            ("ra", self.ra),
+            ("decl", self.decl),
+            ("raInPixel", self.raInPixel),
+            ("declInPixel", self.declInPixel),
+            ("mag", self.getMag(filterType)),
+        )
+        for name, column in columns:
+            if len(column) == numOfStar:
+                starTable[name] = column
+            else:
+                starTable[name] = np.nan
+
+        return starTable
+
+    def getSubset(self, keep):
+        """Get the subset of stars.
+
+        The columns that are not set are kept empty.
+
+        Parameters
+        ----------
+        keep : numpy.ndarray[bool] or numpy.ndarray[int]
+            Boolean mask or index of the stars to keep.
+
+        Returns
+        -------
+        StarData
+            Subset of stars.
+        """
+
+        # Do the shallow copy
+        subset = copy.copy(self)
+
+        subset.setId(self.starId[keep])
+        subset.setRA(self.ra[keep])
+        subset.setDecl(self.decl[keep])
+
+        if len(self.raInPixel) != 0:
+            subset.setRaInPixel(self.raInPixel[keep])
+        if len(self.declInPixel) != 0:
+            subset.setDeclInPixel(self.declInPixel[keep])
+
+        for filterType in FilterType:
+            if filterType != FilterType.REF:
+                magArray = self.getMag(filterType)
+                if len(magArray) != 0:
+                    subset.setMag(filterType, magArray[keep])
+
+        return subset
 
     def getNeighboringStar(self, idxCand, maxDist, filterType, maxNumOfNbrStar=0):
         """Get the neighboring stars of candidate stars based on the specific
@@ -401,63 +460,83 @@ class StarData(object):
 
         nbrStar = NbrStar()
 
-        # Calculate the distance in pixel between candidate stars and all stars
         numOfIdxCand = len(idxCand)
         if numOfIdxCand != 0:
-            allStarXY = np.array([self.raInPixel, self.declInPixel]).transpose()
-            candidateStarXY = allStarXY[np.array(idxCand), :]
-            starDistances = cdist(candidateStarXY, allStarXY)
-
-            # Decide the number of neighboring stars
-            for ii in range(numOfIdxCand):
-                idxNbrStar = np.where(starDistances[ii, :] < maxDist)[0]
-
-                # Delete candidate star itself
-                idxNbrStar = np.delete(idxNbrStar, np.where(idxNbrStar == idxCand[ii]))
-
-                # Remove the candidate star if there is the neighboring star
-                # brighter than itself
-                if filterType == FilterType.U:
-                    magSelf = self.lsstMagU[idxCand[ii]]
-                    magNbrStar = self.lsstMagU[idxNbrStar]
-
-                elif filterType == FilterType.G:
-                    magSelf = self.lsstMagG[idxCand[ii]]
-                    magNbrStar = self.lsstMagG[idxNbrStar]
-
-                elif filterType == FilterType.R:
-                    magSelf = self.lsstMagR[idxCand[ii]]
-                    magNbrStar = self.lsstMagR[idxNbrStar]
-
-                elif filterType == FilterType.I:
-                    magSelf = self.lsstMagI[idxCand[ii]]
-                    magNbrStar = self.lsstMagI[idxNbrStar]
-
-                elif filterType == FilterType.Z:
-                    magSelf = self.lsstMagZ[idxCand[ii]]
-                    magNbrStar = self.lsstMagZ[idxNbrStar]
-
-                elif filterType == FilterType.Y:
-                    magSelf = self.lsstMagY[idxCand[ii]]
-                    magNbrStar = self.lsstMagY[idxNbrStar]
-
-                if (np.where(magNbrStar < magSelf)[0]).size != 0:
-                    brighterNeighbor = True
-                else:
-                    brighterNeighbor = False
-
-                # Restrict the maximum number of neighboring stars
-                if len(idxNbrStar) > maxNumOfNbrStar:
-                    highNeighboringStar = True
-                else:
-                    highNeighboringStar = False
-
-                # Record the information of neighboring stars
-                if brighterNeighbor is False and highNeighboringStar is False:
-                    nbrStar.addStar(self, idxCand[ii], idxNbrStar, filterType)
+            idxCand = np.array(idxCand, dtype=int)
+            idxCandOfNbr, idxNbrStar = self._getIdxNbrStarByTree(idxCand, maxDist)
+
+            # Count the neighboring stars and the ones brighter than the
+            # candidate star
+            mag = self.getMag(filterType)
+            isBrighter = mag[idxNbrStar] < mag[idxCand[idxCandOfNbr]]
+            numOfNbrStar = np.bincount(idxCandOfNbr, minlength=numOfIdxCand)
+            numOfBrighterNbrStar = np.bincount(
+                idxCandOfNbr[isBrighter], minlength=numOfIdxCand
+            )
+
+            # Remove the candidate star if there is the neighboring star
+            # brighter than itself or too many neighboring stars
+            isKept = (numOfBrighterNbrStar == 0) & (numOfNbrStar <= maxNumOfNbrStar)
+
+            # Record the information of neighboring stars
+            isNbrStarKept = isKept[idxCandOfNbr]
+            nbrStar.addStarGroups(
+                self.getStarTable(filterType),
+                idxCand[isKept],
+                idxNbrStar[isNbrStarKept],
+                numOfNbrStar[isKept],
+                filterType,
+            )
 
         return nbrStar
 
+    def _getIdxNbrStarByTree(self, idxCand, maxDist):
+        """Get the index of neighboring stars of candidate stars by the radius
+        query of k-d tree.
+
+        The neighboring star is closer than the maximum distance to the
+        candidate star, and the candidate star itself is excluded.
+
+        Parameters
+        ----------
+        idxCand : numpy.ndarray[int]
+            Index of candidate star in "stars" data.
+        maxDist : float
+            Maximum distance in pixel.
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Position of candidate star in idxCand of each neighboring star.
+        numpy.ndarray[int]
+            Index of neighboring star in "stars" data. It is sorted for each
+            candidate star.
+        """
+
+        allStarXY = np.array([self.raInPixel, self.declInPixel]).transpose()
+        candidateStarXY = allStarXY[idxCand, :]
+
+        # The query radius is a little larger to keep the stars on the
+        # boundary, which are checked by the exact distance later
+        radius = max(maxDist, 0) * (1 + 1e-9)
+        idxNbrStarList = cKDTree(allStarXY).query_ball_point(
+            candidateStarXY, radius, return_sorted=True
+        )
+
+        numOfNbrStar = [len(idxNbrStar) for idxNbrStar in idxNbrStarList]
+        idxCandOfNbr = np.repeat(np.arange(len(idxCand)), numOfNbrStar)
+        idxNbrStar = np.fromiter(
+            chain.from_iterable(idxNbrStarList), dtype=int, count=sum(numOfNbrStar)
+        )
+
+        # Keep the stars closer than the maximum distance and delete the
+        # candidate star itself
+        delta = allStarXY[idxNbrStar, :] - candidateStarXY[idxCandOfNbr, :]
+        distance = np.sqrt(np.sum(delta ** 2, axis=1))
+        isNbrStar = (distance < maxDist) & (idxNbrStar != idxCand[idxCandOfNbr])
+
+        return idxCandOfNbr[isNbrStar], idxNbrStar[isNbrStar]
+
 
 if __name__ == "__main__":
     pass
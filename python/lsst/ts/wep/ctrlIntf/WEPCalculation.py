@@ -20,6 +20,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import asyncio
+import threading
 import warnings
 
 from lsst.ts.wep.Utility import (
@@ -86,6 +88,13 @@ class WEPCalculation(object):
         # Sky information file for the temporary use
         self.skyFile = ""
 
+        # Address of the database of star file kept connected between the
+        # calculations to reuse the table of sky file
+        self._bscDbAdress = ""
+
+        # Lock to prepare one calculation of wavefront error at a time
+        self._prepareLock = threading.Lock()
+
         # Default setting file
         settingFilePath = os.path.join(getConfigDir(), settingFileName)
         self.settingFile = ParamReader(filePath=settingFilePath)
@@ -122,6 +131,9 @@ class WEPCalculation(object):
 
         wepCntlr = WepController(dataCollector, isrWrapper, sourSelc, sourProc, wfsEsti)
 
+        numOfProc = self.settingFile.getSetting("numOfProc")
+        wepCntlr.setNumOfProc(numOfProc)
+
         return wepCntlr
 
     def _getBscDbType(self):
@@ -255,6 +267,30 @@ class WEPCalculation(object):
 
         return self.skyFile
 
+    def close(self):
+        """Release the resources kept between the calculations.
+
+        The database of bright star catalog is disconnected and the worker
+        processes to calculate the wavefront error are shut down.
+        """
+
+        self.disconnectBsc()
+        self.wepCntlr.close()
+
+    def disconnectBsc(self):
+        """Disconnect the database of bright star catalog kept between the
+        calculations.
+
+        The database of star file is kept connected after the query of target
+        stars, so the table of the same sky file is reused in the next
+        calculation. The columnar database is kept connected to reuse the
+        memory-mapped column files.
+        """
+
+        if self._bscDbAdress != "":
+            self.wepCntlr.getSourSelc().disconnect()
+            self._bscDbAdress = ""
+
     def setWcsData(self, wcsData):
         """Set the WCS data.
 
@@ -379,6 +415,220 @@ class WEPCalculation(object):
             Only single visit is allowed at this time.
         """
 
+        neighborStarMap, obsIdList = self._prepareWfErrCalcInLock(
+            rawExpData, extraRawExpData
+        )
+
+        donutMap = self._calcWfErr(neighborStarMap, obsIdList)
+
+        listOfWfErr = self._populateListOfSensorWavefrontData(donutMap)
+
+        return listOfWfErr
+
+    def calculateWavefrontErrorsByStream(self, rawExpData, extraRawExpData=None):
+        """Calculate the wavefront errors sensor by sensor.
+
+        The images of one sensor are read, the donut images are extracted,
+        the images are released, and the wavefront error of sensor is
+        calculated before the next sensor. The images read ahead are limited
+        by the setting of streamMemoryBudgetInMb.
+
+        Parameters
+        ----------
+        rawExpData : RawExpData
+            Raw exposure data for the corner wavefront sensor. If the input of
+            extraRawExpData is not None, this input will be the intra-focal raw
+            exposure data.
+        extraRawExpData : RawExpData, optional
+            This is the extra-focal raw exposure data if not None. (the default
+            is None.)
+
+        Returns
+        -------
+        generator
+            Generator of SensorWavefrontData object in the order of target
+            stars. The calculation of each sensor is done when it is iterated.
+
+        Raises
+        ------
+        ValueError
+            Corner WFS is not supported yet.
+        ValueError
+            Only single visit is allowed at this time.
+        """
+
+        neighborStarMap, obsIdList = self._prepareWfErrCalcInLock(
+            rawExpData, extraRawExpData
+        )
+
+        return self._genSensorWavefrontDataByStream(neighborStarMap, obsIdList)
+
+    async def calculateWavefrontErrorsAsync(
+        self, rawExpData, extraRawExpData=None, executor=None
+    ):
+        """Calculate the wavefront errors sensor by sensor in the asyncio
+        event loop.
+
+        The preparation (ingestion, ISR, and selection of target stars) and
+        the calculation of each sensor run in the executor, so the event loop
+        is not blocked. The calculation can be cancelled between the stages.
+        The stage already running in the executor is finished in the
+        background and its result is discarded. A preparation left running by
+        the cancelled calculation finishes before the preparation of next
+        calculation begins.
+
+        Parameters
+        ----------
+        rawExpData : RawExpData
+            Raw exposure data for the corner wavefront sensor. If the input of
+            extraRawExpData is not None, this input will be the intra-focal raw
+            exposure data.
+        extraRawExpData : RawExpData, optional
+            This is the extra-focal raw exposure data if not None. (the default
+            is None.)
+        executor : concurrent.futures.Executor, optional
+            Executor to run the stages. If None, the default executor of event
+            loop will be used. (the default is None.)
+
+        Yields
+        ------
+        SensorWavefrontData
+            Wavefront data of sensor in the order of target stars.
+
+        Raises
+        ------
+        ValueError
+            Corner WFS is not supported yet.
+        ValueError
+            Only single visit is allowed at this time.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        neighborStarMap, obsIdList = await loop.run_in_executor(
+            executor, self._prepareWfErrCalcInLock, rawExpData, extraRawExpData
+        )
+
+        sensorGen = self._genSensorWavefrontDataByStream(neighborStarMap, obsIdList)
+
+        # The generator is advanced and closed in the executor. The lock makes
+        # the closing wait for the running stage.
+        lock = threading.Lock()
+
+        def calcNextSensor():
+            with lock:
+                return next(sensorGen, None)
+
+        def closeSensorGen():
+            with lock:
+                try:
+                    sensorGen.close()
+                except Exception as err:
+                    warnings.warn(
+                        f"Cannot close the calculation of sensors: {err!r}.",
+                        category=UserWarning,
+                    )
+
+        try:
+            while True:
+                sensorWavefrontData = await loop.run_in_executor(
+                    executor, calcNextSensor
+                )
+                if sensorWavefrontData is None:
+                    break
+
+                yield sensorWavefrontData
+
+        finally:
+            # Do not wait for the closing, which waits for the running stage
+            # and the images read ahead. The closing runs in its own thread if
+            # the executor is shut down already.
+            try:
+                loop.run_in_executor(executor, closeSensorGen)
+            except RuntimeError:
+                threading.Thread(target=closeSensorGen, daemon=True).start()
+
+    def _genSensorWavefrontDataByStream(self, neighborStarMap, obsIdList):
+        """Generate the sensor wavefront data sensor by sensor.
+
+        Parameters
+        ----------
+        neighborStarMap : dict
+            Information of neighboring stars and candidate stars with the name
+            of sensor as a dictionary.
+        obsIdList : list[int]
+            Observation Id list in [intraObsId, extraObsId].
+
+        Yields
+        ------
+        SensorWavefrontData
+            Wavefront data of sensor.
+        """
+
+        mapSensorNameAndId = MapSensorNameAndId()
+        for sensorName, donutList in self._calcWfErrByStream(
+            neighborStarMap, obsIdList
+        ):
+            yield self._getSensorWavefrontData(
+                sensorName, donutList, mapSensorNameAndId
+            )
+
+    def _prepareWfErrCalcInLock(self, rawExpData, extraRawExpData):
+        """Prepare the images and target stars to calculate the wavefront
+        errors with the lock of preparation.
+
+        The preparation changes the butler inputs and the database of bright
+        star catalog. The lock makes a preparation left running in the
+        executor by a cancelled calculation finish before the next one.
+
+        Parameters
+        ----------
+        rawExpData : RawExpData
+            Raw exposure data for the corner wavefront sensor.
+        extraRawExpData : RawExpData or None
+            This is the extra-focal raw exposure data if not None.
+
+        Returns
+        -------
+        dict
+            Information of neighboring stars and candidate stars with the name
+            of sensor as a dictionary.
+        list[int]
+            Observation Id list in [intraObsId, extraObsId].
+        """
+
+        with self._prepareLock:
+            return self._prepareWfErrCalc(rawExpData, extraRawExpData)
+
+    def _prepareWfErrCalc(self, rawExpData, extraRawExpData):
+        """Prepare the images and target stars to calculate the wavefront
+        errors.
+
+        Parameters
+        ----------
+        rawExpData : RawExpData
+            Raw exposure data for the corner wavefront sensor. If the input of
+            extraRawExpData is not None, this input will be the intra-focal raw
+            exposure data.
+        extraRawExpData : RawExpData or None
+            This is the extra-focal raw exposure data if not None.
+
+        Returns
+        -------
+        dict
+            Information of neighboring stars and candidate stars with the name
+            of sensor as a dictionary.
+        list[int]
+            Observation Id list in [intraObsId, extraObsId].
+
+        Raises
+        ------
+        ValueError
+            Corner WFS is not supported yet.
+        ValueError
+            Only single visit is allowed at this time.
+        """
+
         if extraRawExpData is None:
             raise ValueError("Corner WFS is not supported yet.")
 
@@ -406,7 +656,7 @@ class WEPCalculation(object):
         # Get the target stars map neighboring stars
         neighborStarMap = self._getTargetStar()
 
-        # Calculate the wavefront error
+        # Get the observation Id list
         intraObsIdList = rawExpData.getVisit()
         intraObsId = intraObsIdList[0]
         if extraRawExpData is None:
@@ -416,11 +666,7 @@ class WEPCalculation(object):
             extraObsId = extraObsIdList[0]
             obsIdList = [intraObsId, extraObsId]
 
-        donutMap = self._calcWfErr(neighborStarMap, obsIdList)
-
-        listOfWfErr = self._populateListOfSensorWavefrontData(donutMap)
-
-        return listOfWfErr
+        return neighborStarMap, obsIdList
 
     def _genCamMapperIfNeed(self):
         """Generate the camera mapper file if it is needed.
@@ -524,42 +770,52 @@ class WEPCalculation(object):
     def _getTargetStar(self):
         """Get the target stars
 
+        The database of star file is kept connected, and the table of sky file
+        is reused if the sky file is the same and not modified since the last
+        query. The columnar database is kept connected to reuse the
+        memory-mapped column files. Call disconnectBsc() to release the
+        database.
+
         Returns
         -------
         dict
             Information of neighboring stars and candidate stars with the name
             of sensor as a dictionary.
-
-        Raises
-        ------
-        ValueError
-            WEPCalculation does not support this BSC yet.
         """
 
         # Connect the database
         sourSelc = self.wepCntlr.getSourSelc()
         bscDbType = self._getBscDbType()
-        if bscDbType in (BscDbType.LocalDb, BscDbType.LocalDbForStarFile):
+        if bscDbType == BscDbType.ColumnarDb:
+            dbRelativePath = self.settingFile.getSetting("defaultColumnarBscPath")
+        else:
             dbRelativePath = self.settingFile.getSetting("defaultBscPath")
-            dbAdress = os.path.join(getModulePath(), dbRelativePath)
+        dbAdress = os.path.join(getModulePath(), dbRelativePath)
+
+        if bscDbType == BscDbType.LocalDb:
             sourSelc.connect(dbAdress)
-        else:
-            raise ValueError("WEPCalculation does not support %s yet." % bscDbType)
+        elif dbAdress != self._bscDbAdress:
+            self.disconnectBsc()
+            sourSelc.connect(dbAdress)
+            self._bscDbAdress = dbAdress
 
         # Do the query
         sourSelc.setObsMetaData(self.raInDeg, self.decInDeg, self.rotSkyPos)
 
         camDimOffset = self.settingFile.getSetting("camDimOffset")
-        if bscDbType == BscDbType.LocalDb:
+        if bscDbType in (BscDbType.LocalDb, BscDbType.ColumnarDb):
             neighborStarMap = sourSelc.getTargetStar(offset=camDimOffset)[0]
         elif bscDbType == BscDbType.LocalDbForStarFile:
             skyFile = self._assignSkyFile()
             neighborStarMap = sourSelc.getTargetStarByFile(
-                skyFile, offset=camDimOffset
+                skyFile, offset=camDimOffset, keepTable=True
             )[0]
 
-        # Disconnect the database
-        sourSelc.disconnect()
+        # Disconnect the database. The database of star file and columnar
+        # database are kept connected to reuse the table of sky file and the
+        # memory-mapped column files.
+        if bscDbType == BscDbType.LocalDb:
+            sourSelc.disconnect()
 
         return neighborStarMap
 
@@ -613,25 +869,174 @@ class WEPCalculation(object):
 
         sensorNameList = list(neighborStarMap)
 
+        doDeblending = self.settingFile.getSetting("doDeblending")
+        prefetchDepth = self.settingFile.getSetting("prefetchDepth")
+
         imgType = self._getImageType()
+        if prefetchDepth > 0:
+            donutMap = self._getDonutMapByPrefetch(
+                neighborStarMap, obsIdList, imgType, prefetchDepth, doDeblending
+            )
+
+        else:
+            if imgType == ImageType.Amp:
+                wfsImgMap = self.wepCntlr.getPostIsrImgMapByPistonDefocal(
+                    sensorNameList, obsIdList
+                )
+            elif imgType == ImageType.Eimg:
+                wfsImgMap = self.wepCntlr.getEimgMapByPistonDefocal(
+                    sensorNameList, obsIdList
+                )
+
+            donutMap = self.wepCntlr.getDonutMap(
+                neighborStarMap, wfsImgMap, self.getFilter(), doDeblending=doDeblending
+            )
+
+        donutMap = self.wepCntlr.calcWfErr(donutMap)
+
+        return donutMap
+
+    def _getDonutMapByPrefetch(
+        self, neighborStarMap, obsIdList, imgType, prefetchDepth, doDeblending
+    ):
+        """Get the donut map sensor by sensor with the prefetch of images.
+
+        The images of next sensors are read in the background while the donut
+        images of current sensor are extracted. The images of each sensor are
+        released after its donut images are extracted.
+
+        Parameters
+        ----------
+        neighborStarMap : dict
+            Information of neighboring stars and candidate stars with the name
+            of sensor as a dictionary.
+        obsIdList : list[int]
+            Observation Id list in [intraObsId, extraObsId].
+        imgType : enum 'ImageType'
+            Image type.
+        prefetchDepth : int
+            Maximum number of sensors read ahead.
+        doDeblending : bool
+            Do the deblending or not.
+
+        Returns
+        -------
+        dict
+            Donut image map. The dictionary key is the sensor name. The
+            dictionary item is the list of donut image (type:
+            list[DonutImage]).
+        """
+
+        sensorNameList = list(neighborStarMap)
         if imgType == ImageType.Amp:
-            wfsImgMap = self.wepCntlr.getPostIsrImgMapByPistonDefocal(
-                sensorNameList, obsIdList
+            imgLoader = self.wepCntlr.getPostIsrImgLoaderByPistonDefocal(
+                sensorNameList, obsIdList, prefetchDepth=prefetchDepth
             )
         elif imgType == ImageType.Eimg:
-            wfsImgMap = self.wepCntlr.getEimgMapByPistonDefocal(
-                sensorNameList, obsIdList
+            imgLoader = self.wepCntlr.getEimgLoaderByPistonDefocal(
+                sensorNameList, obsIdList, prefetchDepth=prefetchDepth
             )
 
-        doDeblending = self.settingFile.getSetting("doDeblending")
-        donutMap = self.wepCntlr.getDonutMap(
-            neighborStarMap, wfsImgMap, self.getFilter(), doDeblending=doDeblending
-        )
+        donutMap = dict()
+        for sensorName, wfsImg in imgLoader:
+            donutMapOfSensor = self.wepCntlr.getDonutMap(
+                {sensorName: neighborStarMap[sensorName]},
+                {sensorName: wfsImg},
+                self.getFilter(),
+                doDeblending=doDeblending,
+            )
+            donutMap.update(donutMapOfSensor)
 
-        donutMap = self.wepCntlr.calcWfErr(donutMap)
+            # Release the images of sensor before the next sensor is loaded
+            del wfsImg
 
         return donutMap
 
+    def _calcWfErrByStream(self, neighborStarMap, obsIdList):
+        """Calculate the wavefront error sensor by sensor.
+
+        Parameters
+        ----------
+        neighborStarMap : dict
+            Information of neighboring stars and candidate stars with the name
+            of sensor as a dictionary.
+        obsIdList : list[int]
+            Observation Id list in [intraObsId, extraObsId].
+
+        Yields
+        ------
+        str
+            Sensor name.
+        list[DonutImage]
+            Donut images with the calculated wavefront error on the sensor.
+        """
+
+        sensorNameList = list(neighborStarMap)
+        prefetchDepth = self._getPrefetchDepthInBudget(sensorNameList, len(obsIdList))
+
+        imgType = self._getImageType()
+        if imgType == ImageType.Amp:
+            imgLoader = self.wepCntlr.getPostIsrImgLoaderByPistonDefocal(
+                sensorNameList, obsIdList, prefetchDepth=prefetchDepth
+            )
+        elif imgType == ImageType.Eimg:
+            imgLoader = self.wepCntlr.getEimgLoaderByPistonDefocal(
+                sensorNameList, obsIdList, prefetchDepth=prefetchDepth
+            )
+
+        doDeblending = self.settingFile.getSetting("doDeblending")
+        for sensorName, wfsImg in imgLoader:
+            donutMap = self.wepCntlr.getDonutMap(
+                {sensorName: neighborStarMap[sensorName]},
+                {sensorName: wfsImg},
+                self.getFilter(),
+                doDeblending=doDeblending,
+            )
+
+            # Release the images of sensor before the calculation
+            del wfsImg
+
+            donutMap = self.wepCntlr.calcWfErr(donutMap)
+            for sensorNameWithDonut, donutList in donutMap.items():
+                yield sensorNameWithDonut, donutList
+
+    def _getPrefetchDepthInBudget(self, sensorNameList, numOfImg):
+        """Get the number of sensors read ahead in the memory budget.
+
+        The memory of images of one sensor is estimated by the largest sensor
+        in the list. The budget includes the sensor in process. No sensor is
+        read ahead and the sensors are read one by one if the budget can not
+        hold two sensors or there is no image to read.
+
+        Parameters
+        ----------
+        sensorNameList : list[str]
+            List of sensor name.
+        numOfImg : int
+            Number of images of each sensor.
+
+        Returns
+        -------
+        int
+            Number of sensors read ahead (>= 0).
+        """
+
+        sensorDimList = self.wepCntlr.getSourProc().sensorDimList
+        numOfPixel = 0
+        for sensorName in sensorNameList:
+            sizeX, sizeY = sensorDimList[abbrevDectectorName(sensorName)]
+            numOfPixel = max(numOfPixel, sizeX * sizeY)
+
+        # The images are in float64
+        memOfSensorInMb = numOfPixel * numOfImg * 8 / 2 ** 20
+        if memOfSensorInMb == 0:
+            return 0
+
+        memoryBudgetInMb = self.settingFile.getSetting("streamMemoryBudgetInMb")
+        numOfSensor = int(memoryBudgetInMb // memOfSensorInMb)
+
+        return max(0, numOfSensor - 1)
+
     def _populateListOfSensorWavefrontData(self, donutMap):
         """Populate the list of sensor wavefront data.
 
@@ -651,25 +1056,46 @@ class WEPCalculation(object):
         mapSensorNameAndId = MapSensorNameAndId()
         listOfWfErr = []
         for sensor, donutList in donutMap.items():
+            listOfWfErr.append(
+                self._getSensorWavefrontData(sensor, donutList, mapSensorNameAndId)
+            )
 
-            sensorWavefrontData = SensorWavefrontData()
+        return listOfWfErr
 
-            # Set the sensor Id
-            abbrevSensor = abbrevDectectorName(sensor)
-            sensorIdList = mapSensorNameAndId.mapSensorNameToId(abbrevSensor)
-            sensorId = sensorIdList[0]
-            sensorWavefrontData.setSensorId(sensorId)
+    def _getSensorWavefrontData(self, sensor, donutList, mapSensorNameAndId):
+        """Get the sensor wavefront data.
 
-            sensorWavefrontData.setListOfDonut(donutList)
+        Parameters
+        ----------
+        sensor : str
+            Sensor name.
+        donutList : list[DonutImage]
+            Donut images with the calculated wavefront error on the sensor.
+        mapSensorNameAndId : MapSensorNameAndId
+            Map of sensor name and Id.
 
-            # Set the average zk in um
-            avgErrInNm = self.wepCntlr.calcAvgWfErrOnSglCcd(donutList)
-            avgErrInUm = avgErrInNm * 1e-3
-            sensorWavefrontData.setAnnularZernikePoly(avgErrInUm)
+        Returns
+        -------
+        SensorWavefrontData
+            Sensor wavefront data.
+        """
 
-            listOfWfErr.append(sensorWavefrontData)
+        sensorWavefrontData = SensorWavefrontData()
 
-        return listOfWfErr
+        # Set the sensor Id
+        abbrevSensor = abbrevDectectorName(sensor)
+        sensorIdList = mapSensorNameAndId.mapSensorNameToId(abbrevSensor)
+        sensorId = sensorIdList[0]
+        sensorWavefrontData.setSensorId(sensorId)
+
+        sensorWavefrontData.setListOfDonut(donutList)
+
+        # Set the average zk in um
+        avgErrInNm = self.wepCntlr.calcAvgWfErrOnSglCcd(donutList)
+        avgErrInUm = avgErrInNm * 1e-3
+        sensorWavefrontData.setAnnularZernikePoly(avgErrInUm)
+
+        return sensorWavefrontData
 
     def ingestCalibs(self, calibsDir):
         """Ingest the calibration products.
@@ -21,20 +21,23 @@
 
 import os
 import sys
+import hashlib
 import numpy as np
+from collections import OrderedDict
 
-from scipy.ndimage import generate_binary_structure, iterate_structure
 from scipy.ndimage.filters import laplace
-from scipy.ndimage.morphology import binary_dilation, binary_erosion
 
 from lsst.ts.wep.ParamReader import ParamReader
 from lsst.ts.wep.cwfs.Instrument import Instrument
+from lsst.ts.wep.cwfs.ZernikeFitter import ZernikeFitter
+from lsst.ts.wep.cwfs.FftSolverContext import FftSolverContext
+from lsst.ts.wep.cwfs.OffAxisLookupTable import OffAxisLookupTable
+from lsst.ts.wep.cwfs.ProjectionGeometryCache import ProjectionGeometryCache
 from lsst.ts.wep.cwfs.Tool import (
     padArray,
-    extractArray,
     ZernikeAnnularEval,
-    ZernikeMaskedFit,
-    ZernikeAnnularGrad,
+    ZernikeAnnularBasis,
+    ZernikeAnnularGradBasis,
 )
 from lsst.ts.wep.PlotUtil import plotZernike
 
@@ -71,6 +74,20 @@ class Algorithm(object):
         # Current number of outer-loop iteration
         self.currentItr = 0
 
+        # Index of compSequence used in the next outer-loop iteration and the
+        # number of iterations done in its stage
+        self._compSeqIdx = 0
+        self._itrInCompStage = 0
+
+        # Number of outer-loop iterations of each pair of images in the last
+        # batch calculation
+        self._numOfItrOfBatch = np.array([], dtype=int)
+
+        # Initial Zk coefficients (z4 - zn) in m and compensated sequence to
+        # warm-start the outer-loop iteration
+        self._warmStartZk = None
+        self._warmStartCompSequence = None
+
         # Record the coefficients of normal/ annular Zernike polynomials after
         # z4 in unit of nm
         self.zer4UpNm = np.array([])
@@ -97,6 +114,32 @@ class Algorithm(object):
         self.pMaskPad = None
         self.cMaskPad = None
 
+        # Cache of the basis of annular Zernike polynomials and their
+        # gradients on the masked sensor grid used in the "exp" solver. They
+        # do not depend on the images.
+        self._expBasisCache = OrderedDict()
+        self._expBasisCacheSize = 16
+
+        # Fitter of annular Zernike polynomials used in the "fft" solver. It
+        # caches the pseudo-inverse of design matrix for each mask.
+        self._zernikeFitter = ZernikeFitter()
+
+        # Cache of the contexts of "fft" solver. They depend on the pad
+        # dimension, aperture pixel size, and padded mask only.
+        self._fftContextCache = OrderedDict()
+        self._fftContextCacheSize = 16
+
+        # Number of threads used in the fast Fourier transform
+        self._numOfFftThreads = 1
+
+        # Cache of the masks and the projection without the wavefront of
+        # images. They only depend on the field position of donut.
+        self._geometryCache = ProjectionGeometryCache()
+
+        # Lookup table of off-axis correction. It is calculated when it is
+        # used for the first time if the lookup mode is enabled.
+        self._offAxisLookupTable = None
+
     def reset(self):
         """Reset the calculation for the new input images with the same
         algorithm settings."""
@@ -106,6 +149,9 @@ class Algorithm(object):
         self.currentItr = 0
         self.zer4UpNm = np.zeros(self.zer4UpNm.shape)
 
+        self._compSeqIdx = 0
+        self._itrInCompStage = 0
+
         self.wcomp = np.zeros(self.wcomp.shape)
         self.West = np.zeros(self.West.shape)
 
@@ -148,6 +194,11 @@ class Algorithm(object):
         self.converge = np.zeros((numTerms, outerItr + 1))
 
         self.currentItr = 0
+        self._compSeqIdx = 0
+        self._itrInCompStage = 0
+
+        # The number of Zernike terms may be changed
+        self.resetWarmStart()
 
         self.zer4UpNm = np.zeros(numTerms - 3)
 
@@ -166,6 +217,13 @@ class Algorithm(object):
         self.pMaskPad = None
         self.cMaskPad = None
 
+        # The instrument and cache settings may be changed
+        self._geometryCache = ProjectionGeometryCache(
+            maxSize=self.getGeometryCacheSize(),
+            fieldStep=self.getGeometryCacheFieldStep(),
+        )
+        self._offAxisLookupTable = None
+
     def setDebugLevel(self, debugLevel):
         """Set the debug level.
 
@@ -194,6 +252,253 @@ class Algorithm(object):
 
         return self.debugLevel
 
+    def setZernikeFitter(self, zernikeFitter):
+        """Set the fitter of annular Zernike polynomials.
+
+        The fitter can be shared with other Algorithm objects to reuse the
+        cached pseudo-inverse matrixes.
+
+        Parameters
+        ----------
+        zernikeFitter : ZernikeFitter
+            Fitter of annular Zernike polynomials.
+        """
+
+        self._zernikeFitter = zernikeFitter
+
+    def getZernikeFitter(self):
+        """Get the fitter of annular Zernike polynomials.
+
+        Returns
+        -------
+        ZernikeFitter
+            Fitter of annular Zernike polynomials.
+        """
+
+        return self._zernikeFitter
+
+    def setWarmStart(self, zer4UpNm, compSequence=None):
+        """Set the initial coefficients of Zernike polynomials to warm-start
+        the outer-loop iteration.
+
+        The images are compensated by the initial coefficients from the first
+        iteration, and the compensated sequence for the warm start is used.
+        The warm start is kept for the following calculations until
+        resetWarmStart() is called.
+
+        Parameters
+        ----------
+        zer4UpNm : numpy.ndarray or list
+            Initial coefficients of Zernike polynomials (z4 - zn) in nm. For
+            example, the previous estimation of the same sensor.
+        compSequence : numpy.ndarray or list, optional
+            Compensated sequence of Zernike order for each iteration. The
+            number of outer-loop iterations is the length of this sequence
+            (up to the number of outer-loop iterations). If None, the
+            warmStartCompSequence in the configuration file will be used. (the
+            default is None.)
+
+        Raises
+        ------
+        ValueError
+            The number of Zernike terms is wrong.
+        ValueError
+            The compensated sequence is empty.
+        """
+
+        numTerms = self.getNumOfZernikes()
+        zer4UpNm = np.array(zer4UpNm, dtype=float)
+        if zer4UpNm.shape != (numTerms - 3,):
+            raise ValueError(
+                "The number of Zernike terms should be %d." % (numTerms - 3)
+            )
+
+        if compSequence is None:
+            compSequence = self.algoParamFile.getSetting("warmStartCompSequence")
+
+        compSequence = np.array(compSequence, dtype=int)
+        if compSequence.ndim != 1 or len(compSequence) == 0:
+            raise ValueError("The compensated sequence should not be empty.")
+
+        self._warmStartZk = zer4UpNm * 1e-9
+        self._warmStartCompSequence = compSequence
+
+    def resetWarmStart(self):
+        """Reset the warm start. The outer-loop iteration starts from zero
+        coefficients of Zernike polynomials."""
+
+        self._warmStartZk = None
+        self._warmStartCompSequence = None
+
+    def isWarmStart(self):
+        """The outer-loop iteration is warm-started or not.
+
+        Returns
+        -------
+        bool
+            True if the outer-loop iteration is warm-started.
+        """
+
+        return self._warmStartZk is not None
+
+    def getWarmStartZk(self):
+        """Get the initial coefficients of Zernike polynomials of the warm
+        start.
+
+        Returns
+        -------
+        numpy.ndarray or None
+            Initial coefficients of Zernike polynomials (z4 - zn) in nm. None
+            if the outer-loop iteration is not warm-started.
+        """
+
+        if not self.isWarmStart():
+            return None
+
+        return self._warmStartZk * 1e9
+
+    def setNumOfFftThreads(self, numOfThreads):
+        """Set the number of threads used in the fast Fourier transform of
+        "fft" solver.
+
+        Parameters
+        ----------
+        numOfThreads : int
+            Number of threads. The negative value wraps around from the number
+            of CPUs, e.g. -1 means all the CPUs.
+
+        Raises
+        ------
+        ValueError
+            The number of threads is 0.
+        """
+
+        if int(numOfThreads) == 0:
+            raise ValueError("The number of threads should not be 0.")
+
+        self._numOfFftThreads = int(numOfThreads)
+
+    def getNumOfFftThreads(self):
+        """Get the number of threads used in the fast Fourier transform of
+        "fft" solver.
+
+        Returns
+        -------
+        int
+            Number of threads.
+        """
+
+        return self._numOfFftThreads
+
+    def getGeometryCacheSize(self):
+        """Get the maximum number of items in the cache of the masks and the
+        projection without the wavefront of images.
+
+        Returns
+        -------
+        int
+            Maximum number of items in the cache.
+        """
+
+        return int(self.algoParamFile.getSetting("geometryCacheSize"))
+
+    def getGeometryCacheFieldStep(self):
+        """Get the step in degree to quantize the field position of donut in
+        the cache of the masks and the projection.
+
+        Returns
+        -------
+        float
+            Step of field position. 0 means the exact field position.
+        """
+
+        return float(self.algoParamFile.getSetting("geometryCacheFieldStep"))
+
+    def getGeometryCache(self):
+        """Get the cache of the masks and the projection without the wavefront
+        of images.
+
+        Returns
+        -------
+        ProjectionGeometryCache
+            Cache of the masks and the projection.
+        """
+
+        return self._geometryCache
+
+    def useOffAxisLookupTable(self):
+        """Use the lookup table of off-axis correction or not.
+
+        Returns
+        -------
+        bool
+            True if the lookup table is used instead of evaluating the
+            polynomials.
+        """
+
+        return bool(self.algoParamFile.getSetting("offAxisLookupTable"))
+
+    def getOffAxisLookupTable(self):
+        """Get the lookup table of off-axis correction.
+
+        The table is calculated for the instrument when it is used for the
+        first time. If the offAxisLookupFile setting is not empty, the table is
+        loaded from the file if the file exists and is built for the current
+        instrument and pupil grid. Otherwise, the table is calculated and saved
+        to the file. The relative path of file is in the instrument directory.
+
+        Returns
+        -------
+        OffAxisLookupTable or None
+            Lookup table of off-axis correction. None if the lookup table is
+            not used.
+        """
+
+        if not self.useOffAxisLookupTable():
+            return None
+
+        if self._offAxisLookupTable is None:
+            lookupTable = OffAxisLookupTable(
+                gridDim=int(self.algoParamFile.getSetting("offAxisLookupGridDim"))
+            )
+            instDir = self._inst.getInstFileDir()
+
+            # The stale table in the file is recalculated
+            filePath = self.algoParamFile.getSetting("offAxisLookupFile")
+            if filePath:
+                filePath = os.path.join(instDir, filePath)
+
+            if filePath and os.path.exists(filePath):
+                savedTable = OffAxisLookupTable()
+                savedTable.loadTable(filePath)
+                if savedTable.isBuiltFor(
+                    instDir, lookupTable.getGridDim(), lookupTable.getGridExtent()
+                ):
+                    lookupTable = savedTable
+
+            if not lookupTable.isReady():
+                lookupTable.calcTable(instDir)
+                if filePath:
+                    lookupTable.saveTable(filePath)
+
+            self._offAxisLookupTable = lookupTable
+
+        return self._offAxisLookupTable
+
+    def setOffAxisLookupTable(self, lookupTable):
+        """Set the lookup table of off-axis correction.
+
+        The table is used if the offAxisLookupTable setting is True.
+
+        Parameters
+        ----------
+        lookupTable : OffAxisLookupTable
+            Lookup table of off-axis correction of the instrument.
+        """
+
+        self._offAxisLookupTable = lookupTable
+        self._geometryCache.clear()
+
     def getZer4UpInNm(self):
         """Get the coefficients of Zernike polynomials of z4-zn in nm.
 
@@ -301,6 +606,29 @@ class Algorithm(object):
 
         return int(self.algoParamFile.getSetting("offAxisPolyOrder"))
 
+    def getImgInterpOrder(self):
+        """Get the order of spline to resample the donut image in the
+        compensation.
+
+        Returns
+        -------
+        int
+            Order of spline. 1 is the bilinear interpolation.
+
+        Raises
+        ------
+        ValueError
+            The order of spline is not in [1, 5].
+        """
+
+        interpOrder = int(self.algoParamFile.getSetting("imgInterpOrder"))
+        if interpOrder not in range(1, 6):
+            raise ValueError(
+                "Order of image interpolation (%d) should be 1-5." % interpOrder
+            )
+
+        return interpOrder
+
     def getCompensatorMode(self):
         """Get the method name to compensate the wavefront by wavefront error.
 
@@ -333,6 +661,38 @@ class Algorithm(object):
 
         return compSequence
 
+    def _getCompSequenceInUse(self):
+        """Get the compensated sequence of Zernike order used in the
+        outer-loop iteration.
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Compensated sequence for the warm start if the iteration is
+            warm-started. Otherwise, it is the same as getCompSequence().
+        """
+
+        if self.isWarmStart():
+            return self._warmStartCompSequence[: self.getNumOfOuterItr()]
+        else:
+            return self.getCompSequence()
+
+    def _getNumOfOuterItrInUse(self):
+        """Get the number of outer-loop iterations in use.
+
+        Returns
+        -------
+        int
+            Length of the compensated sequence for the warm start if the
+            iteration is warm-started. Otherwise, it is the same as
+            getNumOfOuterItr().
+        """
+
+        if self.isWarmStart():
+            return len(self._getCompSequenceInUse())
+        else:
+            return self.getNumOfOuterItr()
+
     def _extend1dArray(self, origArray, targetLength):
         """Extend the 1D original array to the taget length.
 
@@ -361,6 +721,97 @@ class Algorithm(object):
 
         return extendArray
 
+    def getConvergeCriteria(self):
+        """Get the convergence criteria of outer loop iteration.
+
+        The Zernike terms after z3 are divided into groups by the Noll index of
+        the last term in each group. A group is converged if the change of each
+        term compared with the previous iteration is less than
+        max(absolute tolerance, relative tolerance * |Zk|).
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Noll index of the last term in each group. It is empty if the
+            criteria are disabled.
+        numpy.ndarray
+            Absolute tolerance of each group in nm.
+        numpy.ndarray
+            Relative tolerance of each group.
+
+        Raises
+        ------
+        ValueError
+            The numbers of groups and tolerances are different.
+        ValueError
+            The Noll indexes of groups are not increasing from z4.
+        """
+
+        zkGroups = np.array(
+            self.algoParamFile.getSetting("convergeZkGroups"), dtype=int
+        )
+        absTol = np.array(self.algoParamFile.getSetting("convergeAbsTol"), dtype=float)
+        relTol = np.array(self.algoParamFile.getSetting("convergeRelTol"), dtype=float)
+
+        if (len(absTol) != len(zkGroups)) or (len(relTol) != len(zkGroups)):
+            raise ValueError(
+                "The numbers of convergeZkGroups, convergeAbsTol, and convergeRelTol should be the same."
+            )
+
+        if np.any(np.diff(np.append(3, zkGroups)) <= 0):
+            raise ValueError("The convergeZkGroups should be increasing from z4.")
+
+        return zkGroups, absTol, relTol
+
+    def getMinItrOfCompStage(self):
+        """Get the minimum number of iterations in a stage of compSequence
+        before the iteration can stop or skip the stage by the convergence
+        criteria.
+
+        Returns
+        -------
+        int
+            Minimum number of iterations in a stage of compSequence.
+        """
+
+        return int(self.algoParamFile.getSetting("minItrOfCompStage"))
+
+    def getSkipConvergedCompStage(self):
+        """Get the decision to skip the rest of stage in compSequence if the
+        compensated terms are converged or not.
+
+        Returns
+        -------
+        bool
+            True if skip the converged stage.
+        """
+
+        return bool(self.algoParamFile.getSetting("skipConvergedCompStage"))
+
+    def getNumOfItrRun(self):
+        """Get the number of outer-loop iterations run in the last calculation
+        of single pair of images.
+
+        Returns
+        -------
+        int
+            Number of outer-loop iterations.
+        """
+
+        return self.currentItr
+
+    def getNumOfItrOfBatch(self):
+        """Get the number of outer-loop iterations of each pair of images in
+        the last batch calculation.
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Number of outer-loop iterations of each pair of images.
+        """
+
+        return self._numOfItrOfBatch
+
     def getBoundaryThickness(self):
         """Get the boundary thickness that the computation mask extends beyond
         the pupil mask.
@@ -542,7 +993,7 @@ class Algorithm(object):
         # To have the iteration time initiated from global variable is to
         # distinguish the manually and automatically iteration processes.
         itr = self.currentItr
-        while itr <= self.getNumOfOuterItr():
+        while itr <= self._getNumOfOuterItrInUse():
             stopItr = self._singleItr(I1, I2, model, tol)
 
             # Stop the iteration of outer loop if converged
@@ -572,6 +1023,233 @@ class Algorithm(object):
             self._singleItr(I1, I2, model)
             ii += 1
 
+    def runItBatch(self, I1s, I2s, model, tol=1e-3):
+        """Calculate the wavefront errors of pairs of defocal images by solving
+        the transport of intensity equation (TIE) together.
+
+        The outer loop iterations of all pairs are run in lockstep. The images
+        are compensated pair by pair, and the Poisson's equations of pairs with
+        the same mask are solved in a batch by the "exp" solver, which is a
+        stacked matrix calculation of the pairs. The compensation of images
+        dominates the time of iteration and is not batched. The pair stops
+        its iteration if converged or caustic. The number of iterations of each
+        pair can be got by getNumOfItrOfBatch(). The state of single pair (e.g.
+        getZer4UpInNm()) is not updated.
+
+        Parameters
+        ----------
+        I1s : list[CompensableImage]
+            Intra- or extra-focal images.
+        I2s : list[CompensableImage]
+            Intra- or extra-focal images paired with I1s.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        tol : float, optional
+            Tolerance of difference of coefficients of Zk polynomials compared
+            with the previours iteration. (the default is 1e-3.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of normal/ annular Zernike polynomials after z4 in nm
+            with the dimension of (number of pairs, number of terms - 3).
+
+        Raises
+        ------
+        ValueError
+            The numbers of I1s and I2s are different.
+        """
+
+        if len(I1s) != len(I2s):
+            raise ValueError("The numbers of I1s and I2s are different.")
+
+        numOfPairs = len(I1s)
+        numTerms = self.getNumOfZernikes()
+        numOfOuterItr = self._getNumOfOuterItrInUse()
+
+        compMode = self.getCompensatorMode()
+
+        # Prepare the images that are not used in the iteration before
+        for I1, I2 in zip(I1s, I2s):
+            if I1.getImgInit() is None or I2.getImgInit() is None:
+                self._prepareImages(I1, I2, model)
+
+        # The master masks of pairs do not change in the iteration
+        masks = [self._getMasterMaskOfPair(I1, I2) for I1, I2 in zip(I1s, I2s)]
+
+        # Variables of each pair used in the iteration
+        converge = np.zeros((numOfPairs, numTerms, numOfOuterItr + 1))
+        zcomp = np.zeros((numOfPairs, numTerms))
+        zc = zcomp.copy()
+
+        if self.isWarmStart():
+            zcomp[:, 3:] = self._warmStartZk
+
+        # Index of iteration of the final Zk coefficients
+        finalItr = np.zeros(numOfPairs, dtype=int)
+        isDone = np.zeros(numOfPairs, dtype=bool)
+
+        # Stage of compSequence used in the next iteration
+        compSeqIdx = np.zeros(numOfPairs, dtype=int)
+        itrInCompStage = np.zeros(numOfPairs, dtype=int)
+
+        self._numOfItrOfBatch = np.zeros(numOfPairs, dtype=int)
+
+        for jj in range(numOfOuterItr + 1):
+
+            if np.all(isDone):
+                break
+
+            # Compensate the images pair by pair
+            pairsToSolve = []
+            for ii in np.nonzero(~isDone)[0]:
+
+                I1 = I1s[ii]
+                I2 = I2s[ii]
+
+                if compMode == "zer":
+                    zcomp[ii] = zcomp[ii] + self._getFeedbackOfZk(
+                        zc[ii], compSeqIdx[ii], jj
+                    )
+                self._compensateImages(I1, I2, zcomp[ii], model)
+
+                # Stop the iteration of pair with the problem of image
+                if I1.isCaustic() or I2.isCaustic():
+                    converge[ii, :, jj] = converge[ii, :, jj - 1]
+                    finalItr[ii] = jj
+                    isDone[ii] = True
+                else:
+                    pairsToSolve.append(ii)
+
+            if len(pairsToSolve) == 0:
+                break
+
+            # Solve the Poisson's equations
+            zc[pairsToSolve] = self._solvePoissonEqBatch(
+                [I1s[ii] for ii in pairsToSolve],
+                [I2s[ii] for ii in pairsToSolve],
+                [masks[ii] for ii in pairsToSolve],
+                jj,
+            )
+
+            # Record the Zk coefficients
+            if compMode == "zer":
+                converge[pairsToSolve, :, jj] = zcomp[pairsToSolve] + zc[pairsToSolve]
+            finalItr[pairsToSolve] = jj
+            self._numOfItrOfBatch[pairsToSolve] += 1
+
+            # Check the status of iteration
+            if jj > 0:
+                for ii in pairsToSolve:
+                    (
+                        compSeqIdx[ii],
+                        itrInCompStage[ii],
+                        isDone[ii],
+                    ) = self._checkItrStatus(
+                        compSeqIdx[ii],
+                        itrInCompStage[ii],
+                        converge[ii, :, jj],
+                        converge[ii, :, jj - 1],
+                        tol,
+                    )
+
+        return converge[np.arange(numOfPairs), 3:, finalItr] * 1e9
+
+    def _solvePoissonEqBatch(self, I1s, I2s, masks, iOutItr=0):
+        """Solve the Poisson's equations of pairs of defocal images.
+
+        The pairs with the same mask are solved in a batch by the "exp" solver.
+        The "fft" solver solves the pairs one by one.
+
+        Parameters
+        ----------
+        I1s : list[CompensableImage]
+            Intra- or extra-focal images.
+        I2s : list[CompensableImage]
+            Intra- or extra-focal images paired with I1s.
+        masks : list[tuple]
+            Master masks of pairs from _getMasterMaskOfPair().
+        iOutItr : int, optional
+            ith number of outer loop iteration which is important in "fft"
+            algorithm. (the default is 0.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of normal/ annular Zernike polynomials with the
+            dimension of (number of pairs, number of terms).
+        """
+
+        poissonSolver = self.getPoissonSolverName()
+        zcs = np.zeros((len(I1s), self.getNumOfZernikes()))
+
+        # Group the pairs by the mask for the "exp" solver
+        groups = OrderedDict()
+        for ii, (I1, I2, mask) in enumerate(zip(I1s, I2s, masks)):
+
+            # Use the mask of pair and correct the images if I1 and I2 are
+            # belong to different sources
+            self.pMask, self.cMask, self.pMaskPad, self.cMaskPad, maskHash = mask
+            I1, I2 = self._applyI1I2pMask(I1, I2)
+
+            if poissonSolver == "fft":
+                zcs[ii] = self._solvePoissonEq(I1, I2, iOutItr)[0]
+            else:
+                I0, dI = self._getdIandI(I1, I2)
+
+                group = groups.setdefault(maskHash, (self.cMask, [], []))
+                group[1].append(ii)
+                group[2].append((I0, dI))
+
+        # Solve the pairs with the same mask together
+        if len(groups) > 0:
+            apertureDiameter = self._inst.getApertureDiameter()
+            sensorFactor = self._inst.getSensorFactor()
+            dimOfDonut = self._inst.getDimOfDonutOnSensor()
+            dOmega = (apertureDiameter * sensorFactor / dimOfDonut) ** 2
+
+            for maskHash, (cMask, idx, images) in groups.items():
+                self.cMask = cMask
+                I0s = np.array([I0 for I0, dI in images])
+                dIs = np.array([dI for I0, dI in images])
+                zcs[idx] = self._solveExpBatch(I0s, dIs, dOmega, maskHash=maskHash)[0]
+
+        return zcs
+
+    def _getMasterMaskOfPair(self, I1, I2):
+        """Get the master mask of pair of defocal images.
+
+        Parameters
+        ----------
+        I1 : CompensableImage
+            Intra- or extra-focal image.
+        I2 : CompensableImage
+            Intra- or extra-focal image.
+
+        Returns
+        -------
+        tuple
+            Padded mask, non-padded mask, padded masks extended for the "fft"
+            solver (None for the "exp" solver), and the hash of non-padded
+            mask.
+        """
+
+        poissonSolver = self.getPoissonSolverName()
+        self._makeMasterMask(I1, I2, poissonSolver)
+        if poissonSolver != "fft":
+            self.pMaskPad = None
+            self.cMaskPad = None
+
+        maskHash = hashlib.sha1(np.ascontiguousarray(self.cMask).tobytes())
+
+        return (
+            self.pMask,
+            self.cMask,
+            self.pMaskPad,
+            self.cMaskPad,
+            maskHash.hexdigest(),
+        )
+
     def _singleItr(self, I1, I2, model, tol=1e-3):
         """Run the outer-loop with single iteration to solve the transport of
         intensity equation (TIE).
@@ -600,47 +1278,22 @@ class Algorithm(object):
         # Use the zonal mode ("zer")
         compMode = self.getCompensatorMode()
 
-        # Define the gain of feedbackGain
-        feedbackGain = self.getFeedbackGain()
-
         # Set the pre-condition
         if self.currentItr == 0:
 
             # Check this is the first time of running iteration or not
             if I1.getImgInit() is None or I2.getImgInit() is None:
+                self._prepareImages(I1, I2, model)
 
-                # Check the image dimension
-                if I1.getImg().shape != I2.getImg().shape:
-                    print(
-                        "Error: The intra and extra image stamps need to be of same size."
-                    )
-                    sys.exit()
-
-                # Calculate the pupil mask (binary matrix) and related
-                # parameters
-                boundaryT = self.getBoundaryThickness()
-                I1.makeMask(self._inst, model, boundaryT, 1)
-                I2.makeMask(self._inst, model, boundaryT, 1)
-                self._makeMasterMask(I1, I2, self.getPoissonSolverName())
-
-                # Load the offAxis correction coefficients
-                if model == "offAxis":
-                    offAxisPolyOrder = self.getOffAxisPolyOrder()
-                    I1.setOffAxisCorr(self._inst, offAxisPolyOrder)
-                    I2.setOffAxisCorr(self._inst, offAxisPolyOrder)
-
-                # Cocenter the images to the center referenced to fieldX and
-                # fieldY. Need to check the availability of this.
-                I1.imageCoCenter(self._inst, debugLevel=self.debugLevel)
-                I2.imageCoCenter(self._inst, debugLevel=self.debugLevel)
-
-                # Update the self-initial image
-                I1.updateImgInit()
-                I2.updateImgInit()
-
-            # Initialize the variables used in the iteration.
+            # Initialize the variables used in the iteration. The images are
+            # compensated by the initial Zk coefficients if warm-started.
             self.zcomp = np.zeros(self.getNumOfZernikes())
             self.zc = self.zcomp.copy()
+            if self.isWarmStart():
+                self.zcomp[3:] = self._warmStartZk
+
+            self._compSeqIdx = 0
+            self._itrInCompStage = 0
 
             dimOfDonut = self._inst.getDimOfDonutOnSensor()
             self.wcomp = np.zeros((dimOfDonut, dimOfDonut))
@@ -654,27 +1307,13 @@ class Algorithm(object):
         # Solve the transport of intensity equation (TIE)
         if not self.caustic:
 
-            # Reset the images before the compensation
-            I1.updateImage(I1.getImgInit().copy())
-            I2.updateImage(I2.getImgInit().copy())
-
+            # Add partial feedback of residual estimated wavefront in Zk
             if compMode == "zer":
+                self.zcomp = self.zcomp + self._getFeedbackOfZk(
+                    self.zc, self._compSeqIdx, jj
+                )
 
-                # Zk coefficient from the previous iteration
-                ztmp = self.zc.copy()
-
-                # Do the feedback of Zk from the lower terms first based on the
-                # sequence defined in compSequence
-                if jj != 0:
-                    compSequence = self.getCompSequence()
-                    ztmp[int(compSequence[jj - 1]) :] = 0
-
-                # Add partial feedback of residual estimated wavefront in Zk
-                self.zcomp = self.zcomp + ztmp * feedbackGain
-
-                # Remove the image distortion by forwarding the image to pupil
-                I1.compensate(self._inst, self, self.zcomp, model)
-                I2.compensate(self._inst, self, self.zcomp, model)
+            self._compensateImages(I1, I2, self.zcomp, model)
 
             # Check the image condition. If there is the problem, done with
             # this _singleItr().
@@ -715,16 +1354,16 @@ class Algorithm(object):
         # Status of iteration
         stopItr = False
 
-        # Calculate the difference
+        # Check the status of iteration
         if jj > 0:
-            diffZk = (
-                np.sum(np.abs(self.converge[:, jj] - self.converge[:, jj - 1])) * 1e9
+            (self._compSeqIdx, self._itrInCompStage, stopItr) = self._checkItrStatus(
+                self._compSeqIdx,
+                self._itrInCompStage,
+                self.converge[:, jj],
+                self.converge[:, jj - 1],
+                tol,
             )
 
-            # Check the Status of iteration
-            if diffZk < tol:
-                stopItr = True
-
         # Update the current iteration time
         self.currentItr += 1
 
@@ -735,6 +1374,230 @@ class Algorithm(object):
 
         return stopItr
 
+    def _getFeedbackOfZk(self, zc, compSeqIdx, iOutItr):
+        """Get the partial feedback of Zk coefficients of the previous
+        iteration to compensate the images.
+
+        The feedback is from the lower terms first based on the sequence
+        defined in compSequence.
+
+        Parameters
+        ----------
+        zc : numpy.ndarray
+            Zk coefficients solved in the previous iteration.
+        compSeqIdx : int
+            Index of the stage of compSequence in use.
+        iOutItr : int
+            ith number of outer loop iteration.
+
+        Returns
+        -------
+        numpy.ndarray
+            Feedback of Zk coefficients.
+        """
+
+        ztmp = zc.copy()
+        if iOutItr != 0:
+            compSequence = self._getCompSequenceInUse()
+            ztmp[int(compSequence[compSeqIdx]) :] = 0
+
+        return ztmp * self.getFeedbackGain()
+
+    def _compensateImages(self, I1, I2, zcomp, model):
+        """Reset the defocal images and remove the image distortion by
+        forwarding the images to pupil.
+
+        The images are only reset if the compensator mode is not "zer".
+
+        Parameters
+        ----------
+        I1 : CompensableImage
+            Intra- or extra-focal image.
+        I2 : CompensableImage
+            Intra- or extra-focal image.
+        zcomp : numpy.ndarray
+            Zk coefficients to compensate.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        """
+
+        I1.updateImage(I1.getImgInit().copy())
+        I2.updateImage(I2.getImgInit().copy())
+
+        if self.getCompensatorMode() == "zer":
+            for img in (I1, I2):
+                img.compensate(
+                    self._inst, self, zcomp, model, geometryCache=self._geometryCache
+                )
+
+    def _checkItrStatus(self, compSeqIdx, itrInCompStage, zk, zkPrev, tol):
+        """Check the status of iteration and decide the stage of compSequence
+        used in the next iteration.
+
+        Parameters
+        ----------
+        compSeqIdx : int
+            Index of the stage of compSequence in use.
+        itrInCompStage : int
+            Number of iterations run in the stage.
+        zk : numpy.ndarray
+            Zk coefficients of the current iteration.
+        zkPrev : numpy.ndarray
+            Zk coefficients of the previous iteration.
+        tol : float
+            Tolerance of difference of coefficients of Zk polynomials compared
+            with the previours iteration.
+
+        Returns
+        -------
+        int
+            Index of the stage of compSequence used in the next iteration.
+        int
+            Number of iterations run in the stage.
+        bool
+            True if the iteration should be stopped.
+        """
+
+        diffZk = np.sum(np.abs(zk - zkPrev)) * 1e9
+
+        compSeqIdx, itrInCompStage, isConverged = self._updateCompStage(
+            compSeqIdx, itrInCompStage, zk, zkPrev
+        )
+
+        return compSeqIdx, itrInCompStage, (diffZk < tol) or isConverged
+
+    def _prepareImages(self, I1, I2, model):
+        """Prepare the defocal images before the first iteration.
+
+        Make the masks, load the offAxis correction coefficients, cocenter the
+        images, and record the initial images.
+
+        Parameters
+        ----------
+        I1 : CompensableImage
+            Intra- or extra-focal image.
+        I2 : CompensableImage
+            Intra- or extra-focal image.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        """
+
+        # Check the image dimension
+        if I1.getImg().shape != I2.getImg().shape:
+            print("Error: The intra and extra image stamps need to be of same size.")
+            sys.exit()
+
+        # Calculate the pupil mask (binary matrix) and related parameters
+        boundaryT = self.getBoundaryThickness()
+        I1.makeMask(self._inst, model, boundaryT, 1, geometryCache=self._geometryCache)
+        I2.makeMask(self._inst, model, boundaryT, 1, geometryCache=self._geometryCache)
+        self._makeMasterMask(I1, I2, self.getPoissonSolverName())
+
+        # Load the offAxis correction coefficients
+        if model == "offAxis":
+            offAxisPolyOrder = self.getOffAxisPolyOrder()
+            lookupTable = self.getOffAxisLookupTable()
+            I1.setOffAxisCorr(self._inst, offAxisPolyOrder, lookupTable=lookupTable)
+            I2.setOffAxisCorr(self._inst, offAxisPolyOrder, lookupTable=lookupTable)
+
+        # Cocenter the images to the center referenced to fieldX and fieldY.
+        # Need to check the availability of this.
+        I1.imageCoCenter(self._inst, debugLevel=self.debugLevel)
+        I2.imageCoCenter(self._inst, debugLevel=self.debugLevel)
+
+        # Update the self-initial image
+        I1.updateImgInit()
+        I2.updateImgInit()
+
+    def _getConvergedZkOrder(self, zk, zkPrev):
+        """Get the Noll index of the last term that all the terms up to it are
+        converged by the convergence criteria.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Coefficients of Zernike polynomials in m.
+        zkPrev : numpy.ndarray
+            Coefficients of Zernike polynomials in m of the previous iteration.
+
+        Returns
+        -------
+        int
+            Noll index of the last converged term. It is 0 if the criteria are
+            disabled.
+        """
+
+        zkGroups, absTol, relTol = self.getConvergeCriteria()
+        if len(zkGroups) == 0:
+            return 0
+
+        numTerms = len(zk)
+        diffZkInNm = np.abs(zk - zkPrev) * 1e9
+        zkInNm = np.abs(zk) * 1e9
+
+        # The index of array is the Noll index - 1
+        startIdx = 3
+        for endIdx, absTolOfGroup, relTolOfGroup in zip(zkGroups, absTol, relTol):
+            endIdx = min(endIdx, numTerms)
+            tolOfGroup = np.maximum(
+                absTolOfGroup, relTolOfGroup * zkInNm[startIdx:endIdx]
+            )
+            if np.any(diffZkInNm[startIdx:endIdx] >= tolOfGroup):
+                return startIdx
+
+            startIdx = endIdx
+
+        return numTerms
+
+    def _updateCompStage(self, compSeqIdx, itrInCompStage, zk, zkPrev):
+        """Update the stage of compSequence after an outer-loop iteration.
+
+        The stage is the consecutive iterations with the same compensated
+        Zernike order in compSequence. The rest of stage is skipped if the
+        compensated terms are converged and skipConvergedCompStage is True.
+
+        Parameters
+        ----------
+        compSeqIdx : int
+            Index of compSequence used in the iteration.
+        itrInCompStage : int
+            Number of iterations done in the stage before the iteration.
+        zk : numpy.ndarray
+            Coefficients of Zernike polynomials in m.
+        zkPrev : numpy.ndarray
+            Coefficients of Zernike polynomials in m of the previous iteration.
+
+        Returns
+        -------
+        int
+            Index of compSequence used in the next iteration.
+        int
+            Number of iterations done in the stage of next iteration.
+        bool
+            True if all the terms are compensated and converged.
+        """
+
+        compSequence = self._getCompSequenceInUse()
+        compOrder = compSequence[compSeqIdx]
+        itrInCompStage += 1
+
+        isStageConverged = (itrInCompStage >= self.getMinItrOfCompStage()) and (
+            self._getConvergedZkOrder(zk, zkPrev) >= compOrder
+        )
+        isConverged = isStageConverged and (compOrder >= len(zk))
+
+        # Go to the next stage directly if the stage is converged
+        nextIdx = min(compSeqIdx + 1, len(compSequence) - 1)
+        if isStageConverged and self.getSkipConvergedCompStage():
+            idxOfNextStage = np.nonzero(compSequence[compSeqIdx:] > compOrder)[0]
+            if len(idxOfNextStage) > 0:
+                nextIdx = compSeqIdx + idxOfNextStage[0]
+
+        if compSequence[nextIdx] != compOrder:
+            itrInCompStage = 0
+
+        return nextIdx, itrInCompStage, isConverged
+
     def _solvePoissonEq(self, I1, I2, iOutItr=0):
         """Solve the Poisson's equation by Fourier transform (differential) or
         serial expansion (integration).
@@ -782,115 +1645,45 @@ class Algorithm(object):
             sumclipSequence = self.getSignalClipSequence()
             cliplevel = sumclipSequence[iOutItr]
 
-            # Generate the v, u-coordinates on pupil plane
-            padDim = self.getFftDimension()
-            v, u = np.mgrid[
-                -0.5
-                / aperturePixelSize : 0.5
-                / aperturePixelSize : 1.0
-                / padDim
-                / aperturePixelSize,
-                -0.5
-                / aperturePixelSize : 0.5
-                / aperturePixelSize : 1.0
-                / padDim
-                / aperturePixelSize,
-            ]
-
-            # Show the threshold and pupil coordinate information
+            # Show the threshold information
             if self.debugLevel >= 3:
                 print("iOuter=%d, cliplevel=%4.2f" % (iOutItr, cliplevel))
-                print(v.shape)
-
-            # Calculate the const of fft:
-            # FT{Delta W} = -4*pi^2*(u^2+v^2) * FT{W}
-            u2v2 = -4 * (np.pi ** 2) * (u * u + v * v)
 
-            # Set origin to Inf to result in 0 at origin after filtering
-            ctrIdx = int(np.floor(padDim / 2.0))
-            u2v2[ctrIdx, ctrIdx] = np.inf
+            # Get the quantities that only depend on the pad dimension,
+            # aperture pixel size, and mask
+            fftContext = self._getFftSolverContext(aperturePixelSize)
 
             # Calculate the wavefront signal
             Sini = self._createSignal(I1, I2, cliplevel)
 
-            # Find the just-outside and just-inside indices of a ring in pixels
-            # This is for the use in setting dWdn = 0
-            boundaryT = self.getBoundaryThickness()
-
-            struct = generate_binary_structure(2, 1)
-            struct = iterate_structure(struct, boundaryT)
-
-            ApringOut = np.logical_xor(
-                binary_dilation(self.pMask, structure=struct), self.pMask
-            ).astype(int)
-            ApringIn = np.logical_xor(
-                binary_erosion(self.pMask, structure=struct), self.pMask
-            ).astype(int)
-
-            bordery, borderx = np.nonzero(ApringOut)
-
             # Put the signal in boundary (since there's no existing Sestimate,
             # S just equals self.S as the initial condition of SCF
             S = Sini.copy()
             for jj in range(self.getNumOfInnerItr()):
 
-                # Calculate FT{S}
-                SFFT = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(S)))
-
                 # Calculate W by W=IFT{ FT{S}/(-4*pi^2*(u^2+v^2)) }
-                W = np.fft.fftshift(
-                    np.fft.irfft2(np.fft.fftshift(SFFT / u2v2), s=S.shape)
-                )
+                W = fftContext.calcWavefront(S, numOfThreads=self._numOfFftThreads)
 
                 # Estimate the wavefront (includes zeroing offset & masking to
                 # the aperture size)
+                West = fftContext.extractWavefront(W)
 
-                # Take the estimated wavefront
-                West = extractArray(W, dimOfDonut)
-
-                # Calculate the offset
-                offset = West[self.pMask == 1].mean()
-                West = West - offset
-                West[self.pMask == 0] = 0
-
-                # Set dWestimate/dn = 0 around boundary
-                WestdWdn0 = West.copy()
-
-                # Do a 3x3 average around each border pixel, including only
-                # those pixels inside the aperture
-                for ii in range(len(borderx)):
-                    reg = West[
-                        borderx[ii] - boundaryT : borderx[ii] + boundaryT + 1,
-                        bordery[ii] - boundaryT : bordery[ii] + boundaryT + 1,
-                    ]
-
-                    intersectIdx = ApringIn[
-                        borderx[ii] - boundaryT : borderx[ii] + boundaryT + 1,
-                        bordery[ii] - boundaryT : bordery[ii] + boundaryT + 1,
-                    ]
-
-                    WestdWdn0[borderx[ii], bordery[ii]] = reg[
-                        np.nonzero(intersectIdx)
-                    ].mean()
+                # Set dWestimate/dn = 0 around boundary by averaging the pixels
+                # inside the aperture around each border pixel
+                WestdWdn0 = fftContext.setDwdnZero(West)
 
                 # Take Laplacian to find sensor signal estimate (Delta W = S)
                 del2W = laplace(WestdWdn0) / dOmega
 
                 # Extend the dimension of signal to the order of 2 for "fft" to
-                # use
-                Sest = padArray(del2W, padDim)
-
-                # Put signal back inside boundary, leaving the rest of
+                # use and put signal back inside boundary, leaving the rest of
                 # Sestimate
-                Sest[self.pMaskPad == 1] = Sini[self.pMaskPad == 1]
-
-                # Need to recheck this condition
-                S = Sest
+                S = fftContext.padSignal(del2W, Sini)
 
             # Calculate the coefficient of normal/ annular Zernike polynomials
             if self.getCompensatorMode() == "zer":
                 xSensor, ySensor = self._inst.getSensorCoor()
-                zc = ZernikeMaskedFit(
+                zc = self._zernikeFitter.maskedFit(
                     West, xSensor, ySensor, numTerms, self.pMask, zobsR
                 )
             else:
@@ -904,74 +1697,264 @@ class Algorithm(object):
             # Calculate I0 and dI
             I0, dI = self._getdIandI(I1, I2)
 
-            # Get the x, y coordinate in mask. The element outside mask is 0.
-            xSensor, ySensor = self._inst.getSensorCoor()
-            xSensor = xSensor * self.cMask
-            ySensor = ySensor * self.cMask
+            # Solve the equation with the basis of annular Zernike polynomials
+            # in the mask
+            zcs, Wests = self._solveExpBatch(
+                I0[np.newaxis, :, :], dI[np.newaxis, :, :], dOmega
+            )
+            zc = zcs[0]
+            West = Wests[0]
 
-            # Create the F matrix and Zernike-related matrixes
-            F = np.zeros(numTerms)
-            dZidx = np.zeros((numTerms, dimOfDonut, dimOfDonut))
-            dZidy = dZidx.copy()
+        return zc, West
 
-            zcCol = np.zeros(numTerms)
-            for ii in range(int(numTerms)):
+    def _solveExpBatch(self, I0s, dIs, dOmega, maskHash=None):
+        """Solve the Poisson's equations of pairs of images with the same mask
+        by the serial expansion.
 
-                # Calculate the matrix for each Zk related component
-                # Set the specific Zk cofficient to be 1 for the calculation
-                zcCol[ii] = 1
+        The matrices of all the pairs are calculated and solved together.
 
-                F[ii] = (
-                    np.sum(dI * ZernikeAnnularEval(zcCol, xSensor, ySensor, zobsR))
-                    * dOmega
-                )
-                dZidx[ii, :, :] = ZernikeAnnularGrad(
-                    zcCol, xSensor, ySensor, zobsR, "dx"
-                )
-                dZidy[ii, :, :] = ZernikeAnnularGrad(
-                    zcCol, xSensor, ySensor, zobsR, "dy"
-                )
+        Parameters
+        ----------
+        I0s : numpy.ndarray
+            Central images with the dimension of (number of pairs, dim, dim).
+        dIs : numpy.ndarray
+            Differential images with the dimension of (number of pairs, dim,
+            dim).
+        dOmega : float
+            Differential Omega.
+        maskHash : str, optional
+            Hash of the non-padded mask. If None, it is calculated. (the
+            default is None.)
 
-                # Set the specific Zk cofficient back to 0 to avoid interfering
-                # other Zk's calculation
-                zcCol[ii] = 0
-
-            # Calculate Mij matrix, need to check the stability of integration
-            # and symmetry later
-            Mij = np.zeros([numTerms, numTerms])
-            for ii in range(numTerms):
-                for jj in range(numTerms):
-                    Mij[ii, jj] = np.sum(
-                        I0
-                        * (
-                            dZidx[ii, :, :].squeeze() * dZidx[jj, :, :].squeeze()
-                            + dZidy[ii, :, :].squeeze() * dZidy[jj, :, :].squeeze()
-                        )
-                    )
-            Mij = dOmega / (apertureDiameter / 2.0) ** 2 * Mij
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of annular Zernike polynomials with the dimension of
+            (number of pairs, number of terms).
+        numpy.ndarray
+            Estimated wavefronts based on z4 - z22 with the dimension of
+            (number of pairs, dim, dim).
+        """
 
-            # Calculate dz
-            focalLength = self._inst.getFocalLength()
-            offset = self._inst.getDefocalDisOffset()
-            dz = 2 * focalLength * (focalLength - offset) / offset
+        numTerms = self.getNumOfZernikes()
+        zobsR = self.getObsOfZernikes()
 
-            # Define zc
-            zc = np.zeros(numTerms)
+        # Get the basis of annular Zernike polynomials and the gradients
+        # in the mask. Only the pixels in the mask contribute to the
+        # integrations.
+        Zi, inMask, ZiFlat, dZidxFlat, dZidyFlat = self._getExpBasisInMask(
+            numTerms, zobsR, maskHash=maskHash
+        )
 
-            # Consider specific Zk terms only
-            idx = self.getZernikeTerms()
+        numOfPairs = I0s.shape[0]
+        I0Flat = I0s.reshape(numOfPairs, -1)[:, inMask]
+        dIFlat = dIs.reshape(numOfPairs, -1)[:, inMask]
 
-            # Solve the equation: M*W = F => W = M^(-1)*F
-            zc_tmp = np.linalg.lstsq(Mij[:, idx][idx], F[idx], rcond=None)[0] / dz
-            zc[idx] = zc_tmp
+        # Create the F matrix
+        F = dIFlat.dot(ZiFlat.T) * dOmega
 
-            # Estimate the wavefront surface based on z4 - z22
-            # z0 - z3 are set to be 0 instead
-            West = ZernikeAnnularEval(
-                np.concatenate(([0, 0, 0], zc[3:])), xSensor, ySensor, zobsR
-            )
+        # Calculate Mij matrices of all the pairs, need to check the stability
+        # of integration and symmetry later:
+        # Mij = sum_k I0_k * (dZi/dx*dZj/dx + dZi/dy*dZj/dy)_k.
+        # The x and y terms are summed in a single stacked matrix product.
+        dZiFlat = np.concatenate((dZidxFlat, dZidyFlat), axis=1)
+        I0FlatOfXy = np.concatenate((I0Flat, I0Flat), axis=1)
+        Mij = np.matmul(I0FlatOfXy[:, np.newaxis, :] * dZiFlat, dZiFlat.T)
 
-        return zc, West
+        apertureDiameter = self._inst.getApertureDiameter()
+        Mij = dOmega / (apertureDiameter / 2.0) ** 2 * Mij
+
+        # Calculate dz
+        focalLength = self._inst.getFocalLength()
+        offset = self._inst.getDefocalDisOffset()
+        dz = 2 * focalLength * (focalLength - offset) / offset
+
+        # Consider specific Zk terms only
+        idx = self.getZernikeTerms()
+
+        # Solve the equation: M*W = F => W = M^(-1)*F. The pseudo-inverse
+        # gives the least-squares solution of minimum norm of all the pairs
+        # together with the same cutoff of singular values as lstsq().
+        MijOfTerms = Mij[:, idx][:, :, idx]
+        invMij = np.linalg.pinv(MijOfTerms, rcond=np.finfo(float).eps * len(idx))
+        zcs = np.zeros((numOfPairs, numTerms))
+        zcs[:, idx] = np.einsum("pij,pj->pi", invMij, F[:, idx]) / dz
+
+        # Estimate the wavefront surface based on z4 - z22
+        # z0 - z3 are set to be 0 instead
+        Wests = np.tensordot(zcs[:, 3:], Zi[3:, :, :], axes=1)
+
+        return zcs, Wests
+
+    def _getFftSolverContext(self, aperturePixelSize):
+        """Get the context of "fft" solver from the cache or create it if it
+        does not exist.
+
+        Parameters
+        ----------
+        aperturePixelSize : float
+            Aperture pixel size in meter.
+
+        Returns
+        -------
+        FftSolverContext
+            Context of "fft" solver for the pad dimension, aperture pixel size,
+            boundary thickness, and padded mask.
+        """
+
+        # Key of the cache
+        padDim = self.getFftDimension()
+        boundaryT = self.getBoundaryThickness()
+        maskHash = hashlib.sha1(np.ascontiguousarray(self.pMask).tobytes())
+        key = (
+            padDim,
+            aperturePixelSize,
+            boundaryT,
+            self.pMask.shape,
+            maskHash.hexdigest(),
+        )
+
+        if key in self._fftContextCache:
+            self._fftContextCache.move_to_end(key)
+            return self._fftContextCache[key]
+
+        fftContext = FftSolverContext(padDim, aperturePixelSize, self.pMask, boundaryT)
+
+        # Put in the cache and remove the least recently used one if needed
+        self._fftContextCache[key] = fftContext
+        if len(self._fftContextCache) > self._fftContextCacheSize:
+            self._fftContextCache.popitem(last=False)
+
+        return fftContext
+
+    def _getExpBasis(self, numTerms, zobsR):
+        """Get the basis of annular Zernike polynomials and their gradients in
+        the mask for the serial expansion method.
+
+        The basis only depends on the sensor grid of instrument, obscuration,
+        and non-padded mask. It is cached and reused in the following outer
+        loop iterations and donuts with the same mask.
+
+        Parameters
+        ----------
+        numTerms : int
+            Number of annular Zernike terms.
+        zobsR : float
+            Obscuration of annular Zernike polynomials.
+
+        Returns
+        -------
+        numpy.ndarray
+            Annular Zernike polynomials with the dimension of (numTerms, dim,
+            dim).
+        numpy.ndarray
+            Gradient of annular Zernike polynomials in x direction.
+        numpy.ndarray
+            Gradient of annular Zernike polynomials in y direction.
+        """
+
+        return self._getExpBasisEntry(numTerms, zobsR)[:3]
+
+    def _getExpBasisEntry(self, numTerms, zobsR, maskHash=None):
+        """Get the entry of cache of the basis of annular Zernike polynomials
+        and their gradients for the serial expansion method.
+
+        Parameters
+        ----------
+        numTerms : int
+            Number of annular Zernike terms.
+        zobsR : float
+            Obscuration of annular Zernike polynomials.
+        maskHash : str, optional
+            Hash of the non-padded mask. If None, it is calculated. (the
+            default is None.)
+
+        Returns
+        -------
+        tuple
+            Basis, its x- and y-gradients, the flattened mask, and the basis
+            and its x- and y-gradients of the pixels in the mask.
+        """
+
+        # Key of the cache
+        if maskHash is None:
+            maskHash = hashlib.sha1(
+                np.ascontiguousarray(self.cMask).tobytes()
+            ).hexdigest()
+        key = (
+            self._inst.getInstFileDir(),
+            self._inst.getDimOfDonutOnSensor(),
+            self._inst.getSensorFactor(),
+            zobsR,
+            numTerms,
+            maskHash,
+        )
+
+        if key in self._expBasisCache:
+            self._expBasisCache.move_to_end(key)
+            return self._expBasisCache[key]
+
+        # Get the x, y coordinate in mask. The element outside mask is 0.
+        xSensor, ySensor = self._inst.getSensorCoor()
+        xSensor = xSensor * self.cMask
+        ySensor = ySensor * self.cMask
+
+        # Calculate the basis and its gradients in one pass for all the terms
+        Zi = ZernikeAnnularBasis(numTerms, xSensor, ySensor, zobsR)
+        dZidx = ZernikeAnnularGradBasis(numTerms, xSensor, ySensor, zobsR, "dx")
+        dZidy = ZernikeAnnularGradBasis(numTerms, xSensor, ySensor, zobsR, "dy")
+
+        # The basis in the mask for the integrations
+        inMask = self.cMask.ravel() != 0
+        ZiFlat = Zi.reshape(numTerms, -1)[:, inMask]
+        dZidxFlat = dZidx.reshape(numTerms, -1)[:, inMask]
+        dZidyFlat = dZidy.reshape(numTerms, -1)[:, inMask]
+
+        # Put in the cache and remove the least recently used one if needed
+        entry = (Zi, dZidx, dZidy, inMask, ZiFlat, dZidxFlat, dZidyFlat)
+        self._expBasisCache[key] = entry
+        if len(self._expBasisCache) > self._expBasisCacheSize:
+            self._expBasisCache.popitem(last=False)
+
+        return entry
+
+    def _getExpBasisInMask(self, numTerms, zobsR, maskHash=None):
+        """Get the basis of annular Zernike polynomials and their gradients of
+        the pixels in the mask for the serial expansion method.
+
+        The basis is cached with the one of _getExpBasis().
+
+        Parameters
+        ----------
+        numTerms : int
+            Number of annular Zernike terms.
+        zobsR : float
+            Obscuration of annular Zernike polynomials.
+        maskHash : str, optional
+            Hash of the non-padded mask. If None, it is calculated. (the
+            default is None.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Annular Zernike polynomials with the dimension of (numTerms, dim,
+            dim).
+        numpy.ndarray[bool]
+            Flattened mask.
+        numpy.ndarray
+            Annular Zernike polynomials in the mask with the dimension of
+            (numTerms, number of pixels in mask).
+        numpy.ndarray
+            Gradient of annular Zernike polynomials in x direction in the
+            mask.
+        numpy.ndarray
+            Gradient of annular Zernike polynomials in y direction in the
+            mask.
+        """
+
+        entry = self._getExpBasisEntry(numTerms, zobsR, maskHash=maskHash)
+
+        return (entry[0],) + entry[3:]
 
     def _createSignal(self, I1, I2, cliplevel):
         """Calculate the wavefront singal for "fft" to use in solving the
@@ -19,24 +19,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import os
-import re
 import numpy as np
+import scipy.fft
 
-from scipy.ndimage import generate_binary_structure, iterate_structure
-from scipy.ndimage.morphology import binary_dilation, binary_erosion
+from contextlib import contextmanager
+from scipy.ndimage import shift
 from scipy.interpolate import RectBivariateSpline
-from scipy.signal import correlate
-
-from lsst.ts.wep.ParamReader import ParamReader
-from lsst.ts.wep.cwfs.Tool import (
-    padArray,
-    extractArray,
-    ZernikeAnnularGrad,
-    ZernikeAnnularJacobian,
-)
+
+from lsst.ts.wep.cwfs.Tool import ZernikeAnnularDerivatives
 from lsst.ts.wep.cwfs import mathcwfs
 from lsst.ts.wep.cwfs.Image import Image
+from lsst.ts.wep.cwfs.OffAxisCoeffStore import getSharedOffAxisCoeffStore
+from lsst.ts.wep.cwfs.ProjectionMaskCloser import ProjectionMaskCloser
 from lsst.ts.wep.Utility import DefocalType, CentroidFindType
 
 
@@ -67,6 +61,13 @@ class CompensableImage(object):
         # Defocused offset in files of off-axis correction
         self.offAxisOffset = 0.0
 
+        # Lookup table of off-axis correction. The polynomials are evaluated
+        # directly if it is None.
+        self._offAxisLookupTable = None
+
+        # Closing of the projection of pupil in the compensation
+        self._maskCloser = None
+
         # Ture if the image gets the over-compensation
         self.caustic = False
 
@@ -239,6 +240,7 @@ class CompensableImage(object):
 
         self.offAxisCoeff = np.array([])
         self.offAxisOffset = 0.0
+        self._offAxisLookupTable = None
 
         self.caustic = False
 
@@ -361,7 +363,7 @@ class CompensableImage(object):
 
         return fieldDist
 
-    def compensate(self, inst, algo, zcCol, model):
+    def compensate(self, inst, algo, zcCol, model, geometryCache=None):
         """Calculate the image compensated from the affection of wavefront.
 
         Parameters
@@ -375,6 +377,9 @@ class CompensableImage(object):
             Coefficients of wavefront.
         model : str
             Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        geometryCache : ProjectionGeometryCache, optional
+            Cache of the projection without the wavefront. (the default is
+            None.)
 
         Raises
         ------
@@ -409,7 +414,14 @@ class CompensableImage(object):
 
         # Set up the mapping
         lutxp, lutyp, J = self._aperture2image(
-            inst, algo, zcCol, lutx, luty, projSamples, model
+            inst,
+            algo,
+            zcCol,
+            lutx,
+            luty,
+            projSamples,
+            model,
+            geometryCache=geometryCache,
         )
 
         show_lutxyp = self._showProjection(
@@ -419,18 +431,11 @@ class CompensableImage(object):
             self.caustic = True
             return
 
-        # Extend the dimension of image by 20 pixel in x and y direction
-        show_lutxyp = padArray(show_lutxyp, projSamples + 20)
-
-        # Get the binary matrix of image on pupil plane if raytrace=False
-        struct0 = generate_binary_structure(2, 1)
-        struct = iterate_structure(struct0, 4)
-        struct = binary_dilation(struct, structure=struct0, iterations=2).astype(int)
-        show_lutxyp = binary_dilation(show_lutxyp, structure=struct)
-        show_lutxyp = binary_erosion(show_lutxyp, structure=struct)
-
-        # Extract the region from the center of image and get the original one
-        show_lutxyp = extractArray(show_lutxyp, projSamples)
+        # Get the binary matrix of image on pupil plane if raytrace=False by
+        # the closing with the preallocated buffers
+        if (self._maskCloser is None) or (self._maskCloser.getDim() != projSamples):
+            self._maskCloser = ProjectionMaskCloser(projSamples)
+        show_lutxyp = self._maskCloser.close(show_lutxyp)
 
         # Recenter the image
         imgRecenter = self.centerOnProjection(
@@ -438,27 +443,15 @@ class CompensableImage(object):
         )
         self.updateImage(imgRecenter)
 
-        # Construct the interpolant to get the intensity on (x', p') plane
-        # that corresponds to the grid points on (x,y)
-        yp, xp = np.mgrid[
-            -(sm / 2 - 0.5) : (sm / 2 + 0.5), -(sm / 2 - 0.5) : (sm / 2 + 0.5)
-        ]
-
-        xp = xp / (sm / 2 / sensorFactor)
-        yp = yp / (sm / 2 / sensorFactor)
-
         # Put the NaN to be 0 for the interpolate to use
         lutxp[np.isnan(lutxp)] = 0
         lutyp[np.isnan(lutyp)] = 0
 
-        # Construct the function for interpolation
-        ip = RectBivariateSpline(yp[:, 0], xp[0, :], self.getImg(), kx=1, ky=1)
-
-        # Construct the projected image by the interpolation
-        lutIp = np.zeros(lutxp.shape[0] * lutxp.shape[1])
-        for ii, (xx, yy) in enumerate(zip(lutxp.ravel(), lutyp.ravel())):
-            lutIp[ii] = ip(yy, xx)
-        lutIp = lutIp.reshape(lutxp.shape)
+        # Construct the projected image by the interpolation of intensity on
+        # (x', y') plane that corresponds to the grid points on (x,y)
+        lutIp = self._resampleImg(
+            self.getImg(), lutxp, lutyp, sensorFactor, algo.getImgInterpOrder()
+        )
 
         # Calaculate the image on focal plane with compensation based on flux
         # conservation
@@ -484,7 +477,52 @@ class CompensableImage(object):
         imgCompensate[imgCompensate < 0] = 0
         self.updateImage(imgCompensate)
 
-    def _aperture2image(self, inst, algo, zcCol, lutx, luty, projSamples, model):
+    def _resampleImg(self, img, lutxp, lutyp, sensorFactor, interpOrder=1):
+        """Resample the image on the projected x, y-coordinate.
+
+        All the points are evaluated in a single call of spline instead of
+        one point at a time.
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            Image to resample.
+        lutxp : numpy.ndarray
+            Projected x-coordinate to evaluate. The NaN is not allowed.
+        lutyp : numpy.ndarray
+            Projected y-coordinate to evaluate. The NaN is not allowed.
+        sensorFactor : float
+            Sensor factor.
+        interpOrder : int, optional
+            Order of spline. 1 is the bilinear interpolation and up to 5 is
+            supported. (the default is 1.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Resampled image with the same shape as lutxp.
+        """
+
+        # Grid points of image on (x', y') plane
+        sm = img.shape[0]
+        yp, xp = np.mgrid[
+            -(sm / 2 - 0.5) : (sm / 2 + 0.5), -(sm / 2 - 0.5) : (sm / 2 + 0.5)
+        ]
+
+        xp = xp / (sm / 2 / sensorFactor)
+        yp = yp / (sm / 2 / sensorFactor)
+
+        # Construct the function for interpolation
+        ip = RectBivariateSpline(
+            yp[:, 0], xp[0, :], img, kx=interpOrder, ky=interpOrder
+        )
+
+        # Evaluate at the scattered points instead of the grid
+        return ip(lutyp, lutxp, grid=False)
+
+    def _aperture2image(
+        self, inst, algo, zcCol, lutx, luty, projSamples, model, geometryCache=None
+    ):
         """Calculate the x, y-coordinate on the focal plane and the related
         Jacobian matrix.
 
@@ -507,6 +545,9 @@ class CompensableImage(object):
             magnification ratio of donut image.
         model : str
             Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        geometryCache : ProjectionGeometryCache, optional
+            Cache of the projection without the wavefront. (the default is
+            None.)
 
         Returns
         -------
@@ -518,6 +559,159 @@ class CompensableImage(object):
             Jacobian matrix between the pupil and focal plane.
         """
 
+        # The projection without the wavefront only depends on the field
+        # position instead of the image
+        geometry = None
+        if geometryCache is not None:
+            key = geometryCache.getKey(
+                inst,
+                model,
+                self.fieldX,
+                self.fieldY,
+                "projection",
+                self.defocalType,
+                self._offAxisLookupTable is not None,
+                projSamples,
+                algo.getOffAxisPolyOrder(),
+            )
+            geometry = geometryCache.get(key)
+
+        if geometry is None:
+            with self._useFieldOfCache(inst, model, geometryCache):
+                geometry = self._calcProjGeometry(
+                    inst, algo, lutx, luty, projSamples, model
+                )
+            if geometry is None:
+                return
+
+            if geometryCache is not None:
+                geometryCache.put(key, geometry)
+
+        lutx = geometry["lutx"]
+        luty = geometry["luty"]
+        lutxp = geometry["lutxp"]
+        lutyp = geometry["lutyp"]
+        myC = geometry["myC"]
+
+        # Obscuration of annular aperture
+        zobsR = algo.getObsOfZernikes()
+
+        # Calculate the x, y-coordinate on focal plane
+        # x' = F(x,y)*x + C*(dW/dx), y' = F(x,y)*y + C*(dW/dy)
+
+        # In Model basis (zer: Zernike polynomials)
+        if zcCol.ndim == 1:
+            # Evaluate all the derivatives of Zernike polynomials in one call.
+            # The Jacobian is only needed by the paraxial model.
+            zDer = ZernikeAnnularDerivatives(
+                zcCol, lutx, luty, zobsR, withJacobian=(model == "paraxial")
+            )
+
+            lutxp = lutxp + myC * zDer["dx"]
+            lutyp = lutyp + myC * zDer["dy"]
+
+        # Make the sign to be consistent
+        if self.defocalType == DefocalType.Extra:
+            lutxp = -lutxp
+            lutyp = -lutyp
+
+        # Calculate the Jacobian matrix
+        # In Model basis (zer: Zernike polynomials)
+        if zcCol.ndim == 1:
+            if model == "paraxial":
+                J = 1 + myC * zDer["1st"] + myC ** 2 * zDer["2nd"]
+
+            elif model in ("onAxis", "offAxis"):
+                # Add the wavefront part to the derivatives of projection
+                xpox = geometry["xpox"] + myC * zDer["dx2"]
+                ypoy = geometry["ypoy"] + myC * zDer["dy2"]
+
+                temp = myC * zDer["dxy"]
+                xpoy = geometry["xpoy"] + temp
+                ypox = geometry["ypox"] + temp
+
+                J = xpox * ypoy - xpoy * ypox
+
+        return lutxp, lutyp, J
+
+    @contextmanager
+    def _useFieldOfCache(self, inst, model, geometryCache):
+        """Use the field position that the item of geometry cache is
+        calculated at.
+
+        The field position and the coefficients of off-axis correction are
+        restored after the calculation.
+
+        Parameters
+        ----------
+        inst : Instrument
+            Instrument to use.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        geometryCache : ProjectionGeometryCache or None
+            Cache of the projection and masks. Nothing is changed if it is
+            None.
+        """
+
+        fieldXY = (self.fieldX, self.fieldY)
+        fieldInUse = fieldXY
+        if geometryCache is not None:
+            fieldInUse = geometryCache.getFieldInUse(model, *fieldXY)
+
+        if fieldInUse == fieldXY:
+            yield
+            return
+
+        offAxisCorr = (self.offAxisCoeff, self.offAxisOffset)
+        try:
+            self.fieldX, self.fieldY = fieldInUse
+            if self.offAxisCoeff.size > 0:
+                fieldDist = self._getFieldDistFromOrigin(minDist=0.0)
+                (
+                    self.offAxisCoeff,
+                    self.offAxisOffset,
+                ) = getSharedOffAxisCoeffStore().getCoeff(
+                    inst.getInstFileDir(), fieldDist
+                )
+            yield
+
+        finally:
+            self.fieldX, self.fieldY = fieldXY
+            self.offAxisCoeff, self.offAxisOffset = offAxisCorr
+
+    def _calcProjGeometry(self, inst, algo, lutx, luty, projSamples, model):
+        """Calculate the projection between the pupil and focal plane without
+        the wavefront.
+
+        Parameters
+        ----------
+        inst : Instrument
+            Instrument to use.
+        algo : Algorithm
+            Algorithm to solve the Poisson's equation. It can by done by the
+            fast Fourier transform or serial expansion.
+        lutx : numpy.ndarray
+            X-coordinate on pupil plane. It will be modified.
+        luty : numpy.ndarray
+            Y-coordinate on pupil plane. It will be modified.
+        projSamples : int
+            Dimension of projected image. This value considers the
+            magnification ratio of donut image.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+
+        Returns
+        -------
+        dict
+            Projection without the wavefront. The keys are "lutx" and "luty"
+            for the x, y-coordinate on pupil plane with the extended boundary,
+            "lutxp" and "lutyp" for the x, y-coordinate on focal plane, "myC"
+            for the constant of reduced coordinate, and "xpox", "ypoy",
+            "xpoy", and "ypox" for the derivatives of x, y-coordinate on focal
+            plane (None in the "paraxial" model). None if the optical model is
+            unknown.
+        """
+
         # Get the radius: R = D/2
         R = inst.getApertureDiameter() / 2
 
@@ -532,11 +726,8 @@ class CompensableImage(object):
         focalLength = inst.getFocalLength()
         myC = -focalLength * (focalLength - l) / l / R ** 2
 
-        # Get the functions to do the off-axis correction by numerical fitting
         # Order to do the off-axis correction. The order is 10 now.
         offAxisPolyOrder = algo.getOffAxisPolyOrder()
-        polyFunc = self._getFunction("poly%d_2D" % offAxisPolyOrder)
-        polyGradFunc = self._getFunction("poly%dGrad" % offAxisPolyOrder)
 
         # Calculate the distance to center
         lutr = np.sqrt(lutx ** 2 + luty ** 2)
@@ -572,6 +763,12 @@ class CompensableImage(object):
         lutx[idxinbd] = lutx[idxinbd] / lutr[idxinbd] * obscuration
         luty[idxinbd] = luty[idxinbd] / lutr[idxinbd] * obscuration
 
+        # Derivatives of x, y-coordinate on focal plane without the wavefront
+        xpox = None
+        ypoy = None
+        xpoy = None
+        ypox = None
+
         # Get the corrected x, y-coordinate on focal plane (lutxp, lutyp)
         if model == "paraxial":
             # No correction is needed in "paraxial" model
@@ -598,23 +795,30 @@ class CompensableImage(object):
             lutxp = maskScalingFactor * myA * lutx
             lutyp = maskScalingFactor * myA * luty
 
-        elif model == "offAxis":
+            xpox = (
+                maskScalingFactor
+                * myA
+                * (1 + lutx ** 2 * R ** 2.0 / (focalLength ** 2 - R ** 2 * lutr ** 2))
+            )
 
-            # Get the coefficient of polynomials for off-axis correction
-            tt = self.offAxisOffset
+            ypoy = (
+                maskScalingFactor
+                * myA
+                * (1 + luty ** 2 * R ** 2.0 / (focalLength ** 2 - R ** 2 * lutr ** 2))
+            )
 
-            cx = (self.offAxisCoeff[0, :] - self.offAxisCoeff[2, :]) * (tt + l) / (
-                2 * tt
-            ) + self.offAxisCoeff[2, :]
-            cy = (self.offAxisCoeff[1, :] - self.offAxisCoeff[3, :]) * (tt + l) / (
-                2 * tt
-            ) + self.offAxisCoeff[3, :]
+            xpoy = (
+                maskScalingFactor
+                * myA
+                * lutx
+                * luty
+                * (R ** 2)
+                / (focalLength ** 2 - R ** 2 * lutr ** 2)
+            )
+
+            ypox = xpoy
 
-            # This will be inverted back by typesign later on.
-            # We do the inversion here to make the (x,y)->(x',y') equations has
-            # the same form as the paraxial case.
-            cx = np.sign(l) * cx
-            cy = np.sign(l) * cy
+        elif model == "offAxis":
 
             # Do the orthogonalization: x'=1/sqrt(2)*(x+y), y'=1/sqrt(2)*(x-y)
             # Calculate the rotation angle for the orthogonalization
@@ -657,8 +861,26 @@ class CompensableImage(object):
             luty0 = -lutx * sintheta + luty * costheta
 
             # Use the mapping at reference orientation
-            lutxp0 = polyFunc(cx, lutx0, y=luty0)
-            lutyp0 = polyFunc(cy, lutx0, y=luty0)
+            if self._offAxisLookupTable is None:
+                (
+                    lutxp0,
+                    lutyp0,
+                    cxOx0,
+                    cxOy0,
+                    cyOx0,
+                    cyOy0,
+                ) = self._evalOffAxisPoly(l, lutx0, luty0, offAxisPolyOrder)
+            else:
+                (
+                    lutxp0,
+                    lutyp0,
+                    cxOx0,
+                    cxOy0,
+                    cyOx0,
+                    cyOy0,
+                ) = self._offAxisLookupTable.evaluate(
+                    self._getFieldDistFromOrigin(minDist=0.0), l, lutx0, luty0
+                )
 
             # Rotate back to focal plane
             lutxp = lutxp0 * costheta - lutyp0 * sintheta
@@ -673,101 +895,97 @@ class CompensableImage(object):
             lutxp = lutxp * reduced_coordi_factor
             lutyp = lutyp * reduced_coordi_factor
 
-        else:
-            print("Wrong optical model type in compensate. \n")
-            return
-
-        # Obscuration of annular aperture
-        zobsR = algo.getObsOfZernikes()
-
-        # Calculate the x, y-coordinate on focal plane
-        # x' = F(x,y)*x + C*(dW/dx), y' = F(x,y)*y + C*(dW/dy)
-
-        # In Model basis (zer: Zernike polynomials)
-        if zcCol.ndim == 1:
-            lutxp = lutxp + myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dx")
-            lutyp = lutyp + myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dy")
-
-        # Make the sign to be consistent
-        if self.defocalType == DefocalType.Extra:
-            lutxp = -lutxp
-            lutyp = -lutyp
+            xp0ox = cxOx0 * costheta - cxOy0 * sintheta
+            yp0ox = cyOx0 * costheta - cyOy0 * sintheta
+            xp0oy = cxOx0 * sintheta + cxOy0 * costheta
+            yp0oy = cyOx0 * sintheta + cyOy0 * costheta
 
-        # Calculate the Jacobian matrix
-        # In Model basis (zer: Zernike polynomials)
-        if zcCol.ndim == 1:
-            if model == "paraxial":
-                J = (
-                    1
-                    + myC * ZernikeAnnularJacobian(zcCol, lutx, luty, zobsR, "1st")
-                    + myC ** 2 * ZernikeAnnularJacobian(zcCol, lutx, luty, zobsR, "2nd")
-                )
-
-            elif model == "onAxis":
-                xpox = maskScalingFactor * myA * (
-                    1 + lutx ** 2 * R ** 2.0 / (focalLength ** 2 - R ** 2 * lutr ** 2)
-                ) + myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dx2")
-
-                ypoy = maskScalingFactor * myA * (
-                    1 + luty ** 2 * R ** 2.0 / (focalLength ** 2 - R ** 2 * lutr ** 2)
-                ) + myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dy2")
-
-                xpoy = maskScalingFactor * myA * lutx * luty * R ** 2 / (
-                    focalLength ** 2 - R ** 2 * lutr ** 2
-                ) + myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dxy")
+            xpox = (xp0ox * costheta - yp0ox * sintheta) * reduced_coordi_factor
+            ypoy = (xp0oy * sintheta + yp0oy * costheta) * reduced_coordi_factor
 
-                ypox = xpoy
+            # xpoy-flipud(rot90(ypox))==0 is true
+            xpoy = (xp0oy * costheta - yp0oy * sintheta) * reduced_coordi_factor
+            ypox = (xp0ox * sintheta + yp0ox * costheta) * reduced_coordi_factor
 
-                J = xpox * ypoy - xpoy * ypox
+        else:
+            print("Wrong optical model type in compensate. \n")
+            return
 
-            elif model == "offAxis":
-                xp0ox = (
-                    polyGradFunc(cx, lutx0, luty0, "dx") * costheta
-                    - polyGradFunc(cx, lutx0, luty0, "dy") * sintheta
-                )
+        return dict(
+            lutx=lutx,
+            luty=luty,
+            lutxp=lutxp,
+            lutyp=lutyp,
+            myC=myC,
+            xpox=xpox,
+            ypoy=ypoy,
+            xpoy=xpoy,
+            ypox=ypox,
+        )
 
-                yp0ox = (
-                    polyGradFunc(cy, lutx0, luty0, "dx") * costheta
-                    - polyGradFunc(cy, lutx0, luty0, "dy") * sintheta
-                )
+    def _evalOffAxisPoly(self, defocalDis, x, y, offAxisPolyOrder):
+        """Evaluate the off-axis polynomial mapping at the reference
+        orientation.
 
-                xp0oy = (
-                    polyGradFunc(cx, lutx0, luty0, "dx") * sintheta
-                    + polyGradFunc(cx, lutx0, luty0, "dy") * costheta
-                )
+        Parameters
+        ----------
+        defocalDis : float
+            Defocal distance in m. It is positive for the intra-focal image
+            and negative for the extra-focal image.
+        x : numpy.ndarray
+            X-coordinate on pupil plane at the reference orientation.
+        y : numpy.ndarray
+            Y-coordinate on pupil plane at the reference orientation.
+        offAxisPolyOrder : int
+            Order of off-axis correction.
 
-                yp0oy = (
-                    polyGradFunc(cy, lutx0, luty0, "dx") * sintheta
-                    + polyGradFunc(cy, lutx0, luty0, "dy") * costheta
-                )
+        Returns
+        -------
+        numpy.ndarray
+            X-coordinate on focal plane at the reference orientation.
+        numpy.ndarray
+            Y-coordinate on focal plane at the reference orientation.
+        numpy.ndarray
+            X-derivative of x-coordinate on focal plane.
+        numpy.ndarray
+            Y-derivative of x-coordinate on focal plane.
+        numpy.ndarray
+            X-derivative of y-coordinate on focal plane.
+        numpy.ndarray
+            Y-derivative of y-coordinate on focal plane.
+        """
 
-                xpox = (
-                    xp0ox * costheta - yp0ox * sintheta
-                ) * reduced_coordi_factor + myC * ZernikeAnnularGrad(
-                    zcCol, lutx, luty, zobsR, "dx2"
-                )
+        # Get the functions to do the off-axis correction by numerical fitting
+        polyFunc = self._getFunction("poly%d_2D" % offAxisPolyOrder)
+        polyGradFunc = self._getFunction("poly%dGrad" % offAxisPolyOrder)
 
-                ypoy = (
-                    xp0oy * sintheta + yp0oy * costheta
-                ) * reduced_coordi_factor + myC * ZernikeAnnularGrad(
-                    zcCol, lutx, luty, zobsR, "dy2"
-                )
+        # Get the coefficient of polynomials for off-axis correction
+        tt = self.offAxisOffset
+        l = defocalDis
 
-                temp = myC * ZernikeAnnularGrad(zcCol, lutx, luty, zobsR, "dxy")
+        cx = (self.offAxisCoeff[0, :] - self.offAxisCoeff[2, :]) * (tt + l) / (
+            2 * tt
+        ) + self.offAxisCoeff[2, :]
+        cy = (self.offAxisCoeff[1, :] - self.offAxisCoeff[3, :]) * (tt + l) / (
+            2 * tt
+        ) + self.offAxisCoeff[3, :]
 
-                # if temp==0,xpoy doesn't need to be symmetric about x=y
-                xpoy = (
-                    xp0oy * costheta - yp0oy * sintheta
-                ) * reduced_coordi_factor + temp
+        # This will be inverted back by typesign later on.
+        # We do the inversion here to make the (x,y)->(x',y') equations has
+        # the same form as the paraxial case.
+        cx = np.sign(l) * cx
+        cy = np.sign(l) * cy
 
-                # xpoy-flipud(rot90(ypox))==0 is true
-                ypox = (
-                    xp0ox * sintheta + yp0ox * costheta
-                ) * reduced_coordi_factor + temp
+        xp = polyFunc(cx, x, y=y)
+        yp = polyFunc(cy, x, y=y)
 
-                J = xpox * ypoy - xpoy * ypox
+        # Gradients of polynomials at reference orientation
+        xpOx = polyGradFunc(cx, x, y, "dx")
+        xpOy = polyGradFunc(cx, x, y, "dy")
+        ypOx = polyGradFunc(cy, x, y, "dx")
+        ypOy = polyGradFunc(cy, x, y, "dy")
 
-        return lutxp, lutyp, J
+        return xp, yp, xpOx, xpOy, ypOx, ypOy
 
     def _getFunction(self, name):
         """Decide to call the function of _poly10_2D() or _poly10Grad().
@@ -1021,9 +1239,12 @@ class CompensableImage(object):
 
         return cax, cay, cbx, cby
 
-    def centerOnProjection(self, img, template, window=20):
+    def centerOnProjection(self, img, template, window=20, subPixel=False):
         """Center the image to the template's center.
 
+        Only the shifts in the window are considered, and the cross-correlation
+        is calculated for these shifts only by the fast Fourier transform.
+
         Parameters
         ----------
         img : numpy.array
@@ -1037,6 +1258,10 @@ class CompensableImage(object):
             Size of window in pixel. Assume the difference of centers of input
             image and template is in this range (e.g. [-window/2, window/2] if
             1D). (the default is 20.)
+        subPixel : bool, optional
+            Refine the shift to the sub-pixel by the parabola fitting of peak
+            of cross-correlation and shift the image by the bilinear
+            interpolation after the integer shift. (the default is False.)
 
         Returns
         -------
@@ -1044,117 +1269,137 @@ class CompensableImage(object):
             Recentered image.
         """
 
-        # Calculate the cross-correlate
-        corr = correlate(img, template, mode="same")
-
-        # Calculate the shifts of center
-
-        # Only consider the shifts in a cetrain window (range)
+        # Calculate the cross-correlate of shifts in a cetrain window (range)
         # Align the input image to the center of template
         length = template.shape[0]
         center = length // 2
 
         r = window // 2
+        corr = self._calcCorrInWindow(img, template, r)
 
-        mask = np.zeros(corr.shape)
-        mask[center - r : center + r, center - r : center + r] = 1
-        idx = np.argmax(corr * mask)
-
-        # The above 'idx' is an interger. Need to rematch it to the
-        # two-dimention position (x and y)
-        xmatch = idx % length
-        ymatch = idx // length
+        # Calculate the shifts of center
+        if (corr.size == 0) or (corr.max() <= 0):
+            # There is no positive peak in the window. Keep the same shifts as
+            # the argmax of masked cross-correlation of whole image, which is
+            # the first pixel of image.
+            dx = center
+            dy = center
+            corr = np.array([])
+        else:
+            iy, ix = np.unravel_index(np.argmax(corr), corr.shape)
 
-        dx = center - xmatch
-        dy = center - ymatch
+            # The shift of template to match the input image is ix - r and
+            # iy - r
+            dx = r - ix
+            dy = r - iy
 
         # Shift/ recenter the input image
-        return np.roll(np.roll(img, dx, axis=1), dy, axis=0)
+        imgRecenter = np.roll(np.roll(img, dx, axis=1), dy, axis=0)
+
+        if subPixel and (corr.size != 0):
+            subDy = self._calcSubPixelPeak(corr[:, ix], iy)
+            subDx = self._calcSubPixelPeak(corr[iy, :], ix)
+            if (subDx != 0) or (subDy != 0):
+                imgRecenter = shift(
+                    imgRecenter, (-subDy, -subDx), order=1, mode="nearest"
+                )
 
-    def setOffAxisCorr(self, inst, order):
-        """Set the coefficients of off-axis correction for x, y-projection of
-        intra- and extra-image.
+        return imgRecenter
 
-        This is for the mapping of coordinate from the telescope apearature to
-        defocal image plane.
+    def _calcCorrInWindow(self, img, template, halfWindow):
+        """Calculate the cross-correlation of image and template for the
+        shifts in the window.
+
+        The circular cross-correlation by the fast Fourier transform is used.
+        The images are padded by the half window at least to avoid the
+        wrap-around of the shifts in the window.
 
         Parameters
         ----------
-        inst : Instrument
-            Instrument to use.
-        order : int
-            Up to order-th of off-axis correction.
-        """
+        img : numpy.array
+            Image. The input image needs to be a n-by-n matrix.
+        template : numpy.array
+            Template image to have the same dimention as the input image.
+        halfWindow : int
+            Half size of window in pixel.
 
-        # List of configuration
-        configList = ["cxin", "cyin", "cxex", "cyex"]
+        Returns
+        -------
+        numpy.array
+            Cross-correlation sum(img[n + s] * template[n]) of shifts, s, from
+            -halfWindow to halfWindow - 1 in each direction. The shift of
+            element [i, j] is (i - halfWindow, j - halfWindow) in (y, x).
+        """
 
-        # Get all files in the directory
-        instDir = inst.getInstFileDir()
-        fileList = [
-            f for f in os.listdir(instDir) if os.path.isfile(os.path.join(instDir, f))
-        ]
+        if halfWindow <= 0:
+            return np.zeros((0, 0))
 
-        # Read files
-        offAxisCoeff = []
-        for config in configList:
+        length = template.shape[0]
+        dimFft = scipy.fft.next_fast_len(length + halfWindow, real=True)
+        shape = (dimFft, dimFft)
 
-            # Construct the configuration file name
-            for fileName in fileList:
-                m = re.match(r"\S*%s\S*.yaml" % config, fileName)
-                if m is not None:
-                    matchFileName = m.group()
-                    break
+        imgFft = scipy.fft.rfft2(img, s=shape)
+        imgFft *= np.conj(scipy.fft.rfft2(template, s=shape))
+        corrCircular = scipy.fft.irfft2(imgFft, s=shape, overwrite_x=True)
 
-            filePath = os.path.join(instDir, matchFileName)
-            corrCoeff, offset = self._getOffAxisCorrSingle(filePath)
-            offAxisCoeff.append(corrCoeff)
+        shifts = np.arange(-halfWindow, halfWindow) % dimFft
 
-        # Give the values
-        self.offAxisCoeff = np.array(offAxisCoeff)
-        self.offAxisOffset = offset
+        return corrCircular[np.ix_(shifts, shifts)]
 
-    def _getOffAxisCorrSingle(self, confFile):
-        """Get the image-related pamameters for the off-axis distortion by the
-        linear approximation with a series of fitted parameters with LSST
-        ZEMAX model.
+    def _calcSubPixelPeak(self, values, idxPeak):
+        """Calculate the sub-pixel offset of peak by the parabola fitting of
+        the peak and its neighbors.
 
         Parameters
         ----------
-        confFile : str
-            Path of configuration file.
+        values : numpy.array
+            1D values.
+        idxPeak : int
+            Index of peak.
 
         Returns
         -------
-        numpy.ndarray
-            Coefficients for the off-axis distortion based on the linear
-            response.
         float
-            Defocal distance in m.
+            Offset of peak in [-0.5, 0.5]. It is 0 if the peak is at the
+            boundary.
         """
 
-        fieldDist = self._getFieldDistFromOrigin(minDist=0.0)
+        if (idxPeak <= 0) or (idxPeak >= len(values) - 1):
+            return 0.0
 
-        # Read the configuration file
-        paramReader = ParamReader()
-        paramReader.setFilePath(confFile)
-        cdata = paramReader.getMatContent()
+        left, peak, right = values[idxPeak - 1 : idxPeak + 2]
+        denominator = left - 2 * peak + right
+        if denominator >= 0:
+            return 0.0
 
-        # Record the offset (defocal distance)
-        offset = cdata[0, 0]
+        return float(np.clip(0.5 * (left - right) / denominator, -0.5, 0.5))
 
-        # Take the reference parameters
-        c = cdata[:, 1:]
+    def setOffAxisCorr(self, inst, order, lookupTable=None):
+        """Set the coefficients of off-axis correction for x, y-projection of
+        intra- and extra-image.
 
-        # Get the ruler, which is the distance to center
-        # ruler is between 1.51 and 1.84 degree here
-        ruler = np.sqrt(c[:, 0] ** 2 + c[:, 1] ** 2)
+        This is for the mapping of coordinate from the telescope apearature to
+        defocal image plane.
 
-        # Get the fitted parameters for off-axis correction by linear
-        # approximation
-        corr_coeff = self._linearApprox(fieldDist, ruler, c[:, 2:])
+        Parameters
+        ----------
+        inst : Instrument
+            Instrument to use.
+        order : int
+            Up to order-th of off-axis correction.
+        lookupTable : OffAxisLookupTable, optional
+            Lookup table of off-axis correction used in the compensation
+            instead of the evaluation of polynomials. (the default is None.)
+        """
+
+        self._offAxisLookupTable = lookupTable
 
-        return corr_coeff, offset
+        # The tables of off-axis correction are read once in the process and
+        # shared by all images
+        fieldDist = self._getFieldDistFromOrigin(minDist=0.0)
+        self.offAxisCoeff, self.offAxisOffset = getSharedOffAxisCoeffStore().getCoeff(
+            inst.getInstFileDir(), fieldDist
+        )
 
     def _interpMaskParam(self, fieldX, fieldY, maskParam):
         """Get the mask-related pamameters for the off-axis distortion and
@@ -1383,7 +1628,9 @@ class CompensableImage(object):
 
         return show_lutxyp
 
-    def makeMask(self, inst, model, boundaryT, maskScalingFactorLocal):
+    def makeMask(
+        self, inst, model, boundaryT, maskScalingFactorLocal, geometryCache=None
+    ):
         """Get the binary mask which considers the obscuration and off-axis
         correction.
 
@@ -1404,6 +1651,45 @@ class CompensableImage(object):
             zero.
         maskScalingFactorLocal : float
             Mask scaling factor (for fast beam) for local correction.
+        geometryCache : ProjectionGeometryCache, optional
+            Cache of the masks. (the default is None.)
+        """
+
+        # The masks only depend on the field position instead of the image
+        if geometryCache is not None:
+            key = geometryCache.getKey(
+                inst,
+                model,
+                self.fieldX,
+                self.fieldY,
+                "mask",
+                boundaryT,
+                maskScalingFactorLocal,
+            )
+            masks = geometryCache.get(key)
+            if masks is not None:
+                self.pMask, self.cMask = masks
+                return
+
+        with self._useFieldOfCache(inst, model, geometryCache):
+            self._calcMask(inst, model, boundaryT, maskScalingFactorLocal)
+
+        if geometryCache is not None:
+            geometryCache.put(key, (self.pMask, self.cMask))
+
+    def _calcMask(self, inst, model, boundaryT, maskScalingFactorLocal):
+        """Calculate the padded and non-padded masks.
+
+        Parameters
+        ----------
+        inst : Instrument
+            Instrument to use.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        boundaryT : int
+            Extended boundary in pixel.
+        maskScalingFactorLocal : float
+            Mask scaling factor (for fast beam) for local correction.
         """
 
         dimOfDonut = inst.getDimOfDonutOnSensor()
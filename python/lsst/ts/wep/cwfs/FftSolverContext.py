@@ -0,0 +1,359 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import scipy.fft
+from scipy.ndimage import generate_binary_structure, iterate_structure
+from scipy.ndimage.filters import correlate1d
+from scipy.ndimage.morphology import binary_dilation, binary_erosion
+
+from lsst.ts.wep.cwfs.Tool import padArray
+
+
+class FftSolverContext(object):
+    def __init__(self, padDim, aperturePixelSize, pMask, boundaryT):
+        """Initialize the FftSolverContext class.
+
+        Hold the quantities of "fft" Poisson solver that only depend on the
+        pad dimension, aperture pixel size, and padded mask, so they can be
+        reused in the inner and outer loop iterations.
+
+        Parameters
+        ----------
+        padDim : int
+            FFT pad dimension in pixel. It should be the order of 2.
+        aperturePixelSize : float
+            Aperture pixel size in meter.
+        pMask : numpy.ndarray[int]
+            Padded mask for use at the offset planes.
+        boundaryT : int
+            Boundary thickness in pixel to set dW/dn = 0.
+
+        Raises
+        ------
+        ValueError
+            The pad dimension is not an even number or is smaller than the
+            dimension of mask.
+        """
+
+        padDim = int(padDim)
+        if (padDim % 2 != 0) or (padDim < pMask.shape[0]):
+            raise ValueError(
+                "The pad dimension should be an even number >= mask dimension."
+            )
+
+        self._padDim = padDim
+        self._aperturePixelSize = aperturePixelSize
+        self._boundaryT = int(boundaryT)
+
+        self._pMask = np.array(pMask, dtype=int)
+        self._pMaskIdx = self._pMask == 1
+        self._pMaskPadIdx = padArray(self._pMask, padDim) == 1
+
+        # Begining index of the mask in the padded array
+        self._padIdx = int(np.floor((padDim - self._pMask.shape[0]) / 2))
+
+        self._u2v2 = self._calcU2V2()
+
+        # The fftshift() is identical to ifftshift() for the even dimension.
+        # The shifts before and after the filtering cancel each other, so the
+        # filter is applied to the real-to-complex transform of signal with
+        # the zero frequency at the origin directly.
+        self._u2v2Rfft = np.fft.ifftshift(self._u2v2)[:, : padDim // 2 + 1].copy()
+
+        self._apringOut, self._apringIn = self._calcRingsOfBoundary()
+
+        # Find the just-outside indices of ring in pixels and the number of
+        # just-inside pixels around them. This is for the use in setting
+        # dWdn = 0
+        bordery, borderx = np.nonzero(self._apringOut)
+        self._borderIdx = (borderx, bordery)
+        self._numOfInPixel = self._calcBoxSum(self._apringIn, self._boundaryT)[
+            self._borderIdx
+        ]
+
+        # Reusable buffer of the padded sensor signal
+        self._sigPad = np.zeros((padDim, padDim))
+
+    def _calcU2V2(self):
+        """Calculate the constant of fft: FT{Delta W} = -4*pi^2*(u^2+v^2) *
+        FT{W}.
+
+        Returns
+        -------
+        numpy.ndarray
+            -4*pi^2*(u^2+v^2) with the origin at the center. The value at the
+            origin is Inf to result in 0 after filtering.
+        """
+
+        # Generate the v, u-coordinates on pupil plane
+        padDim = self._padDim
+        aperturePixelSize = self._aperturePixelSize
+        v, u = np.mgrid[
+            -0.5
+            / aperturePixelSize : 0.5
+            / aperturePixelSize : 1.0
+            / padDim
+            / aperturePixelSize,
+            -0.5
+            / aperturePixelSize : 0.5
+            / aperturePixelSize : 1.0
+            / padDim
+            / aperturePixelSize,
+        ]
+
+        u2v2 = -4 * (np.pi ** 2) * (u * u + v * v)
+
+        # Set origin to Inf to result in 0 at origin after filtering
+        ctrIdx = int(np.floor(padDim / 2.0))
+        u2v2[ctrIdx, ctrIdx] = np.inf
+
+        return u2v2
+
+    def _calcRingsOfBoundary(self):
+        """Calculate the just-outside and just-inside rings of mask.
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Ring just outside the mask.
+        numpy.ndarray[int]
+            Ring just inside the mask.
+        """
+
+        struct = generate_binary_structure(2, 1)
+        struct = iterate_structure(struct, self._boundaryT)
+
+        apringOut = np.logical_xor(
+            binary_dilation(self._pMask, structure=struct), self._pMask
+        ).astype(int)
+        apringIn = np.logical_xor(
+            binary_erosion(self._pMask, structure=struct), self._pMask
+        ).astype(int)
+
+        return apringOut, apringIn
+
+    def _calcBoxSum(self, img, halfWidth):
+        """Calculate the sum of pixels in the (2*halfWidth+1) x
+        (2*halfWidth+1) box around each pixel.
+
+        The pixels outside the image are treated as 0.
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            Image.
+        halfWidth : int
+            Half width of box.
+
+        Returns
+        -------
+        numpy.ndarray
+            Sum of pixels in the box.
+        """
+
+        weights = np.ones(2 * int(halfWidth) + 1)
+        boxSum = correlate1d(
+            np.asarray(img, dtype=float), weights, axis=0, mode="constant"
+        )
+
+        return correlate1d(boxSum, weights, axis=1, mode="constant")
+
+    def _calcMaskedMean(self, img, mask, halfWidth, idx, numOfInPixel):
+        """Calculate the mean of pixels in the mask within the box around the
+        selected pixels.
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            Image.
+        mask : numpy.ndarray[int]
+            Mask of pixels to average.
+        halfWidth : int
+            Half width of box.
+        idx : tuple
+            Row and column indexes of the selected pixels.
+        numOfInPixel : numpy.ndarray
+            Number of pixels in the mask within the box around the selected
+            pixels.
+
+        Returns
+        -------
+        numpy.ndarray
+            Mean of pixels in the mask within the box. It is nan if there is
+            no pixel in the mask.
+        """
+
+        boxSum = self._calcBoxSum(img * mask, halfWidth)[idx]
+
+        maskedMean = np.full(len(boxSum), np.nan)
+        np.divide(boxSum, numOfInPixel, out=maskedMean, where=(numOfInPixel > 0))
+
+        return maskedMean
+
+    def getPadDim(self):
+        """Get the FFT pad dimension in pixel.
+
+        Returns
+        -------
+        int
+            FFT pad dimension.
+        """
+
+        return self._padDim
+
+    def getU2V2(self):
+        """Get the constant of fft: -4*pi^2*(u^2+v^2).
+
+        Returns
+        -------
+        numpy.ndarray
+            -4*pi^2*(u^2+v^2) with the origin at the center.
+        """
+
+        return self._u2v2
+
+    def getRingsOfBoundary(self):
+        """Get the just-outside and just-inside rings of mask.
+
+        Returns
+        -------
+        numpy.ndarray[int]
+            Ring just outside the mask.
+        numpy.ndarray[int]
+            Ring just inside the mask.
+        """
+
+        return self._apringOut, self._apringIn
+
+    def getPaddedMaskIdx(self):
+        """Get the boolean index of padded mask.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            Index of padded mask.
+        """
+
+        return self._pMaskIdx
+
+    def calcWavefront(self, S, numOfThreads=1):
+        """Calculate the wavefront by W = IFT{ FT{S}/(-4*pi^2*(u^2+v^2)) }.
+
+        Parameters
+        ----------
+        S : numpy.ndarray
+            Sensor signal with the dimension of pad dimension.
+        numOfThreads : int, optional
+            Number of threads used in the fast Fourier transform. (the default
+            is 1.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Wavefront with the dimension of pad dimension.
+        """
+
+        SFFT = scipy.fft.rfft2(S, workers=numOfThreads)
+        np.divide(SFFT, self._u2v2Rfft, out=SFFT)
+
+        return scipy.fft.irfft2(SFFT, s=S.shape, overwrite_x=True, workers=numOfThreads)
+
+    def extractWavefront(self, W):
+        """Extract the wavefront in the mask with the zero offset.
+
+        Parameters
+        ----------
+        W : numpy.ndarray
+            Wavefront with the dimension of pad dimension.
+
+        Returns
+        -------
+        numpy.ndarray
+            Wavefront with the dimension of mask. The mean in the mask is 0 and
+            the value outside the mask is 0.
+        """
+
+        dim = self._pMask.shape[0]
+        West = W[self._padIdx : self._padIdx + dim, self._padIdx : self._padIdx + dim]
+
+        # Calculate the offset
+        offset = West[self._pMaskIdx].mean()
+        West = West - offset
+        West[~self._pMaskIdx] = 0
+
+        return West
+
+    def padSignal(self, del2W, Sini):
+        """Extend the estimated signal to the pad dimension and put the initial
+        signal back inside the mask.
+
+        Parameters
+        ----------
+        del2W : numpy.ndarray
+            Estimated sensor signal with the dimension of mask.
+        Sini : numpy.ndarray
+            Initial sensor signal with the dimension of pad dimension.
+
+        Returns
+        -------
+        numpy.ndarray
+            Sensor signal with the dimension of pad dimension. The array is a
+            buffer reused in the next call.
+        """
+
+        dim = self._pMask.shape[0]
+        sigPad = self._sigPad
+        sigPad.fill(0)
+        sigPad[
+            self._padIdx : self._padIdx + dim, self._padIdx : self._padIdx + dim
+        ] = del2W
+        sigPad[self._pMaskPadIdx] = Sini[self._pMaskPadIdx]
+
+        return sigPad
+
+    def setDwdnZero(self, West):
+        """Set dW/dn = 0 around the boundary of mask.
+
+        The wavefront at each pixel just outside the mask is the average of
+        pixels just inside the mask in the box around it.
+
+        Parameters
+        ----------
+        West : numpy.ndarray
+            Estimated wavefront with the dimension of mask.
+
+        Returns
+        -------
+        numpy.ndarray
+            Estimated wavefront with dW/dn = 0 around the boundary.
+        """
+
+        WestdWdn0 = West.copy()
+        WestdWdn0[self._borderIdx] = self._calcMaskedMean(
+            West,
+            self._apringIn,
+            self._boundaryT,
+            self._borderIdx,
+            self._numOfInPixel,
+        )
+
+        return WestdWdn0
@@ -0,0 +1,336 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+import hashlib
+import threading
+import numpy as np
+
+from lsst.ts.wep.ParamReader import ParamReader
+
+
+class OffAxisCoeffStore(object):
+
+    # List of configuration of off-axis correction: x, y-projection of intra-
+    # and extra-image
+    CONFIG_LIST = ("cxin", "cyin", "cxex", "cyex")
+
+    def __init__(self):
+        """Initialize the OffAxisCoeffStore class.
+
+        Hold the tables of off-axis correction of each instrument directory in
+        memory. The tables are read from the configuration files once and the
+        coefficients are interpolated by the field distance. The store is safe
+        to share between threads.
+        """
+
+        # Tables of off-axis correction. The key is the instrument directory
+        # and the value is the tuple of (rulers, parameters, offset).
+        self._tables = dict()
+
+        self._lock = threading.Lock()
+
+    def getNumOfInst(self):
+        """Get the number of instrument directories in the store.
+
+        Returns
+        -------
+        int
+            Number of instrument directories.
+        """
+
+        with self._lock:
+            return len(self._tables)
+
+    def clear(self):
+        """Clear the tables in the store."""
+
+        with self._lock:
+            self._tables.clear()
+
+    def getCoeff(self, instDir, fieldDist):
+        """Get the coefficients of off-axis correction for x, y-projection of
+        intra- and extra-image by the linear approximation.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+        fieldDist : float
+            Field distance from donut to origin (aperature) in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of off-axis correction. The rows are in the order of
+            OffAxisCoeffStore.CONFIG_LIST.
+        float
+            Defocal distance in m.
+        """
+
+        rulers, parameters, offset = self.getTable(instDir)
+
+        offAxisCoeff = np.array(
+            [
+                self._linearApprox(fieldDist, ruler, param)
+                for ruler, param in zip(rulers, parameters)
+            ]
+        )
+
+        return offAxisCoeff, offset
+
+    def getTable(self, instDir):
+        """Get the table of off-axis correction of instrument directory.
+
+        The table is read from the configuration files if it is not in the
+        store yet.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+
+        Returns
+        -------
+        list[numpy.ndarray]
+            Sorted distances to center with available parameters of each
+            configuration.
+        list[numpy.ndarray]
+            Fitted parameters in the order of distance of each configuration.
+        float
+            Defocal distance in m.
+        """
+
+        key = os.path.abspath(instDir)
+
+        # The lock is held during the reading to avoid the same files to be
+        # read by multiple threads
+        with self._lock:
+            table = self._tables.get(key)
+            if table is None:
+                table = self._readTable(key)
+                self._tables[key] = table
+
+        return table
+
+    def getSourceHash(self, instDir):
+        """Get the hash of the configuration files of off-axis correction of
+        instrument directory.
+
+        The hash is used to check the derived data (e.g. the lookup table of
+        off-axis correction) is built from the current configuration files.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+
+        Returns
+        -------
+        str
+            SHA-1 hash of the names and contents of configuration files.
+        """
+
+        sha1 = hashlib.sha1()
+        for filePath in self._getConfigFilePaths(instDir):
+            sha1.update(os.path.basename(filePath).encode())
+            with open(filePath, "rb") as file:
+                sha1.update(file.read())
+
+        return sha1.hexdigest()
+
+    def _getConfigFilePaths(self, instDir):
+        """Get the paths of configuration files of off-axis correction.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+
+        Returns
+        -------
+        list[str]
+            Paths of configuration files in the order of CONFIG_LIST.
+
+        Raises
+        ------
+        ValueError
+            Can not find the file of configuration.
+        """
+
+        # Get all files in the directory
+        fileList = sorted(
+            [f for f in os.listdir(instDir) if os.path.isfile(os.path.join(instDir, f))]
+        )
+
+        filePaths = []
+        for config in self.CONFIG_LIST:
+
+            # Construct the configuration file name
+            matchFileName = None
+            for fileName in fileList:
+                m = re.match(r"\S*%s\S*.yaml" % config, fileName)
+                if m is not None:
+                    matchFileName = m.group()
+                    break
+
+            if matchFileName is None:
+                raise ValueError(
+                    "Can not find the file of %s in %s." % (config, instDir)
+                )
+
+            filePaths.append(os.path.join(instDir, matchFileName))
+
+        return filePaths
+
+    def _readTable(self, instDir):
+        """Read the table of off-axis correction from the configuration files.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+
+        Returns
+        -------
+        list[numpy.ndarray]
+            Sorted distances to center with available parameters of each
+            configuration.
+        list[numpy.ndarray]
+            Fitted parameters in the order of distance of each configuration.
+        float
+            Defocal distance in m.
+
+        Raises
+        ------
+        ValueError
+            Can not find the file of configuration.
+        """
+
+        rulers = []
+        parameters = []
+        offset = 0.0
+        for filePath in self._getConfigFilePaths(instDir):
+
+            # Read the configuration file
+            paramReader = ParamReader()
+            paramReader.setFilePath(filePath)
+            cdata = paramReader.getMatContent()
+
+            # Record the offset (defocal distance)
+            offset = cdata[0, 0]
+
+            # Take the reference parameters
+            c = cdata[:, 1:]
+
+            # Get the ruler, which is the distance to center, and sort the
+            # parameters based on the magnitude of ruler
+            ruler = np.sqrt(c[:, 0] ** 2 + c[:, 1] ** 2)
+            sortIndex = np.argsort(ruler)
+
+            rulers.append(ruler[sortIndex])
+            parameters.append(np.ascontiguousarray(c[sortIndex, 2:]))
+
+        return rulers, parameters, offset
+
+    def getInterpWeights(self, fieldDist, ruler):
+        """Get the nodes and weights of the linear approximation.
+
+        The value at the field distance is w1 * value[p1] + w2 * value[p2].
+        The value at the boundary is used if the field distance is out of
+        range.
+
+        Parameters
+        ----------
+        fieldDist : float
+            Field distance from donut to origin (aperature).
+        ruler : numpy.ndarray
+            Sorted distances with available parameters for the fitting.
+
+        Returns
+        -------
+        int
+            Index of the first node (p1).
+        int
+            Index of the second node (p2).
+        float
+            Weight of the first node (w1).
+        float
+            Weight of the second node (w2).
+        """
+
+        # fieldDist is too big and out of range
+        if fieldDist > ruler[-1]:
+            return 0, len(ruler) - 1, 0.0, 1.0
+
+        # fieldDist is too small to be in the range
+        elif fieldDist < ruler[0]:
+            return 0, 0, 1.0, 0.0
+
+        # Find the boundary of fieldDist in the known data
+        p2 = int(np.searchsorted(ruler, fieldDist, side="left"))
+        p1 = p2 - 1
+
+        # Calculate the weighting ratio
+        w1 = (ruler[p2] - fieldDist) / (ruler[p2] - ruler[p1])
+        w2 = 1 - w1
+
+        return p1, p2, w1, w2
+
+    def _linearApprox(self, fieldDist, ruler, parameters):
+        """Get the fitted parameters for off-axis correction by linear
+        approximation.
+
+        Parameters
+        ----------
+        fieldDist : float
+            Field distance from donut to origin (aperature).
+        ruler : numpy.ndarray
+            Sorted distances with available parameters for the fitting.
+        parameters : numpy.ndarray
+            Referenced parameters in the order of ruler.
+
+        Returns
+        -------
+        numpy.ndarray
+            Fitted parameters based on the linear approximation.
+        """
+
+        p1, p2, w1, w2 = self.getInterpWeights(fieldDist, ruler)
+
+        return w1 * parameters[p1, :] + w2 * parameters[p2, :]
+
+
+# Store shared by all CompensableImage objects in the process
+_sharedStore = OffAxisCoeffStore()
+
+
+def getSharedOffAxisCoeffStore():
+    """Get the off-axis coefficient store shared in the process.
+
+    Returns
+    -------
+    OffAxisCoeffStore
+        Shared off-axis coefficient store.
+    """
+
+    return _sharedStore
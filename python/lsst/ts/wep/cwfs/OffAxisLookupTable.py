@@ -0,0 +1,372 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import numpy as np
+from scipy.ndimage import map_coordinates, spline_filter
+
+from lsst.ts.wep.cwfs import mathcwfs
+from lsst.ts.wep.cwfs.OffAxisCoeffStore import getSharedOffAxisCoeffStore
+
+
+class OffAxisLookupTable(object):
+
+    # Order of spline to interpolate the table
+    SPLINE_ORDER = 3
+
+    def __init__(self, gridDim=129, gridExtent=1.2):
+        """Initialize the OffAxisLookupTable class.
+
+        Lookup table of the off-axis polynomial mapping from the pupil to
+        focal plane at the reference orientation and its gradients. The
+        polynomial of each fitted node of field distance is tabulated on a
+        regular pupil grid. The mapping of a donut is the linear combination of
+        the tables of nearby nodes, which is exact because the polynomial is
+        linear in the coefficients, and the spline interpolation at the pupil
+        coordinates of donut.
+
+        Parameters
+        ----------
+        gridDim : int, optional
+            Dimension of pupil grid. (the default is 129.)
+        gridExtent : float, optional
+            Half width of pupil grid in the normalized pupil coordinate. It
+            should cover the extended pupil. (the default is 1.2.)
+
+        Raises
+        ------
+        ValueError
+            The dimension of pupil grid is less than 4 or the half width is
+            not positive.
+        """
+
+        if int(gridDim) < 4:
+            raise ValueError("The dimension of pupil grid should be >= 4.")
+
+        if gridExtent <= 0:
+            raise ValueError("The half width of pupil grid should be > 0.")
+
+        self._gridDim = int(gridDim)
+        self._gridExtent = float(gridExtent)
+
+        # Sorted distances of fitted nodes of each configuration
+        self._rulers = []
+
+        # Spline coefficients of the tables of each configuration. The shape
+        # of each element is (number of nodes, 3, gridDim, gridDim) for the
+        # polynomial, and its x- and y-derivatives.
+        self._splineCoeffs = []
+
+        # Defocal distance in m of the fitted polynomials
+        self._offset = 0.0
+
+        # Instrument directory and hash of the files of off-axis correction
+        # that the table is calculated from
+        self._instDir = ""
+        self._sourceHash = ""
+
+    def getGridDim(self):
+        """Get the dimension of pupil grid.
+
+        Returns
+        -------
+        int
+            Dimension of pupil grid.
+        """
+
+        return self._gridDim
+
+    def getGridExtent(self):
+        """Get the half width of pupil grid.
+
+        Returns
+        -------
+        float
+            Half width of pupil grid in the normalized pupil coordinate.
+        """
+
+        return self._gridExtent
+
+    def isReady(self):
+        """The table is ready to use or not.
+
+        Returns
+        -------
+        bool
+            True if the table is calculated or loaded.
+        """
+
+        return len(self._splineCoeffs) != 0
+
+    def isBuiltFor(self, instDir, gridDim, gridExtent):
+        """The table is built for the instrument and pupil grid or not.
+
+        The files of off-axis correction in the instrument directory should be
+        the same as the ones that the table is calculated from.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+        gridDim : int
+            Dimension of pupil grid.
+        gridExtent : float
+            Half width of pupil grid in the normalized pupil coordinate.
+
+        Returns
+        -------
+        bool
+            True if the table is built for the instrument and pupil grid.
+        """
+
+        if not self.isReady():
+            return False
+
+        if (
+            (self._instDir != os.path.realpath(instDir))
+            or (self._gridDim != int(gridDim))
+            or (self._gridExtent != float(gridExtent))
+        ):
+            return False
+
+        return self._sourceHash == getSharedOffAxisCoeffStore().getSourceHash(instDir)
+
+    def calcTable(self, instDir):
+        """Calculate the table of instrument.
+
+        Parameters
+        ----------
+        instDir : str
+            Instrument directory that has the files of off-axis correction.
+        """
+
+        coeffStore = getSharedOffAxisCoeffStore()
+        rulers, parameters, offset = coeffStore.getTable(instDir)
+
+        grid = np.linspace(-self._gridExtent, self._gridExtent, self._gridDim)
+        yy, xx = np.meshgrid(grid, grid, indexing="ij")
+        xx = xx.flatten()
+        yy = yy.flatten()
+
+        shape = (self._gridDim, self._gridDim)
+        splineCoeffs = []
+        for param in parameters:
+            coeffOfConfig = np.zeros((param.shape[0], 3) + shape)
+            for node, coeff in enumerate(param):
+                values = (
+                    mathcwfs.poly10_2D(coeff, xx, yy),
+                    mathcwfs.poly10Grad(coeff, xx, yy, "dx"),
+                    mathcwfs.poly10Grad(coeff, xx, yy, "dy"),
+                )
+                for idx, value in enumerate(values):
+                    coeffOfConfig[node, idx] = spline_filter(
+                        value.reshape(shape), order=self.SPLINE_ORDER
+                    )
+
+            splineCoeffs.append(coeffOfConfig)
+
+        self._rulers = [ruler.copy() for ruler in rulers]
+        self._splineCoeffs = splineCoeffs
+        self._offset = offset
+        self._instDir = os.path.realpath(instDir)
+        self._sourceHash = coeffStore.getSourceHash(instDir)
+
+    def saveTable(self, filePath):
+        """Save the table to the file.
+
+        The table is written to a temporary file in the same directory first,
+        which then replaces the file. The processes reading the file never see
+        the partially written table.
+
+        Parameters
+        ----------
+        filePath : str
+            Path of numpy .npz file.
+
+        Raises
+        ------
+        RuntimeError
+            The table is not ready.
+        """
+
+        if not self.isReady():
+            raise RuntimeError("The table is not calculated or loaded yet.")
+
+        numOfConfig = len(self._splineCoeffs)
+        arrays = dict(
+            gridDim=self._gridDim,
+            gridExtent=self._gridExtent,
+            offset=self._offset,
+            numOfConfig=numOfConfig,
+            instDir=self._instDir,
+            sourceHash=self._sourceHash,
+        )
+        for idx in range(numOfConfig):
+            arrays["ruler%d" % idx] = self._rulers[idx]
+            arrays["splineCoeff%d" % idx] = self._splineCoeffs[idx]
+
+        fd, tempFilePath = tempfile.mkstemp(
+            suffix=".tmp",
+            prefix=os.path.basename(filePath) + ".",
+            dir=os.path.dirname(os.path.abspath(filePath)),
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(tempFilePath, filePath)
+
+        except BaseException:
+            os.remove(tempFilePath)
+            raise
+
+    def loadTable(self, filePath):
+        """Load the table from the file.
+
+        Use isBuiltFor() to check the loaded table is built for the current
+        instrument and pupil grid.
+
+        Parameters
+        ----------
+        filePath : str
+            Path of numpy .npz file saved by saveTable().
+        """
+
+        with np.load(filePath) as data:
+            self._gridDim = int(data["gridDim"])
+            self._gridExtent = float(data["gridExtent"])
+            self._offset = float(data["offset"])
+
+            # The file saved without the source of table is never built for
+            # any instrument
+            self._instDir = str(data["instDir"]) if "instDir" in data else ""
+            self._sourceHash = str(data["sourceHash"]) if "sourceHash" in data else ""
+
+            numOfConfig = int(data["numOfConfig"])
+            self._rulers = [data["ruler%d" % idx] for idx in range(numOfConfig)]
+            self._splineCoeffs = [
+                data["splineCoeff%d" % idx] for idx in range(numOfConfig)
+            ]
+
+    def evaluate(self, fieldDist, defocalDis, x, y):
+        """Evaluate the off-axis mapping at the reference orientation.
+
+        The polynomial coefficients are the linear combination of intra- and
+        extra-focal ones by the defocal distance as in
+        CompensableImage._aperture2image().
+
+        Parameters
+        ----------
+        fieldDist : float
+            Field distance from donut to origin (aperature) in degree.
+        defocalDis : float
+            Defocal distance in m. It is positive for the intra-focal image
+            and negative for the extra-focal image.
+        x : numpy.ndarray
+            X-coordinate on pupil plane at the reference orientation. The NaN
+            means the point is outside the pupil.
+        y : numpy.ndarray
+            Y-coordinate on pupil plane at the reference orientation.
+
+        Returns
+        -------
+        numpy.ndarray
+            X-coordinate on focal plane at the reference orientation.
+        numpy.ndarray
+            Y-coordinate on focal plane at the reference orientation.
+        numpy.ndarray
+            X-derivative of x-coordinate on focal plane.
+        numpy.ndarray
+            Y-derivative of x-coordinate on focal plane.
+        numpy.ndarray
+            X-derivative of y-coordinate on focal plane.
+        numpy.ndarray
+            Y-derivative of y-coordinate on focal plane.
+
+        Raises
+        ------
+        RuntimeError
+            The table is not ready.
+        """
+
+        if not self.isReady():
+            raise RuntimeError("The table is not calculated or loaded yet.")
+
+        # Weights of intra- and extra-focal coefficients
+        tt = self._offset
+        weightIntra = (tt + defocalDis) / (2 * tt)
+        signOfDis = np.sign(defocalDis)
+
+        # Pupil coordinate in the index of table
+        idx = ~np.isnan(x) & ~np.isnan(y)
+        scale = (self._gridDim - 1) / (2 * self._gridExtent)
+        coordinates = np.array(
+            [(y[idx] + self._gridExtent) * scale, (x[idx] + self._gridExtent) * scale]
+        )
+
+        # The configurations are in the order of OffAxisCoeffStore.CONFIG_LIST
+        results = []
+        for configIntra, configExtra in ((0, 2), (1, 3)):
+            splineCoeff = signOfDis * (
+                weightIntra * self._combineNodes(configIntra, fieldDist)
+                + (1 - weightIntra) * self._combineNodes(configExtra, fieldDist)
+            )
+
+            for coeff in splineCoeff:
+                value = np.full(x.shape, np.nan)
+                value[idx] = map_coordinates(
+                    coeff,
+                    coordinates,
+                    order=self.SPLINE_ORDER,
+                    mode="mirror",
+                    prefilter=False,
+                )
+                results.append(value)
+
+        xp, xpOx, xpOy, yp, ypOx, ypOy = results
+
+        return xp, yp, xpOx, xpOy, ypOx, ypOy
+
+    def _combineNodes(self, config, fieldDist):
+        """Combine the spline coefficients of nodes by the linear
+        approximation of field distance.
+
+        Parameters
+        ----------
+        config : int
+            Index of configuration.
+        fieldDist : float
+            Field distance from donut to origin (aperature) in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Spline coefficients of the polynomial, and its x- and
+            y-derivatives.
+        """
+
+        p1, p2, w1, w2 = getSharedOffAxisCoeffStore().getInterpWeights(
+            fieldDist, self._rulers[config]
+        )
+
+        splineCoeff = self._splineCoeffs[config]
+
+        return w1 * splineCoeff[p1] + w2 * splineCoeff[p2]
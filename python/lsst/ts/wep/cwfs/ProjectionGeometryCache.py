@@ -0,0 +1,261 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+class ProjectionGeometryCache(object):
+    def __init__(self, maxSize=64, fieldStep=0.0):
+        """Initialize the ProjectionGeometryCache class.
+
+        Least-recently-used cache of the quantities of CompensableImage that
+        only depend on the instrument, optical model, defocal type, and field
+        position of donut instead of the pixel data. These are the pupil masks
+        and the projection between the pupil and image planes without the
+        wavefront. The cache is safe to share between threads.
+
+        Parameters
+        ----------
+        maxSize : int, optional
+            Maximum number of items in the cache. (the default is 64.)
+        fieldStep : float, optional
+            Step in degree to quantize the field position in the key. The
+            donuts in the same step share the quantities calculated at the
+            quantized field position (centre of step), so the cached item only
+            depends on the key. 0 means the exact field position is used. (the
+            default is 0.0.)
+
+        Raises
+        ------
+        ValueError
+            The maximum number of items is less than 1 or the step of field
+            position is negative.
+        """
+
+        if int(maxSize) < 1:
+            raise ValueError("The maximum number of items should be >= 1.")
+
+        if fieldStep < 0:
+            raise ValueError("The step of field position should be >= 0.")
+
+        self._maxSize = int(maxSize)
+        self._fieldStep = float(fieldStep)
+
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """Get the state to pickle.
+
+        The cached items and lock are not pickled. The cache is empty after
+        the unpickling, for example in the worker process.
+
+        Returns
+        -------
+        dict
+            State of object.
+        """
+
+        state = self.__dict__.copy()
+        del state["_items"]
+        del state["_lock"]
+
+        return state
+
+    def __setstate__(self, state):
+        """Set the state after the unpickling.
+
+        Parameters
+        ----------
+        state : dict
+            State of object.
+        """
+
+        self.__dict__.update(state)
+
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getMaxSize(self):
+        """Get the maximum number of items in the cache.
+
+        Returns
+        -------
+        int
+            Maximum number of items.
+        """
+
+        return self._maxSize
+
+    def getFieldStep(self):
+        """Get the step in degree to quantize the field position.
+
+        Returns
+        -------
+        float
+            Step of field position. 0 means no quantization.
+        """
+
+        return self._fieldStep
+
+    def getNumOfItems(self):
+        """Get the number of items in the cache.
+
+        Returns
+        -------
+        int
+            Number of items.
+        """
+
+        with self._lock:
+            return len(self._items)
+
+    def clear(self):
+        """Clear the items in the cache."""
+
+        with self._lock:
+            self._items.clear()
+
+    def getFieldInUse(self, model, fieldX, fieldY):
+        """Get the field position to calculate the item of cache.
+
+        The field position is quantized to the centre of step in the
+        "offAxis" model if the step is not 0. The item calculated at this
+        position does not depend on which donut in the step is the first one.
+
+        Parameters
+        ----------
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        fieldX : float
+            Field x in degree.
+        fieldY : float
+            Field y in degree.
+
+        Returns
+        -------
+        float
+            Field x in degree to calculate the item.
+        float
+            Field y in degree to calculate the item.
+        """
+
+        if (model == "offAxis") and (self._fieldStep > 0):
+            fieldX = float(np.round(fieldX / self._fieldStep) * self._fieldStep)
+            fieldY = float(np.round(fieldY / self._fieldStep) * self._fieldStep)
+
+        return fieldX, fieldY
+
+    def getKey(self, inst, model, fieldX, fieldY, *args):
+        """Get the key of cache.
+
+        The field position is only used in the "offAxis" model because the
+        other models do not depend on it.
+
+        Parameters
+        ----------
+        inst : Instrument
+            Instrument to use.
+        model : str
+            Optical model. It can be "paraxial", "onAxis", or "offAxis".
+        fieldX : float
+            Field x in degree.
+        fieldY : float
+            Field y in degree.
+        *args
+            Other hashable quantities the cached item depends on.
+
+        Returns
+        -------
+        tuple
+            Key of cache.
+        """
+
+        if model != "offAxis":
+            fieldX = 0
+            fieldY = 0
+        elif self._fieldStep > 0:
+            fieldX = int(np.round(fieldX / self._fieldStep))
+            fieldY = int(np.round(fieldY / self._fieldStep))
+        else:
+            fieldX = float(fieldX)
+            fieldY = float(fieldY)
+
+        instKey = (
+            inst.getInstFileDir(),
+            inst.getDimOfDonutOnSensor(),
+            inst.getAnnDefocalDisInMm(),
+        )
+
+        return (instKey, model, fieldX, fieldY) + tuple(args)
+
+    def get(self, key):
+        """Get the item in the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of cache.
+
+        Returns
+        -------
+        object
+            Cached item. None if it is not in the cache.
+        """
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+
+        return item
+
+    def put(self, key, item):
+        """Put the item in the cache.
+
+        The numpy arrays in the item are set to be read-only because they are
+        shared by the images. The least recently used item is removed if the
+        cache is full.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of cache.
+        item : numpy.ndarray, tuple, or dict
+            Item to cache. The numpy arrays can be in the tuple or the values
+            of dictionary.
+        """
+
+        values = item.values() if isinstance(item, dict) else item
+        if isinstance(item, np.ndarray):
+            values = [item]
+
+        for value in values:
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            if len(self._items) > self._maxSize:
+                self._items.popitem(last=False)
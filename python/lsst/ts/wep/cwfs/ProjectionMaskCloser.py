@@ -0,0 +1,196 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from scipy.ndimage import generate_binary_structure, iterate_structure
+from scipy.ndimage.morphology import binary_dilation
+
+
+class ProjectionMaskCloser(object):
+
+    # Half width of structuring element in pixel
+    HALF_WIDTH = 4
+
+    def __init__(self, dim):
+        """Initialize the ProjectionMaskCloser class.
+
+        Do the binary closing (dilation and then erosion) of the projection of
+        pupil on the image plane in CompensableImage.compensate() with the
+        preallocated buffers.
+
+        The structuring element is the 9x9 octagon of pixels with
+        |x| <= 4, |y| <= 4, and |x| + |y| <= 6. It is the Minkowski sum of the
+        5x5 square and the diamond of radius 2, so the dilation (erosion) is
+        done by two 3x3 square and two cross dilations (erosions) of shifted
+        slices. The image is padded by the half width of structuring element,
+        which gives the same result as the padding by 20 pixels.
+
+        Parameters
+        ----------
+        dim : int
+            Dimension of projection in pixel.
+        """
+
+        self._dim = int(dim)
+
+        dimPad = self._dim + 2 * self.HALF_WIDTH
+        self._buffer = np.zeros((dimPad, dimPad), dtype=bool)
+        self._bufferWork = np.zeros((dimPad, dimPad), dtype=bool)
+        self._bufferTemp = np.zeros((dimPad, dimPad), dtype=bool)
+
+    def getDim(self):
+        """Get the dimension of projection in pixel.
+
+        Returns
+        -------
+        int
+            Dimension of projection.
+        """
+
+        return self._dim
+
+    def getStructure(self):
+        """Get the structuring element of closing.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            Structuring element.
+        """
+
+        struct0 = generate_binary_structure(2, 1)
+        struct = iterate_structure(struct0, self.HALF_WIDTH)
+
+        return binary_dilation(struct, structure=struct0, iterations=2)
+
+    def close(self, projection):
+        """Do the binary closing of projection.
+
+        Parameters
+        ----------
+        projection : numpy.ndarray
+            Projection of pupil on the image plane. The nonzero value means the
+            pixel is in the projection.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            Projection after the closing. The array is a buffer reused in the
+            next call.
+
+        Raises
+        ------
+        ValueError
+            The shape of projection does not match the dimension.
+        """
+
+        if projection.shape != (self._dim, self._dim):
+            raise ValueError(
+                "The shape of projection should be (%d, %d)." % (self._dim, self._dim)
+            )
+
+        buffer = self._buffer
+        bufferWork = self._bufferWork
+
+        halfWidth = self.HALF_WIDTH
+        region = (
+            slice(halfWidth, halfWidth + self._dim),
+            slice(halfWidth, halfWidth + self._dim),
+        )
+
+        buffer.fill(False)
+        np.not_equal(projection, 0, out=buffer[region])
+
+        for erode in (False, True):
+            self._applySquare(buffer, bufferWork, erode)
+            self._applySquare(bufferWork, buffer, erode)
+            self._applyCross(buffer, bufferWork, erode)
+            self._applyCross(bufferWork, buffer, erode)
+
+        return buffer[region]
+
+    def _applyCross(self, src, dst, erode):
+        """Apply the dilation or erosion with the 3x3 cross.
+
+        Parameters
+        ----------
+        src : numpy.ndarray[bool]
+            Input image.
+        dst : numpy.ndarray[bool]
+            Output image.
+        erode : bool
+            Do the erosion if True. Otherwise, do the dilation.
+        """
+
+        op = np.logical_and if erode else np.logical_or
+
+        dst[...] = src
+        op(dst[1:, :], src[:-1, :], out=dst[1:, :])
+        op(dst[:-1, :], src[1:, :], out=dst[:-1, :])
+        op(dst[:, 1:], src[:, :-1], out=dst[:, 1:])
+        op(dst[:, :-1], src[:, 1:], out=dst[:, :-1])
+
+        if erode:
+            self._clearBorder(dst)
+
+    def _applySquare(self, src, dst, erode):
+        """Apply the dilation or erosion with the 3x3 square.
+
+        The square is separable to the vertical and horizontal lines.
+
+        Parameters
+        ----------
+        src : numpy.ndarray[bool]
+            Input image.
+        dst : numpy.ndarray[bool]
+            Output image.
+        erode : bool
+            Do the erosion if True. Otherwise, do the dilation.
+        """
+
+        op = np.logical_and if erode else np.logical_or
+        temp = self._bufferTemp
+
+        temp[...] = src
+        op(temp[1:, :], src[:-1, :], out=temp[1:, :])
+        op(temp[:-1, :], src[1:, :], out=temp[:-1, :])
+
+        dst[...] = temp
+        op(dst[:, 1:], temp[:, :-1], out=dst[:, 1:])
+        op(dst[:, :-1], temp[:, 1:], out=dst[:, :-1])
+
+        if erode:
+            self._clearBorder(dst)
+
+    def _clearBorder(self, img):
+        """Clear the border pixels of image. The pixels outside the image are
+        treated as 0 in the erosion.
+
+        Parameters
+        ----------
+        img : numpy.ndarray[bool]
+            Image.
+        """
+
+        img[0, :] = False
+        img[-1, :] = False
+        img[:, 0] = False
+        img[:, -1] = False
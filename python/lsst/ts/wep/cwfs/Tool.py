@@ -54,6 +54,111 @@ def ZernikeAnnularEval(z, x, y, e, nMax=28):
     return mathcwfs.zernikeAnnularEval(z, x.flatten(), y.flatten(), e).reshape(x.shape)
 
 
+def ZernikeAnnularEvalBatch(z, x, y, e, nMax=28):
+    """Calculate the wavefront surfaces in the basis of annular Zernike
+    polynomial for multiple sets of coefficients in one pass.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Coefficients of annular Zernike polynomials with the dimension of
+        (number of sets, number of terms).
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    e : float
+        Obscuration value. It is 0.61 in LSST.
+    nMax : int, optional
+        Maximum number of Zernike terms. (the default is 28.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Wavefront surfaces with the dimension of (number of sets, x.shape).
+    """
+
+    # Check the preconditions
+    z = _checkBatchPrecondition(z, x, y, int(nMax))
+
+    # Calculate the wavefronts
+    return mathcwfs.zernikeAnnularEvalBatch(z, x.flatten(), y.flatten(), e).reshape(
+        (z.shape[0],) + x.shape
+    )
+
+
+def _checkBatchPrecondition(z, x, y, nMax):
+    """Check the preconditions before the batch evaluation related to Zernike
+    polynomials.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Coefficients of Zernike polynomials with the dimension of (number of
+        sets, number of terms).
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    nMax : int
+        Maximum number of Zernike terms.
+
+    Returns
+    -------
+    numpy.ndarray
+        Coefficients of Zernike polynomials with the dimension of (number of
+        sets, nMax).
+
+    Raises
+    ------
+    ValueError
+        x and y are not the same size.
+    ValueError
+        The number of terms is more than nMax.
+    """
+
+    if x.shape != y.shape:
+        raise ValueError("x & y are not the same size.")
+
+    z = np.atleast_2d(z)
+    numOfSets, numOfTerms = z.shape
+    if numOfTerms > nMax:
+        raise ValueError(
+            "Some Zernike related functions are not implemented with >%d terms." % nMax
+        )
+    elif numOfTerms < nMax:
+        # Put the higher order terms as zero to make sure nMax terms of
+        # polynomials
+        z = np.hstack((z, np.zeros((numOfSets, nMax - numOfTerms))))
+
+    return z
+
+
+def ZernikeAnnularBasis(numTerms, x, y, e, nMax=28):
+    """Calculate the first numTerms annular Zernike polynomials.
+
+    Parameters
+    ----------
+    numTerms : int
+        Number of annular Zernike terms.
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    e : float
+        Obscuration value. It is 0.61 in LSST.
+    nMax : int, optional
+        Maximum number of Zernike terms. (the default is 28.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Annular Zernike polynomials with the dimension of (numTerms, x.shape).
+    """
+
+    return ZernikeAnnularEvalBatch(np.eye(int(numTerms)), x, y, e, nMax=nMax)
+
+
 def _checkPrecondition(z, x, y, nMax):
     """Check the preconditions before the evaluation related to Zernike
     polynomials.
@@ -128,6 +233,71 @@ def ZernikeAnnularGrad(z, x, y, e, axis, nMax=22):
     )
 
 
+def ZernikeAnnularGradBatch(z, x, y, e, axis, nMax=22):
+    """Evaluate the gradident of annular Zernike polynomials in a certain
+    direction for multiple sets of coefficients in one pass.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Coefficients of annular Zernike polynomials with the dimension of
+        (number of sets, number of terms).
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    e : float
+        Obscuration value. It is 0.61 in LSST.
+    axis : str
+        It can be "dx", "dy", "dx2", "dy2", or "dxy".
+    nMax : int, optional
+        Maximum number of Zernike terms. (the default is 22.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Integration elements of gradient part with the dimension of (number of
+        sets, x.shape).
+    """
+
+    # Check the preconditions
+    z = _checkBatchPrecondition(z, x, y, int(nMax))
+
+    # Calculate the integration elements
+    return mathcwfs.zernikeAnnularGradBatch(
+        z, x.flatten(), y.flatten(), e, axis
+    ).reshape((z.shape[0],) + x.shape)
+
+
+def ZernikeAnnularGradBasis(numTerms, x, y, e, axis, nMax=22):
+    """Evaluate the gradient of the first numTerms annular Zernike polynomials
+    in a certain direction.
+
+    Parameters
+    ----------
+    numTerms : int
+        Number of annular Zernike terms.
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    e : float
+        Obscuration value. It is 0.61 in LSST.
+    axis : str
+        It can be "dx", "dy", "dx2", "dy2", or "dxy".
+    nMax : int, optional
+        Maximum number of Zernike terms. (the default is 22.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Gradient of annular Zernike polynomials with the dimension of
+        (numTerms, x.shape).
+    """
+
+    return ZernikeAnnularGradBatch(np.eye(int(numTerms)), x, y, e, axis, nMax=nMax)
+
+
 def ZernikeAnnularJacobian(z, x, y, e, order, nMax=22):
     """Evaluate the Jacobian of annular Zernike polynomials in a certain order.
 
@@ -161,6 +331,55 @@ def ZernikeAnnularJacobian(z, x, y, e, order, nMax=22):
     ).reshape(x.shape)
 
 
+def ZernikeAnnularDerivatives(z, x, y, e, withJacobian=False, nMax=22):
+    """Evaluate the gradients and Jacobians of annular Zernike polynomials in
+    one call.
+
+    This is equivalent to calling ZernikeAnnularGrad() with "dx", "dy", "dx2",
+    "dy2", "dxy" and ZernikeAnnularJacobian() with "1st", "2nd", but the
+    inputs are only checked and flattened once.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Coefficient of annular Zernike polynomials.
+    x : numpy.ndarray
+        X coordinate on pupil plane.
+    y : numpy.ndarray
+        Y coordinate on pupil plane.
+    e : float
+        Obscuration value. It is 0.61 in LSST.
+    withJacobian : bool, optional
+        Evaluate the Jacobians in "1st" and "2nd" orders as well. (the default
+        is False.)
+    nMax : int, optional
+        Maximum number of Zernike terms. (the default is 22.)
+
+    Returns
+    -------
+    dict
+        Derivatives with the keys of "dx", "dy", "dx2", "dy2", "dxy", and
+        "1st", "2nd" if withJacobian is True. Each value is a numpy.ndarray
+        with the shape of x.
+    """
+
+    # Check the preconditions
+    z = _checkPrecondition(z, x, y, int(nMax))
+
+    # Calculate the derivatives
+    derivatives = mathcwfs.zernikeAnnularDerivatives(
+        z, x.flatten(), y.flatten(), e, withJacobian
+    )
+
+    keys = ["dx", "dy", "dx2", "dy2", "dxy"]
+    if withJacobian:
+        keys += ["1st", "2nd"]
+
+    return {
+        key: derivative.reshape(x.shape) for key, derivative in zip(keys, derivatives)
+    }
+
+
 def ZernikeAnnularFit(s, x, y, numTerms, e, nMax=28):
     """Get the coefficients of annular Zernike polynomials by fitting the
     wavefront surface.
@@ -202,12 +421,7 @@ def ZernikeAnnularFit(s, x, y, numTerms, e, nMax=28):
     yFinite = yFinite[finiteIndex]
 
     # Do the fitting
-    h = np.zeros([len(sFinite), numTerms])
-
-    for ii in range(numTerms):
-        z = np.zeros(numTerms)
-        z[ii] = 1
-        h[:, ii] = ZernikeAnnularEval(z, xFinite, yFinite, e, nMax=nMax)
+    h = ZernikeAnnularBasis(numTerms, xFinite, yFinite, e, nMax=nMax).T
 
     # Solve the equation: H*Z = S => Z = H^(-1)S
     z = np.linalg.lstsq(h, s, rcond=None)[0]
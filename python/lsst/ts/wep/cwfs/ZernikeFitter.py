@@ -0,0 +1,211 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+from lsst.ts.wep.cwfs.Tool import ZernikeAnnularBasis
+
+
+class ZernikeFitter(object):
+    def __init__(self, cacheSize=16):
+        """Initialize the ZernikeFitter class.
+
+        Fit the wavefront surface to the annular Zernike polynomials. The
+        pseudo-inverse of design matrix is cached for each set of pupil
+        coordinates, so the repeated fits on the same grid only need a
+        matrix-vector product.
+
+        Parameters
+        ----------
+        cacheSize : int, optional
+            Maximum number of pseudo-inverse matrixes in the cache. The least
+            recently used one is removed if the cache is full. (the default is
+            16.)
+
+        Raises
+        ------
+        ValueError
+            The cache size is less than 1.
+        """
+
+        if int(cacheSize) < 1:
+            raise ValueError("The cache size should be >= 1.")
+
+        self._cacheSize = int(cacheSize)
+        self._pinvCache = OrderedDict()
+
+    def getCacheSize(self):
+        """Get the maximum number of pseudo-inverse matrixes in the cache.
+
+        Returns
+        -------
+        int
+            Maximum number of pseudo-inverse matrixes in the cache.
+        """
+
+        return self._cacheSize
+
+    def getNumOfCachedItems(self):
+        """Get the number of pseudo-inverse matrixes in the cache.
+
+        Returns
+        -------
+        int
+            Number of pseudo-inverse matrixes in the cache.
+        """
+
+        return len(self._pinvCache)
+
+    def clearCache(self):
+        """Clear the cache of pseudo-inverse matrixes."""
+
+        self._pinvCache.clear()
+
+    def fit(self, s, x, y, numTerms, e, nMax=28):
+        """Get the coefficients of annular Zernike polynomials by fitting the
+        wavefront surface.
+
+        This gives the same result as ZernikeAnnularFit() in Tool.
+
+        Parameters
+        ----------
+        s : numpy.ndarray
+            Wavefront surface to be fitted.
+        x : numpy.ndarray
+            Normalized x coordinate between -1 and 1 (pupil coordinate).
+        y : numpy.ndarray
+            Normalized y coordinate between -1 and 1 (pupil coordinate).
+        numTerms : int
+            Number of annular Zernike terms used in the fit.
+        e : float
+            Obscuration ratio of annular Zernikes.
+        nMax : int, optional
+            Maximum number of Zernike terms. (the default is 28.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of annular Zernike polynomials by the fitting.
+
+        Raises
+        ------
+        ValueError
+            x and y are not the same size.
+        """
+
+        if x.shape != y.shape:
+            raise ValueError("x & y are not the same size.")
+
+        # Get the value that is finite
+        finiteIndex = np.isfinite(s + x + y)
+
+        sFinite = s[finiteIndex]
+        xFinite = x[finiteIndex]
+        yFinite = y[finiteIndex]
+
+        # Solve the equation: H*Z = S => Z = H^(-1)S
+        pinv = self._getPinv(xFinite, yFinite, int(numTerms), e, int(nMax))
+
+        return pinv.dot(sFinite)
+
+    def maskedFit(self, s, x, y, numTerms, mask, e, nMax=28):
+        """Fit the wavefront surface on pupil (e.g. under the mask) to a linear
+        combination of annular Zernike polynomials.
+
+        This gives the same result as ZernikeMaskedFit() in Tool.
+
+        Parameters
+        ----------
+        s : numpy.ndarray
+            Wavefront surface to be fitted.
+        x : numpy.ndarray
+            Normalized x coordinate between -1 and 1 (pupil coordinate).
+        y : numpy.ndarray
+            Normalized y coordinate between -1 and 1 (pupil coordinate).
+        numTerms : int
+            Number of annular Zernike terms used in the fit.
+        mask : numpy.ndarray[int]
+            Mask used.
+        e : float
+            Obscuration ratio of annular Zernikes.
+        nMax : int, optional
+            Maximum number of Zernike terms. (the default is 28.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients of annular Zernike polynomials by the fitting.
+        """
+
+        # Get S, x, y elements in mask
+        j, i = np.nonzero(mask[:])
+        s = s[i, j]
+        x = x[i, j]
+        y = y[i, j]
+
+        return self.fit(s, x, y, numTerms, e, nMax=nMax)
+
+    def _getPinv(self, x, y, numTerms, e, nMax):
+        """Get the pseudo-inverse of design matrix from the cache or calculate
+        it if it does not exist.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Normalized x coordinate of the finite data points.
+        y : numpy.ndarray
+            Normalized y coordinate of the finite data points.
+        numTerms : int
+            Number of annular Zernike terms used in the fit.
+        e : float
+            Obscuration ratio of annular Zernikes.
+        nMax : int
+            Maximum number of Zernike terms.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pseudo-inverse of design matrix with the dimension of (numTerms,
+            number of data points).
+        """
+
+        # Key of the cache
+        xyHash = hashlib.sha1(np.ascontiguousarray(x, dtype=float).tobytes())
+        xyHash.update(np.ascontiguousarray(y, dtype=float).tobytes())
+        key = (x.shape, numTerms, e, nMax, xyHash.hexdigest())
+
+        if key in self._pinvCache:
+            self._pinvCache.move_to_end(key)
+            return self._pinvCache[key]
+
+        # Use the same cutoff of small singular values as numpy.linalg.lstsq()
+        h = ZernikeAnnularBasis(numTerms, x, y, e, nMax=nMax).T
+        rcond = np.finfo(float).eps * max(h.shape)
+        pinv = np.linalg.pinv(h, rcond=rcond)
+
+        # Put in the cache and remove the least recently used one if needed
+        self._pinvCache[key] = pinv
+        if len(self._pinvCache) > self._cacheSize:
+            self._pinvCache.popitem(last=False)
+
+        return pinv
@@ -54,6 +54,275 @@ ArrayNpInfo getNpArrayInfo(py::array arrayNp) {
     return info;
 }
 
+struct ArrayNp2DInfo {
+    size_t rows;
+    size_t cols;
+    double *buf;
+};
+
+ArrayNp2DInfo getNpArray2DInfo(py::array arrayNp) {
+
+    ArrayNp2DInfo info;
+
+    py::buffer_info bufInfo = arrayNp.request();
+    if (bufInfo.ndim != 2) {
+        throw std::runtime_error("Number of dimensions must be two.");
+    }
+
+    info.rows = bufInfo.shape[0];
+    info.cols = bufInfo.shape[1];
+    info.buf = (double *)bufInfo.ptr;
+
+    return info;
+}
+
+// The terms are evaluated inside the loops over the points. Force the
+// inlining to let the compiler hoist the constant factors out of the loops.
+#define ALWAYS_INLINE inline __attribute__((always_inline))
+
+/**
+ * Radial powers and angular terms of a point on the pupil plane used in the
+ * evaluation of annular Zernike polynomials.
+ */
+struct PupilPolarPoint {
+    double x_c, r, r2, r3, r4, r5, r6;
+    double s, s2, s3, s4, s5, s6;
+    double c, c2, c3, c4, c5, c6;
+
+    PupilPolarPoint(double x, double y);
+};
+
+inline PupilPolarPoint::PupilPolarPoint(double x, double y) {
+    x_c = x;
+    double y_c = y;
+
+    r2 = pow(x_c, 2) + pow(y_c, 2);
+    r = sqrt(r2);
+    r3 = r2 * r;
+    r4 = r2 * r2;
+    r5 = r3 * r2;
+    r6 = r3 * r3;
+
+    double t = atan2(y_c, x_c);
+    s = sin(t);
+    c = cos(t);
+
+    double t2 = 2 * t;
+    double t3 = 3 * t;
+    double t4 = 4 * t;
+    double t5 = 5 * t;
+    double t6 = 6 * t;
+
+    s2 = sin(t2);
+    c2 = cos(t2);
+    s3 = sin(t3);
+    c3 = cos(t3);
+    s4 = sin(t4);
+    c4 = cos(t4);
+    s5 = sin(t5);
+    c5 = cos(t5);
+    s6 = sin(t6);
+    c6 = cos(t6);
+}
+
+/**
+ * Annular Zernike polynomials (up to Z28) at one point.
+ */
+struct AnnularEvalTerms {
+    double e2;
+    double e4;
+    double e6;
+    double e8;
+    double e10;
+    double e12;
+    double e14;
+    double sqrt_3;
+    double sqrt_5;
+    double sqrt_6;
+    double sqrt_7;
+    double sqrt_8;
+    double sqrt_10;
+    double sqrt_12;
+    double sqrt_14;
+    double den1;
+    double den2;
+    double den3;
+    double den4;
+    double den5;
+    double den6;
+    double den7;
+    double num7;
+    double den8;
+    double den9;
+    double num9E;
+    double den10;
+    double num10E;
+    double den11;
+    double den12;
+    double num11a;
+    double num11b;
+    double num11c;
+    double den13;
+    double num12;
+    double den14;
+    double num13;
+
+    explicit AnnularEvalTerms(double e);
+
+    ALWAYS_INLINE double value(const double *Z, const PupilPolarPoint &p) const;
+};
+
+AnnularEvalTerms::AnnularEvalTerms(double e) {
+    e2 = pow(e, 2);
+    e4 = e2 * e2;
+    e6 = e4 * e2;
+    e8 = e6 * e2;
+    e10 = e8 * e2;
+    e12 = e10 * e2;
+    e14 = e12 * e2;
+
+    sqrt_3 = sqrt(3);
+    sqrt_5 = sqrt(5);
+    sqrt_6 = sqrt(6);
+    sqrt_7 = sqrt(7);
+    sqrt_8 = sqrt(8);
+    sqrt_10 = sqrt(10);
+    sqrt_12 = sqrt(12);
+    sqrt_14 = sqrt(14);
+
+    den1 = sqrt(1 + e2);
+    den2 = 1 - e2;
+    den3 = sqrt(1 + e2 + e4);
+    den4 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
+    den5 = sqrt(1 + e2 + e4 + e6);
+    den6 = pow(1 - e2, 2);
+
+    den7 = pow(1 - e2, 3) * (1 + e2 + e4);
+    num7 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
+                (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
+
+    den8 = sqrt(1 + e2 + e4 + e6 + e8);
+
+    den9 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
+    num9E =
+        sqrt(pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6));
+
+    den10 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
+    num10E = sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
+                  (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
+
+    den11 = sqrt(1 + e2 + e4 + e6 + e8 + e10);
+    den12 = pow(1 - e2, 3);
+
+    num11a = 15 * (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8);
+    num11b = -20 * (1 + 4 * e2 + 10 * e4 + 10 * e6 + 4 * e8 + e10);
+    num11c = 6 * (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12);
+    den13 = pow(1 - e2, 2) *
+            sqrt((1 + 4 * e2 + 10 * e4 + 4 * e6 + e8) *
+                 (1 + 9 * e2 + 45 * e4 + 65 * e6 + 45 * e8 + 9 * e10 + e12));
+
+    num12 = -5 * (1 - e12) / (1 - e10);
+    den14 = sqrt(1 / (1 - e2) *
+                 (36 * (1 - e14) - (35 * pow(1 - e12, 2)) / (1 - e10)));
+
+    num13 = sqrt((1 - e2) / (1 - e14));
+}
+
+inline double AnnularEvalTerms::value(const double *Z,
+                                      const PupilPolarPoint &p) const {
+    double x_c = p.x_c;
+    double r = p.r;
+    double r2 = p.r2;
+    double r3 = p.r3;
+    double r4 = p.r4;
+    double r5 = p.r5;
+    double r6 = p.r6;
+    double s = p.s;
+    double s2 = p.s2;
+    double s3 = p.s3;
+    double s4 = p.s4;
+    double s5 = p.s5;
+    double s6 = p.s6;
+    double c = p.c;
+    double c2 = p.c2;
+    double c3 = p.c3;
+    double c4 = p.c4;
+    double c5 = p.c5;
+    double c6 = p.c6;
+
+    double temp, numQ, Rnl;
+
+    temp = Z[0] * (1 + 0 * x_c);
+
+    Rnl = 2 * r / den1;
+    temp += Z[1] * Rnl * c;
+    temp += Z[2] * Rnl * s;
+
+    temp += Z[3] * sqrt_3 * (2 * r2 - 1 - e2) / den2;
+
+    Rnl = sqrt_6 * r2 / den3;
+    temp += Z[4] * Rnl * s2;
+    temp += Z[5] * Rnl * c2;
+
+    Rnl = sqrt_8 * (3 * r3 - 2 * r - 2 * e4 * r + e2 * r * (3 * r2 - 2)) / den4;
+    temp += Z[6] * Rnl * s;
+    temp += Z[7] * Rnl * c;
+
+    Rnl = sqrt_8 * r3 / den5;
+    temp += Z[8] * Rnl * s3;
+    temp += Z[9] * Rnl * c3;
+
+    temp +=
+        Z[10] * sqrt_5 * (6 * r4 - 6 * r2 + 1 + e4 + e2 * (4 - 6 * r2)) / den6;
+
+    Rnl = sqrt_10 *
+          (4 * r4 - 3 * r2 - 3 * e6 * r2 - e2 * r2 * (3 - 4 * r2) -
+           e4 * r2 * (3 - 4 * r2)) *
+          num7 / den7;
+    temp += Z[11] * Rnl * c2;
+    temp += Z[12] * Rnl * s2;
+
+    Rnl = sqrt_10 * r4 / den8;
+    temp += Z[13] * Rnl * c4;
+    temp += Z[14] * Rnl * s4;
+
+    numQ = 10 * r5 - 12 * r3 + 3 * r + 3 * e8 * r - 12 * e6 * r * (r2 - 1) +
+           2 * e4 * r * (15 - 24 * r2 + 5 * r4) +
+           4 * e2 * r * (3 - 12 * r2 + 10 * r4);
+    Rnl = sqrt_12 * num9E * numQ / den9;
+    temp += Z[15] * Rnl * c;
+    temp += Z[16] * Rnl * s;
+
+    numQ = r3 * (5 * r2 - 4 - 4 * e8 - e2 * (4 - 5 * r2) - e4 * (4 - 5 * r2) -
+                 e6 * (4 - 5 * r2));
+    Rnl = sqrt_12 * num10E * numQ / den10;
+    temp += Z[17] * Rnl * c3;
+    temp += Z[18] * Rnl * s3;
+
+    Rnl = sqrt_12 * r5 / den11;
+    temp += Z[19] * Rnl * c5;
+    temp += Z[20] * Rnl * s5;
+
+    temp += Z[21] * sqrt_7 *
+            (20 * r6 - 30 * r4 + 12 * r2 - 1 - e6 + 3 * e4 * (-3 + 4 * r2) -
+             3 * e2 * (3 - 12 * r2 + 10 * r4)) /
+            den12;
+
+    Rnl = sqrt_14 * (num11a * r6 + num11b * r4 + num11c * r2) / den13;
+    temp += Z[22] * Rnl * s2;
+    temp += Z[23] * Rnl * c2;
+
+    Rnl = sqrt_14 * (6 * r6 + num12 * r4) / den14;
+    temp += Z[24] * Rnl * s4;
+    temp += Z[25] * Rnl * c4;
+
+    Rnl = sqrt_14 * num13 * r6;
+    temp += Z[26] * Rnl * s6;
+    temp += Z[27] * Rnl * c6;
+
+    return temp;
+}
+
 py::array_t<double> zernikeAnnularEval(py::array_t<double> arrayZk,
                                        py::array_t<double> arrayX,
                                        py::array_t<double> arrayY, double e) {
@@ -74,176 +343,715 @@ py::array_t<double> zernikeAnnularEval(py::array_t<double> arrayZk,
     double *S = infoResult.buf;
 
     // Parameters of constant
-    double e2 = pow(e, 2);
-    double e4 = e2 * e2;
-    double e6 = e4 * e2;
-    double e8 = e6 * e2;
-    double e10 = e8 * e2;
-    double e12 = e10 * e2;
-    double e14 = e12 * e2;
-
-    double sqrt_3 = sqrt(3);
-    double sqrt_5 = sqrt(5);
-    double sqrt_6 = sqrt(6);
-    double sqrt_7 = sqrt(7);
-    double sqrt_8 = sqrt(8);
-    double sqrt_10 = sqrt(10);
-    double sqrt_12 = sqrt(12);
-    double sqrt_14 = sqrt(14);
-
-    double den1 = sqrt(1 + e2);
-    double den2 = 1 - e2;
-    double den3 = sqrt(1 + e2 + e4);
-    double den4 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
-    double den5 = sqrt(1 + e2 + e4 + e6);
-    double den6 = pow(1 - e2, 2);
-
-    double den7 = pow(1 - e2, 3) * (1 + e2 + e4);
-    double num7 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
-                       (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
-
-    double den8 = sqrt(1 + e2 + e4 + e6 + e8);
-
-    double den9 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
-    double num9E =
+    AnnularEvalTerms terms(e);
+
+    for (size_t ii = 0; ii < n; ii++) {
+        S[ii] = terms.value(Z, PupilPolarPoint(x[ii], y[ii]));
+    }
+
+    return result;
+}
+
+/**
+ * Powers of a point on the pupil plane shared by the derivative terms.
+ */
+struct PupilPoint {
+    double x_c, y_c, x2, y2, x4, y4, x6, y6, xy, r2, r4;
+
+    PupilPoint(double x, double y);
+};
+
+inline PupilPoint::PupilPoint(double x, double y) {
+    x_c = x;
+    y_c = y;
+
+    x2 = x_c * x_c;
+    y2 = y_c * y_c;
+    x4 = x2 * x2;
+    y4 = y2 * y2;
+    x6 = x4 * x2;
+    y6 = y4 * y2;
+    xy = x_c * y_c;
+    r2 = x2 + y2;
+    r4 = r2 * r2;
+}
+
+/**
+ * Gradient terms of annular Zernike polynomials (up to Z22) at one point.
+ */
+struct AnnularGradTerms {
+    double e2;
+    double e4;
+    double e6;
+    double e8;
+    double e10;
+    double e12;
+    double sqrt_3;
+    double sqrt_5;
+    double sqrt_6;
+    double sqrt_7;
+    double sqrt_8;
+    double sqrt_10;
+    double sqrt_12;
+    double den1;
+    double den2;
+    double den3;
+    double den4;
+    double den5;
+    double den6;
+    double den7;
+    double num7;
+    double den8;
+    double den9;
+    double num9;
+    double den10;
+    double num10;
+    double den11;
+    double den12;
+
+    explicit AnnularGradTerms(double e);
+
+    ALWAYS_INLINE double dx(const double *Z, const PupilPoint &p) const;
+    ALWAYS_INLINE double dy(const double *Z, const PupilPoint &p) const;
+    ALWAYS_INLINE double dx2(const double *Z, const PupilPoint &p) const;
+    ALWAYS_INLINE double dy2(const double *Z, const PupilPoint &p) const;
+    ALWAYS_INLINE double dxy(const double *Z, const PupilPoint &p) const;
+};
+
+AnnularGradTerms::AnnularGradTerms(double e) {
+    e2 = pow(e, 2);
+    e4 = e2 * e2;
+    e6 = e4 * e2;
+    e8 = e6 * e2;
+    e10 = e8 * e2;
+    e12 = e10 * e2;
+
+    sqrt_3 = sqrt(3);
+    sqrt_5 = sqrt(5);
+    sqrt_6 = sqrt(6);
+    sqrt_7 = sqrt(7);
+    sqrt_8 = sqrt(8);
+    sqrt_10 = sqrt(10);
+    sqrt_12 = sqrt(12);
+
+    den1 = sqrt(1 + e2);
+    den2 = 1 - e2;
+    den3 = sqrt(1 + e2 + e4);
+    den4 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
+    den5 = sqrt(1 + e2 + e4 + e6);
+    den6 = pow(1 - e2, 2);
+
+    den7 = pow(1 - e2, 3) * (1 + e2 + e4);
+    num7 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
+                (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
+
+    den8 = sqrt(1 + e2 + e4 + e6 + e8);
+
+    den9 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
+    num9 =
         sqrt(pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6));
 
-    double den10 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
-    double num10E =
-        sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
-             (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
+    den10 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
+    num10 = sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
+                 (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
 
-    double den11 = sqrt(1 + e2 + e4 + e6 + e8 + e10);
-    double den12 = pow(1 - e2, 3);
+    den11 = sqrt(1 + e2 + e4 + e6 + e8 + e10);
+    den12 = pow(1 - e2, 3);
+}
 
-    double num11a = 15 * (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8);
-    double num11b = -20 * (1 + 4 * e2 + 10 * e4 + 10 * e6 + 4 * e8 + e10);
-    double num11c =
-        6 * (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12);
-    double den13 =
-        pow(1 - e2, 2) *
-        sqrt((1 + 4 * e2 + 10 * e4 + 4 * e6 + e8) *
-             (1 + 9 * e2 + 45 * e4 + 65 * e6 + 45 * e8 + 9 * e10 + e12));
+inline double AnnularGradTerms::dx(const double *Z, const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double x4 = p.x4;
+    double y4 = p.y4;
+    double xy = p.xy;
+    double r2 = p.r2;
+
+    double temp;
+    temp = Z[1] * 2 * 1 / den1;
+
+    temp += Z[3] * sqrt_3 * 4 * x_c / den2;
+
+    temp += Z[4] * sqrt_6 * 2 * y_c / den3;
+    temp += Z[5] * sqrt_6 * 2 * x_c / den3;
+
+    temp += Z[6] * sqrt_8 * 6 * xy * (1 + e2) / den4;
+    temp += Z[7] * sqrt_8 * ((9 * x2 + 3 * y2 - 2) * (1 + e2) - 2 * e4) / den4;
+
+    temp += Z[8] * sqrt_8 * 6 * xy / den5;
+    temp += Z[9] * sqrt_8 * (3 * x2 - 3 * y2) / den5;
+
+    temp += Z[10] * sqrt_5 * 12 * x_c * (2 * r2 - 1 - e2) / den6;
+
+    temp += Z[11] * sqrt_10 *
+            (x_c * (16 * x2 - 6) * (1 + e2 + e4) - 6 * x_c * e6) * num7 / den7;
+    temp += Z[12] * sqrt_10 *
+            (y_c * (24 * x2 + 8 * y2 - 6) * (1 + e2 + e4) - 6 * y_c * e6) *
+            num7 / den7;
+
+    temp += Z[13] * sqrt_10 * 4 * x_c * (x2 - 3 * y2) / den8;
+    temp += Z[14] * sqrt_10 * 4 * y_c * (3 * x2 - y2) / den8;
+
+    temp += Z[15] * sqrt_12 *
+            (3 * e8 - 36 * e6 * x2 - 12 * e6 * y2 + 12 * e6 + 50 * e4 * x4 +
+             60 * e4 * x2 * y2 - 144 * e4 * x2 + 10 * e4 * y4 - 48 * e4 * y2 +
+             30 * e4 + 200 * e2 * x4 + 240 * e2 * x2 * y2 - 144 * e2 * x2 +
+             40 * e2 * y4 - 48 * e2 * y2 + 12 * e2 + 50 * x4 + 60 * x2 * y2 -
+             36 * x2 + 10 * y4 - 12 * y2 + 3) *
+            num9 / den9;
+    temp += Z[16] * sqrt_12 *
+            (8 * xy *
+             (5 * r2 * (1 + 4 * e2 + e4) - (3 + 12 * e2 + 12 * e4 + 3 * e6))) *
+            num9 / den9;
+
+    temp += Z[17] * sqrt_12 *
+            (25 * (e6 + e4 + e2 + 1) * x4 +
+             (-12 * e8 - 30 * e6 * y2 - 12 * e6 - 30 * e4 * y2 - 12 * e4 -
+              30 * e2 * y2 - 12 * e2 - 30 * y2 - 12) *
+                 x2 +
+             12 * e8 * y2 - 15 * e6 * y4 + 12 * e6 * y2 - 15 * e4 * y4 +
+             12 * e4 * y2 - 15 * e2 * y4 + 12 * e2 * y2 - 15 * y4 + 12 * y2) *
+            num10 / den10;
+    temp += Z[18] * sqrt_12 *
+            (4.0 * xy *
+             (15 * (e6 + e4 + e2 + 1) * x2 - 6 * e8 + 5 * e6 * y2 - 6 * e6 +
+              5 * e4 * y2 - 6 * e4 + 5 * e2 * y2 - 6 * e2 + 5 * y2 - 6)) *
+            num10 / den10;
+
+    temp += Z[19] * sqrt_12 * 5 * (x2 * (x2 - 6 * y2) + y4) / den11;
+    temp += Z[20] * sqrt_12 * 20 * xy * (x2 - y2) / den11;
+
+    temp += Z[21] * sqrt_7 * 24 * x_c *
+            (e4 - e2 * (5 * y2 - 3) + 5 * x4 - 5 * y2 + 5 * y4 -
+             x2 * (5 * e2 - 10 * y2 + 5) + 1) /
+            den12;
+
+    return temp;
+}
 
-    double num12 = -5 * (1 - e12) / (1 - e10);
-    double den14 = sqrt(1 / (1 - e2) *
-                        (36 * (1 - e14) - (35 * pow(1 - e12, 2)) / (1 - e10)));
+inline double AnnularGradTerms::dy(const double *Z, const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double x4 = p.x4;
+    double y4 = p.y4;
+    double xy = p.xy;
+    double r2 = p.r2;
+
+    double temp;
+    temp = Z[2] * 2 * 1 / den1;
+
+    temp += Z[3] * sqrt_3 * 4 * y_c / den2;
+
+    temp += Z[4] * sqrt_6 * 2 * x_c / den3;
+    temp += Z[5] * sqrt_6 * (-2) * y_c / den3;
+
+    temp += Z[6] * sqrt_8 * ((1 + e2) * (3 * x2 + 9 * y2 - 2) - 2 * e4) / den4;
+    temp += Z[7] * sqrt_8 * 6 * xy * (1 + e2) / den4;
+
+    temp += Z[8] * sqrt_8 * (3 * x2 - 3 * y2) / den5;
+    temp += Z[9] * sqrt_8 * (-6) * xy / den5;
+
+    temp += Z[10] * sqrt_5 * 12 * y_c * (2 * r2 - 1 - e2) / den6;
+
+    temp += Z[11] * sqrt_10 *
+            (y_c * (6 - 16 * y2) * (1 + e2 + e4) + 6 * y_c * e6) * num7 / den7;
+    temp += Z[12] * sqrt_10 *
+            (x_c * (8 * x2 + 24 * y2 - 6) * (1 + e2 + e4) - 6 * x_c * e6) *
+            num7 / den7;
+
+    temp += Z[13] * sqrt_10 * 4 * y_c * (y2 - 3 * x2) / den8;
+    temp += Z[14] * sqrt_10 * 4 * x_c * (x2 - 3 * y2) / den8;
+
+    temp += Z[15] * sqrt_12 *
+            (-x_c * (24 * y_c + 4 * e2 * (24 * y_c - 40 * y_c * r2) +
+                     2 * e4 * (48 * y_c - 20 * y_c * r2) + 24 * e6 * y_c -
+                     40 * y_c * r2)) *
+            num9 / den9;
+    temp += Z[16] * sqrt_12 *
+            (3 * e8 - 12 * e6 * x2 - 36 * e6 * y2 + 12 * e6 + 10 * e4 * x4 +
+             60 * e4 * x2 * y2 - 48 * e4 * x2 + 50 * e4 * y4 - 144 * e4 * y2 +
+             30 * e4 + 40 * e2 * x4 + 240 * e2 * x2 * y2 - 48 * e2 * x2 +
+             200 * e2 * y4 - 144 * e2 * y2 + 12 * e2 + 10 * x4 + 60 * x2 * y2 -
+             12 * x2 + 50 * y4 - 36 * y2 + 3) *
+            num9 / den9;
+
+    temp += Z[17] * sqrt_12 *
+            (4.0 * xy *
+             ((-5) * (e6 + e4 + e2 + 1) * x2 + 6 * e8 - 15 * e6 * y2 + 6 * e6 -
+              15 * e4 * y2 + 6 * e4 - 15 * e2 * y2 + 6 * e2 - 15 * y2 + 6)) *
+            num10 / den10;
+    temp +=
+        Z[18] * sqrt_12 *
+        (-12 * e8 * x2 + 12 * e8 * y2 + 15 * e6 * x4 + 30 * e6 * x2 * y2 -
+         12 * e6 * x2 - 25 * e6 * y4 + 12 * e6 * y2 + 15 * e4 * x4 +
+         30 * e4 * x2 * y2 - 12 * e4 * x2 - 25 * e4 * y4 + 12 * e4 * y2 +
+         15 * e2 * x4 + 30 * e2 * x2 * y2 - 12 * e2 * x2 - 25 * e2 * y4 +
+         12 * e2 * y2 + 15 * x4 + 30 * x2 * y2 - 12 * x2 - 25 * y4 + 12 * y2) *
+        num10 / den10;
+
+    temp += Z[19] * sqrt_12 * 20 * xy * (y2 - x2) / den11;
+    temp += Z[20] * sqrt_12 * 5 * (x2 * (x2 - 6 * y2) + y4) / den11;
+
+    temp += Z[21] * sqrt_7 * 24 * y_c *
+            (e4 - e2 * (5 * x2 - 3) - 5 * x2 + 5 * x4 + 5 * y4 -
+             y2 * (5 * e2 - 10 * x2 + 5) + 1) /
+            den12;
+
+    return temp;
+}
 
-    double num13 = sqrt((1 - e2) / (1 - e14));
+inline double AnnularGradTerms::dx2(const double *Z,
+                                    const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double xy = p.xy;
+    double r2 = p.r2;
+    double r4 = p.r4;
+
+    double temp;
+    temp = Z[3] * sqrt_3 * 4 / den2;
+
+    temp += Z[5] * sqrt_6 * 2 / den3;
+
+    temp += Z[6] * sqrt_8 * 6 * y_c * (1 + e2) / den4;
+    temp += Z[7] * sqrt_8 * 18 * x_c * (1 + e2) / den4;
+
+    temp += Z[8] * sqrt_8 * 6 * y_c / den5;
+    temp += Z[9] * sqrt_8 * 6 * x_c / den5;
+
+    temp += Z[10] * sqrt_5 * 12 * (6 * x2 + 2 * y2 - e2 - 1) / den6;
+
+    temp += Z[11] * sqrt_10 * ((48 * x2 - 6) * (1 + e2 + e4) - 6 * e6) * num7 /
+            den7;
+    temp += Z[12] * sqrt_10 * 48 * xy * (1 + e2 + e4) * num7 / den7;
+
+    temp += Z[13] * sqrt_10 * 12 * (x2 - y2) / den8;
+    temp += Z[14] * sqrt_10 * 24 * xy / den8;
+
+    temp += Z[15] * sqrt_12 *
+            (-8 * x_c *
+             (9 * e6 - 25 * e4 * x2 - 15 * e4 * y2 + 36 * e4 - 100 * e2 * x2 -
+              60 * e2 * y2 + 36 * e2 - 25 * x2 - 15 * y2 + 9)) *
+            num9 / den9;
+    temp += Z[16] * sqrt_12 *
+            (-8 * y_c *
+             (3 * e6 - 15 * e4 * x2 - 5 * e4 * y2 + 12 * e4 - 60 * e2 * x2 -
+              20 * e2 * y2 + 12 * e2 - 15 * x2 - 5 * y2 + 3)) *
+            num9 / den9;
+
+    temp += Z[17] * sqrt_12 *
+            (-4 * x_c *
+             (6 * e8 - 25 * e6 * x2 + 15 * e6 * y2 + 6 * e6 - 25 * e4 * x2 +
+              15 * e4 * y2 + 6 * e4 - 25 * e2 * x2 + 15 * e2 * y2 + 6 * e2 -
+              25 * x2 + 15 * y2 + 6)) *
+            num10 / den10;
+    temp += Z[18] * sqrt_12 *
+            (-4 * y_c *
+             (6 * e8 - 45 * e6 * x2 - 5 * e6 * y2 + 6 * e6 - 45 * e4 * x2 -
+              5 * e4 * y2 + 6 * e4 - 45 * e2 * x2 - 5 * e2 * y2 + 6 * e2 -
+              45 * x2 - 5 * y2 + 6)) *
+            num10 / den10;
+
+    temp += Z[19] * sqrt_12 * 20 * x_c * (x2 - 3 * y2) / den11;
+    temp += Z[20] * sqrt_12 * 20 * y_c * (3 * x2 - y2) / den11;
+
+    temp += Z[21] * sqrt_7 *
+            (480 * x2 * r2 + 120 * r4 + 24 * e4 - 360 * x2 - 120 * y2 -
+             3 * e2 * (120 * x2 + 40 * y2 - 24) + 24) /
+            den12;
+
+    return temp;
+}
 
-    // Parameter in loop
-    double r, r2, r3, r4, r5, r6;
-    double t, t2, t3, t4, t5, t6;
-    double s, s2, s3, s4, s5, s6;
-    double c, c2, c3, c4, c5, c6;
+inline double AnnularGradTerms::dy2(const double *Z,
+                                    const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double xy = p.xy;
+    double r2 = p.r2;
+    double r4 = p.r4;
+
+    double temp;
+    temp = Z[3] * sqrt_3 * 4 / den2;
+
+    temp += Z[5] * sqrt_6 * (-2) / den3;
+
+    temp += Z[6] * sqrt_8 * (1 + e2) * 18 * y_c / den4;
+    temp += Z[7] * sqrt_8 * 6 * x_c * (1 + e2) / den4;
+
+    temp += Z[8] * sqrt_8 * (-6) * y_c / den5;
+    temp += Z[9] * sqrt_8 * (-6) * x_c / den5;
+
+    temp += Z[10] * sqrt_5 * 12 * (2 * x2 + 6 * y2 - e2 - 1) / den6;
+
+    temp += Z[11] * sqrt_10 * ((6 - 48 * y2) * (1 + e2 + e4) + 6 * e6) * num7 /
+            den7;
+    temp += Z[12] * sqrt_10 * 48 * xy * (1 + e2 + e4) * num7 / den7;
+
+    temp += Z[13] * sqrt_10 * 12 * (y2 - x2) / den8;
+    temp += Z[14] * sqrt_10 * (-24) * xy / den8;
+
+    temp += Z[15] * sqrt_12 *
+            (-8 * x_c *
+             (3 * e6 - 5 * e4 * x2 - 15 * e4 * y2 + 12 * e4 - 20 * e2 * x2 -
+              60 * e2 * y2 + 12 * e2 - 5 * x2 - 15 * y2 + 3)) *
+            num9 / den9;
+    temp += Z[16] * sqrt_12 *
+            (-8 * y_c *
+             (9 * e6 - 15 * e4 * x2 - 25 * e4 * y2 + 36 * e4 - 60 * e2 * x2 -
+              100 * e2 * y2 + 36 * e2 - 15 * x2 - 25 * y2 + 9)) *
+            num9 / den9;
+
+    temp += Z[17] * sqrt_12 *
+            (4 * x_c *
+             (6 * e8 - 5 * e6 * x2 - 45 * e6 * y2 + 6 * e6 - 5 * e4 * x2 -
+              45 * e4 * y2 + 6 * e4 - 5 * e2 * x2 - 45 * e2 * y2 + 6 * e2 -
+              5 * x2 - 45 * y2 + 6)) *
+            num10 / den10;
+    temp += Z[18] * sqrt_12 *
+            (4 * y_c *
+             (6 * e8 + 15 * e6 * x2 - 25 * e6 * y2 + 6 * e6 + 15 * e4 * x2 -
+              25 * e4 * y2 + 6 * e4 + 15 * e2 * x2 - 25 * e2 * y2 + 6 * e2 +
+              15 * x2 - 25 * y2 + 6)) *
+            num10 / den10;
+
+    temp += Z[19] * sqrt_12 * 20 * x_c * (3 * y2 - x2) / den11;
+    temp += Z[20] * sqrt_12 * 20 * y_c * (y2 - 3 * x2) / den11;
+
+    temp += Z[21] * sqrt_7 *
+            (480 * y2 * r2 + 120 * r4 + 24 * e4 - 120 * x2 - 360 * y2 -
+             3 * e2 * (40 * x2 + 120 * y2 - 24) + 24) /
+            den12;
+
+    return temp;
+}
 
-    double temp, numQ, x_c, y_c, Rnl;
+inline double AnnularGradTerms::dxy(const double *Z,
+                                    const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double xy = p.xy;
+    double r2 = p.r2;
+
+    double temp;
+    temp = Z[4] * sqrt_6 * 2 / den3;
+
+    temp += Z[6] * sqrt_8 * (1 + e2) * (6 * x_c) / den4;
+    temp += Z[7] * sqrt_8 * 6 * y_c * (1 + e2) / den4;
+
+    temp += Z[8] * sqrt_8 * 6 * x_c / den5;
+    temp += Z[9] * sqrt_8 * (-6) * y_c / den5;
+
+    temp += Z[10] * sqrt_5 * 48 * xy / den6;
+
+    temp += Z[12] * sqrt_10 *
+            ((24 * x2 + 24 * y2 - 6) * (1 + e2 + e4) - 6 * e6) * num7 / den7;
+
+    temp += Z[13] * sqrt_10 * (-24) * xy / den8;
+    temp += Z[14] * sqrt_10 * 12 * (x2 - y2) / den8;
+
+    temp += Z[15] * sqrt_12 *
+            (-8 * y_c *
+             (3 * e6 - 15 * e4 * x2 - 5 * e4 * y2 + 12 * e4 - 60 * e2 * x2 -
+              20 * e2 * y2 + 12 * e2 - 15 * x2 - 5 * y2 + 3)) *
+            num9 / den9;
+    temp += Z[16] * sqrt_12 *
+            (-8 * x_c *
+             (3 * e6 - 5 * e4 * x2 - 15 * e4 * y2 + 12 * e4 - 20 * e2 * x2 -
+              60 * e2 * y2 + 12 * e2 - 5 * x2 - 15 * y2 + 3)) *
+            num9 / den9;
+
+    temp += Z[17] * sqrt_12 *
+            (12 * y_c *
+             (2 * e8 - 5 * e6 * r2 + 2 * e6 - 5 * e4 * r2 + 2 * e4 -
+              5 * e2 * r2 + 2 * e2 - 5 * r2 + 2)) *
+            num10 / den10;
+    temp += Z[18] * sqrt_12 *
+            (-12 * x_c *
+             (2 * e8 - 5 * e6 * r2 + 2 * e6 - 5 * e4 * r2 + 2 * e4 -
+              5 * e2 * r2 + 2 * e2 - 5 * r2 + 2)) *
+            num10 / den10;
+
+    temp += Z[19] * sqrt_12 * 20 * y_c * (y2 - 3 * x2) / den11;
+    temp += Z[20] * sqrt_12 * 20 * x_c * (x2 - 3 * y2) / den11;
+
+    temp += Z[21] * sqrt_7 * 240 * xy * (2 * r2 - 1 - e2) / den12;
+
+    return temp;
+}
 
-    for (size_t ii = 0; ii < n; ii++) {
-        x_c = x[ii];
-        y_c = y[ii];
+/**
+ * Jacobian terms of annular Zernike polynomials (up to Z22) at one point.
+ */
+struct AnnularJacobianTerms {
+    double e2;
+    double e4;
+    double e6;
+    double e8;
+    double e10;
+    double e12;
+    double e14;
+    double e16;
+    double sqrt_3;
+    double sqrt_5;
+    double sqrt_7;
+    double sqrt_8;
+    double sqrt_10;
+    double sqrt_12;
+    double den1;
+    double den2;
+    double den3;
+    double den4;
+    double num4;
+    double den5;
+    double num5;
+    double den6;
+    double num6;
+    double den7;
+    double den2_2;
+    double den2_3;
+    double den2_4;
+    double den2_5;
+    double den2_6;
+    double num2_6;
+    double den2_7;
+    double den2_8;
+    double num2_8;
+    double den2_9;
+    double num2_9;
+    double den2_10;
+    double den2_11;
+
+    explicit AnnularJacobianTerms(double e);
+
+    ALWAYS_INLINE double first(const double *Z, const PupilPoint &p) const;
+    ALWAYS_INLINE double second(const double *Z, const PupilPoint &p) const;
+};
 
-        r2 = pow(x_c, 2) + pow(y_c, 2);
-        r = sqrt(r2);
-        r3 = r2 * r;
-        r4 = r2 * r2;
-        r5 = r3 * r2;
-        r6 = r3 * r3;
-
-        t = atan2(y_c, x_c);
-        s = sin(t);
-        c = cos(t);
-
-        t2 = 2 * t;
-        t3 = 3 * t;
-        t4 = 4 * t;
-        t5 = 5 * t;
-        t6 = 6 * t;
-
-        s2 = sin(t2);
-        c2 = cos(t2);
-        s3 = sin(t3);
-        c3 = cos(t3);
-        s4 = sin(t4);
-        c4 = cos(t4);
-        s5 = sin(t5);
-        c5 = cos(t5);
-        s6 = sin(t6);
-        c6 = cos(t6);
-
-        temp = Z[0] * (1 + 0 * x_c);
-
-        Rnl = 2 * r / den1;
-        temp += Z[1] * Rnl * c;
-        temp += Z[2] * Rnl * s;
-
-        temp += Z[3] * sqrt_3 * (2 * r2 - 1 - e2) / den2;
-
-        Rnl = sqrt_6 * r2 / den3;
-        temp += Z[4] * Rnl * s2;
-        temp += Z[5] * Rnl * c2;
-
-        Rnl = sqrt_8 * (3 * r3 - 2 * r - 2 * e4 * r + e2 * r * (3 * r2 - 2)) /
-              den4;
-        temp += Z[6] * Rnl * s;
-        temp += Z[7] * Rnl * c;
-
-        Rnl = sqrt_8 * r3 / den5;
-        temp += Z[8] * Rnl * s3;
-        temp += Z[9] * Rnl * c3;
-
-        temp += Z[10] * sqrt_5 *
-                (6 * r4 - 6 * r2 + 1 + e4 + e2 * (4 - 6 * r2)) / den6;
-
-        Rnl = sqrt_10 *
-              (4 * r4 - 3 * r2 - 3 * e6 * r2 - e2 * r2 * (3 - 4 * r2) -
-               e4 * r2 * (3 - 4 * r2)) *
-              num7 / den7;
-        temp += Z[11] * Rnl * c2;
-        temp += Z[12] * Rnl * s2;
-
-        Rnl = sqrt_10 * r4 / den8;
-        temp += Z[13] * Rnl * c4;
-        temp += Z[14] * Rnl * s4;
-
-        numQ = 10 * r5 - 12 * r3 + 3 * r + 3 * e8 * r - 12 * e6 * r * (r2 - 1) +
-               2 * e4 * r * (15 - 24 * r2 + 5 * r4) +
-               4 * e2 * r * (3 - 12 * r2 + 10 * r4);
-        Rnl = sqrt_12 * num9E * numQ / den9;
-        temp += Z[15] * Rnl * c;
-        temp += Z[16] * Rnl * s;
-
-        numQ = r3 * (5 * r2 - 4 - 4 * e8 - e2 * (4 - 5 * r2) -
-                     e4 * (4 - 5 * r2) - e6 * (4 - 5 * r2));
-        Rnl = sqrt_12 * num10E * numQ / den10;
-        temp += Z[17] * Rnl * c3;
-        temp += Z[18] * Rnl * s3;
-
-        Rnl = sqrt_12 * r5 / den11;
-        temp += Z[19] * Rnl * c5;
-        temp += Z[20] * Rnl * s5;
-
-        temp += Z[21] * sqrt_7 *
-                (20 * r6 - 30 * r4 + 12 * r2 - 1 - e6 + 3 * e4 * (-3 + 4 * r2) -
-                 3 * e2 * (3 - 12 * r2 + 10 * r4)) /
-                den12;
-
-        Rnl = sqrt_14 * (num11a * r6 + num11b * r4 + num11c * r2) / den13;
-        temp += Z[22] * Rnl * s2;
-        temp += Z[23] * Rnl * c2;
-
-        Rnl = sqrt_14 * (6 * r6 + num12 * r4) / den14;
-        temp += Z[24] * Rnl * s4;
-        temp += Z[25] * Rnl * c4;
-
-        Rnl = sqrt_14 * num13 * r6;
-        temp += Z[26] * Rnl * s6;
-        temp += Z[27] * Rnl * c6;
-
-        S[ii] = temp;
-    }
+AnnularJacobianTerms::AnnularJacobianTerms(double e) {
+    e2 = pow(e, 2);
+    e4 = e2 * e2;
+    e6 = e4 * e2;
+    e8 = e6 * e2;
+    e10 = e8 * e2;
+    e12 = e10 * e2;
+    e14 = e12 * e2;
+    e16 = e14 * e2;
+
+    sqrt_3 = sqrt(3);
+    sqrt_5 = sqrt(5);
+    sqrt_7 = sqrt(7);
+    sqrt_8 = sqrt(8);
+    sqrt_10 = sqrt(10);
+    sqrt_12 = sqrt(12);
 
-    return result;
+    // 1st order
+    den1 = 1 - e2;
+    den2 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
+    den3 = pow(1 - e2, 2);
+
+    den4 = pow(1 - e2, 3) * (1 + e2 + e4);
+    num4 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
+                (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
+
+    den5 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
+    num5 =
+        sqrt(pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6));
+
+    den6 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
+    num6 = sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
+                (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
+
+    den7 = pow(1 - e2, 3);
+
+    // 2nd order
+    den2_2 = (1 + e2 + e4);
+    den2_3 = pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4);
+    den2_4 = (1 + e2 + e4 + e6);
+    den2_5 = pow(1 - e2, 4);
+
+    den2_6 = pow(1 - e2, 6) * pow(1 + e2 + e4, 2);
+    num2_6 =
+        (pow(1 - e2, 4) * (1 + e2 + e4) / (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
+
+    den2_7 = (1 + e2 + e4 + e6 + e8);
+
+    den2_8 = pow(1 - e2, 6) * pow(1 + 4 * e2 + e4, 2);
+    num2_8 = pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6);
+
+    den2_9 = pow(1 - e2, 8) * pow(1 + e2, 2) * pow(1 + e4, 2);
+    num2_9 = pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
+             (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12);
+
+    den2_10 = (1 + e2 + e4 + e6 + e8 + e10);
+    den2_11 = pow(1 - e2, 6);
+}
+
+inline double AnnularJacobianTerms::first(const double *Z,
+                                          const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double x4 = p.x4;
+    double y4 = p.y4;
+    double xy = p.xy;
+    double r2 = p.r2;
+
+    double temp;
+    temp = Z[3] * sqrt_3 * 8 / den1;
+
+    temp += Z[6] * sqrt_8 * 24 * y_c * (1 + e2) / den2;
+    temp += Z[7] * sqrt_8 * 24 * x_c * (1 + e2) / den2;
+
+    temp += Z[10] * sqrt_5 * (96 * r2 - 24 * (1 + e2)) / den3;
+
+    temp += Z[11] * sqrt_10 * 48 * (x2 - y2) * (1 + e2 + e4) * num4 / den4;
+    temp += Z[12] * sqrt_10 * 96 * xy * (1 + e2 + e4) * num4 / den4;
+
+    temp += Z[15] * sqrt_12 * 48 * x_c *
+            (5 * r2 * (1 + 4 * e2 + e4) - 2 * (1 + 4 * e2 + 4 * e4 + e6)) *
+            num5 / den5;
+    temp += Z[16] * sqrt_12 * 48 * y_c *
+            (5 * r2 * (1 + 4 * e2 + e4) - 2 * (1 + 4 * e2 + 4 * e4 + e6)) *
+            num5 / den5;
+
+    temp += Z[17] * sqrt_12 * 80.0 * x_c * (x2 - 3.0 * y2) * (1 + e2) *
+            (1 + e4) * num6 / den6;
+    temp += Z[18] * sqrt_12 * 80.0 * y_c * (3 * x2 - y2) * (1 + e2) * (1 + e4) *
+            num6 / den6;
+
+    temp += Z[21] * sqrt_7 * 48 *
+            (e4 - 10 * e2 * x2 - 10 * e2 * y2 + 3 * e2 + 15 * x4 +
+             30 * x2 * y2 - 10 * x2 + 15 * y4 - 10 * y2 + 1) /
+            den7;
+
+    return temp;
+}
+
+inline double AnnularJacobianTerms::second(const double *Z,
+                                           const PupilPoint &p) const {
+    double x_c = p.x_c;
+    double y_c = p.y_c;
+    double x2 = p.x2;
+    double y2 = p.y2;
+    double x4 = p.x4;
+    double y4 = p.y4;
+    double x6 = p.x6;
+    double y6 = p.y6;
+    double r2 = p.r2;
+
+    double temp;
+    temp = pow(Z[3], 2) * (3) * 16 / den1 / den1;
+
+    temp += pow(Z[4], 2) * (6) * (-4) / den2_2;
+    temp += pow(Z[5], 2) * (6) * (-4) / den2_2;
+
+    temp += pow(Z[6], 2) * (8) * (108 * y2 - 36 * x2) * (1 + e2) / den2_3;
+    temp += pow(Z[7], 2) * (8) * (108 * x2 - 36 * y2) * (1 + e2) / den2_3;
+
+    temp += pow(Z[8], 2) * (8) * (-36 * r2) / den2_4;
+    temp += pow(Z[9], 2) * (8) * (-36 * r2) / den2_4;
+
+    temp += pow(Z[10], 2) * (5) * 144 * (1 + e2 - 2 * r2) * (1 + e2 - 6 * r2) /
+            den2_5;
+
+    temp += pow(Z[11], 2) * (10) * 36 *
+            (8 * (1 + e2 + e4) * x2 - 1 - e2 - e4 - e6) *
+            (1 + e2 + e4 + e6 - 8 * (1 + e2 + e4) * y2) * num2_6 / den2_6;
+    temp += pow(Z[12], 2) * (10) * 36 *
+            (-4 * pow(x_c - y_c, 2) * (e4 + e2 + 1) + 1 + e2 + e4 + e6) *
+            (4 * pow(x_c + y_c, 2) * (e4 + e2 + 1) - 1 - e2 - e4 - e6) *
+            num2_6 / den2_6;
+
+    temp += pow(Z[13], 2) * (10) * (-144) * pow(r2, 2) / den2_7;
+    temp += pow(Z[14], 2) * (10) * (-144) * pow(r2, 2) / den2_7;
+
+    temp += pow(Z[15], 2) * (12) * 64 *
+            ((3 * e6 - 5 * e4 * r2 + 12 * e4 - 20 * e2 * r2 + 12 * e2 - 5 * r2 +
+              3) *
+             (9 * e6 * x2 - 3 * e6 * y2 - 25 * e4 * x4 - 20 * e4 * x2 * y2 +
+              36 * e4 * x2 + 5 * e4 * y4 - 12 * e4 * y2 - 100 * e2 * x4 -
+              80 * e2 * x2 * y2 + 36 * e2 * x2 + 20 * e2 * y4 - 12 * e2 * y2 -
+              25 * x4 - 20 * x2 * y2 + 9 * x2 + 5 * y4 - 3 * y2)) *
+            num2_8 / den2_8;
+    temp += pow(Z[16], 2) * (12) * 64 *
+            (-(3 * e6 - 5 * e4 * r2 + 12 * e4 - 20 * e2 * r2 + 12 * e2 -
+               5 * r2 + 3) *
+             (3 * e6 * x2 - 9 * e6 * y2 - 5 * e4 * x4 + 20 * e4 * x2 * y2 +
+              12 * e4 * x2 + 25 * e4 * y4 - 36 * e4 * y2 - 20 * e2 * x4 +
+              80 * e2 * x2 * y2 + 12 * e2 * x2 + 100 * e2 * y4 - 36 * e2 * y2 -
+              5 * x4 + 20 * x2 * y2 + 3 * x2 + 25 * y4 - 9 * y2)) *
+            num2_8 / den2_8;
+
+    temp +=
+        pow(Z[17], 2) * (12) * 16.0 *
+        (-36 * e16 * x2 - 36 * e16 * y2 + 180 * e14 * x4 + 360 * e14 * x2 * y2 -
+         72 * e14 * x2 + 180 * e14 * y4 - 72 * e14 * y2 - 125 * e12 * x6 -
+         1275 * e12 * x4 * y2 + 360 * e12 * x4 + 225 * e12 * x2 * y4 +
+         720 * e12 * x2 * y2 - 108 * e12 * x2 - 225 * e12 * y6 +
+         360 * e12 * y4 - 108 * e12 * y2 - 250 * e10 * x6 -
+         2550 * e10 * x4 * y2 + 540 * e10 * x4 + 450 * e10 * x2 * y4 +
+         1080 * e10 * x2 * y2 - 144 * e10 * x2 - 450 * e10 * y6 +
+         540 * e10 * y4 - 144 * e10 * y2 - 375 * e8 * x6 - 3825 * e8 * x4 * y2 +
+         720 * e8 * x4 + 675 * e8 * x2 * y4 + 1440 * e8 * x2 * y2 -
+         180 * e8 * x2 - 675 * e8 * y6 + 720 * e8 * y4 - 180 * e8 * y2 -
+         500 * e6 * x6 - 5100 * e6 * x4 * y2 + 720 * e6 * x4 +
+         900 * e6 * x2 * y4 + 1440 * e6 * x2 * y2 - 144 * e6 * x2 -
+         900 * e6 * y6 + 720 * e6 * y4 - 144 * e6 * y2 - 375 * e4 * x6 -
+         3825 * e4 * x4 * y2 + 540 * e4 * x4 + 675 * e4 * x2 * y4 +
+         1080 * e4 * x2 * y2 - 108 * e4 * x2 - 675 * e4 * y6 + 540 * e4 * y4 -
+         108 * e4 * y2 - 250 * e2 * x6 - 2550 * e2 * x4 * y2 + 360 * e2 * x4 +
+         450 * e2 * x2 * y4 + 720 * e2 * x2 * y2 - 72 * e2 * x2 -
+         450 * e2 * y6 + 360 * e2 * y4 - 72 * e2 * y2 - 125 * x6 -
+         1275 * x4 * y2 + 180 * x4 + 225 * x2 * y4 + 360 * x2 * y2 - 36 * x2 -
+         225 * y6 + 180 * y4 - 36 * y2) *
+        num2_9 / den2_9;
+    temp +=
+        pow(Z[18], 2) * (12) * 16.0 *
+        ((-225 * e12 - 450 * e10 - 675 * e8 - 900 * e6 - 675 * e4 - 450 * e2 -
+          225) *
+             x6 +
+         (180 * e14 + 225 * e12 * y2 + 360 * e12 + 450 * e10 * y2 + 540 * e10 +
+          675 * e8 * y2 + 720 * e8 + 900 * e6 * y2 + 720 * e6 + 675 * e4 * y2 +
+          540 * e4 + 450 * e2 * y2 + 360 * e2 + 225 * y2 + 180) *
+             x4 +
+         (-36 * e16 + 360 * e14 * y2 - 72 * e14 - 1275 * e12 * y4 +
+          720 * e12 * y2 - 108 * e12 - 2550 * e10 * y4 + 1080 * e10 * y2 -
+          144 * e10 - 3825 * e8 * y4 + 1440 * e8 * y2 - 180 * e8 -
+          5100 * e6 * y4 + 1440 * e6 * y2 - 144 * e6 - 3825 * e4 * y4 +
+          1080 * e4 * y2 - 108 * e4 - 2550 * e2 * y4 + 720 * e2 * y2 - 72 * e2 -
+          1275 * y4 + 360 * y2 - 36) *
+             x2 -
+         36 * e16 * y2 + 180 * e14 * y4 - 72 * e14 * y2 - 125 * e12 * y6 +
+         360 * e12 * y4 - 108 * e12 * y2 - 250 * e10 * y6 + 540 * e10 * y4 -
+         144 * e10 * y2 - 375 * e8 * y6 + 720 * e8 * y4 - 180 * e8 * y2 -
+         500 * e6 * y6 + 720 * e6 * y4 - 144 * e6 * y2 - 375 * e4 * y6 +
+         540 * e4 * y4 - 108 * e4 * y2 - 250 * e2 * y6 + 360 * e2 * y4 -
+         72 * e2 * y2 - 125 * y6 + 180 * y4 - 36 * y2) *
+        num2_9 / den2_9;
+
+    temp += pow(Z[19], 2) * (12) * (-400) * pow(r2, 3) / den2_10;
+    temp += pow(Z[20], 2) * (12) * (-400) * pow(r2, 3) / den2_10;
+
+    temp += pow(Z[21], 2) * (7) * 576 *
+            ((e4 - 5 * e2 * x2 - 5 * e2 * y2 + 3 * e2 + 5 * x4 + 10 * x2 * y2 -
+              5 * x2 + 5 * y4 - 5 * y2 + 1) *
+             (e4 - 15 * e2 * x2 - 15 * e2 * y2 + 3 * e2 + 25 * x4 +
+              50 * x2 * y2 - 15 * x2 + 25 * y4 - 15 * y2 + 1)) /
+            den2_11;
+
+    return temp;
 }
 
 py::array_t<double> zernikeAnnularJacobian(py::array_t<double> arrayZk,
@@ -267,239 +1075,15 @@ py::array_t<double> zernikeAnnularJacobian(py::array_t<double> arrayZk,
     double *out = infoResult.buf;
 
     // Parameters of constant
-    double e2 = pow(e, 2);
-    double e4 = e2 * e2;
-    double e6 = e4 * e2;
-    double e8 = e6 * e2;
-    double e10 = e8 * e2;
-    double e12 = e10 * e2;
-    double e14 = e12 * e2;
-    double e16 = e14 * e2;
-
-    double sqrt_3 = sqrt(3);
-    double sqrt_5 = sqrt(5);
-    double sqrt_7 = sqrt(7);
-    double sqrt_8 = sqrt(8);
-    double sqrt_10 = sqrt(10);
-    double sqrt_12 = sqrt(12);
-
-    // 1st order
-    double den1 = 1 - e2;
-    double den2 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
-    double den3 = pow(1 - e2, 2);
-
-    double den4 = pow(1 - e2, 3) * (1 + e2 + e4);
-    double num4 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
-                       (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
-
-    double den5 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
-    double num5 =
-        sqrt(pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6));
-
-    double den6 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
-    double num6 =
-        sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
-             (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
-
-    double den7 = pow(1 - e2, 3);
-
-    // 2nd order
-    double den2_2 = (1 + e2 + e4);
-    double den2_3 = pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4);
-    double den2_4 = (1 + e2 + e4 + e6);
-    double den2_5 = pow(1 - e2, 4);
-
-    double den2_6 = pow(1 - e2, 6) * pow(1 + e2 + e4, 2);
-    double num2_6 =
-        (pow(1 - e2, 4) * (1 + e2 + e4) / (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
-
-    double den2_7 = (1 + e2 + e4 + e6 + e8);
-
-    double den2_8 = pow(1 - e2, 6) * pow(1 + 4 * e2 + e4, 2);
-    double num2_8 =
-        pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6);
-
-    double den2_9 = pow(1 - e2, 8) * pow(1 + e2, 2) * pow(1 + e4, 2);
-    double num2_9 = pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
-                    (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12);
-
-    double den2_10 = (1 + e2 + e4 + e6 + e8 + e10);
-    double den2_11 = pow(1 - e2, 6);
-
-    // Parameters in loop
-    double x2, y2, x4, y4, xy, r2, x6, y6, temp, x_c, y_c;
+    AnnularJacobianTerms terms(e);
 
     if (atype == "1st") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-
-            // to make d an array with the same size as x
-            temp = Z[3] * sqrt_3 * 8 / den1;
-
-            temp += Z[6] * sqrt_8 * 24 * y_c * (1 + e2) / den2;
-            temp += Z[7] * sqrt_8 * 24 * x_c * (1 + e2) / den2;
-
-            temp += Z[10] * sqrt_5 * (96 * r2 - 24 * (1 + e2)) / den3;
-
-            temp +=
-                Z[11] * sqrt_10 * 48 * (x2 - y2) * (1 + e2 + e4) * num4 / den4;
-            temp += Z[12] * sqrt_10 * 96 * xy * (1 + e2 + e4) * num4 / den4;
-
-            temp +=
-                Z[15] * sqrt_12 * 48 * x_c *
-                (5 * r2 * (1 + 4 * e2 + e4) - 2 * (1 + 4 * e2 + 4 * e4 + e6)) *
-                num5 / den5;
-            temp +=
-                Z[16] * sqrt_12 * 48 * y_c *
-                (5 * r2 * (1 + 4 * e2 + e4) - 2 * (1 + 4 * e2 + 4 * e4 + e6)) *
-                num5 / den5;
-
-            temp += Z[17] * sqrt_12 * 80.0 * x_c * (x2 - 3.0 * y2) * (1 + e2) *
-                    (1 + e4) * num6 / den6;
-            temp += Z[18] * sqrt_12 * 80.0 * y_c * (3 * x2 - y2) * (1 + e2) *
-                    (1 + e4) * num6 / den6;
-
-            temp += Z[21] * sqrt_7 * 48 *
-                    (e4 - 10 * e2 * x2 - 10 * e2 * y2 + 3 * e2 + 15 * x4 +
-                     30 * x2 * y2 - 10 * x2 + 15 * y4 - 10 * y2 + 1) /
-                    den7;
-
-            out[ii] = temp;
+            out[ii] = terms.first(Z, PupilPoint(x[ii], y[ii]));
         }
     } else if (atype == "2nd") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-            x4 = x2 * x2;
-            x6 = x4 * x2;
-            y4 = y2 * y2;
-            y6 = y4 * y2;
-
-            // to make d an array with the same size as x
-            temp = pow(Z[3], 2) * (3) * 16 / den1 / den1;
-
-            temp += pow(Z[4], 2) * (6) * (-4) / den2_2;
-            temp += pow(Z[5], 2) * (6) * (-4) / den2_2;
-
-            temp +=
-                pow(Z[6], 2) * (8) * (108 * y2 - 36 * x2) * (1 + e2) / den2_3;
-            temp +=
-                pow(Z[7], 2) * (8) * (108 * x2 - 36 * y2) * (1 + e2) / den2_3;
-
-            temp += pow(Z[8], 2) * (8) * (-36 * r2) / den2_4;
-            temp += pow(Z[9], 2) * (8) * (-36 * r2) / den2_4;
-
-            temp += pow(Z[10], 2) * (5) * 144 * (1 + e2 - 2 * r2) *
-                    (1 + e2 - 6 * r2) / den2_5;
-
-            temp += pow(Z[11], 2) * (10) * 36 *
-                    (8 * (1 + e2 + e4) * x2 - 1 - e2 - e4 - e6) *
-                    (1 + e2 + e4 + e6 - 8 * (1 + e2 + e4) * y2) * num2_6 /
-                    den2_6;
-            temp +=
-                pow(Z[12], 2) * (10) * 36 *
-                (-4 * pow(x_c - y_c, 2) * (e4 + e2 + 1) + 1 + e2 + e4 + e6) *
-                (4 * pow(x_c + y_c, 2) * (e4 + e2 + 1) - 1 - e2 - e4 - e6) *
-                num2_6 / den2_6;
-
-            temp += pow(Z[13], 2) * (10) * (-144) * pow(r2, 2) / den2_7;
-            temp += pow(Z[14], 2) * (10) * (-144) * pow(r2, 2) / den2_7;
-
-            temp += pow(Z[15], 2) * (12) * 64 *
-                    ((3 * e6 - 5 * e4 * r2 + 12 * e4 - 20 * e2 * r2 + 12 * e2 -
-                      5 * r2 + 3) *
-                     (9 * e6 * x2 - 3 * e6 * y2 - 25 * e4 * x4 -
-                      20 * e4 * x2 * y2 + 36 * e4 * x2 + 5 * e4 * y4 -
-                      12 * e4 * y2 - 100 * e2 * x4 - 80 * e2 * x2 * y2 +
-                      36 * e2 * x2 + 20 * e2 * y4 - 12 * e2 * y2 - 25 * x4 -
-                      20 * x2 * y2 + 9 * x2 + 5 * y4 - 3 * y2)) *
-                    num2_8 / den2_8;
-            temp += pow(Z[16], 2) * (12) * 64 *
-                    (-(3 * e6 - 5 * e4 * r2 + 12 * e4 - 20 * e2 * r2 + 12 * e2 -
-                       5 * r2 + 3) *
-                     (3 * e6 * x2 - 9 * e6 * y2 - 5 * e4 * x4 +
-                      20 * e4 * x2 * y2 + 12 * e4 * x2 + 25 * e4 * y4 -
-                      36 * e4 * y2 - 20 * e2 * x4 + 80 * e2 * x2 * y2 +
-                      12 * e2 * x2 + 100 * e2 * y4 - 36 * e2 * y2 - 5 * x4 +
-                      20 * x2 * y2 + 3 * x2 + 25 * y4 - 9 * y2)) *
-                    num2_8 / den2_8;
-
-            temp +=
-                pow(Z[17], 2) * (12) * 16.0 *
-                (-36 * e16 * x2 - 36 * e16 * y2 + 180 * e14 * x4 +
-                 360 * e14 * x2 * y2 - 72 * e14 * x2 + 180 * e14 * y4 -
-                 72 * e14 * y2 - 125 * e12 * x6 - 1275 * e12 * x4 * y2 +
-                 360 * e12 * x4 + 225 * e12 * x2 * y4 + 720 * e12 * x2 * y2 -
-                 108 * e12 * x2 - 225 * e12 * y6 + 360 * e12 * y4 -
-                 108 * e12 * y2 - 250 * e10 * x6 - 2550 * e10 * x4 * y2 +
-                 540 * e10 * x4 + 450 * e10 * x2 * y4 + 1080 * e10 * x2 * y2 -
-                 144 * e10 * x2 - 450 * e10 * y6 + 540 * e10 * y4 -
-                 144 * e10 * y2 - 375 * e8 * x6 - 3825 * e8 * x4 * y2 +
-                 720 * e8 * x4 + 675 * e8 * x2 * y4 + 1440 * e8 * x2 * y2 -
-                 180 * e8 * x2 - 675 * e8 * y6 + 720 * e8 * y4 - 180 * e8 * y2 -
-                 500 * e6 * x6 - 5100 * e6 * x4 * y2 + 720 * e6 * x4 +
-                 900 * e6 * x2 * y4 + 1440 * e6 * x2 * y2 - 144 * e6 * x2 -
-                 900 * e6 * y6 + 720 * e6 * y4 - 144 * e6 * y2 - 375 * e4 * x6 -
-                 3825 * e4 * x4 * y2 + 540 * e4 * x4 + 675 * e4 * x2 * y4 +
-                 1080 * e4 * x2 * y2 - 108 * e4 * x2 - 675 * e4 * y6 +
-                 540 * e4 * y4 - 108 * e4 * y2 - 250 * e2 * x6 -
-                 2550 * e2 * x4 * y2 + 360 * e2 * x4 + 450 * e2 * x2 * y4 +
-                 720 * e2 * x2 * y2 - 72 * e2 * x2 - 450 * e2 * y6 +
-                 360 * e2 * y4 - 72 * e2 * y2 - 125 * x6 - 1275 * x4 * y2 +
-                 180 * x4 + 225 * x2 * y4 + 360 * x2 * y2 - 36 * x2 - 225 * y6 +
-                 180 * y4 - 36 * y2) *
-                num2_9 / den2_9;
-            temp +=
-                pow(Z[18], 2) * (12) * 16.0 *
-                ((-225 * e12 - 450 * e10 - 675 * e8 - 900 * e6 - 675 * e4 -
-                  450 * e2 - 225) *
-                     x6 +
-                 (180 * e14 + 225 * e12 * y2 + 360 * e12 + 450 * e10 * y2 +
-                  540 * e10 + 675 * e8 * y2 + 720 * e8 + 900 * e6 * y2 +
-                  720 * e6 + 675 * e4 * y2 + 540 * e4 + 450 * e2 * y2 +
-                  360 * e2 + 225 * y2 + 180) *
-                     x4 +
-                 (-36 * e16 + 360 * e14 * y2 - 72 * e14 - 1275 * e12 * y4 +
-                  720 * e12 * y2 - 108 * e12 - 2550 * e10 * y4 +
-                  1080 * e10 * y2 - 144 * e10 - 3825 * e8 * y4 +
-                  1440 * e8 * y2 - 180 * e8 - 5100 * e6 * y4 + 1440 * e6 * y2 -
-                  144 * e6 - 3825 * e4 * y4 + 1080 * e4 * y2 - 108 * e4 -
-                  2550 * e2 * y4 + 720 * e2 * y2 - 72 * e2 - 1275 * y4 +
-                  360 * y2 - 36) *
-                     x2 -
-                 36 * e16 * y2 + 180 * e14 * y4 - 72 * e14 * y2 -
-                 125 * e12 * y6 + 360 * e12 * y4 - 108 * e12 * y2 -
-                 250 * e10 * y6 + 540 * e10 * y4 - 144 * e10 * y2 -
-                 375 * e8 * y6 + 720 * e8 * y4 - 180 * e8 * y2 - 500 * e6 * y6 +
-                 720 * e6 * y4 - 144 * e6 * y2 - 375 * e4 * y6 + 540 * e4 * y4 -
-                 108 * e4 * y2 - 250 * e2 * y6 + 360 * e2 * y4 - 72 * e2 * y2 -
-                 125 * y6 + 180 * y4 - 36 * y2) *
-                num2_9 / den2_9;
-
-            temp += pow(Z[19], 2) * (12) * (-400) * pow(r2, 3) / den2_10;
-            temp += pow(Z[20], 2) * (12) * (-400) * pow(r2, 3) / den2_10;
-
-            temp += pow(Z[21], 2) * (7) * 576 *
-                    ((e4 - 5 * e2 * x2 - 5 * e2 * y2 + 3 * e2 + 5 * x4 +
-                      10 * x2 * y2 - 5 * x2 + 5 * y4 - 5 * y2 + 1) *
-                     (e4 - 15 * e2 * x2 - 15 * e2 * y2 + 3 * e2 + 25 * x4 +
-                      50 * x2 * y2 - 15 * x2 + 25 * y4 - 15 * y2 + 1)) /
-                    den2_11;
-
-            out[ii] = temp;
+            out[ii] = terms.second(Z, PupilPoint(x[ii], y[ii]));
         }
     } else {
         throw std::invalid_argument("Input atype is not supported.");
@@ -528,408 +1112,199 @@ py::array_t<double> zernikeAnnularGrad(py::array_t<double> arrayZk,
     double *d = infoResult.buf;
 
     // Parameters of constant
-    double e2 = pow(e, 2);
-    double e4 = e2 * e2;
-    double e6 = e4 * e2;
-    double e8 = e6 * e2;
-    double e10 = e8 * e2;
-    double e12 = e10 * e2;
-
-    double sqrt_3 = sqrt(3);
-    double sqrt_5 = sqrt(5);
-    double sqrt_6 = sqrt(6);
-    double sqrt_7 = sqrt(7);
-    double sqrt_8 = sqrt(8);
-    double sqrt_10 = sqrt(10);
-    double sqrt_12 = sqrt(12);
-
-    double den1 = sqrt(1 + e2);
-    double den2 = 1 - e2;
-    double den3 = sqrt(1 + e2 + e4);
-    double den4 = sqrt(pow(1 - e2, 2) * (1 + e2) * (1 + 4 * e2 + e4));
-    double den5 = sqrt(1 + e2 + e4 + e6);
-    double den6 = pow(1 - e2, 2);
-
-    double den7 = pow(1 - e2, 3) * (1 + e2 + e4);
-    double num7 = sqrt(pow(1 - e2, 4) * (1 + e2 + e4) /
-                       (1 + 4 * e2 + 10 * e4 + 4 * e6 + e8));
-
-    double den8 = sqrt(1 + e2 + e4 + e6 + e8);
-
-    double den9 = pow(1 - e2, 3) * (1 + 4 * e2 + e4);
-    double num9 =
-        sqrt(pow(1 - e2, 2) * (1 + 4 * e2 + e4) / (1 + 9 * e2 + 9 * e4 + e6));
-
-    double den10 = pow(1 - e2, 4) * (1 + e2) * (1 + e4);
-    double num10 =
-        sqrt(pow(1 - e2, 6) * (1 + e2) * (1 + e4) /
-             (1 + 4 * e2 + 10 * e4 + 20 * e6 + 10 * e8 + 4 * e10 + e12));
-
-    double den11 = sqrt(1 + e2 + e4 + e6 + e8 + e10);
-    double den12 = pow(1 - e2, 3);
-
-    // Parameters in loop
-    double x2, y2, x4, y4, xy, r2, r4, temp, x_c, y_c;
+    AnnularGradTerms terms(e);
     if (axis == "dx") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-
-            // to make d an array with the same size as x
-            temp = Z[1] * 2 * 1 / den1;
-
-            temp += Z[3] * sqrt_3 * 4 * x_c / den2;
-
-            temp += Z[4] * sqrt_6 * 2 * y_c / den3;
-            temp += Z[5] * sqrt_6 * 2 * x_c / den3;
-
-            temp += Z[6] * sqrt_8 * 6 * xy * (1 + e2) / den4;
-            temp += Z[7] * sqrt_8 *
-                    ((9 * x2 + 3 * y2 - 2) * (1 + e2) - 2 * e4) / den4;
-
-            temp += Z[8] * sqrt_8 * 6 * xy / den5;
-            temp += Z[9] * sqrt_8 * (3 * x2 - 3 * y2) / den5;
-
-            temp += Z[10] * sqrt_5 * 12 * x_c * (2 * r2 - 1 - e2) / den6;
-
-            temp += Z[11] * sqrt_10 *
-                    (x_c * (16 * x2 - 6) * (1 + e2 + e4) - 6 * x_c * e6) *
-                    num7 / den7;
-            temp +=
-                Z[12] * sqrt_10 *
-                (y_c * (24 * x2 + 8 * y2 - 6) * (1 + e2 + e4) - 6 * y_c * e6) *
-                num7 / den7;
-
-            temp += Z[13] * sqrt_10 * 4 * x_c * (x2 - 3 * y2) / den8;
-            temp += Z[14] * sqrt_10 * 4 * y_c * (3 * x2 - y2) / den8;
-
-            temp +=
-                Z[15] * sqrt_12 *
-                (3 * e8 - 36 * e6 * x2 - 12 * e6 * y2 + 12 * e6 + 50 * e4 * x4 +
-                 60 * e4 * x2 * y2 - 144 * e4 * x2 + 10 * e4 * y4 -
-                 48 * e4 * y2 + 30 * e4 + 200 * e2 * x4 + 240 * e2 * x2 * y2 -
-                 144 * e2 * x2 + 40 * e2 * y4 - 48 * e2 * y2 + 12 * e2 +
-                 50 * x4 + 60 * x2 * y2 - 36 * x2 + 10 * y4 - 12 * y2 + 3) *
-                num9 / den9;
-            temp += Z[16] * sqrt_12 *
-                    (8 * xy *
-                     (5 * r2 * (1 + 4 * e2 + e4) -
-                      (3 + 12 * e2 + 12 * e4 + 3 * e6))) *
-                    num9 / den9;
-
-            temp += Z[17] * sqrt_12 *
-                    (25 * (e6 + e4 + e2 + 1) * x4 +
-                     (-12 * e8 - 30 * e6 * y2 - 12 * e6 - 30 * e4 * y2 -
-                      12 * e4 - 30 * e2 * y2 - 12 * e2 - 30 * y2 - 12) *
-                         x2 +
-                     12 * e8 * y2 - 15 * e6 * y4 + 12 * e6 * y2 - 15 * e4 * y4 +
-                     12 * e4 * y2 - 15 * e2 * y4 + 12 * e2 * y2 - 15 * y4 +
-                     12 * y2) *
-                    num10 / den10;
-            temp +=
-                Z[18] * sqrt_12 *
-                (4.0 * xy *
-                 (15 * (e6 + e4 + e2 + 1) * x2 - 6 * e8 + 5 * e6 * y2 - 6 * e6 +
-                  5 * e4 * y2 - 6 * e4 + 5 * e2 * y2 - 6 * e2 + 5 * y2 - 6)) *
-                num10 / den10;
-
-            temp += Z[19] * sqrt_12 * 5 * (x2 * (x2 - 6 * y2) + y4) / den11;
-            temp += Z[20] * sqrt_12 * 20 * xy * (x2 - y2) / den11;
-
-            temp += Z[21] * sqrt_7 * 24 * x_c *
-                    (e4 - e2 * (5 * y2 - 3) + 5 * x4 - 5 * y2 + 5 * y4 -
-                     x2 * (5 * e2 - 10 * y2 + 5) + 1) /
-                    den12;
-
-            d[ii] = temp;
+            d[ii] = terms.dx(Z, PupilPoint(x[ii], y[ii]));
         }
     } else if (axis == "dy") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-
-            // to make d an array with the same size as x
-            temp = Z[2] * 2 * 1 / den1;
-
-            temp += Z[3] * sqrt_3 * 4 * y_c / den2;
-
-            temp += Z[4] * sqrt_6 * 2 * x_c / den3;
-            temp += Z[5] * sqrt_6 * (-2) * y_c / den3;
-
-            temp += Z[6] * sqrt_8 *
-                    ((1 + e2) * (3 * x2 + 9 * y2 - 2) - 2 * e4) / den4;
-            temp += Z[7] * sqrt_8 * 6 * xy * (1 + e2) / den4;
-
-            temp += Z[8] * sqrt_8 * (3 * x2 - 3 * y2) / den5;
-            temp += Z[9] * sqrt_8 * (-6) * xy / den5;
-
-            temp += Z[10] * sqrt_5 * 12 * y_c * (2 * r2 - 1 - e2) / den6;
-
-            temp += Z[11] * sqrt_10 *
-                    (y_c * (6 - 16 * y2) * (1 + e2 + e4) + 6 * y_c * e6) *
-                    num7 / den7;
-            temp +=
-                Z[12] * sqrt_10 *
-                (x_c * (8 * x2 + 24 * y2 - 6) * (1 + e2 + e4) - 6 * x_c * e6) *
-                num7 / den7;
-
-            temp += Z[13] * sqrt_10 * 4 * y_c * (y2 - 3 * x2) / den8;
-            temp += Z[14] * sqrt_10 * 4 * x_c * (x2 - 3 * y2) / den8;
-
-            temp += Z[15] * sqrt_12 *
-                    (-x_c * (24 * y_c + 4 * e2 * (24 * y_c - 40 * y_c * r2) +
-                             2 * e4 * (48 * y_c - 20 * y_c * r2) +
-                             24 * e6 * y_c - 40 * y_c * r2)) *
-                    num9 / den9;
-            temp +=
-                Z[16] * sqrt_12 *
-                (3 * e8 - 12 * e6 * x2 - 36 * e6 * y2 + 12 * e6 + 10 * e4 * x4 +
-                 60 * e4 * x2 * y2 - 48 * e4 * x2 + 50 * e4 * y4 -
-                 144 * e4 * y2 + 30 * e4 + 40 * e2 * x4 + 240 * e2 * x2 * y2 -
-                 48 * e2 * x2 + 200 * e2 * y4 - 144 * e2 * y2 + 12 * e2 +
-                 10 * x4 + 60 * x2 * y2 - 12 * x2 + 50 * y4 - 36 * y2 + 3) *
-                num9 / den9;
-
-            temp += Z[17] * sqrt_12 *
-                    (4.0 * xy *
-                     ((-5) * (e6 + e4 + e2 + 1) * x2 + 6 * e8 - 15 * e6 * y2 +
-                      6 * e6 - 15 * e4 * y2 + 6 * e4 - 15 * e2 * y2 + 6 * e2 -
-                      15 * y2 + 6)) *
-                    num10 / den10;
-            temp += Z[18] * sqrt_12 *
-                    (-12 * e8 * x2 + 12 * e8 * y2 + 15 * e6 * x4 +
-                     30 * e6 * x2 * y2 - 12 * e6 * x2 - 25 * e6 * y4 +
-                     12 * e6 * y2 + 15 * e4 * x4 + 30 * e4 * x2 * y2 -
-                     12 * e4 * x2 - 25 * e4 * y4 + 12 * e4 * y2 + 15 * e2 * x4 +
-                     30 * e2 * x2 * y2 - 12 * e2 * x2 - 25 * e2 * y4 +
-                     12 * e2 * y2 + 15 * x4 + 30 * x2 * y2 - 12 * x2 - 25 * y4 +
-                     12 * y2) *
-                    num10 / den10;
-
-            temp += Z[19] * sqrt_12 * 20 * xy * (y2 - x2) / den11;
-            temp += Z[20] * sqrt_12 * 5 * (x2 * (x2 - 6 * y2) + y4) / den11;
-
-            temp += Z[21] * sqrt_7 * 24 * y_c *
-                    (e4 - e2 * (5 * x2 - 3) - 5 * x2 + 5 * x4 + 5 * y4 -
-                     y2 * (5 * e2 - 10 * x2 + 5) + 1) /
-                    den12;
-
-            d[ii] = temp;
+            d[ii] = terms.dy(Z, PupilPoint(x[ii], y[ii]));
         }
     } else if (axis == "dx2") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-            r4 = r2 * r2;
-
-            // to make d an array with the same size as x
-            temp = Z[3] * sqrt_3 * 4 / den2;
-
-            temp += Z[5] * sqrt_6 * 2 / den3;
-
-            temp += Z[6] * sqrt_8 * 6 * y_c * (1 + e2) / den4;
-            temp += Z[7] * sqrt_8 * 18 * x_c * (1 + e2) / den4;
-
-            temp += Z[8] * sqrt_8 * 6 * y_c / den5;
-            temp += Z[9] * sqrt_8 * 6 * x_c / den5;
-
-            temp += Z[10] * sqrt_5 * 12 * (6 * x2 + 2 * y2 - e2 - 1) / den6;
-
-            temp += Z[11] * sqrt_10 * ((48 * x2 - 6) * (1 + e2 + e4) - 6 * e6) *
-                    num7 / den7;
-            temp += Z[12] * sqrt_10 * 48 * xy * (1 + e2 + e4) * num7 / den7;
-
-            temp += Z[13] * sqrt_10 * 12 * (x2 - y2) / den8;
-            temp += Z[14] * sqrt_10 * 24 * xy / den8;
-
-            temp += Z[15] * sqrt_12 *
-                    (-8 * x_c *
-                     (9 * e6 - 25 * e4 * x2 - 15 * e4 * y2 + 36 * e4 -
-                      100 * e2 * x2 - 60 * e2 * y2 + 36 * e2 - 25 * x2 -
-                      15 * y2 + 9)) *
-                    num9 / den9;
-            temp +=
-                Z[16] * sqrt_12 *
-                (-8 * y_c *
-                 (3 * e6 - 15 * e4 * x2 - 5 * e4 * y2 + 12 * e4 - 60 * e2 * x2 -
-                  20 * e2 * y2 + 12 * e2 - 15 * x2 - 5 * y2 + 3)) *
-                num9 / den9;
-
-            temp += Z[17] * sqrt_12 *
-                    (-4 * x_c *
-                     (6 * e8 - 25 * e6 * x2 + 15 * e6 * y2 + 6 * e6 -
-                      25 * e4 * x2 + 15 * e4 * y2 + 6 * e4 - 25 * e2 * x2 +
-                      15 * e2 * y2 + 6 * e2 - 25 * x2 + 15 * y2 + 6)) *
-                    num10 / den10;
-            temp += Z[18] * sqrt_12 *
-                    (-4 * y_c *
-                     (6 * e8 - 45 * e6 * x2 - 5 * e6 * y2 + 6 * e6 -
-                      45 * e4 * x2 - 5 * e4 * y2 + 6 * e4 - 45 * e2 * x2 -
-                      5 * e2 * y2 + 6 * e2 - 45 * x2 - 5 * y2 + 6)) *
-                    num10 / den10;
-
-            temp += Z[19] * sqrt_12 * 20 * x_c * (x2 - 3 * y2) / den11;
-            temp += Z[20] * sqrt_12 * 20 * y_c * (3 * x2 - y2) / den11;
-
-            temp += Z[21] * sqrt_7 *
-                    (480 * x2 * r2 + 120 * r4 + 24 * e4 - 360 * x2 - 120 * y2 -
-                     3 * e2 * (120 * x2 + 40 * y2 - 24) + 24) /
-                    den12;
-
-            d[ii] = temp;
+            d[ii] = terms.dx2(Z, PupilPoint(x[ii], y[ii]));
         }
     } else if (axis == "dy2") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
-
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-            r4 = r2 * r2;
-
-            // to make d an array with the same size as x
-            temp = Z[3] * sqrt_3 * 4 / den2;
-
-            temp += Z[5] * sqrt_6 * (-2) / den3;
-
-            temp += Z[6] * sqrt_8 * (1 + e2) * 18 * y_c / den4;
-            temp += Z[7] * sqrt_8 * 6 * x_c * (1 + e2) / den4;
-
-            temp += Z[8] * sqrt_8 * (-6) * y_c / den5;
-            temp += Z[9] * sqrt_8 * (-6) * x_c / den5;
-
-            temp += Z[10] * sqrt_5 * 12 * (2 * x2 + 6 * y2 - e2 - 1) / den6;
-
-            temp += Z[11] * sqrt_10 * ((6 - 48 * y2) * (1 + e2 + e4) + 6 * e6) *
-                    num7 / den7;
-            temp += Z[12] * sqrt_10 * 48 * xy * (1 + e2 + e4) * num7 / den7;
-
-            temp += Z[13] * sqrt_10 * 12 * (y2 - x2) / den8;
-            temp += Z[14] * sqrt_10 * (-24) * xy / den8;
-
-            temp +=
-                Z[15] * sqrt_12 *
-                (-8 * x_c *
-                 (3 * e6 - 5 * e4 * x2 - 15 * e4 * y2 + 12 * e4 - 20 * e2 * x2 -
-                  60 * e2 * y2 + 12 * e2 - 5 * x2 - 15 * y2 + 3)) *
-                num9 / den9;
-            temp += Z[16] * sqrt_12 *
-                    (-8 * y_c *
-                     (9 * e6 - 15 * e4 * x2 - 25 * e4 * y2 + 36 * e4 -
-                      60 * e2 * x2 - 100 * e2 * y2 + 36 * e2 - 15 * x2 -
-                      25 * y2 + 9)) *
-                    num9 / den9;
-
-            temp += Z[17] * sqrt_12 *
-                    (4 * x_c *
-                     (6 * e8 - 5 * e6 * x2 - 45 * e6 * y2 + 6 * e6 -
-                      5 * e4 * x2 - 45 * e4 * y2 + 6 * e4 - 5 * e2 * x2 -
-                      45 * e2 * y2 + 6 * e2 - 5 * x2 - 45 * y2 + 6)) *
-                    num10 / den10;
-            temp += Z[18] * sqrt_12 *
-                    (4 * y_c *
-                     (6 * e8 + 15 * e6 * x2 - 25 * e6 * y2 + 6 * e6 +
-                      15 * e4 * x2 - 25 * e4 * y2 + 6 * e4 + 15 * e2 * x2 -
-                      25 * e2 * y2 + 6 * e2 + 15 * x2 - 25 * y2 + 6)) *
-                    num10 / den10;
-
-            temp += Z[19] * sqrt_12 * 20 * x_c * (3 * y2 - x2) / den11;
-            temp += Z[20] * sqrt_12 * 20 * y_c * (y2 - 3 * x2) / den11;
-
-            temp += Z[21] * sqrt_7 *
-                    (480 * y2 * r2 + 120 * r4 + 24 * e4 - 120 * x2 - 360 * y2 -
-                     3 * e2 * (40 * x2 + 120 * y2 - 24) + 24) /
-                    den12;
-
-            d[ii] = temp;
+            d[ii] = terms.dy2(Z, PupilPoint(x[ii], y[ii]));
         }
     } else if (axis == "dxy") {
         for (size_t ii = 0; ii < n; ii++) {
-            x_c = x[ii];
-            y_c = y[ii];
+            d[ii] = terms.dxy(Z, PupilPoint(x[ii], y[ii]));
+        }
+    } else {
+        throw std::invalid_argument("Input axis is not supported.");
+    }
+    return result;
+}
+
+py::array_t<double> zernikeAnnularDerivatives(py::array_t<double> arrayZk,
+                                              py::array_t<double> arrayX,
+                                              py::array_t<double> arrayY,
+                                              double e, bool withJacobian) {
+    // Get the numpy array information
+    ArrayNpInfo infoZk = getNpArrayInfo(arrayZk);
+    ArrayNpInfo infoX = getNpArrayInfo(arrayX);
+    ArrayNpInfo infoY = getNpArrayInfo(arrayY);
+
+    // No pointer is passed, so NumPy will allocate the buffer. Each row holds
+    // one derivative in the order of "dx", "dy", "dx2", "dy2", "dxy", and
+    // "1st", "2nd" if the Jacobian is asked.
+    size_t n = infoX.size;
+    size_t numOfRows = withJacobian ? 7 : 5;
+    auto result = py::array_t<double>({numOfRows, n});
+    double *out = (double *)result.request().ptr;
+
+    // Assign the variables
+    double *Z = infoZk.buf;
+    double *x = infoX.buf;
+    double *y = infoY.buf;
+
+    // Parameters of constant
+    AnnularGradTerms gradTerms(e);
+
+    // Each derivative has its own loop to keep the constant terms in the
+    // registers
+    double *d = out;
+    for (size_t ii = 0; ii < n; ii++) {
+        d[ii] = gradTerms.dx(Z, PupilPoint(x[ii], y[ii]));
+    }
+
+    d += n;
+    for (size_t ii = 0; ii < n; ii++) {
+        d[ii] = gradTerms.dy(Z, PupilPoint(x[ii], y[ii]));
+    }
+
+    d += n;
+    for (size_t ii = 0; ii < n; ii++) {
+        d[ii] = gradTerms.dx2(Z, PupilPoint(x[ii], y[ii]));
+    }
+
+    d += n;
+    for (size_t ii = 0; ii < n; ii++) {
+        d[ii] = gradTerms.dy2(Z, PupilPoint(x[ii], y[ii]));
+    }
+
+    d += n;
+    for (size_t ii = 0; ii < n; ii++) {
+        d[ii] = gradTerms.dxy(Z, PupilPoint(x[ii], y[ii]));
+    }
+
+    if (withJacobian) {
+        AnnularJacobianTerms jacTerms(e);
+
+        d += n;
+        for (size_t ii = 0; ii < n; ii++) {
+            d[ii] = jacTerms.first(Z, PupilPoint(x[ii], y[ii]));
+        }
+
+        d += n;
+        for (size_t ii = 0; ii < n; ii++) {
+            d[ii] = jacTerms.second(Z, PupilPoint(x[ii], y[ii]));
+        }
+    }
+
+    return result;
+}
 
-            x2 = x_c * x_c;
-            y2 = y_c * y_c;
-            x4 = x2 * x2;
-            y4 = y2 * y2;
-            xy = x_c * y_c;
-            r2 = x2 + y2;
-            r4 = r2 * r2;
-
-            // to make d an array with the same size as x
-            temp = Z[4] * sqrt_6 * 2 / den3;
-
-            temp += Z[6] * sqrt_8 * (1 + e2) * (6 * x_c) / den4;
-            temp += Z[7] * sqrt_8 * 6 * y_c * (1 + e2) / den4;
-
-            temp += Z[8] * sqrt_8 * 6 * x_c / den5;
-            temp += Z[9] * sqrt_8 * (-6) * y_c / den5;
-
-            temp += Z[10] * sqrt_5 * 48 * xy / den6;
-
-            temp += Z[12] * sqrt_10 *
-                    ((24 * x2 + 24 * y2 - 6) * (1 + e2 + e4) - 6 * e6) * num7 /
-                    den7;
-
-            temp += Z[13] * sqrt_10 * (-24) * xy / den8;
-            temp += Z[14] * sqrt_10 * 12 * (x2 - y2) / den8;
-
-            temp +=
-                Z[15] * sqrt_12 *
-                (-8 * y_c *
-                 (3 * e6 - 15 * e4 * x2 - 5 * e4 * y2 + 12 * e4 - 60 * e2 * x2 -
-                  20 * e2 * y2 + 12 * e2 - 15 * x2 - 5 * y2 + 3)) *
-                num9 / den9;
-            temp +=
-                Z[16] * sqrt_12 *
-                (-8 * x_c *
-                 (3 * e6 - 5 * e4 * x2 - 15 * e4 * y2 + 12 * e4 - 20 * e2 * x2 -
-                  60 * e2 * y2 + 12 * e2 - 5 * x2 - 15 * y2 + 3)) *
-                num9 / den9;
-
-            temp += Z[17] * sqrt_12 *
-                    (12 * y_c *
-                     (2 * e8 - 5 * e6 * r2 + 2 * e6 - 5 * e4 * r2 + 2 * e4 -
-                      5 * e2 * r2 + 2 * e2 - 5 * r2 + 2)) *
-                    num10 / den10;
-            temp += Z[18] * sqrt_12 *
-                    (-12 * x_c *
-                     (2 * e8 - 5 * e6 * r2 + 2 * e6 - 5 * e4 * r2 + 2 * e4 -
-                      5 * e2 * r2 + 2 * e2 - 5 * r2 + 2)) *
-                    num10 / den10;
-
-            temp += Z[19] * sqrt_12 * 20 * y_c * (y2 - 3 * x2) / den11;
-            temp += Z[20] * sqrt_12 * 20 * x_c * (x2 - 3 * y2) / den11;
-
-            temp += Z[21] * sqrt_7 * 240 * xy * (2 * r2 - 1 - e2) / den12;
-
-            d[ii] = temp;
+template <typename Terms, typename Point, typename TermFunc>
+void evalBatch(const Terms &terms, TermFunc termFunc, const ArrayNp2DInfo &zk,
+               const double *x, const double *y, size_t n, double *out) {
+    // The point related terms are calculated once and shared by all the sets
+    // of coefficients
+    for (size_t ii = 0; ii < n; ii++) {
+        Point p(x[ii], y[ii]);
+        for (size_t kk = 0; kk < zk.rows; kk++) {
+            out[kk * n + ii] = termFunc(terms, zk.buf + kk * zk.cols, p);
         }
+    }
+}
+
+py::array_t<double> zernikeAnnularEvalBatch(
+    py::array_t<double, py::array::c_style | py::array::forcecast> arrayZk,
+    py::array_t<double> arrayX, py::array_t<double> arrayY, double e) {
+    // Get the numpy array information
+    ArrayNp2DInfo infoZk = getNpArray2DInfo(arrayZk);
+    ArrayNpInfo infoX = getNpArrayInfo(arrayX);
+    ArrayNpInfo infoY = getNpArrayInfo(arrayY);
+
+    if (infoZk.cols < 28) {
+        throw std::invalid_argument("Number of Zernike terms must be 28.");
+    }
+
+    // No pointer is passed, so NumPy will allocate the buffer
+    size_t n = infoX.size;
+    auto result = py::array_t<double>({infoZk.rows, n});
+    double *S = (double *)result.request().ptr;
+
+    // Parameters of constant
+    AnnularEvalTerms terms(e);
+
+    evalBatch<AnnularEvalTerms, PupilPolarPoint>(
+        terms,
+        [](const AnnularEvalTerms &t, const double *Z,
+           const PupilPolarPoint &p) { return t.value(Z, p); },
+        infoZk, infoX.buf, infoY.buf, n, S);
+
+    return result;
+}
+
+py::array_t<double> zernikeAnnularGradBatch(
+    py::array_t<double, py::array::c_style | py::array::forcecast> arrayZk,
+    py::array_t<double> arrayX, py::array_t<double> arrayY, double e,
+    std::string axis) {
+    // Get the numpy array information
+    ArrayNp2DInfo infoZk = getNpArray2DInfo(arrayZk);
+    ArrayNpInfo infoX = getNpArrayInfo(arrayX);
+    ArrayNpInfo infoY = getNpArrayInfo(arrayY);
+
+    if (infoZk.cols < 22) {
+        throw std::invalid_argument("Number of Zernike terms must be 22.");
+    }
+
+    // No pointer is passed, so NumPy will allocate the buffer
+    size_t n = infoX.size;
+    auto result = py::array_t<double>({infoZk.rows, n});
+    double *d = (double *)result.request().ptr;
+
+    // Assign the variables
+    double *x = infoX.buf;
+    double *y = infoY.buf;
+
+    // Parameters of constant
+    AnnularGradTerms terms(e);
+
+    if (axis == "dx") {
+        evalBatch<AnnularGradTerms, PupilPoint>(
+            terms,
+            [](const AnnularGradTerms &t, const double *Z,
+               const PupilPoint &p) { return t.dx(Z, p); },
+            infoZk, x, y, n, d);
+    } else if (axis == "dy") {
+        evalBatch<AnnularGradTerms, PupilPoint>(
+            terms,
+            [](const AnnularGradTerms &t, const double *Z,
+               const PupilPoint &p) { return t.dy(Z, p); },
+            infoZk, x, y, n, d);
+    } else if (axis == "dx2") {
+        evalBatch<AnnularGradTerms, PupilPoint>(
+            terms,
+            [](const AnnularGradTerms &t, const double *Z,
+               const PupilPoint &p) { return t.dx2(Z, p); },
+            infoZk, x, y, n, d);
+    } else if (axis == "dy2") {
+        evalBatch<AnnularGradTerms, PupilPoint>(
+            terms,
+            [](const AnnularGradTerms &t, const double *Z,
+               const PupilPoint &p) { return t.dy2(Z, p); },
+            infoZk, x, y, n, d);
+    } else if (axis == "dxy") {
+        evalBatch<AnnularGradTerms, PupilPoint>(
+            terms,
+            [](const AnnularGradTerms &t, const double *Z,
+               const PupilPoint &p) { return t.dxy(Z, p); },
+            infoZk, x, y, n, d);
     } else {
         throw std::invalid_argument("Input axis is not supported.");
     }
@@ -0,0 +1,188 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from lsst.ts.wep.bsc.ColumnarDatabase import ColumnarDatabase
+from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
+from lsst.ts.wep.Utility import getModulePath, FilterType
+
+
+class TestColumnarDatabase(unittest.TestCase):
+    """Test the ColumnarDatabase class."""
+
+    def setUp(self):
+
+        # Set the local database
+        dbAdress = os.path.join(getModulePath(), "tests", "testData", "bsc.db3")
+        self.localDatabase = LocalDatabase()
+        self.localDatabase.connect(dbAdress)
+
+        # Set the filter
+        self.filterType = FilterType.U
+
+        # Convert the table of local database to the column files
+        self.dataDir = tempfile.TemporaryDirectory()
+        self.columnarDatabase = ColumnarDatabase()
+        self.columnarDatabase.connect(self.dataDir.name)
+
+        stars = self.localDatabase.getAllStarData(self.filterType)
+        self.columnarDatabase.writeTable(
+            self.filterType,
+            stars.getId(),
+            stars.getRA(),
+            stars.getDecl(),
+            stars.getMag(self.filterType),
+            numOfDeclBand=36,
+        )
+
+    def tearDown(self):
+
+        self.columnarDatabase.disconnect()
+        self.localDatabase.disconnect()
+        self.dataDir.cleanup()
+
+    def testConnectWithWrongDir(self):
+
+        self.assertRaises(
+            ValueError,
+            self.columnarDatabase.connect,
+            os.path.join(self.dataDir.name, "wrongDir"),
+        )
+
+    def testHasTable(self):
+
+        self.assertTrue(self.columnarDatabase.hasTable(self.filterType))
+        self.assertFalse(self.columnarDatabase.hasTable(FilterType.G))
+
+    def testWriteTableWithWrongInput(self):
+
+        self.assertRaises(
+            ValueError,
+            self.columnarDatabase.writeTable,
+            FilterType.G,
+            [1],
+            [0.1],
+            [0.1],
+            [1.0],
+            numOfDeclBand=0,
+        )
+        self.assertRaises(
+            ValueError,
+            self.columnarDatabase.writeTable,
+            FilterType.G,
+            [1, 2],
+            [0.1],
+            [0.1],
+            [1.0],
+        )
+
+    def testQuery(self):
+
+        boxes = [
+            (self.filterType, [0, 60], [0, 70], [10, 60], [10, 70]),
+            (self.filterType, [359, 60], [359, 70], [1, 60], [1, 70]),
+            (self.filterType, [100, -90], [100, 90], [300, -90], [300, 90]),
+            (self.filterType, [10, 65.5], [10, 65.7], [20, 65.5], [20, 65.7]),
+        ]
+        for box in boxes:
+            stars = self.columnarDatabase.query(*box)
+            starsOfLocalDb = self.localDatabase.query(*box)
+
+            # The stars are in the order of declination band and ra
+            idxSort = np.lexsort((stars.getRA(), stars.getId()))
+            idxSortOfLocalDb = np.lexsort(
+                (starsOfLocalDb.getRA(), starsOfLocalDb.getId())
+            )
+            self.assertTrue(
+                np.array_equal(
+                    stars.getId()[idxSort], starsOfLocalDb.getId()[idxSortOfLocalDb]
+                )
+            )
+            self.assertTrue(
+                np.array_equal(
+                    stars.getRA()[idxSort], starsOfLocalDb.getRA()[idxSortOfLocalDb]
+                )
+            )
+            self.assertTrue(
+                np.array_equal(
+                    stars.getDecl()[idxSort],
+                    starsOfLocalDb.getDecl()[idxSortOfLocalDb],
+                )
+            )
+            self.assertTrue(
+                np.array_equal(
+                    stars.getMag(self.filterType)[idxSort],
+                    starsOfLocalDb.getMag(self.filterType)[idxSortOfLocalDb],
+                )
+            )
+            self.assertEqual(len(stars.getMag(FilterType.G)), 0)
+
+        self.assertGreater(len(self.columnarDatabase.query(*boxes[0]).getId()), 0)
+
+    def testQueryWithStarAndCrossRa0(self):
+
+        self.columnarDatabase.writeTable(
+            FilterType.G,
+            [123, 456, 789],
+            [0.005, 359.98, 359.999],
+            [-1.5, -1.5, -1.5],
+            [2.0, 3.0, 4.0],
+        )
+        stars = self.columnarDatabase.query(
+            FilterType.G, [0.01, -1], [359.99, -2], [0.01, -1], [359.99, -2]
+        )
+
+        self.assertEqual(sorted(stars.getId().tolist()), [123, 789])
+        self.assertEqual(sorted(stars.getRA().tolist()), [0.005, 359.999])
+
+    def testQueryWithoutTable(self):
+
+        self.assertRaises(
+            ValueError,
+            self.columnarDatabase.query,
+            FilterType.G,
+            [0, 60],
+            [0, 70],
+            [10, 60],
+            [10, 70],
+        )
+
+    def testQueryInBand(self):
+
+        # The box covers the declination band of 60 - 65 degree, and the
+        # columns should be the views of memory-mapped files.
+        stars = self.columnarDatabase.query(
+            self.filterType, [0, 60], [0, 65], [10, 60], [10, 65]
+        )
+        table = self.columnarDatabase._getTable(self.filterType)
+        self.assertTrue(np.shares_memory(stars.getId(), table["id"]))
+        self.assertTrue(np.shares_memory(stars.getRA(), table["ra"]))
+        self.assertGreater(len(stars.getId()), 0)
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
@@ -24,6 +24,7 @@ import unittest
 from lsst.ts.wep.bsc.DatabaseFactory import DatabaseFactory
 from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
 from lsst.ts.wep.bsc.LocalDatabaseForStarFile import LocalDatabaseForStarFile
+from lsst.ts.wep.bsc.ColumnarDatabase import ColumnarDatabase
 from lsst.ts.wep.Utility import BscDbType
 
 
@@ -38,6 +39,9 @@ class TestDatabaseFactory(unittest.TestCase):
         dbForFile = DatabaseFactory.createDb(BscDbType.LocalDbForStarFile)
         self.assertTrue(isinstance(dbForFile, LocalDatabaseForStarFile))
 
+        columnarDb = DatabaseFactory.createDb(BscDbType.ColumnarDb)
+        self.assertTrue(isinstance(columnarDb, ColumnarDatabase))
+
         self.assertRaises(ValueError, DatabaseFactory.createDb, "wrongType")
 
 
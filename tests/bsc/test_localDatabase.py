@@ -20,7 +20,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
 import unittest
+import numpy as np
 
 from lsst.ts.wep.bsc.StarData import StarData
 from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
@@ -35,6 +38,7 @@ class TestLocalDatabase(unittest.TestCase):
         # Set the database address
         modulePath = getModulePath()
         dbAdress = os.path.join(modulePath, "tests", "testData", "bsc.db3")
+        self.dbAdress = dbAdress
 
         # Set up local database
         self.localDatabase = LocalDatabase()
@@ -107,6 +111,100 @@ class TestLocalDatabase(unittest.TestCase):
         )
         return stars
 
+    def testCreateSpatialIndex(self):
+
+        localDatabase, dataDir = self._connectCopyOfDb()
+
+        self.assertFalse(localDatabase.hasSpatialIndex(FilterType.U))
+
+        boxes = [
+            (FilterType.U, [0, 60], [0, 70], [10, 60], [10, 70]),
+            (FilterType.U, [359, 60], [359, 70], [1, 60], [1, 70]),
+            (FilterType.U, [100, -90], [100, 90], [300, -90], [300, 90]),
+        ]
+        starsNoIndex = [localDatabase.query(*box) for box in boxes]
+
+        localDatabase.createSpatialIndex(FilterType.U)
+        self.assertTrue(localDatabase.hasSpatialIndex(FilterType.U))
+
+        for box, starNoIndex in zip(boxes, starsNoIndex):
+            stars = localDatabase.query(*box)
+            self.assertTrue(np.array_equal(stars.getId(), starNoIndex.getId()))
+            self.assertTrue(np.array_equal(stars.getRA(), starNoIndex.getRA()))
+            self.assertTrue(
+                np.array_equal(
+                    stars.getMag(FilterType.U), starNoIndex.getMag(FilterType.U)
+                )
+            )
+
+        self.assertGreater(len(starsNoIndex[0].getId()), 0)
+
+        localDatabase.disconnect()
+        dataDir.cleanup()
+
+    def testCreateSpatialIndexWithDataChange(self):
+
+        localDatabase, dataDir = self._connectCopyOfDb()
+        localDatabase.createSpatialIndex(self.filterType)
+
+        # Insert the data
+        localDatabase.insertData(self.filterType, self.neighboringStar)
+        stars = localDatabase.query(
+            self.filterType, [0, 2], [0, 2.4], [0.4, 2], [0.4, 2.4]
+        )
+        self.assertEqual(stars.getId().tolist(), [123, 456, 789])
+
+        # Update the data
+        starData = localDatabase.searchSimobjdID(self.filterType, [123, 456, 789])
+        listID = [item[0] for item in starData]
+        localDatabase.updateData(
+            self.filterType, listID, ["ra", "ra", "ra"], [0.005, 359.98, 359.999]
+        )
+        localDatabase.updateData(
+            self.filterType, listID, ["decl", "decl", "decl"], [-1.5, -1.5, -1.5]
+        )
+        stars = localDatabase.query(
+            self.filterType, [0.01, -1], [359.99, -2], [0.01, -1], [359.99, -2]
+        )
+        self.assertEqual(stars.getId().tolist(), [123, 789])
+
+        # Delete the data
+        localDatabase.deleteData(self.filterType, listID)
+        stars = localDatabase.query(
+            self.filterType, [0.01, -1], [359.99, -2], [0.01, -1], [359.99, -2]
+        )
+        self.assertEqual(len(stars.getId()), 0)
+
+        localDatabase.disconnect()
+        dataDir.cleanup()
+
+    def testDropSpatialIndex(self):
+
+        localDatabase, dataDir = self._connectCopyOfDb()
+
+        localDatabase.createSpatialIndex(FilterType.U)
+        localDatabase.dropSpatialIndex(FilterType.U)
+        self.assertFalse(localDatabase.hasSpatialIndex(FilterType.U))
+
+        # The status should be read from the database after the reconnection
+        localDatabase.disconnect()
+        localDatabase.connect(os.path.join(dataDir.name, "bsc.db3"))
+        self.assertFalse(localDatabase.hasSpatialIndex(FilterType.U))
+
+        localDatabase.disconnect()
+        dataDir.cleanup()
+
+    def _connectCopyOfDb(self):
+
+        dataDir = tempfile.TemporaryDirectory()
+        dbAdress = os.path.join(dataDir.name, "bsc.db3")
+        shutil.copyfile(self.dbAdress, dbAdress)
+
+        localDatabase = LocalDatabase()
+        localDatabase.connect(dbAdress)
+
+        return localDatabase, dataDir
+
     def testSearchSimobjdID(self):
 
         starData = self.localDatabase.searchSimobjdID(FilterType.U, [54408946])
@@ -151,6 +249,25 @@ class TestLocalDatabase(unittest.TestCase):
         self.assertEqual(len(oldDataId), 0)
         self.assertEqual(len(newDataId), 1)
 
+    def testUpdateDataWithMixedItems(self):
+
+        self._insertData()
+        listID = self._getListId()
+        self.localDatabase.updateData(
+            self.filterType,
+            listID,
+            ["ra", "mag", "ra"],
+            [np.float64(1.0), np.float64(5.0), 3.0],
+        )
+
+        starData = self.localDatabase.searchSimobjdID(self.filterType, [123, 789])
+        self.assertEqual([star[1] for star in starData], [1.0, 3.0])
+
+        self.localDatabase.cursor.execute(
+            "SELECT gmag FROM BrightStarCatalogG WHERE id=?", (listID[1],)
+        )
+        self.assertEqual(self.localDatabase.cursor.fetchall(), [(5.0,)])
+
     def _getListId(self):
 
         starData = self.localDatabase.searchSimobjdID(self.filterType, [123, 456, 789])
@@ -177,6 +294,21 @@ class TestLocalDatabase(unittest.TestCase):
         allId = self.localDatabase.getAllId(self.filterType)
         self.assertEqual(len(allId), 0)
 
+    def testGetAllStarData(self):
+
+        stars = self.localDatabase.getAllStarData(FilterType.U)
+        self.assertEqual(len(stars.getId()), 7155)
+        self.assertEqual(stars.getId().dtype, np.int64)
+        self.assertEqual(len(stars.getRA()), 7155)
+        self.assertEqual(len(stars.getDecl()), 7155)
+        self.assertEqual(len(stars.getMag(FilterType.U)), 7155)
+        self.assertEqual(len(stars.getMag(FilterType.G)), 0)
+
+    def testGetAllStarDataWithoutData(self):
+
+        stars = self.localDatabase.getAllStarData(self.filterType)
+        self.assertEqual(len(stars.getId()), 0)
+
 
 if __name__ == "__main__":
 
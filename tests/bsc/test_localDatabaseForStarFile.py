@@ -123,6 +123,82 @@ class TestLocalDatabaseForStarFile(unittest.TestCase):
 
         self.assertEqual(len(idAll), 0)
 
+    def testCreateTemporaryTable(self):
+
+        self.db.createTable(self.filterType, temporary=True)
+        self.assertTrue(self.db._tableIsInDb("StarTableG"))
+
+        # The temporary table should be deleted after the disconnection
+        self._reconnect()
+        self.assertFalse(self.db._tableIsInDb("StarTableG"))
+
+    def _reconnect(self):
+
+        self.db.disconnect()
+        self.db.connect(os.path.join(self.modulePath, "tests", "testData", "bsc.db3"))
+
+    def testPrepareTableByFile(self):
+
+        skyFilePath = self._writeStarFile(
+            "twoStars.txt",
+            starData=[[1, 359.933039, -0.040709, 15.0], [2, 0.1, 0.1, 16.0]],
+        )
+
+        self.assertTrue(self.db.prepareTableByFile(skyFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 2)
+
+        # The prepared table should be reused for the same file
+        self.assertFalse(self.db.prepareTableByFile(skyFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 2)
+
+        # The table should be prepared again if the file is modified
+        self._writeStarFile("twoStars.txt", starData=[[3, 0.2, 0.2, 14.0]])
+        stat = os.stat(skyFilePath)
+        os.utime(skyFilePath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertTrue(self.db.prepareTableByFile(skyFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 1)
+
+        # The table should be prepared again after the reconnection
+        self._reconnect()
+        self.assertTrue(self.db.prepareTableByFile(skyFilePath, self.filterType))
+
+    def testPrepareTableByFileWithTableInMainSchema(self):
+
+        skyFilePath = os.path.join(
+            self.modulePath, "tests", "testData", "skyComCamInfo.txt"
+        )
+        self._createTable()
+        self.db.insertDataByFile(skyFilePath, self.filterType)
+        self.db.createSpatialIndex(self.filterType)
+
+        # The temporary table hides the table in the main schema
+        starFilePath = self._writeStarFile(
+            "sglStar.txt", starData=[[1, 359.933039, -0.040709, 15.0]]
+        )
+        self.assertTrue(self.db.prepareTableByFile(starFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 1)
+        self.assertFalse(self.db.hasSpatialIndex(self.filterType))
+
+        self.assertTrue(self.db.prepareTableByFile(skyFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 4)
+
+        # The table in the main schema and its spatial index should be kept
+        self._reconnect()
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 4)
+        self.assertTrue(self.db.hasSpatialIndex(self.filterType))
+
+    def testPrepareTableByFileAfterDeleteTable(self):
+
+        skyFilePath = os.path.join(
+            self.modulePath, "tests", "testData", "skyComCamInfo.txt"
+        )
+        self.db.prepareTableByFile(skyFilePath, self.filterType)
+        self.db.deleteTable(self.filterType)
+
+        self.assertTrue(self.db.prepareTableByFile(skyFilePath, self.filterType))
+        self.assertEqual(len(self.db.getAllId(self.filterType)), 4)
+
     def testDeleteTable(self):
 
         self._createTable()
@@ -86,6 +86,30 @@ class TestNbrStar(unittest.TestCase):
         self._addStar()
         self.assertNotEqual(len(self.neighboringStar.getId()), 0)
 
+    def testAddStarGroups(self):
+
+        starTable = self.stars.getStarTable(FilterType.R)
+        self.neighboringStar.addStarGroups(
+            starTable, [0, 2], np.array([1]), [1, 0], FilterType.R
+        )
+
+        self.assertEqual(self.neighboringStar.getId(), {123: [456], 789: []})
+        self.assertEqual(list(self.neighboringStar.getRaDecl()), [456, 123, 789])
+        self.assertEqual(
+            self.neighboringStar.getMag(FilterType.R), {456: 3.2, 123: 2.2, 789: 4.2}
+        )
+
+    def testGetStarTable(self):
+
+        self._addStar()
+        starTable = self.neighboringStar.getStarTable(123, FilterType.R)
+
+        self.assertEqual(starTable["id"].tolist(), [456, 123])
+        self.assertEqual(starTable["ra"].tolist(), [0.2, 0.1])
+        self.assertEqual(starTable["raInPixel"].tolist(), [2.0, 1.0])
+        self.assertEqual(starTable["declInPixel"].tolist(), [22.0, 21.0])
+        self.assertEqual(starTable["mag"].tolist(), [3.2, 2.2])
+
 
 if __name__ == "__main__":
 
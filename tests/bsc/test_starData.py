@@ -21,6 +21,7 @@
 
 import numpy as np
 import unittest
+from scipy.spatial.distance import cdist
 
 from lsst.ts.wep.bsc.StarData import StarData
 from lsst.ts.wep.Utility import FilterType
@@ -48,6 +49,12 @@ class TestStarData(unittest.TestCase):
         self.assertEqual(starId.dtype, int)
         self.assertEqual(starId.tolist(), [123, 456, 789])
 
+    def testSetIdWithoutCopy(self):
+
+        starId = np.array([123, 456], dtype=int)
+        self.stars.setId(starId)
+        self.assertTrue(np.shares_memory(self.stars.getId(), starId))
+
     def testGetRA(self):
 
         self.assertEqual(self.stars.getRA().tolist(), [0.1, 0.2, 0.3])
@@ -123,6 +130,46 @@ class TestStarData(unittest.TestCase):
         self.assertEqual(indexCandidateZ, [1, 2])
         self.assertEqual(indexCandidateY, [])
 
+    def testCheckCandidateStarsWithoutStar(self):
+
+        stars = StarData([], [], [], [], [], [], [], [], [])
+        self.assertEqual(stars.checkCandidateStars(FilterType.U, 2, 3), [])
+
+    def testGetStarTable(self):
+
+        self._populateRaDeclInPixel()
+        starTable = self.stars.getStarTable(FilterType.G)
+
+        self.assertEqual(starTable["id"].tolist(), [123, 456, 789])
+        self.assertEqual(starTable["decl"].tolist(), [2.1, 2.2, 2.3])
+        self.assertEqual(starTable["raInPixel"].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(starTable["mag"].tolist(), [2.1, 2.1, 4.1])
+
+    def testGetStarTableWithoutPixel(self):
+
+        starTable = self.stars.getStarTable(FilterType.U)
+
+        self.assertEqual(starTable["mag"].tolist(), [2.0, 3.0, 4.0])
+        self.assertTrue(np.all(np.isnan(starTable["raInPixel"])))
+
+    def testGetSubset(self):
+
+        self._populateRaDeclInPixel()
+        self.stars.setDetector("R22_S11")
+        self.stars.setMag(FilterType.Y, [])
+
+        subset = self.stars.getSubset(np.array([True, False, True]))
+
+        self.assertEqual(subset.getDetector(), "R22_S11")
+        self.assertEqual(subset.getId().tolist(), [123, 789])
+        self.assertEqual(subset.getRA().tolist(), [0.1, 0.3])
+        self.assertEqual(subset.getDeclInPixel().tolist(), [21.0, 23.0])
+        self.assertEqual(subset.getMag(FilterType.R).tolist(), [2.2, 4.2])
+        self.assertEqual(len(subset.getMag(FilterType.Y)), 0)
+
+        # The original stars should not be changed
+        self.assertEqual(self.stars.getId().tolist(), [123, 456, 789])
+
     def testGetNeighboringStar(self):
 
         self._populateRaDeclInPixel()
@@ -173,6 +220,57 @@ class TestStarData(unittest.TestCase):
 
         self.assertEqual(len(neighboringStarU.getId()), 0)
 
+    def testGetNeighboringStarWithManyStars(self):
+
+        # The stars on the integer grid have the neighboring stars on the
+        # boundary of maximum distance
+        numOfStar = 500
+        rng = np.random.default_rng(seed=1)
+        mag = rng.uniform(10, 16, numOfStar)
+        stars = StarData(
+            np.arange(numOfStar),
+            np.zeros(numOfStar),
+            np.zeros(numOfStar),
+            mag,
+            mag,
+            mag,
+            mag,
+            mag,
+            mag,
+        )
+        stars.setRaInPixel(rng.integers(0, 150, numOfStar).astype(float))
+        stars.setDeclInPixel(rng.integers(0, 150, numOfStar).astype(float))
+
+        idxCand = list(range(0, numOfStar, 3))
+        for maxDist, maxNumOfNbrStar in ((5, 99), (5, 2), (0.5, 0)):
+            nbrStar = stars.getNeighboringStar(
+                idxCand, maxDist, FilterType.R, maxNumOfNbrStar=maxNumOfNbrStar
+            )
+            idMap = self._getNbrStarIdByDenseDist(
+                stars, idxCand, maxDist, maxNumOfNbrStar
+            )
+
+            self.assertEqual(nbrStar.getId(), idMap)
+            self.assertGreater(len(idMap), 0)
+
+    def _getNbrStarIdByDenseDist(self, stars, idxCand, maxDist, maxNumOfNbrStar):
+
+        allStarXY = np.array([stars.getRaInPixel(), stars.getDeclInPixel()]).T
+        starDistances = cdist(allStarXY[idxCand, :], allStarXY)
+        mag = stars.getMag(FilterType.R)
+
+        idMap = dict()
+        for ii, idx in enumerate(idxCand):
+            idxNbrStar = np.where(starDistances[ii, :] < maxDist)[0]
+            idxNbrStar = idxNbrStar[idxNbrStar != idx]
+            if np.any(mag[idxNbrStar] < mag[idx]):
+                continue
+            if len(idxNbrStar) > maxNumOfNbrStar:
+                continue
+            idMap[stars.getId()[idx]] = stars.getId()[idxNbrStar].tolist()
+
+        return idMap
+
 
 if __name__ == "__main__":
 
@@ -20,8 +20,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import asyncio
+import threading
+import concurrent.futures
 import unittest
 import tempfile
+import numpy as np
 
 from lsst.ts.wep.Utility import (
     getModulePath,
@@ -32,6 +36,9 @@ from lsst.ts.wep.Utility import (
     BscDbType,
 )
 from lsst.ts.wep.ParamReader import ParamReader
+from lsst.ts.wep.SourceSelector import SourceSelector
+from lsst.ts.wep.bsc.LocalDatabase import LocalDatabase
+from lsst.ts.wep.bsc.ColumnarDatabase import ColumnarDatabase
 
 from lsst.ts.wep.ctrlIntf.WEPCalculation import WEPCalculation
 from lsst.ts.wep.ctrlIntf.AstWcsSol import AstWcsSol
@@ -57,6 +64,7 @@ class TestWEPCalculation(unittest.TestCase):
 
     def tearDown(self):
 
+        self.wepCalculation.close()
         self.dataDir.cleanup()
 
     def testGetSettingFile(self):
@@ -74,6 +82,11 @@ class TestWEPCalculation(unittest.TestCase):
             self.wepCalculation._getBscDbType(), BscDbType.LocalDbForStarFile
         )
 
+    def testGetNumOfProcOfWepCntlr(self):
+
+        numOfProc = self.wepCalculation.getWepCntlr().getNumOfProc()
+        self.assertEqual(numOfProc, 1)
+
     def testGetIsrDir(self):
 
         isrDir = self.wepCalculation.getIsrDir()
@@ -118,6 +131,90 @@ class TestWEPCalculation(unittest.TestCase):
 
         self.assertEqual(self.wepCalculation.getBoresight(), (ra, dec))
 
+    def testGetTargetStarReusesTableOfSkyFile(self):
+
+        skyFile = os.path.join(
+            self.testDataDir, "phosimOutput", "realComCam", "skyComCamInfo.txt"
+        )
+        self.wepCalculation.setSkyFile(skyFile)
+
+        # Count the insertions of sky data
+        db = self.wepCalculation.getWepCntlr().getSourSelc().db
+        insertDataByFile = db.insertDataByFile
+        insertedFiles = []
+
+        def countInsertDataByFile(skyFilePath, filterType, skiprows=1):
+            insertedFiles.append(skyFilePath)
+            insertDataByFile(skyFilePath, filterType, skiprows=skiprows)
+
+        db.insertDataByFile = countInsertDataByFile
+
+        neighborStarMap = self.wepCalculation._getTargetStar()
+        neighborStarMapAgain = self.wepCalculation._getTargetStar()
+
+        # The table of sky file is reused in the second query
+        self.assertEqual(insertedFiles, [skyFile])
+        self.assertEqual(list(neighborStarMapAgain), list(neighborStarMap))
+        for sensorName, nbrStar in neighborStarMap.items():
+            self.assertEqual(neighborStarMapAgain[sensorName].getId(), nbrStar.getId())
+
+        # The table is prepared again after the database is disconnected
+        self.wepCalculation.disconnectBsc()
+        self.wepCalculation._getTargetStar()
+        self.assertEqual(insertedFiles, [skyFile, skyFile])
+
+    def testGetTargetStarOfColumnarDb(self):
+
+        # Convert the table of local database to the column files
+        dbAdress = os.path.join(self.testDataDir, "bsc.db3")
+        localDatabase = LocalDatabase()
+        localDatabase.connect(dbAdress)
+
+        columnarDatabase = ColumnarDatabase()
+        columnarDatabase.connect(self.dataDir.name)
+
+        stars = localDatabase.getAllStarData(FilterType.U)
+        columnarDatabase.writeTable(
+            FilterType.U,
+            stars.getId(),
+            stars.getRA(),
+            stars.getDecl(),
+            stars.getMag(FilterType.U),
+        )
+
+        columnarDatabase.disconnect()
+        localDatabase.disconnect()
+
+        # Use the columnar database
+        settingFile = self.wepCalculation.getSettingFile()
+        settingFile.updateSetting("bscDbType", "columnar")
+        settingFile.updateSetting("defaultColumnarBscPath", self.dataDir.name)
+
+        self.wepCalculation.getWepCntlr().sourSelc = (
+            self.wepCalculation._configSourceSelector(
+                CamType.ComCam, BscDbType.ColumnarDb, "default.yaml"
+            )
+        )
+        self.wepCalculation.setFilter(FilterType.U)
+        self.wepCalculation.setBoresight(0.0, 63.0)
+
+        neighborStarMap = self.wepCalculation._getTargetStar()
+
+        # Compare with the query of local database
+        sourSelc = SourceSelector(CamType.ComCam, BscDbType.LocalDb)
+        sourSelc.setObsMetaData(0.0, 63.0, 0.0)
+        sourSelc.setFilter(FilterType.U)
+        sourSelc.connect(dbAdress)
+        neighborStarMapOfLocalDb = sourSelc.getTargetStar(
+            offset=settingFile.getSetting("camDimOffset")
+        )[0]
+        sourSelc.disconnect()
+
+        self.assertGreater(len(neighborStarMap), 0)
+        self.assertEqual(list(neighborStarMap), list(neighborStarMapOfLocalDb))
+        for sensorName, nbrStar in neighborStarMapOfLocalDb.items():
+            self.assertEqual(neighborStarMap[sensorName].getId(), nbrStar.getId())
+
     def testGetRotAng(self):
 
         rotAng = self.wepCalculation.getRotAng()
@@ -182,6 +279,227 @@ class TestWEPCalculation(unittest.TestCase):
             rawExpData,
         )
 
+    def testCalculateWavefrontErrorsByStreamWithoutExtraRawExpData(self):
+
+        self.assertRaises(
+            ValueError,
+            self.wepCalculation.calculateWavefrontErrorsByStream,
+            RawExpData(),
+        )
+
+    def testCalculateWavefrontErrorsAsyncWithoutExtraRawExpData(self):
+        async def calcWfErr():
+            return [
+                sensorWavefrontData
+                async for sensorWavefrontData in (
+                    self.wepCalculation.calculateWavefrontErrorsAsync(RawExpData())
+                )
+            ]
+
+        self.assertRaises(ValueError, asyncio.run, calcWfErr())
+
+    def _stubWfErrCalc(self, numOfSensor, release=None):
+        """Stub the preparation and calculation of wavefront error.
+
+        Parameters
+        ----------
+        numOfSensor : int
+            Number of sensors to calculate.
+        release : threading.Event, optional
+            The calculation of second sensor waits for this event if not None.
+            (the default is None.)
+
+        Returns
+        -------
+        list[int]
+            Indexes of sensors whose calculation is started.
+        threading.Event
+            Event set when the generator of sensor wavefront data is closed.
+        """
+
+        stages = []
+        closed = threading.Event()
+
+        def genSensorWavefrontData(neighborStarMap, obsIdList):
+            try:
+                for idx in range(numOfSensor):
+                    stages.append(idx)
+                    if (idx == 1) and (release is not None):
+                        release.wait()
+                    yield idx
+            finally:
+                closed.set()
+
+        self.wepCalculation._prepareWfErrCalc = lambda rawExpData, extraRawExpData: (
+            dict(),
+            [rawExpData, extraRawExpData],
+        )
+        self.wepCalculation._genSensorWavefrontDataByStream = genSensorWavefrontData
+
+        return stages, closed
+
+    def testCalculateWavefrontErrorsAsync(self):
+
+        stages, closed = self._stubWfErrCalc(3)
+
+        async def calcWfErr():
+            results = []
+            async for sensorWavefrontData in (
+                self.wepCalculation.calculateWavefrontErrorsAsync(
+                    RawExpData(), RawExpData()
+                )
+            ):
+                # The next sensor is not calculated before this one is taken
+                results.append((sensorWavefrontData, len(stages)))
+
+            return results
+
+        results = asyncio.run(calcWfErr())
+        self.assertEqual(results, [(0, 1), (1, 2), (2, 3)])
+        self.assertTrue(closed.is_set())
+
+    def testCalculateWavefrontErrorsAsyncWithCancel(self):
+
+        release = threading.Event()
+        stages, closed = self._stubWfErrCalc(3, release=release)
+
+        async def calcWfErr():
+            results = []
+
+            async def consume():
+                async for sensorWavefrontData in (
+                    self.wepCalculation.calculateWavefrontErrorsAsync(
+                        RawExpData(), RawExpData()
+                    )
+                ):
+                    results.append(sensorWavefrontData)
+
+            # Cancel the calculation while the second sensor is calculated
+            task = asyncio.create_task(consume())
+            while len(stages) < 2:
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            # The running stage is finished in the background
+            release.set()
+            await asyncio.get_running_loop().run_in_executor(None, closed.wait, 10)
+
+            return results
+
+        results = asyncio.run(calcWfErr())
+        self.assertEqual(results, [0])
+        self.assertEqual(stages, [0, 1])
+        self.assertTrue(closed.is_set())
+
+    def testCalculateWavefrontErrorsAsyncWithCancelInPreparation(self):
+
+        release = threading.Event()
+        stages, closed = self._stubWfErrCalc(1)
+
+        prepareWfErrCalc = self.wepCalculation._prepareWfErrCalc
+        preparations = []
+
+        def prepareWfErrCalcAndWait(rawExpData, extraRawExpData):
+            preparations.append("start")
+            if len(preparations) == 1:
+                release.wait()
+            preparations.append("end")
+            return prepareWfErrCalc(rawExpData, extraRawExpData)
+
+        self.wepCalculation._prepareWfErrCalc = prepareWfErrCalcAndWait
+
+        async def calcWfErr():
+            async def consume():
+                return [
+                    sensorWavefrontData
+                    async for sensorWavefrontData in (
+                        self.wepCalculation.calculateWavefrontErrorsAsync(
+                            RawExpData(), RawExpData()
+                        )
+                    )
+                ]
+
+            # Cancel the first calculation in the preparation
+            task = asyncio.create_task(consume())
+            while len(preparations) < 1:
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            # The second preparation waits for the first one
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.1)
+            self.assertEqual(preparations, ["start"])
+
+            release.set()
+            return await task
+
+        self.assertEqual(asyncio.run(calcWfErr()), [0])
+        self.assertEqual(preparations, ["start", "end", "start", "end"])
+
+    def testCalculateWavefrontErrorsAsyncWithEarlyStop(self):
+
+        stages, closed = self._stubWfErrCalc(3)
+
+        async def calcWfErr():
+            sensorGen = self.wepCalculation.calculateWavefrontErrorsAsync(
+                RawExpData(), RawExpData()
+            )
+            async for sensorWavefrontData in sensorGen:
+                break
+
+            await sensorGen.aclose()
+
+            return sensorWavefrontData
+
+        self.assertEqual(asyncio.run(calcWfErr()), 0)
+        self.assertEqual(stages, [0])
+        self.assertTrue(closed.is_set())
+
+    def testCalculateWavefrontErrorsAsyncWithShutdownExecutor(self):
+
+        stages, closed = self._stubWfErrCalc(3)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        async def calcWfErr():
+            sensorGen = self.wepCalculation.calculateWavefrontErrorsAsync(
+                RawExpData(), RawExpData(), executor=executor
+            )
+            async for sensorWavefrontData in sensorGen:
+                break
+
+            # The generator is still closed after the shutdown of executor
+            executor.shutdown()
+            await sensorGen.aclose()
+
+            return sensorWavefrontData
+
+        self.assertEqual(asyncio.run(calcWfErr()), 0)
+        self.assertTrue(closed.wait(10))
+
+    def testGetPrefetchDepthInBudget(self):
+
+        # The images of R22_S11 need 248.5 MB and the budget is 1024 MB
+        prefetchDepth = self.wepCalculation._getPrefetchDepthInBudget(
+            ["R:2,2 S:1,1", "R:2,2 S:1,0"], 2
+        )
+        self.assertEqual(prefetchDepth, 3)
+
+        # The sensors are read one by one if the images of two sensors
+        # (2 x 2485 MB) are over the budget
+        prefetchDepth = self.wepCalculation._getPrefetchDepthInBudget(
+            ["R:2,2 S:1,1"], 20
+        )
+        self.assertEqual(prefetchDepth, 0)
+
+        # Nothing is read ahead if there is no image
+        self.assertEqual(self.wepCalculation._getPrefetchDepthInBudget([], 2), 0)
+
     def testCalculateWavefrontErrors(self):
 
         fakeFlatDir = tempfile.TemporaryDirectory(dir=self.dataDir.name)
@@ -189,6 +507,47 @@ class TestWEPCalculation(unittest.TestCase):
 
         self._calculateWavefrontErrorsAndCheck()
 
+    def testCalculateWavefrontErrorsByStream(self):
+
+        fakeFlatDir = tempfile.TemporaryDirectory(dir=self.dataDir.name)
+        self._genCalibsAndIngest(fakeFlatDir.name)
+
+        comcamDataDir = os.path.join(self.testDataDir, "phosimOutput", "realComCam")
+        rawExpData, extraRawExpData = self._prepareRawExpData(comcamDataDir)
+
+        # Ingest the images and do the ISR once to calculate the wavefront
+        # errors of the same input in both ways
+        prepared = self.wepCalculation._prepareWfErrCalc(rawExpData, extraRawExpData)
+        self.wepCalculation._prepareWfErrCalc = lambda *args: prepared
+
+        with self.assertWarns(UserWarning):
+            listOfWfErr = self.wepCalculation.calculateWavefrontErrors(
+                rawExpData, extraRawExpData=extraRawExpData
+            )
+            listOfWfErrByStream = list(
+                self.wepCalculation.calculateWavefrontErrorsByStream(
+                    rawExpData, extraRawExpData=extraRawExpData
+                )
+            )
+
+        self.assertEqual(len(listOfWfErrByStream), len(listOfWfErr))
+
+        mapOfWfErr = {
+            sensorWavefrontData.getSensorId(): sensorWavefrontData
+            for sensorWavefrontData in listOfWfErr
+        }
+        for sensorWavefrontData in listOfWfErrByStream:
+            self._testSensorWavefrontData(sensorWavefrontData)
+
+            wfErr = mapOfWfErr[sensorWavefrontData.getSensorId()]
+            self.assertEqual(
+                len(sensorWavefrontData.getListOfDonut()), len(wfErr.getListOfDonut())
+            )
+            np.testing.assert_allclose(
+                sensorWavefrontData.getAnnularZernikePoly(),
+                wfErr.getAnnularZernikePoly(),
+            )
+
     def _calculateWavefrontErrorsAndCheck(self):
 
         comcamDataDir = os.path.join(self.testDataDir, "phosimOutput", "realComCam")
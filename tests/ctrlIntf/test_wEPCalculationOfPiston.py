@@ -35,6 +35,10 @@ class TestWEPCalculationOfPiston(unittest.TestCase):
             AstWcsSol(), CamType.ComCam, ""
         )
 
+    def tearDown(self):
+
+        self.wepCalculationOfPiston.close()
+
     def testGetDefocalDisInMm(self):
 
         defocalDisInMm = self.wepCalculationOfPiston.getDefocalDisInMm()
@@ -20,12 +20,17 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
 import numpy as np
 import unittest
 
 from lsst.ts.wep.cwfs.Instrument import Instrument
 from lsst.ts.wep.cwfs.CompensableImage import CompensableImage
 from lsst.ts.wep.cwfs.Algorithm import Algorithm
+from lsst.ts.wep.cwfs.Tool import ZernikeAnnularGrad
+from lsst.ts.wep.cwfs.ZernikeFitter import ZernikeFitter
+from lsst.ts.wep.cwfs.OffAxisLookupTable import OffAxisLookupTable
 from lsst.ts.wep.Utility import getModulePath, getConfigDir, DefocalType, CamType
 
 
@@ -96,6 +101,142 @@ class TestAlgorithm(unittest.TestCase):
         self.algoExp.setDebugLevel(0)
         self.assertEqual(self.algoExp.getDebugLevel(), 0)
 
+    def testSetAndGetZernikeFitter(self):
+
+        self.assertTrue(isinstance(self.algoFft.getZernikeFitter(), ZernikeFitter))
+
+        zernikeFitter = ZernikeFitter()
+        self.algoFft.setZernikeFitter(zernikeFitter)
+        self.assertEqual(id(self.algoFft.getZernikeFitter()), id(zernikeFitter))
+
+    def testSetWarmStart(self):
+
+        self.assertFalse(self.algoExp.isWarmStart())
+
+        zer4UpNm = np.ones(self.algoExp.getNumOfZernikes() - 3)
+        self.algoExp.setWarmStart(zer4UpNm)
+        self.assertTrue(self.algoExp.isWarmStart())
+        self.assertTrue(np.allclose(self.algoExp.getWarmStartZk(), zer4UpNm))
+        self.assertEqual(self.algoExp._getNumOfOuterItrInUse(), 6)
+        self.assertEqual(self.algoExp._getCompSequenceInUse().tolist(), [22] * 6)
+
+        self.algoExp.setWarmStart(zer4UpNm, compSequence=[13, 22])
+        self.assertEqual(self.algoExp._getNumOfOuterItrInUse(), 2)
+
+        self.algoExp.resetWarmStart()
+        self.assertFalse(self.algoExp.isWarmStart())
+        self.assertIsNone(self.algoExp.getWarmStartZk())
+        self.assertEqual(
+            self.algoExp._getNumOfOuterItrInUse(), self.algoExp.getNumOfOuterItr()
+        )
+
+    def testSetWarmStartWithWrongValue(self):
+
+        self.assertRaises(ValueError, self.algoExp.setWarmStart, np.ones(3))
+        self.assertRaises(
+            ValueError,
+            self.algoExp.setWarmStart,
+            np.ones(self.algoExp.getNumOfZernikes() - 3),
+            compSequence=[],
+        )
+
+    def testSetNumOfFftThreads(self):
+
+        self.assertEqual(self.algoFft.getNumOfFftThreads(), 1)
+
+        self.algoFft.setNumOfFftThreads(2)
+        self.assertEqual(self.algoFft.getNumOfFftThreads(), 2)
+
+        self.assertRaises(ValueError, self.algoFft.setNumOfFftThreads, 0)
+
+    def testGetGeometryCacheSize(self):
+
+        self.assertEqual(self.algoExp.getGeometryCacheSize(), 64)
+
+    def testGetGeometryCacheFieldStep(self):
+
+        self.assertEqual(self.algoExp.getGeometryCacheFieldStep(), 0)
+
+    def testGetGeometryCache(self):
+
+        geometryCache = self.algoExp.getGeometryCache()
+        self.assertEqual(geometryCache.getMaxSize(), 64)
+        self.assertEqual(geometryCache.getFieldStep(), 0)
+
+    def testUseOffAxisLookupTable(self):
+
+        self.assertFalse(self.algoExp.useOffAxisLookupTable())
+
+    def testGetOffAxisLookupTable(self):
+
+        self.assertIsNone(self.algoExp.getOffAxisLookupTable())
+
+    def testGetOffAxisLookupTableWithSetting(self):
+
+        self.algoExp.algoParamFile.updateSetting("offAxisLookupTable", True)
+        self.algoExp.algoParamFile.updateSetting("offAxisLookupGridDim", 33)
+
+        lookupTable = self.algoExp.getOffAxisLookupTable()
+        self.assertTrue(lookupTable.isReady())
+        self.assertEqual(lookupTable.getGridDim(), 33)
+        self.assertIs(self.algoExp.getOffAxisLookupTable(), lookupTable)
+
+    def testGetOffAxisLookupTableWithStaleFile(self):
+
+        self.algoExp.algoParamFile.updateSetting("offAxisLookupTable", True)
+        self.algoExp.algoParamFile.updateSetting("offAxisLookupGridDim", 33)
+
+        # The file is built for another pupil grid
+        testDir = os.path.join(self.modulePath, "tests")
+        with tempfile.TemporaryDirectory(dir=testDir) as tempDir:
+            filePath = os.path.join(tempDir, "lookupTable.npz")
+            staleTable = OffAxisLookupTable(gridDim=8)
+            staleTable.calcTable(self.algoExp._inst.getInstFileDir())
+            staleTable.saveTable(filePath)
+
+            self.algoExp.algoParamFile.updateSetting("offAxisLookupFile", filePath)
+            lookupTable = self.algoExp.getOffAxisLookupTable()
+            self.assertEqual(lookupTable.getGridDim(), 33)
+
+            # The file is replaced by the recalculated table
+            savedTable = OffAxisLookupTable()
+            savedTable.loadTable(filePath)
+            self.assertEqual(savedTable.getGridDim(), 33)
+
+    def testGetOffAxisLookupTableWithRelativeFilePath(self):
+
+        testDir = os.path.join(self.modulePath, "tests")
+        with tempfile.TemporaryDirectory(dir=testDir) as tempDir:
+
+            # Use the copy of instrument directory to save the file
+            instDir = os.path.join(tempDir, "instData")
+            shutil.copytree(os.path.join(getConfigDir(), "cwfs", "instData"), instDir)
+            inst = Instrument(instDir)
+            inst.config(
+                CamType.LsstCam, self.I1.getImgSizeInPix(), announcedDefocalDisInMm=1.0
+            )
+
+            algo = Algorithm(os.path.join(getConfigDir(), "cwfs", "algo"))
+            algo.config("exp", inst)
+            algo.algoParamFile.updateSetting("offAxisLookupTable", True)
+            algo.algoParamFile.updateSetting("offAxisLookupGridDim", 33)
+            algo.algoParamFile.updateSetting("offAxisLookupFile", "lookupTable.npz")
+
+            algo.getOffAxisLookupTable()
+
+            # The file is in the instrument directory
+            filePath = os.path.join(inst.getInstFileDir(), "lookupTable.npz")
+            self.assertTrue(os.path.exists(filePath))
+            self.assertFalse(os.path.exists("lookupTable.npz"))
+
+    def testSetOffAxisLookupTable(self):
+
+        self.algoExp.algoParamFile.updateSetting("offAxisLookupTable", True)
+
+        lookupTable = OffAxisLookupTable()
+        self.algoExp.setOffAxisLookupTable(lookupTable)
+        self.assertIs(self.algoExp.getOffAxisLookupTable(), lookupTable)
+
     def testGetZer4UpInNm(self):
 
         zer4UpNm = self.algoExp.getZer4UpInNm()
@@ -147,6 +288,16 @@ class TestAlgorithm(unittest.TestCase):
         self.assertEqual(self.algoExp.getOffAxisPolyOrder(), 10)
         self.assertEqual(self.algoFft.getOffAxisPolyOrder(), 10)
 
+    def testGetImgInterpOrder(self):
+
+        self.assertEqual(self.algoExp.getImgInterpOrder(), 1)
+        self.assertEqual(self.algoFft.getImgInterpOrder(), 1)
+
+    def testGetImgInterpOrderWithWrongValue(self):
+
+        self.algoExp.algoParamFile.updateSetting("imgInterpOrder", 6)
+        self.assertRaises(ValueError, self.algoExp.getImgInterpOrder)
+
     def testGetCompensatorMode(self):
 
         self.assertEqual(self.algoExp.getCompensatorMode(), "zer")
@@ -169,6 +320,67 @@ class TestAlgorithm(unittest.TestCase):
         self.assertEqual(self.algoExp.getBoundaryThickness(), 8)
         self.assertEqual(self.algoFft.getBoundaryThickness(), 1)
 
+    def testGetConvergeCriteria(self):
+
+        zkGroups, absTol, relTol = self.algoExp.getConvergeCriteria()
+        self.assertEqual(len(zkGroups), 0)
+        self.assertEqual(len(absTol), 0)
+        self.assertEqual(len(relTol), 0)
+
+    def testGetConvergeCriteriaWithWrongValue(self):
+
+        self._setConvergeCriteria(self.algoExp, [6, 13, 22], [0.5, 0.5], [0.01] * 3)
+        self.assertRaises(ValueError, self.algoExp.getConvergeCriteria)
+
+        self._setConvergeCriteria(self.algoExp, [13, 6], [0.5] * 2, [0.01] * 2)
+        self.assertRaises(ValueError, self.algoExp.getConvergeCriteria)
+
+    def _setConvergeCriteria(self, algo, zkGroups, absTol, relTol):
+
+        algo.algoParamFile.updateSetting("convergeZkGroups", zkGroups)
+        algo.algoParamFile.updateSetting("convergeAbsTol", absTol)
+        algo.algoParamFile.updateSetting("convergeRelTol", relTol)
+
+    def testGetMinItrOfCompStage(self):
+
+        self.assertEqual(self.algoExp.getMinItrOfCompStage(), 1)
+        self.assertEqual(self.algoFft.getMinItrOfCompStage(), 1)
+
+    def testGetSkipConvergedCompStage(self):
+
+        self.assertFalse(self.algoExp.getSkipConvergedCompStage())
+        self.assertFalse(self.algoFft.getSkipConvergedCompStage())
+
+    def testUpdateCompStage(self):
+
+        numTerms = self.algoExp.getNumOfZernikes()
+        zkPrev = np.zeros(numTerms)
+        zk = np.zeros(numTerms)
+        zk[3:6] = 1e-10
+        zk[6:] = 1e-8
+
+        # The criteria are disabled
+        self.assertEqual(self.algoExp._updateCompStage(0, 0, zk, zkPrev), (1, 1, False))
+
+        # Only z4 - z6 are converged
+        self._setConvergeCriteria(self.algoExp, [6, 13, 22], [0.5] * 3, [0.01] * 3)
+        self.assertEqual(self.algoExp._getConvergedZkOrder(zk, zkPrev), 6)
+        self.assertEqual(self.algoExp._updateCompStage(0, 0, zk, zkPrev), (1, 1, False))
+
+        # Skip the stage of z4 and go to the stage of z6 in compSequence
+        self.algoExp.algoParamFile.updateSetting("skipConvergedCompStage", True)
+        self.assertEqual(self.algoExp._updateCompStage(0, 0, zk, zkPrev), (2, 0, False))
+
+        # Skip the stage of z6 after the minimum number of iterations
+        self.algoExp.algoParamFile.updateSetting("minItrOfCompStage", 2)
+        self.assertEqual(self.algoExp._updateCompStage(2, 0, zk, zkPrev), (3, 1, False))
+        self.assertEqual(self.algoExp._updateCompStage(3, 1, zk, zkPrev), (4, 0, False))
+
+        # All the terms are converged in the final stage
+        self.assertEqual(
+            self.algoExp._updateCompStage(10, 1, zkPrev, zkPrev), (11, 2, True)
+        )
+
     def testGetFftDimension(self):
 
         self.assertEqual(self.algoFft.getFftDimension(), 128)
@@ -233,6 +445,32 @@ class TestAlgorithm(unittest.TestCase):
             11,
         ]
 
+    def testGetExpBasis(self):
+
+        self.algoExp.itr0(self.I1, self.I2, self.opticalModel)
+
+        numTerms = self.algoExp.getNumOfZernikes()
+        zobsR = self.algoExp.getObsOfZernikes()
+        Zi, dZidx, dZidy = self.algoExp._getExpBasis(numTerms, zobsR)
+
+        dimOfDonut = self.inst.getDimOfDonutOnSensor()
+        self.assertEqual(Zi.shape, (numTerms, dimOfDonut, dimOfDonut))
+        self.assertEqual(dZidx.shape, Zi.shape)
+        self.assertEqual(dZidy.shape, Zi.shape)
+
+        # Check the value of z4 gradient
+        xSensor, ySensor = self.inst.getSensorCoor()
+        cMask = self.algoExp.cMask
+        z = np.zeros(numTerms)
+        z[3] = 1
+        dZ4dx = ZernikeAnnularGrad(z, xSensor * cMask, ySensor * cMask, zobsR, "dx")
+        self.assertLess(np.sum(np.abs(dZidx[3, :, :] - dZ4dx)), 1e-10)
+
+        # The basis is reused in the following iterations
+        self.algoExp.nextItr(self.I1, self.I2, self.opticalModel, nItr=2)
+        self.assertEqual(len(self.algoExp._expBasisCache), 1)
+        self.assertIs(self.algoExp._getExpBasis(numTerms, zobsR)[0], Zi)
+
     def testNextItrWithOneIter(self):
 
         self.algoExp.nextItr(self.I1, self.I2, self.opticalModel, nItr=1)
@@ -290,6 +528,81 @@ class TestAlgorithm(unittest.TestCase):
         zk = self.algoExp.getZer4UpInNm()
         self.assertEqual(int(zk[7]), -192)
 
+        self.assertEqual(
+            self.algoExp.getNumOfItrRun(), self.algoExp.getNumOfOuterItr() + 1
+        )
+
+    def testRunItWithConvergeCriteria(self):
+
+        self._setConvergeCriteria(self.algoExp, [6, 13, 22], [0.5] * 3, [0.01] * 3)
+        self.algoExp.runIt(self.I1, self.I2, self.opticalModel, tol=1e-3)
+
+        zk = self.algoExp.getZer4UpInNm()
+        self.assertEqual(int(zk[7]), -192)
+        self.assertLess(
+            self.algoExp.getNumOfItrRun(), self.algoExp.getNumOfOuterItr() + 1
+        )
+
+    def testRunItWithWarmStart(self):
+
+        I1s, I2s = self._getImgPairs(1)
+
+        self.algoExp.runIt(self.I1, self.I2, self.opticalModel, tol=1e-3)
+        zk = self.algoExp.getZer4UpInNm()
+
+        # Warm-start from a close estimation
+        self.algoExp.reset()
+        self.algoExp.setWarmStart(zk + 1)
+        self.algoExp.runIt(I1s[0], I2s[0], self.opticalModel, tol=1e-3)
+
+        self.assertLess(np.max(np.abs(self.algoExp.getZer4UpInNm() - zk)), 2)
+        self.assertEqual(self.algoExp.getNumOfItrRun(), 7)
+
+    def testRunItBatch(self):
+
+        I1s, I2s = self._getImgPairs(2)
+        zkBatch = self.algoExp.runItBatch(I1s, I2s, self.opticalModel, tol=1e-3)
+        self.assertEqual(zkBatch.shape, (2, self.algoExp.getNumOfZernikes() - 3))
+
+        # Compare with the calculation pair by pair
+        self.algoExp.runIt(self.I1, self.I2, self.opticalModel, tol=1e-3)
+        zk = self.algoExp.getZer4UpInNm()
+        for zkOfPair in zkBatch:
+            self.assertLess(np.max(np.abs(zkOfPair - zk)), 1e-8)
+
+        numOfItr = self.algoExp.getNumOfItrOfBatch()
+        self.assertEqual(numOfItr.tolist(), [self.algoExp.getNumOfItrRun()] * 2)
+
+    def testRunItBatchOfFft(self):
+
+        I1s, I2s = self._getImgPairs(1)
+        zkBatch = self.algoFft.runItBatch(I1s, I2s, self.opticalModel, tol=1e-3)
+
+        self.algoFft.runIt(self.I1, self.I2, self.opticalModel, tol=1e-3)
+        zk = self.algoFft.getZer4UpInNm()
+        self.assertLess(np.max(np.abs(zkBatch[0] - zk)), 1e-8)
+
+    def _getImgPairs(self, numOfPairs):
+
+        I1s = []
+        I2s = []
+        for ii in range(numOfPairs):
+            for img, imgs in ((self.I1, I1s), (self.I2, I2s)):
+                compImg = CompensableImage()
+                compImg.setImg(
+                    img.getFieldXY(), img.getDefocalType(), image=img.getImg().copy()
+                )
+                imgs.append(compImg)
+
+        return I1s, I2s
+
+    def testRunItBatchWithWrongNumOfImgs(self):
+
+        I1s, I2s = self._getImgPairs(2)
+        self.assertRaises(
+            ValueError, self.algoExp.runItBatch, I1s, I2s[:1], self.opticalModel
+        )
+
     def testResetAfterFullCalc(self):
 
         self.algoExp.runIt(self.I1, self.I2, self.opticalModel, tol=1e-3)
@@ -312,6 +625,12 @@ class TestAlgorithm(unittest.TestCase):
         zk = self.algoFft.getZer4UpInNm()
         self.assertEqual(int(zk[7]), -192)
 
+        # The pseudo-inverse matrix is reused in the outer loop iterations
+        self.assertEqual(self.algoFft.getZernikeFitter().getNumOfCachedItems(), 1)
+
+        # The context of fft solver is reused in the outer loop iterations
+        self.assertEqual(len(self.algoFft._fftContextCache), 1)
+
 
 if __name__ == "__main__":
 
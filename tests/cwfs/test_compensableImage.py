@@ -22,11 +22,16 @@
 import os
 import numpy as np
 import unittest
+from scipy.interpolate import RectBivariateSpline
+from scipy.ndimage import shift
+from scipy.signal import correlate
 
 from lsst.ts.wep.cwfs.Image import Image
 from lsst.ts.wep.cwfs.Instrument import Instrument
 from lsst.ts.wep.cwfs.CompensableImage import CompensableImage
 from lsst.ts.wep.cwfs.CentroidRandomWalk import CentroidRandomWalk
+from lsst.ts.wep.cwfs.ProjectionGeometryCache import ProjectionGeometryCache
+from lsst.ts.wep.cwfs.OffAxisLookupTable import OffAxisLookupTable
 from lsst.ts.wep.Utility import getModulePath, getConfigDir, DefocalType, CamType
 
 
@@ -38,6 +43,7 @@ class TempAlgo(object):
         self.numTerms = 22
         self.offAxisPolyOrder = 10
         self.zobsR = 0.61
+        self.imgInterpOrder = 1
 
     def getNumOfZernikes(self):
 
@@ -51,6 +57,10 @@ class TempAlgo(object):
 
         return self.zobsR
 
+    def getImgInterpOrder(self):
+
+        return self.imgInterpOrder
+
 
 class TestCompensableImage(unittest.TestCase):
     """Test the CompensableImage class."""
@@ -210,7 +220,9 @@ class TestCompensableImage(unittest.TestCase):
         wfsImgIntra = CompensableImage()
         wfsImgExtra = CompensableImage()
         wfsImgIntra.setImg(
-            self.fieldXY, DefocalType.Intra, imageFile=self.imgFilePathIntra,
+            self.fieldXY,
+            DefocalType.Intra,
+            imageFile=self.imgFilePathIntra,
         )
         wfsImgExtra.setImg(
             self.fieldXY, DefocalType.Extra, imageFile=self.imgFilePathExtra
@@ -238,6 +250,127 @@ class TestCompensableImage(unittest.TestCase):
         res = np.sum(np.abs(intraImg - extraImg) * binaryImg)
         self.assertLess(res, 500)
 
+    def testCompensateWithGeometryCache(self):
+
+        algo = TempAlgo()
+        geometryCache = ProjectionGeometryCache()
+
+        zcCol = np.zeros(22)
+        zcCol[3:] = self.zcCol * 1e-9
+
+        for model in ("paraxial", "offAxis"):
+            imgs = []
+            for cache in (None, geometryCache, geometryCache):
+                wfsImg = CompensableImage()
+                wfsImg.setImg(
+                    self.fieldXY, DefocalType.Extra, imageFile=self.imgFilePathExtra
+                )
+                wfsImg.setOffAxisCorr(self.inst, algo.getOffAxisPolyOrder())
+                wfsImg.compensate(self.inst, algo, zcCol, model, geometryCache=cache)
+                imgs.append(wfsImg.getImg())
+
+            # The results should be the same with and without the cache
+            self.assertTrue(np.array_equal(imgs[1], imgs[0]))
+            self.assertTrue(np.array_equal(imgs[2], imgs[0]))
+
+        self.assertEqual(geometryCache.getNumOfItems(), 2)
+
+    def testCompensateWithFieldStep(self):
+
+        algo = TempAlgo()
+
+        zcCol = np.zeros(22)
+        zcCol[3:] = self.zcCol * 1e-9
+
+        # Two donuts in the same step of field position are compensated in
+        # different orders
+        fieldXYs = [(1.181, 1.184), (1.184, 1.179)]
+        results = []
+        for order in (fieldXYs, fieldXYs[::-1]):
+            geometryCache = ProjectionGeometryCache(fieldStep=0.01)
+            imgs = dict()
+            for fieldXY in order:
+                wfsImg = CompensableImage()
+                wfsImg.setImg(
+                    fieldXY, DefocalType.Extra, imageFile=self.imgFilePathExtra
+                )
+                wfsImg.makeMask(
+                    self.inst, self.opticalModel, 8, 1, geometryCache=geometryCache
+                )
+                wfsImg.setOffAxisCorr(self.inst, algo.getOffAxisPolyOrder())
+                wfsImg.compensate(
+                    self.inst,
+                    algo,
+                    zcCol,
+                    self.opticalModel,
+                    geometryCache=geometryCache,
+                )
+                imgs[fieldXY] = (wfsImg.getImg(), wfsImg.getPaddedMask())
+
+                # The field position of image should not be changed
+                self.assertEqual(wfsImg.getFieldXY(), fieldXY)
+
+            self.assertEqual(geometryCache.getNumOfItems(), 2)
+            results.append(imgs)
+
+        # The results should not depend on the order
+        for fieldXY in fieldXYs:
+            for value, valueOfOtherOrder in zip(
+                results[0][fieldXY], results[1][fieldXY]
+            ):
+                self.assertTrue(np.array_equal(value, valueOfOtherOrder))
+
+    def testCompensateWithOffAxisLookupTable(self):
+
+        algo = TempAlgo()
+        lookupTable = OffAxisLookupTable(gridDim=97)
+        lookupTable.calcTable(self.inst.getInstFileDir())
+
+        zcCol = np.zeros(22)
+        zcCol[3:] = self.zcCol * 1e-9
+
+        imgs = []
+        for table in (None, lookupTable):
+            wfsImg = CompensableImage()
+            wfsImg.setImg(
+                self.fieldXY, DefocalType.Intra, imageFile=self.imgFilePathIntra
+            )
+            wfsImg.setOffAxisCorr(
+                self.inst, algo.getOffAxisPolyOrder(), lookupTable=table
+            )
+            wfsImg.compensate(self.inst, algo, zcCol, self.opticalModel)
+            imgs.append(wfsImg.getImg())
+
+        # The lookup table should be close to the evaluation of polynomials
+        delta = np.sum(np.abs(imgs[1] - imgs[0])) / np.sum(np.abs(imgs[0]))
+        self.assertLess(delta, 1e-3)
+
+    def testResampleImg(self):
+
+        self._setIntraImg()
+        img = self.wfsImg.getImg()
+
+        sensorFactor = self.inst.getSensorFactor()
+        xSensor, ySensor = self.inst.getSensorCoor()
+        lutxp = xSensor * 0.9 + 0.01
+        lutyp = ySensor * 1.1 - 0.02
+
+        lutIp = self.wfsImg._resampleImg(img, lutxp, lutyp, sensorFactor)
+        self.assertEqual(lutIp.shape, lutxp.shape)
+
+        # Compare with the point-by-point evaluation of bilinear interpolation
+        ip = RectBivariateSpline(ySensor[:, 0], xSensor[0, :], img, kx=1, ky=1)
+        lutIpAns = np.array(
+            [ip(yy, xx)[0, 0] for xx, yy in zip(lutxp.ravel(), lutyp.ravel())]
+        ).reshape(lutxp.shape)
+        self.assertTrue(np.array_equal(lutIp, lutIpAns))
+
+        # Higher-order spline should be close to the bilinear one
+        lutIpCubic = self.wfsImg._resampleImg(
+            img, lutxp, lutyp, sensorFactor, interpOrder=3
+        )
+        self.assertLess(np.mean(np.abs(lutIpCubic - lutIp)), 0.1 * np.mean(img))
+
     def testCenterOnProjection(self):
 
         template = self._prepareGaussian2D(100, 1)
@@ -252,6 +385,48 @@ class TestCompensableImage(unittest.TestCase):
         imgRecenter = self.wfsImg.centerOnProjection(img, template, window=20)
         self.assertLess(np.sum(np.abs(imgRecenter - template)), 1e-7)
 
+    def testCenterOnProjectionWithCorrOfWholeImg(self):
+
+        template = np.zeros((120, 120))
+        yy, xx = np.mgrid[-60:60, -60:60]
+        rr = np.hypot(xx, yy)
+        template[(rr < 40) & (rr > 20)] = 1
+
+        window = 20
+        center = 60
+        r = window // 2
+        mask = np.zeros(template.shape)
+        mask[center - r : center + r, center - r : center + r] = 1
+
+        randState = np.random.RandomState(seed=1)
+        for dx, dy in ((2, 8), (-10, 9), (9, -10), (0, 0), (12, 3)):
+            img = np.roll(np.roll(template, dx, axis=1), dy, axis=0)
+            img = 100 * img + 10 * randState.rand(*img.shape)
+
+            # Compare with the cross-correlation of whole image
+            corr = correlate(img, template, mode="same")
+            idx = np.argmax(corr * mask)
+            imgAns = np.roll(
+                np.roll(img, center - idx % 120, axis=1), center - idx // 120, axis=0
+            )
+
+            imgRecenter = self.wfsImg.centerOnProjection(img, template, window=window)
+            self.assertTrue(np.array_equal(imgRecenter, imgAns))
+
+    def testCenterOnProjectionWithSubPixel(self):
+
+        template = self._prepareGaussian2D(100, 1)
+        img = shift(template, (4.3, -2.6), order=3)
+
+        imgRecenter = self.wfsImg.centerOnProjection(img, template, window=20)
+        imgRecenterSubPixel = self.wfsImg.centerOnProjection(
+            img, template, window=20, subPixel=True
+        )
+
+        delta = np.sum(np.abs(imgRecenter - template))
+        deltaSubPixel = np.sum(np.abs(imgRecenterSubPixel - template))
+        self.assertLess(deltaSubPixel, 0.5 * delta)
+
     def _prepareGaussian2D(self, imgSize, sigma):
 
         x = np.linspace(-10, 10, imgSize)
@@ -274,6 +449,7 @@ class TestCompensableImage(unittest.TestCase):
 
         offAxisCoeff, offAxisOffset = self.wfsImg.getOffAxisCoeff()
         self.assertEqual(offAxisCoeff.shape, (4, 66))
+        self.assertIsNone(self.wfsImg._offAxisLookupTable)
         self.assertAlmostEqual(offAxisCoeff[0, 0], -2.6362089 * 1e-3)
         self.assertEqual(offAxisOffset, 0.001)
 
@@ -320,6 +496,45 @@ class TestCompensableImage(unittest.TestCase):
         self.assertEqual(cMask.shape, image.shape)
         self.assertEqual(np.sum(np.abs(cMask - pMask)), 3001)
 
+    def testMakeMaskWithGeometryCache(self):
+
+        self._setIntraImg()
+
+        boundaryT = 8
+        maskScalingFactorLocal = 1
+        model = "offAxis"
+        geometryCache = ProjectionGeometryCache()
+        self.wfsImg.makeMask(
+            self.inst,
+            model,
+            boundaryT,
+            maskScalingFactorLocal,
+            geometryCache=geometryCache,
+        )
+        self.assertEqual(geometryCache.getNumOfItems(), 1)
+
+        # The masks of image at the same position should be from the cache
+        wfsImg = CompensableImage()
+        wfsImg.setImg(self.fieldXY, DefocalType.Extra, imageFile=self.imgFilePathExtra)
+        wfsImg.makeMask(
+            self.inst,
+            model,
+            boundaryT,
+            maskScalingFactorLocal,
+            geometryCache=geometryCache,
+        )
+        self.assertIs(wfsImg.getPaddedMask(), self.wfsImg.getPaddedMask())
+        self.assertIs(wfsImg.getNonPaddedMask(), self.wfsImg.getNonPaddedMask())
+
+        # Compare with the masks without the cache
+        wfsImg.makeMask(self.inst, model, boundaryT, maskScalingFactorLocal)
+        self.assertTrue(
+            np.array_equal(wfsImg.getPaddedMask(), self.wfsImg.getPaddedMask())
+        )
+        self.assertTrue(
+            np.array_equal(wfsImg.getNonPaddedMask(), self.wfsImg.getNonPaddedMask())
+        )
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,187 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import unittest
+
+from lsst.ts.wep.cwfs.FftSolverContext import FftSolverContext
+from lsst.ts.wep.cwfs.Tool import padArray, extractArray
+
+
+class TestFftSolverContext(unittest.TestCase):
+    """Test the FftSolverContext class."""
+
+    def setUp(self):
+
+        # Generate the ring mask
+        self.dim = 40
+        yy, xx = np.mgrid[0 : self.dim, 0 : self.dim]
+        self.rr = np.hypot(xx - self.dim / 2, yy - self.dim / 2)
+        self.mask = ((self.rr >= 10) & (self.rr <= 14)).astype(int)
+
+        self.padDim = 64
+        self.aperturePixelSize = 0.1
+        self.boundaryT = 1
+
+        self.context = FftSolverContext(
+            self.padDim, self.aperturePixelSize, self.mask, self.boundaryT
+        )
+
+    def testInitWithWrongPadDim(self):
+
+        self.assertRaises(
+            ValueError,
+            FftSolverContext,
+            63,
+            self.aperturePixelSize,
+            self.mask,
+            self.boundaryT,
+        )
+        self.assertRaises(
+            ValueError,
+            FftSolverContext,
+            32,
+            self.aperturePixelSize,
+            self.mask,
+            self.boundaryT,
+        )
+
+    def testGetPadDim(self):
+
+        self.assertEqual(self.context.getPadDim(), self.padDim)
+
+    def testGetU2V2(self):
+
+        u2v2 = self.context.getU2V2()
+        self.assertEqual(u2v2.shape, (self.padDim, self.padDim))
+
+        ctrIdx = self.padDim // 2
+        self.assertEqual(u2v2[ctrIdx, ctrIdx], np.inf)
+
+        freqStep = 1.0 / self.padDim / self.aperturePixelSize
+        self.assertAlmostEqual(
+            u2v2[ctrIdx, ctrIdx + 1], -4 * (np.pi ** 2) * freqStep ** 2
+        )
+
+    def testGetRingsOfBoundary(self):
+
+        apringOut, apringIn = self.context.getRingsOfBoundary()
+
+        self.assertEqual(np.sum(apringOut * self.mask), 0)
+        self.assertEqual(np.sum(apringIn * (1 - self.mask)), 0)
+        self.assertGreater(np.sum(apringOut), 0)
+        self.assertGreater(np.sum(apringIn), 0)
+
+    def testCalcWavefront(self):
+
+        S = padArray(np.random.rand(self.dim, self.dim) * self.mask, self.padDim)
+        W = self.context.calcWavefront(S)
+
+        # Compare with the complex-to-complex transform with the shifts
+        u2v2 = self.context.getU2V2()
+        SFFT = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(S)))
+        WAns = np.fft.fftshift(np.fft.irfft2(np.fft.fftshift(SFFT / u2v2), s=S.shape))
+
+        self.assertTrue(np.allclose(W, WAns, rtol=0, atol=1e-12))
+
+        WThreads = self.context.calcWavefront(S, numOfThreads=2)
+        self.assertTrue(np.allclose(WThreads, W, rtol=0, atol=1e-12))
+
+    def testExtractWavefront(self):
+
+        W = np.random.rand(self.padDim, self.padDim)
+        West = self.context.extractWavefront(W)
+
+        WestAns = extractArray(W, self.dim).copy()
+        WestAns -= WestAns[self.mask == 1].mean()
+        WestAns[self.mask == 0] = 0
+
+        self.assertTrue(np.allclose(West, WestAns))
+
+    def testPadSignal(self):
+
+        del2W = np.random.rand(self.dim, self.dim)
+        Sini = np.random.rand(self.padDim, self.padDim)
+        S = self.context.padSignal(del2W, Sini)
+
+        SAns = padArray(del2W, self.padDim)
+        maskPad = padArray(self.mask, self.padDim)
+        SAns[maskPad == 1] = Sini[maskPad == 1]
+
+        self.assertTrue(np.array_equal(S, SAns))
+
+    def testSetDwdnZero(self):
+
+        West = np.random.rand(self.dim, self.dim) * self.mask
+        WestdWdn0 = self.context.setDwdnZero(West)
+
+        # Compare with the pixel-by-pixel calculation
+        apringOut, apringIn = self.context.getRingsOfBoundary()
+        halfWidth = self.boundaryT
+        bordery, borderx = np.nonzero(apringOut)
+        WestAns = West.copy()
+        for ii in range(len(borderx)):
+            region = West[
+                borderx[ii] - halfWidth : borderx[ii] + halfWidth + 1,
+                bordery[ii] - halfWidth : bordery[ii] + halfWidth + 1,
+            ]
+            regionMask = apringIn[
+                borderx[ii] - halfWidth : borderx[ii] + halfWidth + 1,
+                bordery[ii] - halfWidth : bordery[ii] + halfWidth + 1,
+            ]
+            WestAns[borderx[ii], bordery[ii]] = region[np.nonzero(regionMask)].mean()
+
+        self.assertTrue(np.allclose(WestdWdn0, WestAns, equal_nan=True))
+
+    def testCalcMaskedMean(self):
+
+        img = np.random.rand(self.dim, self.dim)
+        halfWidth = 3
+        idxX, idxY = np.nonzero((self.rr > 14) & (self.rr <= 18))
+        idx = (idxX, idxY)
+
+        numOfInPixel = self.context._calcBoxSum(self.mask, halfWidth)[idx]
+        meanVal = self.context._calcMaskedMean(
+            img, self.mask, halfWidth, idx, numOfInPixel
+        )
+
+        # Compare with the pixel-by-pixel calculation
+        for ii in range(len(idxX)):
+            x0 = max(idxX[ii] - halfWidth, 0)
+            y0 = max(idxY[ii] - halfWidth, 0)
+            x1 = idxX[ii] + halfWidth + 1
+            y1 = idxY[ii] + halfWidth + 1
+            region = img[x0:x1, y0:y1]
+            regionMask = self.mask[x0:x1, y0:y1]
+
+            self.assertEqual(numOfInPixel[ii], np.sum(regionMask))
+            if np.sum(regionMask) == 0:
+                self.assertTrue(np.isnan(meanVal[ii]))
+            else:
+                self.assertAlmostEqual(
+                    meanVal[ii], region[np.nonzero(regionMask)].mean()
+                )
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
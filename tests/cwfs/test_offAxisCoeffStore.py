@@ -0,0 +1,134 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import threading
+import numpy as np
+import unittest
+
+from lsst.ts.wep.cwfs.OffAxisCoeffStore import (
+    OffAxisCoeffStore,
+    getSharedOffAxisCoeffStore,
+)
+from lsst.ts.wep.ParamReader import ParamReader
+from lsst.ts.wep.Utility import getConfigDir
+
+
+class TestOffAxisCoeffStore(unittest.TestCase):
+    """Test the OffAxisCoeffStore class."""
+
+    def setUp(self):
+
+        self.instDir = os.path.join(getConfigDir(), "cwfs", "instData", "lsst")
+        self.store = OffAxisCoeffStore()
+
+    def testGetCoeff(self):
+
+        offAxisCoeff, offset = self.store.getCoeff(self.instDir, np.hypot(1.185, 1.185))
+
+        self.assertEqual(offAxisCoeff.shape, (4, 66))
+        self.assertAlmostEqual(offAxisCoeff[0, 0], -2.6362089 * 1e-3)
+        self.assertEqual(offset, 0.001)
+        self.assertEqual(self.store.getNumOfInst(), 1)
+
+    def testGetCoeffOfNode(self):
+
+        filePath = os.path.join(self.instDir, "offAxis_cxin_poly10.yaml")
+        paramReader = ParamReader(filePath=filePath)
+        cdata = paramReader.getMatContent()
+        ruler = np.hypot(cdata[:, 1], cdata[:, 2])
+
+        # The coefficients at the node should be the same as the file
+        idx = np.argsort(ruler)[1]
+        offAxisCoeff = self.store.getCoeff(self.instDir, ruler[idx])[0]
+        self.assertTrue(np.allclose(offAxisCoeff[0], cdata[idx, 3:]))
+
+        # The coefficients out of range should be the ones at the boundary
+        offAxisCoeff = self.store.getCoeff(self.instDir, ruler.max() + 1)[0]
+        self.assertTrue(np.array_equal(offAxisCoeff[0], cdata[np.argmax(ruler), 3:]))
+
+        offAxisCoeff = self.store.getCoeff(self.instDir, 0.0)[0]
+        self.assertTrue(np.array_equal(offAxisCoeff[0], cdata[np.argmin(ruler), 3:]))
+
+    def testGetInterpWeights(self):
+
+        ruler = np.array([1.0, 2.0, 4.0])
+
+        self.assertEqual(self.store.getInterpWeights(3.0, ruler), (1, 2, 0.5, 0.5))
+        self.assertEqual(self.store.getInterpWeights(0.5, ruler), (0, 0, 1.0, 0.0))
+        self.assertEqual(self.store.getInterpWeights(5.0, ruler), (0, 2, 0.0, 1.0))
+
+    def testGetCoeffWithWrongInstDir(self):
+
+        instDir = os.path.join(getConfigDir(), "cwfs", "instData", "auxTel")
+        self.assertRaises(ValueError, self.store.getCoeff, instDir, 1.0)
+
+    def testGetSourceHash(self):
+
+        store = OffAxisCoeffStore()
+        sourceHash = store.getSourceHash(self.instDir)
+        self.assertEqual(len(sourceHash), 40)
+        self.assertEqual(store.getSourceHash(self.instDir), sourceHash)
+
+        instDirOfComCam = os.path.join(getConfigDir(), "cwfs", "instData", "comcam")
+        self.assertNotEqual(store.getSourceHash(instDirOfComCam), sourceHash)
+
+    def testGetCoeffInThreads(self):
+
+        fieldDists = np.linspace(0, 2, 8)
+        results = [None] * len(fieldDists)
+
+        def getCoeff(idx):
+            results[idx] = self.store.getCoeff(self.instDir, fieldDists[idx])[0]
+
+        threads = [
+            threading.Thread(target=getCoeff, args=(idx,))
+            for idx in range(len(fieldDists))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.store.getNumOfInst(), 1)
+        for fieldDist, offAxisCoeff in zip(fieldDists, results):
+            self.assertTrue(
+                np.array_equal(
+                    offAxisCoeff, self.store.getCoeff(self.instDir, fieldDist)[0]
+                )
+            )
+
+    def testClear(self):
+
+        self.store.getCoeff(self.instDir, 1.0)
+        self.store.clear()
+
+        self.assertEqual(self.store.getNumOfInst(), 0)
+
+    def testGetSharedOffAxisCoeffStore(self):
+
+        self.assertIs(getSharedOffAxisCoeffStore(), getSharedOffAxisCoeffStore())
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
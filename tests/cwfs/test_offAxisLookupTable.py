@@ -0,0 +1,185 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import unittest
+
+from lsst.ts.wep.cwfs import mathcwfs
+from lsst.ts.wep.cwfs.OffAxisLookupTable import OffAxisLookupTable
+from lsst.ts.wep.cwfs.OffAxisCoeffStore import getSharedOffAxisCoeffStore
+from lsst.ts.wep.Utility import getModulePath, getConfigDir
+
+
+class TestOffAxisLookupTable(unittest.TestCase):
+    """Test the OffAxisLookupTable class."""
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.instDir = os.path.join(getConfigDir(), "cwfs", "instData", "lsst")
+
+        cls.lookupTable = OffAxisLookupTable(gridDim=97)
+        cls.lookupTable.calcTable(cls.instDir)
+
+    def setUp(self):
+
+        testDir = os.path.join(getModulePath(), "tests")
+        self.testTempDir = tempfile.TemporaryDirectory(dir=testDir)
+
+        # Points in the pupil with the NaN outside the pupil
+        yy, xx = np.mgrid[-1.05:1.05:40j, -1.05:1.05:40j]
+        rr = np.hypot(xx, yy)
+        xx[rr > 1.05] = np.nan
+        yy[rr > 1.05] = np.nan
+        self.xx = xx
+        self.yy = yy
+
+    def tearDown(self):
+
+        self.testTempDir.cleanup()
+
+    def testInitWithWrongValue(self):
+
+        self.assertRaises(ValueError, OffAxisLookupTable, gridDim=3)
+        self.assertRaises(ValueError, OffAxisLookupTable, gridExtent=0)
+
+    def testGetGridDim(self):
+
+        self.assertEqual(self.lookupTable.getGridDim(), 97)
+
+    def testGetGridExtent(self):
+
+        self.assertEqual(self.lookupTable.getGridExtent(), 1.2)
+
+    def testIsReady(self):
+
+        self.assertTrue(self.lookupTable.isReady())
+        self.assertFalse(OffAxisLookupTable().isReady())
+
+    def testIsBuiltFor(self):
+
+        self.assertTrue(self.lookupTable.isBuiltFor(self.instDir, 97, 1.2))
+        self.assertFalse(self.lookupTable.isBuiltFor(self.instDir, 33, 1.2))
+        self.assertFalse(self.lookupTable.isBuiltFor(self.instDir, 97, 1.0))
+        self.assertFalse(OffAxisLookupTable().isBuiltFor(self.instDir, 129, 1.2))
+
+    def testIsBuiltForWithChangedSource(self):
+
+        # Copy the files of off-axis correction and change one of them
+        instDir = os.path.join(self.testTempDir.name, "lsst")
+        shutil.copytree(self.instDir, instDir)
+
+        lookupTable = OffAxisLookupTable(gridDim=8)
+        lookupTable.calcTable(instDir)
+        self.assertTrue(lookupTable.isBuiltFor(instDir, 8, 1.2))
+        self.assertFalse(lookupTable.isBuiltFor(self.instDir, 8, 1.2))
+
+        with open(os.path.join(instDir, "offAxis_cxin_poly10.yaml"), "a") as file:
+            file.write("\n")
+        self.assertFalse(lookupTable.isBuiltFor(instDir, 8, 1.2))
+
+        getSharedOffAxisCoeffStore().clear()
+
+    def testEvaluate(self):
+
+        fieldDist = np.hypot(1.185, 1.185)
+        offAxisCoeff, offset = getSharedOffAxisCoeffStore().getCoeff(
+            self.instDir, fieldDist
+        )
+
+        idx = ~np.isnan(self.xx)
+        xx = self.xx[idx]
+        yy = self.yy[idx]
+        for defocalDis in (offset, -offset):
+            values = self.lookupTable.evaluate(fieldDist, defocalDis, self.xx, self.yy)
+
+            # Compare with the evaluation of polynomials
+            weightIntra = (offset + defocalDis) / (2 * offset)
+            cx = np.sign(defocalDis) * (
+                weightIntra * offAxisCoeff[0] + (1 - weightIntra) * offAxisCoeff[2]
+            )
+            cy = np.sign(defocalDis) * (
+                weightIntra * offAxisCoeff[1] + (1 - weightIntra) * offAxisCoeff[3]
+            )
+            valuesAns = (
+                mathcwfs.poly10_2D(cx, xx, yy),
+                mathcwfs.poly10_2D(cy, xx, yy),
+                mathcwfs.poly10Grad(cx, xx, yy, "dx"),
+                mathcwfs.poly10Grad(cx, xx, yy, "dy"),
+                mathcwfs.poly10Grad(cy, xx, yy, "dx"),
+                mathcwfs.poly10Grad(cy, xx, yy, "dy"),
+            )
+
+            for value, valueAns in zip(values, valuesAns):
+                self.assertEqual(value.shape, self.xx.shape)
+                self.assertTrue(np.all(np.isnan(value[~idx])))
+
+                tol = 1e-4 * np.max(np.abs(valueAns))
+                self.assertLess(np.max(np.abs(value[idx] - valueAns)), tol)
+
+    def testEvaluateWithNotReadyTable(self):
+
+        self.assertRaises(
+            RuntimeError, OffAxisLookupTable().evaluate, 1.0, 1e-3, self.xx, self.yy
+        )
+
+    def testSaveAndLoadTable(self):
+
+        filePath = os.path.join(self.testTempDir.name, "lookupTable.npz")
+        self.lookupTable.saveTable(filePath)
+
+        lookupTable = OffAxisLookupTable()
+        lookupTable.loadTable(filePath)
+        self.assertEqual(lookupTable.getGridDim(), 97)
+        self.assertTrue(lookupTable.isBuiltFor(self.instDir, 97, 1.2))
+
+        values = lookupTable.evaluate(1.7, 1e-3, self.xx, self.yy)
+        valuesAns = self.lookupTable.evaluate(1.7, 1e-3, self.xx, self.yy)
+        for value, valueAns in zip(values, valuesAns):
+            self.assertTrue(np.array_equal(value, valueAns, equal_nan=True))
+
+    def testSaveTableToReplaceFile(self):
+
+        filePath = os.path.join(self.testTempDir.name, "lookupTable.npz")
+        with open(filePath, "w") as file:
+            file.write("old")
+
+        # The file is replaced without the temporary file left
+        self.lookupTable.saveTable(filePath)
+
+        lookupTable = OffAxisLookupTable()
+        lookupTable.loadTable(filePath)
+        self.assertEqual(lookupTable.getGridDim(), 97)
+        self.assertEqual(os.listdir(self.testTempDir.name), ["lookupTable.npz"])
+
+    def testSaveTableWithNotReadyTable(self):
+
+        filePath = os.path.join(self.testTempDir.name, "lookupTable.npz")
+        self.assertRaises(RuntimeError, OffAxisLookupTable().saveTable, filePath)
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
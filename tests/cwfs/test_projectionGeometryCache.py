@@ -0,0 +1,148 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pickle
+import numpy as np
+import unittest
+
+from lsst.ts.wep.cwfs.Instrument import Instrument
+from lsst.ts.wep.cwfs.ProjectionGeometryCache import ProjectionGeometryCache
+from lsst.ts.wep.Utility import getConfigDir, CamType
+
+
+class TestProjectionGeometryCache(unittest.TestCase):
+    """Test the ProjectionGeometryCache class."""
+
+    def setUp(self):
+
+        instDir = os.path.join(getConfigDir(), "cwfs", "instData")
+        self.inst = Instrument(instDir)
+        self.inst.config(CamType.LsstCam, 120, announcedDefocalDisInMm=1.0)
+
+        self.geometryCache = ProjectionGeometryCache(maxSize=2)
+
+    def testInitWithWrongValue(self):
+
+        self.assertRaises(ValueError, ProjectionGeometryCache, maxSize=0)
+        self.assertRaises(ValueError, ProjectionGeometryCache, fieldStep=-0.1)
+
+    def testGetMaxSize(self):
+
+        self.assertEqual(self.geometryCache.getMaxSize(), 2)
+
+    def testGetFieldStep(self):
+
+        self.assertEqual(self.geometryCache.getFieldStep(), 0)
+
+    def testGetKey(self):
+
+        key = self.geometryCache.getKey(self.inst, "offAxis", 1.185, 1.185, "mask")
+        self.assertEqual(
+            key,
+            self.geometryCache.getKey(self.inst, "offAxis", 1.185, 1.185, "mask"),
+        )
+        self.assertNotEqual(
+            key,
+            self.geometryCache.getKey(self.inst, "offAxis", 1.186, 1.185, "mask"),
+        )
+
+        # The field position is not used in the other models
+        self.assertEqual(
+            self.geometryCache.getKey(self.inst, "onAxis", 1.185, 1.185),
+            self.geometryCache.getKey(self.inst, "onAxis", 0.0, 0.0),
+        )
+
+    def testGetKeyWithFieldStep(self):
+
+        geometryCache = ProjectionGeometryCache(fieldStep=0.01)
+
+        key = geometryCache.getKey(self.inst, "offAxis", 1.181, 1.181)
+        self.assertEqual(key, geometryCache.getKey(self.inst, "offAxis", 1.179, 1.184))
+        self.assertNotEqual(
+            key, geometryCache.getKey(self.inst, "offAxis", 1.211, 1.181)
+        )
+
+    def testGetFieldInUse(self):
+
+        self.assertEqual(
+            self.geometryCache.getFieldInUse("offAxis", 1.181, 1.184), (1.181, 1.184)
+        )
+
+        geometryCache = ProjectionGeometryCache(fieldStep=0.01)
+        fieldX, fieldY = geometryCache.getFieldInUse("offAxis", 1.181, 1.184)
+        self.assertAlmostEqual(fieldX, 1.18)
+        self.assertAlmostEqual(fieldY, 1.18)
+
+        # The field position is not used in the other models
+        self.assertEqual(
+            geometryCache.getFieldInUse("onAxis", 1.181, 1.184), (1.181, 1.184)
+        )
+
+    def testPutAndGet(self):
+
+        item = (np.zeros(3), np.ones(3))
+        self.geometryCache.put("a", item)
+
+        self.assertIs(self.geometryCache.get("a"), item)
+        self.assertIsNone(self.geometryCache.get("b"))
+
+        # The arrays in the cache should be read-only
+        self.assertFalse(item[0].flags.writeable)
+        self.assertFalse(item[1].flags.writeable)
+
+    def testPutWithFullCache(self):
+
+        self.geometryCache.put("a", dict(value=np.zeros(3)))
+        self.geometryCache.put("b", dict(value=np.zeros(3)))
+
+        # Use "a" so "b" is the least recently used one
+        self.geometryCache.get("a")
+        self.geometryCache.put("c", dict(value=np.zeros(3)))
+
+        self.assertEqual(self.geometryCache.getNumOfItems(), 2)
+        self.assertIsNotNone(self.geometryCache.get("a"))
+        self.assertIsNone(self.geometryCache.get("b"))
+        self.assertIsNotNone(self.geometryCache.get("c"))
+
+    def testClear(self):
+
+        self.geometryCache.put("a", np.zeros(3))
+        self.geometryCache.clear()
+
+        self.assertEqual(self.geometryCache.getNumOfItems(), 0)
+
+    def testPickle(self):
+
+        self.geometryCache.put("a", np.zeros(3))
+
+        geometryCache = pickle.loads(pickle.dumps(self.geometryCache))
+        self.assertEqual(geometryCache.getMaxSize(), 2)
+        self.assertEqual(geometryCache.getNumOfItems(), 0)
+
+        geometryCache.put("b", np.zeros(3))
+        self.assertEqual(geometryCache.getNumOfItems(), 1)
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,84 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import unittest
+from scipy.ndimage import generate_binary_structure
+from scipy.ndimage.morphology import binary_dilation, binary_erosion
+
+from lsst.ts.wep.cwfs.ProjectionMaskCloser import ProjectionMaskCloser
+from lsst.ts.wep.cwfs.Tool import padArray, extractArray
+
+
+class TestProjectionMaskCloser(unittest.TestCase):
+    """Test the ProjectionMaskCloser class."""
+
+    def setUp(self):
+
+        self.dim = 120
+        self.maskCloser = ProjectionMaskCloser(self.dim)
+
+    def testGetDim(self):
+
+        self.assertEqual(self.maskCloser.getDim(), self.dim)
+
+    def testGetStructure(self):
+
+        struct = self.maskCloser.getStructure()
+        self.assertEqual(struct.shape, (9, 9))
+
+        # The structuring element is the Minkowski sum of 5x5 square and the
+        # diamond of radius 2
+        square = np.zeros((9, 9), dtype=bool)
+        square[2:7, 2:7] = True
+        cross = generate_binary_structure(2, 1)
+        structAns = binary_dilation(square, structure=cross, iterations=2)
+        self.assertTrue(np.array_equal(struct, structAns))
+
+    def testClose(self):
+
+        yy, xx = np.mgrid[0 : self.dim, 0 : self.dim] - self.dim / 2
+        rr = np.hypot(xx, yy)
+
+        struct = self.maskCloser.getStructure()
+        randState = np.random.RandomState(seed=1)
+        for outerR in (30, 55, 62, 70):
+            projection = ((rr < outerR) & (rr > 20)).astype(float)
+            projection *= randState.rand(self.dim, self.dim) < 0.7
+
+            # Compare with the closing of image padded by 20 pixels
+            projectionPad = padArray(projection, self.dim + 20)
+            closingAns = binary_dilation(projectionPad, structure=struct)
+            closingAns = binary_erosion(closingAns, structure=struct)
+            closingAns = extractArray(closingAns, self.dim)
+
+            closing = self.maskCloser.close(projection)
+            self.assertTrue(np.array_equal(closing, closingAns))
+
+    def testCloseWithWrongShape(self):
+
+        self.assertRaises(ValueError, self.maskCloser.close, np.zeros((10, 10)))
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
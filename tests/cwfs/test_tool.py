@@ -27,8 +27,13 @@ import unittest
 
 from lsst.ts.wep.cwfs.Tool import (
     ZernikeAnnularEval,
+    ZernikeAnnularEvalBatch,
+    ZernikeAnnularBasis,
     ZernikeAnnularGrad,
+    ZernikeAnnularGradBatch,
+    ZernikeAnnularGradBasis,
     ZernikeAnnularJacobian,
+    ZernikeAnnularDerivatives,
     ZernikeAnnularFit,
     padArray,
     extractArray,
@@ -73,6 +78,34 @@ class TestTool(unittest.TestCase):
 
         self._checkAnsWithFile(surface, "annularZernikeEval.txt")
 
+    def testZernikeAnnularEvalBatch(self):
+
+        zerCoefs = np.vstack((self.zerCoef, -2 * self.zerCoef))
+        surfaces = ZernikeAnnularEvalBatch(zerCoefs, self.xx, self.yy, self.obscuration)
+
+        self.assertEqual(surfaces.shape, (2,) + self.xx.shape)
+        self._checkAnsWithFile(surfaces[0], "annularZernikeEval.txt")
+        self._checkAnsWithFile(-surfaces[1] / 2, "annularZernikeEval.txt")
+
+    def testZernikeAnnularEvalBatchWithTooManyTerms(self):
+
+        with self.assertRaises(ValueError):
+            ZernikeAnnularEvalBatch(
+                np.ones((2, 29)), self.xx, self.yy, self.obscuration
+            )
+
+    def testZernikeAnnularBasis(self):
+
+        numTerms = 22
+        basis = ZernikeAnnularBasis(numTerms, self.xx, self.yy, self.obscuration)
+        self.assertEqual(basis.shape, (numTerms,) + self.xx.shape)
+
+        for ii in range(numTerms):
+            zerCoef = np.zeros(numTerms)
+            zerCoef[ii] = 1
+            surface = ZernikeAnnularEval(zerCoef, self.xx, self.yy, self.obscuration)
+            self.assertTrue(np.array_equal(basis[ii], surface))
+
     def _checkAnsWithFile(self, value, ansFileName):
 
         ansFilePath = os.path.join(self.testDataDir, ansFileName)
@@ -178,6 +211,40 @@ class TestTool(unittest.TestCase):
                 self.zerCoef, self.xx, self.yy, self.obscuration, "wrongAxis"
             )
 
+    def testZernikeAnnularGradBatch(self):
+
+        zerCoefs = np.vstack((self.zerCoef, 2 * self.zerCoef))
+        surfGrads = ZernikeAnnularGradBatch(
+            zerCoefs, self.xx, self.yy, self.obscuration, "dx"
+        )
+
+        self.assertEqual(surfGrads.shape, (2,) + self.xx.shape)
+        self._checkAnsWithFile(surfGrads[0], "annularZernikeGradDx.txt")
+        self._checkAnsWithFile(surfGrads[1] / 2, "annularZernikeGradDx.txt")
+
+    def testZernikeAnnularGradBatchWrongAxis(self):
+
+        with self.assertRaises(ValueError):
+            ZernikeAnnularGradBatch(
+                np.ones((2, 22)), self.xx, self.yy, self.obscuration, "wrongAxis"
+            )
+
+    def testZernikeAnnularGradBasis(self):
+
+        numTerms = 22
+        for axis in ("dx", "dy", "dx2", "dy2", "dxy"):
+            basis = ZernikeAnnularGradBasis(
+                numTerms, self.xx, self.yy, self.obscuration, axis
+            )
+            self.assertEqual(basis.shape, (numTerms,) + self.xx.shape)
+
+            zerCoef = np.zeros(numTerms)
+            zerCoef[10] = 1
+            surfGrad = ZernikeAnnularGrad(
+                zerCoef, self.xx, self.yy, self.obscuration, axis
+            )
+            self.assertTrue(np.array_equal(basis[10], surfGrad))
+
     def testZernikeAnnularJacobian1st(self):
 
         annuZerJacobian = ZernikeAnnularJacobian(
@@ -201,6 +268,32 @@ class TestTool(unittest.TestCase):
                 self.zerCoef, self.xx, self.yy, self.obscuration, "wrongType"
             )
 
+    def testZernikeAnnularDerivatives(self):
+
+        zDer = ZernikeAnnularDerivatives(
+            self.zerCoef, self.xx, self.yy, self.obscuration
+        )
+
+        self.assertEqual(list(zDer.keys()), ["dx", "dy", "dx2", "dy2", "dxy"])
+        for axis, surfGrad in zDer.items():
+            self.assertEqual(surfGrad.shape, self.xx.shape)
+
+            surfGradAns = ZernikeAnnularGrad(
+                self.zerCoef, self.xx, self.yy, self.obscuration, axis
+            )
+            self.assertTrue(np.array_equal(surfGrad, surfGradAns))
+
+    def testZernikeAnnularDerivativesWithJacobian(self):
+
+        zDer = ZernikeAnnularDerivatives(
+            self.zerCoef, self.xx, self.yy, self.obscuration, withJacobian=True
+        )
+
+        self.assertEqual(len(zDer), 7)
+        self._checkAnsWithFile(zDer["dx2"], "annularZernikeGradDx2.txt")
+        self._checkAnsWithFile(zDer["1st"], "annularZernikeJaco1st.txt")
+        self._checkAnsWithFile(zDer["2nd"], "annularZernikeJaco2nd.txt")
+
     def testZernikeAnnularFit(self):
 
         opdFitsFile = os.path.join(self.testDataDir, "sim6_iter0_opd0.fits.gz")
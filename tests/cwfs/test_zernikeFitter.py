@@ -0,0 +1,147 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import unittest
+
+from lsst.ts.wep.cwfs.ZernikeFitter import ZernikeFitter
+from lsst.ts.wep.cwfs.Tool import (
+    ZernikeAnnularEval,
+    ZernikeAnnularFit,
+    ZernikeMaskedFit,
+)
+
+
+class TestZernikeFitter(unittest.TestCase):
+    """Test the ZernikeFitter class."""
+
+    def setUp(self):
+
+        self.fitter = ZernikeFitter(cacheSize=2)
+
+        # Generate the mesh of x, y-coordinate
+        point = 120
+        yy, xx = np.mgrid[
+            -(point / 2 - 0.5) : (point / 2 + 0.5),
+            -(point / 2 - 0.5) : (point / 2 + 0.5),
+        ]
+        self.xx = xx / (point / 2)
+        self.yy = yy / (point / 2)
+
+        self.obscuration = 0.61
+        self.numTerms = 22
+
+        self.mask = (
+            (np.hypot(self.xx, self.yy) <= 1)
+            & (np.hypot(self.xx, self.yy) >= self.obscuration)
+        ).astype(int)
+
+        self.zerCoef = np.arange(1, 1 + self.numTerms) * 0.1
+        self.surface = ZernikeAnnularEval(
+            self.zerCoef, self.xx, self.yy, self.obscuration
+        )
+
+    def testInitWithWrongCacheSize(self):
+
+        self.assertRaises(ValueError, ZernikeFitter, cacheSize=0)
+
+    def testGetCacheSize(self):
+
+        self.assertEqual(self.fitter.getCacheSize(), 2)
+
+    def testFit(self):
+
+        surface = self.surface.copy()
+        surface[self.mask == 0] = np.nan
+
+        zk = self.fitter.fit(surface, self.xx, self.yy, self.numTerms, self.obscuration)
+        idx = self.mask == 1
+        zkAns = ZernikeAnnularFit(
+            surface[idx], self.xx[idx], self.yy[idx], self.numTerms, self.obscuration
+        )
+
+        self.assertTrue(np.allclose(zk, zkAns, rtol=0, atol=1e-10))
+        self.assertTrue(np.allclose(zk, self.zerCoef, rtol=0, atol=1e-10))
+
+    def testFitWithWrongSize(self):
+
+        self.assertRaises(
+            ValueError,
+            self.fitter.fit,
+            self.surface,
+            self.xx,
+            self.yy[:-1, :],
+            self.numTerms,
+            self.obscuration,
+        )
+
+    def testMaskedFit(self):
+
+        zk = self.fitter.maskedFit(
+            self.surface, self.xx, self.yy, self.numTerms, self.mask, self.obscuration
+        )
+        zkAns = ZernikeMaskedFit(
+            self.surface, self.xx, self.yy, self.numTerms, self.mask, self.obscuration
+        )
+
+        self.assertTrue(np.allclose(zk, zkAns, rtol=0, atol=1e-10))
+
+    def testMaskedFitWithCache(self):
+
+        self.fitter.maskedFit(
+            self.surface, self.xx, self.yy, self.numTerms, self.mask, self.obscuration
+        )
+        self.assertEqual(self.fitter.getNumOfCachedItems(), 1)
+
+        # Fit another surface on the same grid
+        zerCoef = np.zeros(self.numTerms)
+        zerCoef[4] = 1.5
+        surface = ZernikeAnnularEval(zerCoef, self.xx, self.yy, self.obscuration)
+
+        zk = self.fitter.maskedFit(
+            surface, self.xx, self.yy, self.numTerms, self.mask, self.obscuration
+        )
+        self.assertEqual(self.fitter.getNumOfCachedItems(), 1)
+        self.assertTrue(np.allclose(zk, zerCoef, rtol=0, atol=1e-10))
+
+    def testCacheEviction(self):
+
+        for obscuration in (0.5, 0.55, 0.61):
+            self.fitter.maskedFit(
+                self.surface, self.xx, self.yy, self.numTerms, self.mask, obscuration
+            )
+
+        self.assertEqual(self.fitter.getNumOfCachedItems(), 2)
+
+    def testClearCache(self):
+
+        self.fitter.maskedFit(
+            self.surface, self.xx, self.yy, self.numTerms, self.mask, self.obscuration
+        )
+        self.fitter.clearCache()
+
+        self.assertEqual(self.fitter.getNumOfCachedItems(), 0)
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
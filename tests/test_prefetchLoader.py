@@ -0,0 +1,143 @@
+# This file is part of ts_wep.
+#
+# Developed for the LSST Telescope and Site Systems.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import weakref
+import unittest
+
+from lsst.ts.wep.PrefetchLoader import PrefetchLoader
+
+
+class TestPrefetchLoader(unittest.TestCase):
+    """Test the PrefetchLoader class."""
+
+    def setUp(self):
+
+        self.keyList = list(range(10))
+
+        self.lock = threading.Lock()
+        self.loadedKeys = []
+
+    def _load(self, key):
+
+        with self.lock:
+            self.loadedKeys.append(key)
+
+        return key * 10
+
+    def testInitWithWrongDepth(self):
+
+        self.assertRaises(
+            ValueError, PrefetchLoader, self._load, self.keyList, depth=-1
+        )
+
+    def testGetDepth(self):
+
+        loader = PrefetchLoader(self._load, self.keyList, depth=3)
+        self.assertEqual(loader.getDepth(), 3)
+
+    def testGetKeyList(self):
+
+        loader = PrefetchLoader(self._load, self.keyList)
+        self.assertEqual(loader.getKeyList(), self.keyList)
+
+    def testIter(self):
+
+        loader = PrefetchLoader(self._load, self.keyList, depth=3)
+
+        for key, data in loader:
+            self.assertEqual(data, key * 10)
+
+            # The loading is bounded by the depth
+            with self.lock:
+                self.assertLessEqual(max(self.loadedKeys), key + 3)
+
+        self.assertEqual(sorted(self.loadedKeys), self.keyList)
+        self.assertEqual([key for key, data in loader], self.keyList)
+
+    def testIterWithZeroDepth(self):
+
+        loader = PrefetchLoader(self._load, self.keyList, depth=0)
+
+        for key, data in loader:
+            self.assertEqual(data, key * 10)
+
+            # The data is loaded only when it is reached
+            with self.lock:
+                self.assertEqual(max(self.loadedKeys), key)
+
+        self.assertEqual(self.loadedKeys, self.keyList)
+
+    def testIterReleasesData(self):
+
+        for depth in (0, 2):
+            dataRefs = []
+            for key, data in PrefetchLoader(_Data, self.keyList, depth=depth):
+                dataRefs.append(weakref.ref(data))
+                del data
+
+                # The data dropped by the caller is not held by the loader
+                self.assertTrue(all(dataRef() is None for dataRef in dataRefs))
+
+    def testIterWithEarlyStop(self):
+
+        loader = PrefetchLoader(self._load, self.keyList, depth=2)
+
+        for key, data in loader:
+            if key == 2:
+                break
+
+        with self.lock:
+            self.assertLessEqual(max(self.loadedKeys), 4)
+
+    def testIterWithError(self):
+        def load(key):
+            if key == 5:
+                raise RuntimeError("Can not load %d." % key)
+            return key
+
+        loader = PrefetchLoader(load, self.keyList, depth=2)
+
+        keys = []
+        with self.assertRaises(RuntimeError):
+            for key, data in loader:
+                keys.append(key)
+
+        self.assertEqual(keys, list(range(5)))
+
+
+class _Data(object):
+    def __init__(self, key):
+        """Data that can be referred by the weak reference.
+
+        Parameters
+        ----------
+        key : int
+            Key of data.
+        """
+
+        self.key = key
+
+
+if __name__ == "__main__":
+
+    # Do the unit test
+    unittest.main()
@@ -65,6 +65,16 @@ class TestSourceProcessor(unittest.TestCase):
 
         self.assertEqual(self.sourProc.sensorName, sensorName)
 
+    def testCopyWithSensor(self):
+
+        sourProc = self.sourProc.copyWithSensor("R22_S11")
+
+        self.assertEqual(sourProc.sensorName, "R22_S11")
+        self.assertEqual(self.sourProc.sensorName, "R00_S22_C0")
+
+        self.assertIs(sourProc.sensorDimList, self.sourProc.sensorDimList)
+        self.assertIsNot(sourProc.deblend, self.sourProc.deblend)
+
     def testGetEulerZinDeg(self):
 
         wfsSensorName = "R40_S02_C1"
@@ -125,14 +125,45 @@ class TestSourceSelector(unittest.TestCase):
             self.assertEqual(len(starMap[detector].getId()), 2)
             self.assertEqual(len(neighborStarMap[detector].getId()), 2)
 
-    def _getTargetStarByFile(self, filterType):
+    def testGetTargetStarByFileWithKeepTable(self):
+
+        neighborStarMap, starMap, wavefrontSensors = self._getTargetStarByFile(
+            FilterType.G, keepTable=True
+        )
+        self.assertTrue(self.sourSelc.db._tableIsInDb("StarTableG"))
+
+        # The kept table should give the same result
+        (
+            neighborStarMapAgain,
+            starMapAgain,
+            wavefrontSensorsAgain,
+        ) = self.sourSelc.getTargetStarByFile(
+            self._getSkyFilePath(), offset=0, keepTable=True
+        )
+
+        self.assertEqual(list(wavefrontSensorsAgain), list(wavefrontSensors))
+        for detector in wavefrontSensors:
+            self.assertEqual(
+                neighborStarMapAgain[detector].getId(),
+                neighborStarMap[detector].getId(),
+            )
+
+    def _getTargetStarByFile(self, filterType, keepTable=False):
 
         self.sourSelc = SourceSelector(CamType.LsstCam, BscDbType.LocalDbForStarFile)
         self.sourSelc.setObsMetaData(0, 0, 0)
         self.sourSelc.setFilter(filterType)
         self.sourSelc.connect(self.dbAdress)
 
-        skyFilePath = os.path.join(
+        neighborStarMap, starMap, wavefrontSensors = self.sourSelc.getTargetStarByFile(
+            self._getSkyFilePath(), offset=0, keepTable=keepTable
+        )
+
+        return neighborStarMap, starMap, wavefrontSensors
+
+    def _getSkyFilePath(self):
+
+        return os.path.join(
             self.modulePath,
             "tests",
             "testData",
@@ -142,12 +173,6 @@ class TestSourceSelector(unittest.TestCase):
             "skyWfsInfo.txt",
         )
 
-        neighborStarMap, starMap, wavefrontSensors = self.sourSelc.getTargetStarByFile(
-            skyFilePath, offset=0
-        )
-
-        return neighborStarMap, starMap, wavefrontSensors
-
 
 if __name__ == "__main__":
 
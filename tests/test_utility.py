@@ -99,6 +99,7 @@ class TestUtility(unittest.TestCase):
 
         self.assertEqual(getBscDbType("localDb"), BscDbType.LocalDb)
         self.assertEqual(getBscDbType("file"), BscDbType.LocalDbForStarFile)
+        self.assertEqual(getBscDbType("columnar"), BscDbType.ColumnarDb)
 
     def testGetBscDbTypeWithWrongInput(self):
 
@@ -32,6 +32,9 @@ from lsst.ts.wep.SourceProcessor import SourceProcessor
 from lsst.ts.wep.SourceSelector import SourceSelector
 from lsst.ts.wep.WfEstimator import WfEstimator
 from lsst.ts.wep.WepController import WepController
+from lsst.ts.wep.DonutImage import DonutImage
+from lsst.ts.wep.DefocalImage import DefocalImage
+from lsst.ts.wep.bsc.NbrStar import NbrStar
 
 from lsst.ts.wep.Utility import (
     getModulePath,
@@ -123,6 +126,7 @@ class TestWepControllerMonolithic(unittest.TestCase):
     def tearDown(self):
 
         self.wepCntlr.getSourSelc().disconnect()
+        self.wepCntlr.close()
         self.dataDir.cleanup()
 
     def testGetDataCollector(self):
@@ -149,6 +153,159 @@ class TestWepControllerMonolithic(unittest.TestCase):
 
         self.assertEqual(self.wepCntlr.getButlerWrapper(), None)
 
+    def testSetNumOfProc(self):
+
+        self.assertEqual(self.wepCntlr.getNumOfProc(), 1)
+
+        self.wepCntlr.setNumOfProc(4)
+        self.assertEqual(self.wepCntlr.getNumOfProc(), 4)
+
+        self.assertRaises(ValueError, self.wepCntlr.setNumOfProc, 0)
+
+    def testCalcWfErrWithNumOfProc(self):
+
+        cwfsConfigDir = os.path.join(getConfigDir(), "cwfs")
+        wfEsti = WfEstimator(
+            os.path.join(cwfsConfigDir, "instData"), os.path.join(cwfsConfigDir, "algo")
+        )
+        wfEsti.config(sizeInPix=120)
+        wepCntlr = WepController(None, None, None, None, wfEsti)
+
+        donutMapSerial = self._prepareDonutMap()
+        wepCntlr.calcWfErr(donutMapSerial)
+
+        wepCntlr.setNumOfProc(2)
+        donutMapParallel = self._prepareDonutMap()
+        wepCntlr.calcWfErr(donutMapParallel)
+
+        for sensorName, donutList in donutMapSerial.items():
+            for donutSerial, donutParallel in zip(
+                donutList, donutMapParallel[sensorName]
+            ):
+                self.assertTrue(
+                    np.array_equal(donutSerial.getWfErr(), donutParallel.getWfErr())
+                )
+
+        # The intra-focal donut without the paired extra-focal donut is not
+        # calculated
+        self.assertEqual(len(donutMapParallel["R:0,0 S:2,2,A"][1].getWfErr()), 0)
+        self.assertEqual(len(donutMapParallel["R:0,0 S:2,2,B"][0].getWfErr()), 19)
+
+        wepCntlr.close()
+
+    def testCalcWfErrReusesWorkers(self):
+
+        cwfsConfigDir = os.path.join(getConfigDir(), "cwfs")
+        wfEsti = WfEstimator(
+            os.path.join(cwfsConfigDir, "instData"), os.path.join(cwfsConfigDir, "algo")
+        )
+        wfEsti.config(sizeInPix=120)
+        wepCntlr = WepController(None, None, None, None, wfEsti)
+        wepCntlr.setNumOfProc(2)
+
+        wepCntlr.calcWfErr(self._prepareDonutMap())
+        executor = wepCntlr._wfErrExecutor
+        self.assertIsNotNone(executor)
+
+        # The workers are reused
+        wepCntlr.calcWfErr(self._prepareDonutMap())
+        self.assertIs(wepCntlr._wfErrExecutor, executor)
+
+        # The workers are restarted if the configuration is changed
+        wfEsti.setWarmStart(np.zeros(19))
+        wepCntlr.calcWfErr(self._prepareDonutMap())
+        self.assertIsNot(wepCntlr._wfErrExecutor, executor)
+        executor = wepCntlr._wfErrExecutor
+
+        wepCntlr.setNumOfProc(3)
+        wepCntlr.calcWfErr(self._prepareDonutMap())
+        self.assertIsNot(wepCntlr._wfErrExecutor, executor)
+
+        wepCntlr.close()
+        self.assertIsNone(wepCntlr._wfErrExecutor)
+
+    def testGetDonutMapWithNumOfProc(self):
+
+        sourProc = SourceProcessor()
+        wepCntlr = WepController(None, None, None, sourProc, self._configWfEstimator())
+
+        # Simulate the defocal images
+        nbrStar = NbrStar()
+        nbrStar.starId = {523572575: [], 523572679: [523572671]}
+        nbrStar.lsstMagG = {
+            523572575: 14.66652,
+            523572671: 16.00000,
+            523572679: 13.25217,
+        }
+        nbrStar.raDeclInPixel = {
+            523572679: (3966.44, 1022.91),
+            523572671: (3968.77, 1081.02),
+            523572575: (3475.48, 479.33),
+        }
+
+        sourProc.config(sensorName="R00_S22_C0")
+        imageFolderPath = os.path.join(
+            self.modulePath, "tests", "testData", "testImages", "LSST_C_SN26"
+        )
+        ccdImgIntra = sourProc.simulateImg(
+            imageFolderPath, 0.25, nbrStar, FilterType.REF, noiseRatio=0
+        )[0]
+
+        sensorNameList = ["R:0,0 S:2,2,A", "R:0,0 S:2,2,B"]
+        neighborStarMap = dict()
+        wfsImgMap = dict()
+        for sensorName in sensorNameList:
+            neighborStarMap[sensorName] = nbrStar
+            wfsImgMap[sensorName] = DefocalImage(intraImg=ccdImgIntra)
+
+        donutMapSerial = wepCntlr.getDonutMap(
+            neighborStarMap, wfsImgMap, FilterType.REF, doDeblending=False
+        )
+
+        wepCntlr.setNumOfProc(2)
+        donutMapParallel = wepCntlr.getDonutMap(
+            neighborStarMap, wfsImgMap, FilterType.REF, doDeblending=False
+        )
+
+        self.assertEqual(list(donutMapParallel.keys()), sensorNameList)
+        for sensorName in sensorNameList:
+            donutListSerial = donutMapSerial[sensorName]
+            donutListParallel = donutMapParallel[sensorName]
+            self.assertEqual(len(donutListSerial), 1)
+            self.assertEqual(len(donutListParallel), len(donutListSerial))
+
+            for donutSerial, donutParallel in zip(donutListSerial, donutListParallel):
+                self.assertEqual(donutParallel.getStarId(), donutSerial.getStarId())
+                self.assertEqual(donutParallel.getFieldPos(), donutSerial.getFieldPos())
+                self.assertTrue(
+                    np.array_equal(
+                        donutParallel.getIntraImg(), donutSerial.getIntraImg()
+                    )
+                )
+
+    def _prepareDonutMap(self):
+
+        imageFolderPath = os.path.join(
+            self.modulePath, "tests", "testData", "testImages", "LSST_NE_SN25"
+        )
+        intraImg = np.loadtxt(os.path.join(imageFolderPath, "z11_0.25_intra.txt"))
+        extraImg = np.loadtxt(os.path.join(imageFolderPath, "z11_0.25_extra.txt"))
+
+        donutMap = dict()
+        donutMap["R:2,2 S:1,1"] = [
+            DonutImage(starId, 0, 0, 1.185, 1.185 + 0.01 * starId, intraImg, extraImg)
+            for starId in range(3)
+        ]
+        donutMap["R:0,0 S:2,2,A"] = [
+            DonutImage(starId, 0, 0, 1.185, 1.185, intraImg=intraImg)
+            for starId in range(2)
+        ]
+        donutMap["R:0,0 S:2,2,B"] = [
+            DonutImage(0, 0, 0, 1.185, 1.185, extraImg=extraImg)
+        ]
+
+        return donutMap
+
     def testMonolithicSteps(self):
         """Do the test based on the steps defined in the child class."""
 
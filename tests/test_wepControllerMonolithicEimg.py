@@ -116,6 +116,7 @@ class TestWepControllerMonolithic(unittest.TestCase):
     def tearDown(self):
 
         self.wepCntlr.getSourSelc().disconnect()
+        self.wepCntlr.close()
         self.dataDir.cleanup()
 
     def testMonolithicSteps(self):
@@ -53,6 +53,16 @@ class TestWfEsitmator(unittest.TestCase):
         # Field XY position
         self.fieldXY = (1.185, 1.185)
 
+    def testSetWarmStart(self):
+
+        self.wfsEst.config(sizeInPix=120)
+
+        self.wfsEst.setWarmStart(np.zeros(19), compSequence=[22, 22])
+        self.assertTrue(self.wfsEst.getAlgo().isWarmStart())
+
+        self.wfsEst.resetWarmStart()
+        self.assertFalse(self.wfsEst.getAlgo().isWarmStart())
+
     def testCalWfsErrOfExp(self):
 
         # Setup the images
@@ -148,6 +158,42 @@ class TestWfEsitmator(unittest.TestCase):
         self.wfsEst.reset()
         self.assertEqual(np.sum(self.wfsEst.getAlgo().getZer4UpInNm()), 0)
 
+    def testCalWfsErrBatch(self):
+
+        self.wfsEst.config(
+            solver="exp",
+            camType=CamType.LsstCam,
+            opticalModel="offAxis",
+            defocalDisInMm=1.0,
+            sizeInPix=120,
+            debugLevel=0,
+        )
+
+        intraImg = np.loadtxt(self.intraImgFile)
+        extraImg = np.loadtxt(self.extraImgFile)
+        zkBatch = self.wfsEst.calWfsErrBatch(
+            [intraImg, intraImg], [extraImg, extraImg], [self.fieldXY] * 2
+        )
+        self.assertEqual(zkBatch.shape, (2, 19))
+
+        # Compare with the calculation of single pair
+        self.wfsEst.setImg(self.fieldXY, DefocalType.Intra, image=intraImg)
+        self.wfsEst.setImg(self.fieldXY, DefocalType.Extra, image=extraImg)
+        zer4UpNm = self.wfsEst.calWfsErr()
+        for zkOfPair in zkBatch:
+            self.assertLess(np.max(np.abs(zkOfPair - zer4UpNm)), 1e-8)
+
+    def testCalWfsErrBatchWithWrongNumOfImgs(self):
+
+        intraImg = np.loadtxt(self.intraImgFile)
+        self.assertRaises(
+            ValueError,
+            self.wfsEst.calWfsErrBatch,
+            [intraImg, intraImg],
+            [intraImg],
+            [self.fieldXY] * 2,
+        )
+
 
 if __name__ == "__main__":
 